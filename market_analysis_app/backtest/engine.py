@@ -0,0 +1,425 @@
+# market_analysis_app/backtest/engine.py
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from market_analysis_app.backtest.indicator_cache import IndicatorCache
+from market_analysis_app.data.warehouse import Warehouse
+from market_analysis_app.indicators import panel
+from market_analysis_app.strategies.exit_simulator import simulate_exits
+from market_analysis_app.strategies.levels import DailyLevels
+from market_analysis_app.strategies.oi_strategy import oi_trend_analysis
+from market_analysis_app.strategies.scanner import level_arrays, breakout_signals, pivot_signals, strategy3_panel
+from market_analysis_app.strategies.strategy2 import calculate_strategy2_levels
+
+STRATEGIES = ('strategy1', 'strategy2', 'strategy3', 'strategy4', 'oi_strategy')
+
+# Exits each strategy uses live: 1% target by default, PSAR trailing stop for
+# strategy1, fixed stops for the others
+EXIT_RULES = {
+    'strategy1': {'target_pct': 0.01, 'trailing': True},
+    'strategy2': {'target_pct': 0.01, 'trailing': False},
+    'strategy3': {'target_pct': 0.01, 'trailing': False},
+    'strategy4': {'target_pct': 0.01, 'trailing': False},
+    'oi_strategy': {'target_pct': 0.01, 'trailing': False},
+}
+
+# Fixed stop distance for strategies without their own stop levels
+STOP_PCT = 0.005
+
+# Costs per side, as fractions of the fill price
+SLIPPAGE = 0.0002
+COMMISSION = 0.0003
+
+# Bars loaded before a shard's start so indicators and previous-session levels are warm
+WARMUP_BARS = 300
+
+TRADE_COLUMNS = [
+    'symbol', 'strategy', 'direction', 'entry_time', 'entry_price', 'exit_time', 'exit_price',
+    'exit_reason', 'bars_held', 'return'
+]
+
+
+# Tunable parameters of each strategy and the values the live app uses
+DEFAULT_PARAMETERS = {
+    'strategy1': {'ema_length': 9, 'sma_length': 21, 'target_pct': 0.01},
+    'strategy2': {'multiplier': 1.1, 'target_pct': 0.01},
+    'strategy3': {'stop_pct': 0.005, 'target_pct': 0.01},
+    'strategy4': {'tolerance': 0.001, 'stop_pct': 0.005, 'target_pct': 0.01},
+    'oi_strategy': {'stop_pct': 0.005, 'target_pct': 0.01},
+}
+
+
+def _close(data):
+    return data['Close'].to_numpy(dtype=float)
+
+
+def _psar(data):
+    long, short, _, _ = panel.psar(data['High'].to_numpy(dtype=float), data['Low'].to_numpy(dtype=float))
+    return long[0], short[0]
+
+
+def _strategy3(data):
+    bars = {column: data[column].to_numpy(dtype=float) for column in ('Open', 'High', 'Low', 'Close')}
+    return strategy3_panel(bars)[0]
+
+
+def _session_levels(data):
+    """Previous-session high/low/close and pivot levels for every bar, built from the intraday bars themselves."""
+    dates = data.index.normalize()
+    daily = data.groupby(dates).agg({'High': 'max', 'Low': 'min', 'Close': 'last'})
+    sessions = [None] + [
+        DailyLevels.from_bar(daily.iloc[k - 1], daily.index[k - 1].date()) for k in range(1, len(daily))
+    ]
+    codes = daily.index.get_indexer(dates)
+    previous = daily.shift(1).to_numpy()[codes]
+    _, supports, resistances = level_arrays(sessions)
+    return {
+        'High': previous[:, 0], 'Low': previous[:, 1], 'Close': previous[:, 2],
+        'supports': supports[codes], 'resistances': resistances[codes],
+    }
+
+
+# Series the strategies are built from, memoized per symbol by IndicatorCache
+INDICATORS = {
+    'close': _close,
+    'ema': lambda data, length: panel.ema(_close(data), length)[0],
+    'sma': lambda data, length: panel.sma(_close(data), length)[0],
+    'vortex': lambda data, length: tuple(values[0] for values in panel.vortex(
+        data['High'].to_numpy(dtype=float), data['Low'].to_numpy(dtype=float), _close(data), length)),
+    'macd': lambda data, fast, slow, signal: tuple(values[0] for values in panel.macd(_close(data), fast, slow, signal)),
+    'psar': _psar,
+    'strategy3': _strategy3,
+    'sessions': _session_levels,
+}
+
+
+def _fixed_stops(close, stop_pct):
+    return close * (1 - stop_pct), close * (1 + stop_pct)
+
+
+def strategy1_signals(context, ema_length=9, sma_length=21):
+    indicator = context['indicator']
+    ema, sma = indicator('ema', ema_length), indicator('sma', sma_length)
+    vortex_p, vortex_n = indicator('vortex', 14)
+    macd, _, macd_signal = indicator('macd', 12, 26, 9)
+    buy = (ema > sma) & (vortex_p > vortex_n) & (macd > macd_signal)
+    sell = (ema < sma) & (vortex_n > vortex_p) & (macd < macd_signal)
+    return np.where(sell, -1, np.where(buy, 1, 0)), *indicator('psar')
+
+
+def strategy2_signals(context, multiplier=1.1):
+    indicator = context['indicator']
+    levels = calculate_strategy2_levels(indicator('sessions'), multiplier)
+    breakout = np.column_stack((levels['buy_breakout'], levels['sell_breakdown']))
+    return breakout_signals(indicator('close'), breakout), levels['stoploss_buy'], levels['stoploss_sell']
+
+
+def strategy3_signals(context, stop_pct=STOP_PCT):
+    """strategy3's signals as they become known.
+
+    The chikou span compares a bar with the close kijun - 1 bars later, so a
+    signal can only be acted on 25 bars after the bar it belongs to.
+    """
+    indicator = context['indicator']
+    signal = panel.shift(indicator('strategy3').astype(float), 25)[0]
+    return np.nan_to_num(signal).astype(int), *_fixed_stops(indicator('close'), stop_pct)
+
+
+def strategy4_signals(context, tolerance=0.001, stop_pct=STOP_PCT):
+    indicator = context['indicator']
+    sessions, close = indicator('sessions'), indicator('close')
+    return pivot_signals(close, sessions['supports'], sessions['resistances'], tolerance), *_fixed_stops(close, stop_pct)
+
+
+def oi_strategy_signals(context, stop_pct=STOP_PCT):
+    """Trades the strong PCR trends: long on 'Strong Bullish', short on 'Strong Bearish'.
+
+    Needs a PCR series for the symbol (e.g. from stored option-chain
+    snapshots); each bar uses the latest PCR known at its timestamp.
+    """
+    data, pcr = context['data'], context.get('pcr')
+    close = context['indicator']('close')
+    if pcr is None or pcr.empty:
+        return np.zeros(len(data), dtype=int), *_fixed_stops(close, stop_pct)
+    pcr = pcr.sort_index()
+    if pcr.index.tz is None and data.index.tz is not None:
+        pcr = pcr.tz_localize(data.index.tz)
+    known = pcr.reindex(data.index, method='ffill')
+    trend = known.map(lambda value: oi_trend_analysis(value) if pd.notna(value) else None)
+    signal = np.where(trend == 'Strong Bullish', 1, np.where(trend == 'Strong Bearish', -1, 0))
+    return signal, *_fixed_stops(close, stop_pct)
+
+
+SIGNALS = {
+    'strategy1': strategy1_signals,
+    'strategy2': strategy2_signals,
+    'strategy3': strategy3_signals,
+    'strategy4': strategy4_signals,
+    'oi_strategy': oi_strategy_signals,
+}
+
+
+def split_params(name, params=None):
+    """Splits a strategy's parameters into (signal parameters, exit rules)."""
+    params = dict(params or {})
+    unknown = set(params) - set(DEFAULT_PARAMETERS[name])
+    if unknown:
+        raise ValueError(f"Unknown parameters for {name}: {sorted(unknown)}")
+    exits = dict(EXIT_RULES[name])
+    if 'target_pct' in params:
+        exits['target_pct'] = params.pop('target_pct')
+    return params, exits
+
+
+def strategy_signals(name, context, params=None):
+    """Returns (signal, long_stop, short_stop) arrays of a strategy over context['data']."""
+    signal_params, _ = split_params(name, params)
+    return SIGNALS[name](context, **signal_params)
+
+
+def _bound(moment, tz):
+    if moment is None:
+        return None
+    moment = pd.Timestamp(moment)
+    if tz is not None and moment.tz is None:
+        return moment.tz_localize(tz)
+    return moment
+
+
+def slice_range(data, start=None, end=None):
+    """Returns the rows of `data` in [start, end); naive bounds are read in the index's timezone."""
+    start, end = _bound(start, data.index.tz), _bound(end, data.index.tz)
+    if start is not None:
+        data = data[data.index >= start]
+    if end is not None:
+        data = data[data.index < end]
+    return data
+
+
+def load_history(symbol, interval, start=None, end=None, warehouse=None, lookback=0):
+    """Returns a symbol's warehouse bars in [start, end) plus `lookback` earlier bars, or None."""
+    warehouse = warehouse if warehouse is not None else Warehouse()
+    return warehouse.frame(symbol, interval, start, end, lookback=lookback)
+
+
+def run_shard(task):
+    """Computes every requested strategy's signals and stops over one symbol and date range.
+
+    Bars before the shard's start are loaded as warm-up and dropped from the
+    result. Returns (symbol, frame) where the frame holds the shard's OHLC and
+    '<strategy>_signal', '<strategy>_long_stop', '<strategy>_short_stop' columns.
+    """
+    symbol, data, start, end = task['symbol'], task.get('data'), task.get('start'), task.get('end')
+    if data is None:
+        data = load_history(
+            symbol, task['interval'], start, end, Warehouse(task['warehouse_root']), lookback=task.get('warmup', WARMUP_BARS)
+        )
+    if data is None or data.empty:
+        return symbol, None
+    start, end = _bound(start, data.index.tz), _bound(end, data.index.tz)
+    first = 0 if start is None else int(data.index.searchsorted(start))
+    stop = len(data) if end is None else int(data.index.searchsorted(end))
+    data = data.iloc[max(first - task.get('warmup', WARMUP_BARS), 0):stop]
+    keep = data.index >= start if start is not None else np.ones(len(data), dtype=bool)
+
+    indicators = IndicatorCache(INDICATORS)
+    context = {'data': data, 'indicator': indicators.bind(symbol, task.get('interval'), data), 'pcr': task.get('pcr')}
+    params = task.get('params') or {}
+    result = data.loc[keep, ['Open', 'High', 'Low', 'Close']].copy()
+    for name in task['strategies']:
+        signal, long_stop, short_stop = strategy_signals(name, context, params.get(name))
+        result[f'{name}_signal'] = np.asarray(signal)[keep]
+        result[f'{name}_long_stop'] = np.asarray(long_stop, dtype=float)[keep]
+        result[f'{name}_short_stop'] = np.asarray(short_stop, dtype=float)[keep]
+    return symbol, result
+
+
+def extract_trades(bars, signal, long_stop, short_stop, target_pct=0.01, trailing=True,
+                   slippage=SLIPPAGE, commission=COMMISSION):
+    """Replays signals through simulate_exits and fills each trade realistically.
+
+    A signal seen at a bar's close is filled at the next bar's open. Exits fill
+    at the stop or target, or at the open when the bar gaps through it; when
+    one bar reaches both, the stop is assumed to have been hit first. Trades
+    still open at the end are closed at the last close. Slippage moves every
+    fill against the trade and commission is charged on both sides.
+    """
+    open_ = bars['Open'].to_numpy(dtype=float)
+    high = bars['High'].to_numpy(dtype=float)
+    low = bars['Low'].to_numpy(dtype=float)
+    close = bars['Close'].to_numpy(dtype=float)
+    exits = simulate_exits(signal, high, low, close, long_stop, short_stop, target_pct=target_pct, trailing=trailing)
+    position = exits['position']
+    n = len(position)
+
+    held = position != 0
+    starts = np.flatnonzero(held & ~np.concatenate(([False], held[:-1])))
+    ends = np.flatnonzero(held & ~np.concatenate((held[1:], [False]))) + 1
+    trades = []
+    for entry_bar, exit_bar in zip(starts, ends):
+        if entry_bar + 1 >= n:
+            continue
+        direction = int(position[entry_bar])
+        entry_price = open_[entry_bar + 1]
+        if exit_bar < n:
+            stop, target = exits['stop_loss'][exit_bar - 1], exits['target_price'][entry_bar]
+            if direction == 1:
+                stopped = low[exit_bar] < stop
+                exit_price = min(open_[exit_bar], stop) if stopped else max(open_[exit_bar], target)
+            else:
+                stopped = high[exit_bar] > stop
+                exit_price = max(open_[exit_bar], stop) if stopped else min(open_[exit_bar], target)
+            reason, exit_time = 'stop' if stopped else 'target', bars.index[exit_bar]
+        else:
+            exit_price, reason, exit_time = close[-1], 'end', bars.index[-1]
+        entry_fill = entry_price * (1 + direction * slippage)
+        exit_fill = exit_price * (1 - direction * slippage)
+        trades.append({
+            'direction': direction,
+            'entry_time': bars.index[entry_bar + 1],
+            'entry_price': entry_fill,
+            'exit_time': exit_time,
+            'exit_price': exit_fill,
+            'exit_reason': reason,
+            'bars_held': min(exit_bar, n - 1) - entry_bar,
+            'return': direction * (exit_fill - entry_fill) / entry_fill - 2 * commission,
+        })
+    return pd.DataFrame(trades, columns=TRADE_COLUMNS[2:])
+
+
+def equity_curves(trades, capital_slices=1):
+    """Equity per strategy, starting at 1.0, stepping at each trade's exit.
+
+    Every trade is sized at 1 / capital_slices of the starting capital, so
+    with one slice per symbol the curve is an equal-weight portfolio.
+    """
+    if trades.empty:
+        return pd.DataFrame()
+    pnl = trades.pivot_table(index='exit_time', columns='strategy', values='return', aggfunc='sum').fillna(0.0)
+    return 1 + pnl.cumsum() / capital_slices
+
+
+def summarize(trades, equity):
+    """Summary statistics per strategy."""
+    rows = {}
+    for name, group in trades.groupby('strategy'):
+        returns = group['return']
+        curve = equity[name]
+        daily = curve.groupby(curve.index.normalize()).last().diff().dropna()
+        losses = -returns[returns < 0].sum()
+        rows[name] = {
+            'trades': len(group),
+            'win_rate': (returns > 0).mean(),
+            'avg_return': returns.mean(),
+            'total_return': curve.iloc[-1] - 1,
+            'profit_factor': returns[returns > 0].sum() / losses if losses > 0 else np.inf,
+            'max_drawdown': (curve / np.maximum(curve.cummax(), 1.0) - 1).min(),
+            'sharpe': daily.mean() / daily.std() * np.sqrt(252) if len(daily) > 1 and daily.std() > 0 else np.nan,
+            'avg_bars_held': group['bars_held'].mean(),
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+class BacktestResult:
+    """Trades, per-strategy equity curves and summary statistics of a backtest run."""
+
+    def __init__(self, trades, equity, stats):
+        self.trades = trades
+        self.equity = equity
+        self.stats = stats
+
+
+def shard_tasks(symbols, strategies, interval, start, end, chunk_days, warehouse_root, frames=None, pcr=None, params=None,
+                warmup=WARMUP_BARS):
+    """One task per symbol, or per symbol and chunk_days-long date range when chunking."""
+    if chunk_days and (start is None or end is None):
+        raise ValueError("chunk_days needs both start and end")
+    bounds = [(start, end)]
+    if chunk_days:
+        edges = list(pd.date_range(pd.Timestamp(start), pd.Timestamp(end), freq=f'{chunk_days}D'))
+        if edges[-1] < pd.Timestamp(end):
+            edges.append(pd.Timestamp(end))
+        bounds = list(zip(edges[:-1], edges[1:]))
+    return [
+        {
+            'symbol': symbol, 'interval': interval, 'start': chunk_start, 'end': chunk_end,
+            'strategies': list(strategies), 'warehouse_root': warehouse_root, 'warmup': warmup,
+            'data': None if frames is None else frames.get(symbol),
+            'pcr': (pcr or {}).get(symbol), 'params': params,
+        }
+        for symbol in symbols for chunk_start, chunk_end in bounds
+    ]
+
+
+def run_backtest(symbols, strategies=STRATEGIES, start=None, end=None, interval='5m', warehouse=None, frames=None,
+                 pcr=None, params=None, chunk_days=None, workers=None, slippage=SLIPPAGE, commission=COMMISSION):
+    """Backtests strategies over stored bars of every symbol.
+
+    Bars come from `frames` ({symbol: DataFrame}) or the Warehouse. Signal
+    generation is sharded by symbol, and by chunk_days-long date ranges when
+    given, across a process pool of `workers` (all cores by default; 1 runs
+    inline). Shards carry WARMUP_BARS of history, so indicators at chunk seams
+    match a single pass up to that warm-up. Positions are then replayed per
+    symbol over the whole range, so trade sequencing does not depend on the
+    sharding. `pcr` maps symbols to PCR series for oi_strategy and `params`
+    maps strategies to overrides of DEFAULT_PARAMETERS.
+    """
+    unknown = set(strategies) - set(SIGNALS)
+    if unknown:
+        raise ValueError(f"Unknown strategies: {sorted(unknown)}")
+    params = params or {}
+    exit_rules = {name: split_params(name, params.get(name))[1] for name in strategies}
+    warehouse_root = (warehouse if warehouse is not None else Warehouse()).root
+    tasks = shard_tasks(symbols, strategies, interval, start, end, chunk_days, warehouse_root, frames, pcr, params)
+
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        shards = [run_shard(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            shards = list(pool.map(run_shard, tasks))
+
+    pieces = {}
+    for symbol, frame in shards:
+        if frame is not None and not frame.empty:
+            pieces.setdefault(symbol, []).append(frame)
+
+    trades = []
+    for symbol, frames_ in pieces.items():
+        bars = pd.concat(frames_)
+        for name in strategies:
+            symbol_trades = extract_trades(
+                bars, bars[f'{name}_signal'].to_numpy(), bars[f'{name}_long_stop'].to_numpy(),
+                bars[f'{name}_short_stop'].to_numpy(), slippage=slippage, commission=commission, **exit_rules[name]
+            )
+            symbol_trades.insert(0, 'strategy', name)
+            symbol_trades.insert(0, 'symbol', symbol)
+            trades.append(symbol_trades)
+    trades = pd.concat(trades, ignore_index=True) if trades else pd.DataFrame(columns=TRADE_COLUMNS)
+    trades = trades.sort_values(['exit_time', 'symbol', 'strategy'], ignore_index=True)
+    equity = equity_curves(trades, capital_slices=max(len(pieces), 1))
+    return BacktestResult(trades, equity, summarize(trades, equity))
+
+
+if __name__ == '__main__':
+    from market_analysis_app.config import SYMBOLS
+
+    parser = argparse.ArgumentParser(description="Backtest the strategies over the warehouse's historical bars.")
+    parser.add_argument('symbols', nargs='*', default=SYMBOLS['NIFTY50'])
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES[:4]), choices=STRATEGIES)
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--chunk-days', type=int)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    result = run_backtest(
+        args.symbols, args.strategies, args.start, args.end, args.interval,
+        chunk_days=args.chunk_days, workers=args.workers
+    )
+    print(result.stats.to_string() if not result.stats.empty else "No trades.")
@@ -0,0 +1,42 @@
+# market_analysis_app/backtest/indicator_cache.py
+
+from collections import OrderedDict
+
+
+class IndicatorCache:
+    """Memoizes indicator series by (symbol, timeframe, indicator, params).
+
+    `functions` maps indicator names to f(data, *params). Series are shared by
+    every strategy and parameter combination that asks for the same key, so
+    e.g. EMA 9 of a symbol is computed once per sweep rather than once per
+    combination. The least recently used series are dropped beyond maxsize.
+    """
+
+    def __init__(self, functions, maxsize=512):
+        self.functions = functions
+        self.maxsize = maxsize
+        self._values = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, symbol, timeframe, data, indicator, *params):
+        key = (symbol, timeframe, indicator, params)
+        if key in self._values:
+            self._values.move_to_end(key)
+            self.stats['hits'] += 1
+            return self._values[key]
+        self.stats['misses'] += 1
+        value = self.functions[indicator](data, *params)
+        self._values[key] = value
+        if len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+        return value
+
+    def bind(self, symbol, timeframe, data):
+        """Returns indicator(name, *params) for one symbol's bars."""
+        def indicator(name, *params):
+            return self.get(symbol, timeframe, data, name, *params)
+        return indicator
+
+    def clear(self, symbol=None):
+        for key in [key for key in self._values if symbol is None or key[0] == symbol]:
+            del self._values[key]
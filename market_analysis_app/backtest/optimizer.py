@@ -0,0 +1,235 @@
+# market_analysis_app/backtest/optimizer.py
+
+import argparse
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from market_analysis_app.backtest.engine import (
+    DEFAULT_PARAMETERS, INDICATORS, SIGNALS, SLIPPAGE, COMMISSION, load_history, slice_range, extract_trades, split_params
+)
+from market_analysis_app.backtest.indicator_cache import IndicatorCache
+from market_analysis_app.data.warehouse import Warehouse
+
+# Per-process state of a sweep: bars by symbol and one IndicatorCache shared by every task the process runs
+_worker = {}
+
+
+def grid(space):
+    """Every combination of a {parameter: [values]} space, in product order."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_sample(space, samples, seed=0):
+    """Up to `samples` distinct combinations drawn uniformly from the grid, without enumerating it."""
+    names = list(space)
+    sizes = [len(space[name]) for name in names]
+    total = int(np.prod(sizes, dtype=object))
+    combos = []
+    for number in random.Random(seed).sample(range(total), min(samples, total)):
+        combo = {}
+        for name, size in zip(reversed(names), reversed(sizes)):
+            number, digit = divmod(number, size)
+            combo[name] = space[name][digit]
+        combos.append({name: combo[name] for name in names})
+    return combos
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def _init_worker(frames, warehouse_root, interval, start, end, pcr, cache_size):
+    _worker.clear()
+    _worker.update(
+        frames=frames or {}, warehouse_root=warehouse_root, interval=interval, start=start, end=end, pcr=pcr or {},
+        bars={}, indicators=IndicatorCache(INDICATORS, maxsize=cache_size)
+    )
+
+
+def _bars(symbol):
+    if symbol not in _worker['bars']:
+        data = _worker['frames'].get(symbol)
+        if data is None:
+            data = load_history(symbol, _worker['interval'], _worker['start'], _worker['end'], Warehouse(_worker['warehouse_root']))
+        else:
+            data = slice_range(data, _worker['start'], _worker['end'])
+        _worker['bars'][symbol] = data
+    return _worker['bars'][symbol]
+
+
+def symbol_stats(returns):
+    """Summary of one symbol's trade returns, in a form that can be summed across symbols."""
+    returns = np.asarray(returns, dtype=float)
+    equity = 1 + np.cumsum(returns)
+    drawdown = (equity / np.maximum(np.maximum.accumulate(equity), 1.0) - 1).min() if len(returns) else 0.0
+    return {
+        'trades': len(returns),
+        'wins': int((returns > 0).sum()),
+        'gross_profit': float(returns[returns > 0].sum()),
+        'gross_loss': float(-returns[returns < 0].sum()),
+        'total_return': float(returns.sum()),
+        'max_drawdown': float(drawdown),
+    }
+
+
+def evaluate(task):
+    """Backtests one strategy on one symbol for a batch of parameter combinations."""
+    symbol, strategy = task['symbol'], task['strategy']
+    data = _bars(symbol)
+    rows = []
+    context = None
+    if data is not None and not data.empty:
+        indicator = _worker['indicators'].bind(symbol, _worker['interval'], data)
+        context = {'data': data, 'indicator': indicator, 'pcr': _worker['pcr'].get(symbol)}
+    for params in task['combos']:
+        returns = []
+        if context is not None:
+            signal_params, exits = split_params(strategy, params)
+            signal, long_stop, short_stop = SIGNALS[strategy](context, **signal_params)
+            trades = extract_trades(
+                data, signal, long_stop, short_stop, slippage=task['slippage'], commission=task['commission'], **exits
+            )
+            returns = trades['return']
+        rows.append({'symbol': symbol, 'key': params_key(params), 'params': params, **symbol_stats(returns)})
+    return rows
+
+
+class SweepProgress:
+    """Results of a sweep, appended to a JSON-lines file as batches finish.
+
+    The first line describes the sweep, so a file is only resumed by the same
+    strategy, data range and costs. Without a path results are kept in memory.
+    """
+
+    def __init__(self, path, sweep):
+        self.path = path
+        self.rows = []
+        if path is None:
+            return
+        if os.path.exists(path):
+            with open(path) as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+            if lines and lines[0].get('sweep') != sweep:
+                raise ValueError(f"{path} holds progress of a different sweep: {lines[0].get('sweep')}")
+            self.rows = lines[1:]
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(json.dumps({'sweep': sweep}) + '\n')
+
+    def done(self):
+        return {(row['symbol'], row['key']) for row in self.rows}
+
+    def append(self, rows):
+        self.rows.extend(rows)
+        if self.path is None:
+            return
+        with open(self.path, 'a') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def aggregate(rows, symbols, sort_by='total_return'):
+    """One row per combination over all symbols, best first.
+
+    total_return is that of an equal-weight portfolio of the symbols and
+    max_drawdown the worst single symbol's.
+    """
+    if not rows:
+        return pd.DataFrame()
+    results = pd.DataFrame(rows)
+    grouped = results.groupby('key', sort=False)
+    table = grouped.agg(
+        trades=('trades', 'sum'), wins=('wins', 'sum'), gross_profit=('gross_profit', 'sum'),
+        gross_loss=('gross_loss', 'sum'), total_return=('total_return', 'sum'), max_drawdown=('max_drawdown', 'min'),
+    )
+    params = pd.DataFrame(list(grouped['params'].first()), index=table.index)
+    table['win_rate'] = (table['wins'] / table['trades']).where(table['trades'] > 0)
+    table['profit_factor'] = (table['gross_profit'] / table['gross_loss']).where(table['gross_loss'] > 0, np.inf)
+    table['total_return'] /= max(len(symbols), 1)
+    table = params.join(table.drop(columns=['wins', 'gross_profit', 'gross_loss']))
+    return table.sort_values(sort_by, ascending=False).reset_index(drop=True)
+
+
+def optimize(strategy, space, symbols, mode='grid', samples=100, seed=0, interval='5m', start=None, end=None,
+             frames=None, warehouse=None, pcr=None, progress_path=None, workers=None, batch_size=50,
+             slippage=SLIPPAGE, commission=COMMISSION, sort_by='total_return', cache_size=512):
+    """Grid or random search over a strategy's parameters.
+
+    `space` maps parameter names (see DEFAULT_PARAMETERS) to candidate values;
+    parameters left out keep their live defaults. Work is split into batches
+    of combinations per symbol and spread over a process pool of `workers`
+    (all cores by default; 1 runs inline). Each process memoizes indicator
+    series by (symbol, timeframe, indicator, params), so a series is computed
+    once and shared by every combination that needs it. With progress_path,
+    finished batches are saved as they complete and a rerun skips them.
+    """
+    combos = grid(space) if mode == 'grid' else random_sample(space, samples, seed)
+    combos = [dict(DEFAULT_PARAMETERS[strategy], **combo) for combo in combos]
+    for combo in combos:
+        split_params(strategy, combo)
+    warehouse_root = (warehouse if warehouse is not None else Warehouse()).root
+    sweep = {
+        'strategy': strategy, 'interval': interval, 'start': None if start is None else str(start),
+        'end': None if end is None else str(end), 'slippage': slippage, 'commission': commission,
+    }
+    progress = SweepProgress(progress_path, sweep)
+    done = progress.done()
+
+    tasks = []
+    for symbol in symbols:
+        pending = [combo for combo in combos if (symbol, params_key(combo)) not in done]
+        for i in range(0, len(pending), batch_size):
+            tasks.append({
+                'symbol': symbol, 'strategy': strategy, 'combos': pending[i:i + batch_size],
+                'slippage': slippage, 'commission': commission,
+            })
+
+    init_args = (frames, warehouse_root, interval, start, end, pcr, cache_size)
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(tasks) <= 1:
+        _init_worker(*init_args)
+        for task in tasks:
+            progress.append(evaluate(task))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker, initargs=init_args) as pool:
+            for future in as_completed([pool.submit(evaluate, task) for task in tasks]):
+                progress.append(future.result())
+
+    keys = {params_key(combo) for combo in combos}
+    rows = [row for row in progress.rows if row['key'] in keys and row['symbol'] in set(symbols)]
+    return aggregate(rows, symbols, sort_by)
+
+
+if __name__ == '__main__':
+    from market_analysis_app.config import SYMBOLS
+
+    parser = argparse.ArgumentParser(description="Sweep a strategy's parameters over the warehouse's historical bars.")
+    parser.add_argument('strategy', choices=list(DEFAULT_PARAMETERS))
+    parser.add_argument('space', help='JSON object of parameter -> list of values, e.g. \'{"ema_length": [5, 9, 13]}\'')
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS['NIFTY50'])
+    parser.add_argument('--mode', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--progress', help='JSON-lines file to save and resume progress')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    results = optimize(
+        args.strategy, json.loads(args.space), args.symbols, mode=args.mode, samples=args.samples, seed=args.seed,
+        interval=args.interval, start=args.start, end=args.end, progress_path=args.progress, workers=args.workers
+    )
+    print(results.head(20).to_string() if not results.empty else "No results.")
@@ -21,3 +21,10 @@ SYMBOLS = {
     ],
     "MIDCAP": []
 }
+
+# Kite instrument tokens of the index feeds (segment 9, not tradable)
+INDEX_TOKENS = {
+    "NIFTY": 256265,
+    "BANKNIFTY": 260105,
+    "SENSEX": 265
+}
@@ -0,0 +1,204 @@
+# market_analysis_app/data/bar_store.py
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+_SECOND = 1_000_000_000
+_IST_OFFSET = int(5.5 * 3600) * _SECOND
+_SESSION_OPEN = (9 * 3600 + 15 * 60) * _SECOND
+
+# Bar length and start of the bucket grid (IST time of day) per timeframe. Intraday
+# bars are aligned to the 09:15 open like the exchange's candles; daily bars start at midnight.
+TIMEFRAMES = {
+    '1m': (60 * _SECOND, _SESSION_OPEN),
+    '5m': (300 * _SECOND, _SESSION_OPEN),
+    '15m': (900 * _SECOND, _SESSION_OPEN),
+    '1h': (3600 * _SECOND, _SESSION_OPEN),
+    '1d': (86400 * _SECOND, 0),
+}
+
+# Bars kept per series: about five sessions of 1m bars and more for slower timeframes
+DEFAULT_CAPACITY = {'1m': 2000, '5m': 1000, '15m': 500, '1h': 300, '1d': 500}
+
+COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class BarSeries:
+    """Fixed-capacity OHLCV ring buffer for one symbol and timeframe.
+
+    Every bar is written twice, at slot i and i + capacity, so the latest
+    `capacity` bars are always one contiguous slice of the buffers and views
+    never copy. The last bar stays open (forming) until a tick from a later
+    bucket arrives.
+
+    Views alias the buffers: a closed bar only changes once `capacity` newer
+    bars have been written and seed() rewrites every slot, so copy anything
+    kept longer than that or read on another thread than the writer's
+    (BarStore does, under its lock).
+    """
+
+    def __init__(self, timeframe, capacity):
+        self.timeframe = timeframe
+        self.step, origin = TIMEFRAMES[timeframe]
+        self._shift = _IST_OFFSET - origin
+        self.capacity = capacity
+        self.times = np.zeros(2 * capacity, dtype=np.int64)
+        self.values = np.full((len(COLUMNS), 2 * capacity), np.nan)
+        self.head = -1
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def bucket(self, timestamp):
+        """Start (UTC nanoseconds) of the bar containing a UTC-nanosecond timestamp."""
+        return (timestamp + self._shift) // self.step * self.step - self._shift
+
+    def _write(self, slot, start, open_, high, low, close, volume):
+        for i in (slot, slot + self.capacity):
+            self.times[i] = start
+            self.values[:, i] = (open_, high, low, close, volume)
+
+    def update(self, timestamp, price, volume=0.0):
+        """Adds a trade/quote. Returns the start of the bar it closed, or None."""
+        return self.add_bar(timestamp, price, price, price, price, volume)
+
+    def add_bar(self, timestamp, open_, high, low, close, volume=0.0):
+        """Folds a finer bar starting at `timestamp` into its bucket, like a tick with a range.
+
+        Returns the start of the bar it closed, or None.
+        """
+        start = self.bucket(timestamp)
+        closed = None
+        if self.count:
+            closed = int(self.times[self.head])
+            if start == closed:
+                for i in (self.head, self.head + self.capacity):
+                    values = self.values[:, i]
+                    values[1] = max(values[1], high)
+                    values[2] = min(values[2], low)
+                    values[3] = close
+                    values[4] += volume
+                return None
+            if start < closed:
+                # Late tick for a bar that has already closed
+                return None
+        self.head = (self.head + 1) % self.capacity
+        self._write(self.head, start, open_, high, low, close, volume)
+        self.count = min(self.count + 1, self.capacity)
+        return closed
+
+    def seed(self, data):
+        """Replaces the buffer with historical bars from a DataFrame with OHLCV columns."""
+        data = data.iloc[-self.capacity:]
+        n = len(data)
+        index = data.index if data.index.tz is not None else data.index.tz_localize('UTC')
+        times = index.tz_convert('UTC').as_unit('ns').asi8
+        values = np.vstack([
+            data[column].to_numpy(dtype=float) if column in data else np.zeros(n)
+            for column in COLUMNS
+        ])
+        for offset in (0, self.capacity):
+            self.times[offset:offset + n] = times
+            self.values[:, offset:offset + n] = values
+        self.head = n - 1
+        self.count = n
+
+    def _window(self, include_forming):
+        n = self.count if include_forming else max(self.count - 1, 0)
+        end = self.head + 1 + self.capacity - (self.count - n)
+        return slice(end - n, end)
+
+    def arrays(self, include_forming=True):
+        """Zero-copy views: {'time': int64 UTC ns, 'Open': ..., 'Volume': ...}, oldest first."""
+        window = self._window(include_forming)
+        arrays = {'time': self.times[window]}
+        arrays.update({column: self.values[i, window] for i, column in enumerate(COLUMNS)})
+        return arrays
+
+    def frame(self, include_forming=True, tz='Asia/Kolkata', copy=False):
+        """DataFrame over the buffers; only the index is materialised unless `copy`."""
+        arrays = self.arrays(include_forming)
+        index = pd.DatetimeIndex(arrays.pop('time').view('datetime64[ns]')).tz_localize('UTC').tz_convert(tz)
+        return pd.DataFrame(arrays, index=index, copy=copy)
+
+
+class BarStore:
+    """In-memory bars for many symbols, aggregated from ticks into every timeframe.
+
+    `symbols` maps instrument tokens to the symbol names bars are stored
+    under, so KiteTicker ticks can be fed straight in through on_ticks().
+    Memory is bounded by the per-timeframe capacities however long the
+    session runs. Ticks are written on the feed's thread while strategies
+    read on workers, so arrays() and frame() return copies of the window
+    taken under the lock, never views of the ring.
+    """
+
+    def __init__(self, symbols=None, timeframes=tuple(TIMEFRAMES), capacity=None):
+        self.symbols = dict(symbols or {})
+        self.timeframes = tuple(timeframes)
+        self.capacity = dict(DEFAULT_CAPACITY, **(capacity or {}))
+        self.last_tick = {}
+        self._series = {}
+        self._day_volume = {}
+        self._lock = threading.Lock()
+
+    def series(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        if key not in self._series:
+            self._series[key] = BarSeries(timeframe, self.capacity[timeframe])
+        return self._series[key]
+
+    def add_tick(self, symbol, timestamp, price, day_volume=None):
+        """Aggregates one tick. `day_volume` is the cumulative traded volume, if the feed has one.
+
+        Returns the timeframes whose bar this tick closed.
+        """
+        volume = 0.0
+        with self._lock:
+            if day_volume is not None:
+                previous = self._day_volume.get(symbol)
+                # The cumulative volume restarts each session
+                volume = float(day_volume - previous) if previous is not None and day_volume >= previous else 0.0
+                self._day_volume[symbol] = day_volume
+            self.last_tick[symbol] = time.time_ns()
+            return [
+                timeframe for timeframe in self.timeframes
+                if self.series(symbol, timeframe).update(timestamp, price, volume) is not None
+            ]
+
+    def on_ticks(self, ticks):
+        """EventBus/KiteTicker callback for a batch of tick dicts."""
+        now = time.time_ns()
+        for tick in ticks:
+            symbol = self.symbols.get(tick['instrument_token'])
+            if symbol is None:
+                continue
+            stamp = tick.get('exchange_timestamp') or tick.get('last_trade_time')
+            # KiteTicker gives naive local datetimes; timestamp() maps them back to epoch time
+            timestamp = int(stamp.timestamp() * 1_000_000) * 1000 if stamp is not None else now
+            self.add_tick(symbol, timestamp, tick['last_price'], tick.get('volume_traded'))
+
+    def seed(self, symbol, timeframe, data):
+        """Loads downloaded history so indicators have their warm-up bars before ticks arrive."""
+        if data is None or data.empty:
+            return
+        with self._lock:
+            self.series(symbol, timeframe).seed(data)
+
+    def arrays(self, symbol, timeframe, include_forming=True):
+        with self._lock:
+            return {name: values.copy() for name, values in self.series(symbol, timeframe).arrays(include_forming).items()}
+
+    def frame(self, symbol, timeframe, include_forming=True):
+        with self._lock:
+            return self.series(symbol, timeframe).frame(include_forming, copy=True)
+
+    def is_live(self, symbol, max_age=60, now=None):
+        """Whether a tick for symbol was received within the last max_age seconds."""
+        last = self.last_tick.get(symbol)
+        now = time.time_ns() if now is None else now
+        return last is not None and now - last <= max_age * _SECOND
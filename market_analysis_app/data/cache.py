@@ -0,0 +1,232 @@
+# market_analysis_app/data/cache.py
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "market_analysis", "ohlcv")
+
+# How long a cached series is served without asking the provider for new bars (seconds).
+INTERVAL_TTLS = {
+    '1m': 30, '2m': 60, '5m': 60, '15m': 120, '30m': 300, '60m': 600, '90m': 600, '1h': 600,
+    '1d': 3600, '5d': 6 * 3600, '1wk': 6 * 3600, '1mo': 24 * 3600, '3mo': 24 * 3600,
+}
+
+# How long partitions are kept on disk (days). Intraday bars are partitioned per
+# day, daily and slower bars per year.
+INTERVAL_RETENTION_DAYS = {'intraday': 60, 'daily': 5 * 365}
+
+_INTRADAY_SUFFIXES = ('m', 'h')
+
+
+def is_intraday(interval):
+    return interval.endswith(_INTRADAY_SUFFIXES) and not interval.endswith('mo')
+
+
+def period_slice(data, period):
+    """Returns the rows of `data` that a yfinance `period` request would cover."""
+    if data is None or data.empty or period == 'max':
+        return data
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if match is None:
+        return data
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == 'd':
+        # yfinance counts trading sessions, not calendar days
+        dates = data.index.normalize().unique()
+        return data[data.index >= dates[-count]] if len(dates) > count else data
+    offset = {'wk': pd.DateOffset(weeks=count), 'mo': pd.DateOffset(months=count), 'y': pd.DateOffset(years=count)}[unit]
+    return data[data.index > data.index[-1] - offset]
+
+
+def covers_period(data, period, covered_from):
+    """Whether a cached frame holds everything a `period` request needs."""
+    if data is None or data.empty:
+        return False
+    if period == 'max':
+        return covered_from is not None
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if match is None:
+        return False
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == 'd':
+        return data.index.normalize().nunique() >= count
+    offset = {'wk': pd.DateOffset(weeks=count), 'mo': pd.DateOffset(months=count), 'y': pd.DateOffset(years=count)}[unit]
+    return covered_from is not None and covered_from <= data.index[-1] - offset
+
+
+def _replace_atomically(path, write):
+    """Writes a file through `write(file)` to a unique temporary name beside `path`, then renames it over `path`."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class OHLCVCache:
+    """Persistent columnar cache of OHLCV bars keyed by symbol and interval.
+
+    Layout: <root>/<symbol>/<interval>/<partition>.npz, one compressed numpy
+    archive per trading day (intraday) or year (daily and slower), with one
+    array per column and the index stored as UTC nanoseconds. A small
+    _meta.json per series records when it was last refreshed. Series read
+    once are also kept in memory, so only a cold start touches the disk.
+
+    One instance is shared by the download thread pools and the app's
+    executor jobs: reads and merges of a series hold that series' lock, and
+    files are written under unique temporary names and renamed into place.
+    """
+
+    def __init__(self, root=None, ttls=None, retention_days=None):
+        self.root = root or os.getenv("MARKET_DATA_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.ttls = dict(INTERVAL_TTLS, **(ttls or {}))
+        self.retention_days = dict(INTERVAL_RETENTION_DAYS, **(retention_days or {}))
+        self._frames = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _series_lock(self, symbol, interval):
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, interval), threading.RLock())
+
+    def _series_dir(self, symbol, interval):
+        safe_symbol = re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+        return os.path.join(self.root, safe_symbol, interval)
+
+    def _meta_path(self, symbol, interval):
+        return os.path.join(self._series_dir(symbol, interval), '_meta.json')
+
+    def _partition_key(self, timestamp, interval):
+        return timestamp.strftime('%Y-%m-%d') if is_intraday(interval) else timestamp.strftime('%Y')
+
+    def read_meta(self, symbol, interval):
+        try:
+            with open(self._meta_path(symbol, interval)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_meta(self, symbol, interval, meta):
+        _replace_atomically(self._meta_path(symbol, interval), lambda f: f.write(json.dumps(meta).encode()))
+
+    def is_fresh(self, symbol, interval, now=None):
+        """Whether the series was refreshed within its interval's TTL."""
+        fetched_at = self.read_meta(symbol, interval).get('fetched_at')
+        if fetched_at is None:
+            return False
+        now = time.time() if now is None else now
+        return now - fetched_at < self.ttls.get(interval, 60)
+
+    def covered_from(self, symbol, interval):
+        covered_from = self.read_meta(symbol, interval).get('covered_from')
+        return None if covered_from is None else pd.Timestamp(covered_from, unit='ns', tz='UTC')
+
+    def _read_partition(self, path):
+        with np.load(path, allow_pickle=False) as archive:
+            columns = [str(name) for name in archive['columns']]
+            index = pd.to_datetime(archive['index'], unit='ns', utc=True).tz_convert(str(archive['tz']))
+            return pd.DataFrame({name: archive[f'col_{i}'] for i, name in enumerate(columns)}, index=index)
+
+    def _write_partition(self, path, frame):
+        index = frame.index
+        arrays = {f'col_{i}': frame[name].to_numpy() for i, name in enumerate(frame.columns)}
+        _replace_atomically(path, lambda f: np.savez_compressed(
+            f,
+            columns=np.array(frame.columns, dtype=str),
+            index=index.tz_convert('UTC').as_unit('ns').asi8,
+            tz=np.array(str(index.tz)),
+            **arrays
+        ))
+
+    def _load(self, symbol, interval):
+        directory = self._series_dir(symbol, interval)
+        if not os.path.isdir(directory):
+            return None
+        frames = [
+            self._read_partition(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory))
+            if name.endswith('.npz') and '.tmp' not in name
+        ]
+        return pd.concat(frames) if frames else None
+
+    def read(self, symbol, interval, start=None):
+        """Returns the cached bars for a series, optionally only those at or after `start`."""
+        key = (symbol, interval)
+        with self._series_lock(symbol, interval):
+            if key not in self._frames:
+                self._frames[key] = self._load(symbol, interval)
+            data = self._frames[key]
+        if data is not None and start is not None:
+            data = data[data.index >= start]
+        return data
+
+    def write(self, symbol, interval, data, full_fetch=False, now=None):
+        """Merges freshly fetched bars into the cache; newer rows replace older ones."""
+        with self._series_lock(symbol, interval):
+            directory = self._series_dir(symbol, interval)
+            os.makedirs(directory, exist_ok=True)
+            meta = self.read_meta(symbol, interval)
+
+            if data is not None and not data.empty:
+                if data.index.tz is None:
+                    data = data.tz_localize('UTC')
+                keys = data.index.strftime('%Y-%m-%d' if is_intraday(interval) else '%Y')
+                for key in keys.unique():
+                    path = os.path.join(directory, f'{key}.npz')
+                    part = data[keys == key]
+                    if os.path.exists(path):
+                        existing = self._read_partition(path)
+                        part = pd.concat([existing, part.tz_convert(existing.index.tz)])
+                        part = part[~part.index.duplicated(keep='last')].sort_index()
+                    self._write_partition(path, part)
+                cached = self._frames.get((symbol, interval))
+                if cached is not None:
+                    merged = pd.concat([cached, data.tz_convert(cached.index.tz)])
+                    self._frames[(symbol, interval)] = merged[~merged.index.duplicated(keep='last')].sort_index()
+                else:
+                    self._frames.pop((symbol, interval), None)
+                if full_fetch:
+                    first = data.index[0]
+                    covered = self.covered_from(symbol, interval)
+                    meta['covered_from'] = int(min(first, covered).value if covered is not None else first.value)
+
+            meta['fetched_at'] = time.time() if now is None else now
+            self._write_meta(symbol, interval, meta)
+            self.evict(symbol, interval, now=now)
+
+    def evict(self, symbol, interval, now=None):
+        """Removes partitions older than the interval's retention window."""
+        with self._series_lock(symbol, interval):
+            directory = self._series_dir(symbol, interval)
+            if not os.path.isdir(directory):
+                return
+            now = pd.Timestamp(time.time() if now is None else now, unit='s')
+            days = self.retention_days['intraday' if is_intraday(interval) else 'daily']
+            oldest_key = self._partition_key(now - pd.Timedelta(days=days), interval)
+            removed = False
+            for name in os.listdir(directory):
+                if name.endswith('.npz') and name[:-4] < oldest_key:
+                    os.remove(os.path.join(directory, name))
+                    removed = True
+            if removed:
+                self._frames.pop((symbol, interval), None)
+                meta = self.read_meta(symbol, interval)
+                meta.pop('covered_from', None)
+                self._write_meta(symbol, interval, meta)
+
+    def clear(self, symbol=None):
+        path = self.root if symbol is None else os.path.dirname(self._series_dir(symbol, '_'))
+        shutil.rmtree(path, ignore_errors=True)
+        self._frames = {key: frame for key, frame in self._frames.items() if symbol is not None and key[0] != symbol}
@@ -1,14 +1,36 @@
 # market_analysis_app/data/data_fetcher.py
 
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 
-def get_data(symbol, interval='15m', period='1d'):
-    """Fetches historical data for a given symbol."""
+from market_analysis_app.data.cache import covers_period, period_slice
+from market_analysis_app.data.providers import YFinanceProvider
+
+# Provider used when a call does not pass one; main.py may swap in a ProviderRouter
+_provider = YFinanceProvider()
+
+def set_provider(provider):
+    """Sets the provider that get_data and get_bulk_data use by default."""
+    global _provider
+    _provider = provider
+
+def get_provider():
+    return _provider
+
+def get_data(symbol, interval='15m', period='1d', cache=None, provider=None):
+    """Fetches historical data for a given symbol.
+
+    When an OHLCVCache is passed the call is read-through: bars within the
+    interval's TTL are served from the cache, stale series are topped up with
+    only the bars after the last cached timestamp.
+    """
+    provider = provider or _provider
+    if cache is not None:
+        return _get_cached_data(symbol, interval, period, cache, provider)
     try:
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period=period, interval=interval)
-        if data.empty:
+        data = provider.history(symbol, interval, period=period)
+        if data is None or data.empty:
             print(f"No data fetched for {symbol} with interval {interval} and period {period}.")
             return None
         return data
@@ -16,6 +38,127 @@ def get_data(symbol, interval='15m', period='1d'):
         print(f"Error fetching data for {symbol}: {e}")
         return None
 
+def _get_cached_data(symbol, interval, period, cache, provider):
+    try:
+        cached = cache.read(symbol, interval)
+        covered = covers_period(cached, period, cache.covered_from(symbol, interval))
+    except Exception as e:
+        print(f"Error reading cached data for {symbol} ({interval}): {e}")
+        cached, covered = None, False
+
+    if covered and cache.is_fresh(symbol, interval):
+        return period_slice(cached, period)
+
+    try:
+        if covered:
+            # The last cached bar may still have been forming, so fetch it again
+            fresh = provider.history(symbol, interval, start=cached.index[-1])
+        else:
+            fresh = provider.history(symbol, interval, period=period)
+    except Exception as e:
+        print(f"Error fetching data for {symbol}: {e}")
+        return None
+
+    if fresh is None or fresh.empty:
+        if covered:
+            cache.write(symbol, interval, None)
+            return period_slice(cached, period)
+        print(f"No data fetched for {symbol} with interval {interval} and period {period}.")
+        return None
+    if not isinstance(fresh.index, pd.DatetimeIndex):
+        return fresh
+
+    try:
+        cache.write(symbol, interval, fresh, full_fetch=not covered)
+        data = cache.read(symbol, interval)
+    except Exception as e:
+        print(f"Error caching data for {symbol} ({interval}): {e}")
+        data = fresh
+
+    data = period_slice(data, period)
+    if data is None or data.empty:
+        print(f"No data fetched for {symbol} with interval {interval} and period {period}.")
+        return None
+    return data
+
+def get_bulk_data(symbols, interval='15m', period='1d', cache=None, max_workers=8, provider=None):
+    """Fetches one interval for many symbols, returning {symbol: DataFrame or None}.
+
+    Symbols are downloaded together in a single request per provider (stale
+    cached series in a second one, for the new bars only). Anything the batch
+    request does not return falls back to get_data, at most max_workers
+    requests at a time.
+    """
+    provider = provider or _provider
+    symbols = list(dict.fromkeys(symbols))
+    results = {}
+    full, delta = [], []
+    # Last cached bar of each stale series, where its delta download starts
+    last_cached = {}
+    for symbol in symbols:
+        if cache is None:
+            full.append(symbol)
+            continue
+        try:
+            cached = cache.read(symbol, interval)
+            covered = covers_period(cached, period, cache.covered_from(symbol, interval))
+        except Exception as e:
+            # An unreadable series is fetched in full, without failing the rest of the batch
+            print(f"Error reading cached data for {symbol} ({interval}): {e}")
+            cached, covered = None, False
+        if not covered:
+            full.append(symbol)
+        elif cache.is_fresh(symbol, interval):
+            results[symbol] = period_slice(cached, period)
+        else:
+            delta.append(symbol)
+            last_cached[symbol] = cached.index[-1]
+
+    downloaded = {}
+    missing = []
+    for source, group in provider.groups(full):
+        frames = source.download(group, interval, period=period) or {}
+        downloaded.update((symbol, frames[symbol]) for symbol in group if symbol in frames and not frames[symbol].empty)
+        missing += [symbol for symbol in group if symbol not in downloaded]
+    for source, group in provider.groups(delta):
+        start = min(last_cached[symbol] for symbol in group)
+        frames = source.download(group, interval, start=start)
+        if frames is None:
+            missing += group
+        else:
+            # A symbol absent from a successful delta request simply has no new bars
+            downloaded.update((symbol, frames.get(symbol)) for symbol in group)
+
+    for symbol, frame in downloaded.items():
+        if cache is not None:
+            try:
+                cache.write(symbol, interval, frame, full_fetch=symbol in full)
+                frame = cache.read(symbol, interval)
+            except Exception as e:
+                print(f"Error caching data for {symbol} ({interval}): {e}")
+        frame = period_slice(frame, period)
+        results[symbol] = frame if frame is not None and not frame.empty else None
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as pool:
+            frames = pool.map(lambda symbol: get_data(symbol, interval=interval, period=period, cache=cache, provider=provider), missing)
+            results.update(zip(missing, frames))
+
+    return {symbol: results.get(symbol) for symbol in symbols}
+
+def get_universe_data(symbols, periods, cache=None, max_workers=8, provider=None):
+    """Fetches several intervals for many symbols concurrently.
+
+    periods maps interval to period, e.g. {'5m': '1d', '15m': '1d', '1d': '2d'}.
+    Returns {interval: {symbol: DataFrame or None}}.
+    """
+    with ThreadPoolExecutor(max_workers=len(periods) or 1) as pool:
+        futures = {
+            interval: pool.submit(get_bulk_data, symbols, interval, period, cache, max_workers, provider)
+            for interval, period in periods.items()
+        }
+        return {interval: future.result() for interval, future in futures.items()}
+
 if __name__ == '__main__':
     # Example usage:
     nifty_data = get_data('^NSEI') # NIFTY
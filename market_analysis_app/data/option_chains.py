@@ -0,0 +1,279 @@
+# market_analysis_app/data/option_chains.py
+
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_OPTION_CHAIN_DIR = os.path.join(os.path.expanduser("~"), ".cache", "market_analysis", "option_chains")
+
+# Per-contract values of a snapshot, in the column order of oi_strategy.get_oi_data
+FIELDS = (
+    'ce_oi', 'pe_oi', 'ce_change_oi', 'pe_change_oi',
+    'ce_ltp', 'pe_ltp', 'ce_iv', 'pe_iv', 'ce_volume', 'pe_volume',
+)
+_COUNTS = {'ce_oi', 'pe_oi', 'ce_change_oi', 'pe_change_oi', 'ce_volume', 'pe_volume'}
+
+# Contracts of a day, in order of first appearance; expiry is days since the epoch
+KEY_DTYPE = np.dtype([('expiry', '<i4'), ('strike', '<f8')])
+
+# One record per snapshot: UTC nanoseconds, underlying price and how many delta rows follow
+SNAPSHOT_DTYPE = np.dtype([('ts', '<i8'), ('underlying', '<f8'), ('rows', '<i4')])
+
+# One record per contract that changed since the previous snapshot. A contract that
+# dropped out of the chain gets a tombstone: its row stored as -row - 1, values zero.
+DELTA_DTYPE = np.dtype([('row', '<i4')] + [(field, '<i8' if field in _COUNTS else '<f8') for field in FIELDS])
+
+
+def _key_rows(deltas):
+    """Key row of each delta record, tombstones included."""
+    rows = deltas['row']
+    return np.where(rows < 0, -rows - 1, rows)
+
+
+class ChainHistory:
+    """A day of snapshots for one symbol, decoded to dense (snapshot x contract) columns.
+
+    `times` are the snapshot times, `expiry`/`strike` describe the contract
+    columns and `column(field)` returns a float matrix where a contract
+    carries its last reported values forward (NaN before it first appears
+    and after it drops out of the chain, until it is quoted again).
+    """
+
+    def __init__(self, times, underlying, keys, deltas, sources):
+        self.times = times
+        self.underlying = underlying
+        self.expiry = keys['expiry'].astype('datetime64[D]')
+        self.strike = keys['strike']
+        self._deltas = deltas
+        self._sources = sources
+        self._removed = deltas['row'] < 0
+        self.delta_count = len(deltas)
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.times)
+
+    def column(self, field):
+        if field not in self._columns:
+            values = np.where(self._removed, np.nan, self._deltas[field].astype(float))
+            column = np.where(self._sources >= 0, values[np.maximum(self._sources, 0)] if len(values) else np.nan, np.nan)
+            self._columns[field] = column
+        return self._columns[field]
+
+    def rows(self, strike=None, expiry=None):
+        """Boolean mask of the contract columns matching a strike and/or expiry."""
+        mask = np.ones(len(self.strike), dtype=bool)
+        if strike is not None:
+            mask &= self.strike == float(strike)
+        if expiry is not None:
+            mask &= self.expiry == np.datetime64(pd.Timestamp(expiry).date(), 'D')
+        return mask
+
+    def nearest_expiry(self, snapshot=-1):
+        """Earliest expiry quoted in a snapshot."""
+        quoted = ~np.isnan(self.column('ce_oi')[snapshot])
+        return pd.Timestamp(self.expiry[quoted].min()) if quoted.any() else None
+
+    def chain(self, snapshot=-1):
+        """One snapshot as a chain DataFrame shaped like oi_strategy.get_oi_data's."""
+        quoted = ~np.isnan(self.column('ce_oi')[snapshot])
+        data = {'strike': self.strike[quoted]}
+        data.update((field, self.column(field)[snapshot, quoted]) for field in FIELDS)
+        data['expiry'] = pd.to_datetime(self.expiry[quoted])
+        frame = pd.DataFrame(data)
+        frame.attrs['timestamp'] = self.times[snapshot]
+        frame.attrs['underlying'] = float(self.underlying[snapshot])
+        return frame.sort_values(['expiry', 'strike'], kind='stable').reset_index(drop=True)
+
+
+class OptionChainStore:
+    """Intraday option-chain history, one directory per symbol and session date.
+
+    Layout: <root>/<symbol>/<YYYY-MM-DD>/{keys,snapshots,deltas}.bin, raw
+    append-only arrays of KEY_DTYPE, SNAPSHOT_DTYPE and DELTA_DTYPE. A
+    snapshot stores only the contracts whose values changed since the
+    previous one, plus a tombstone for each contract it no longer quotes;
+    decoding forward-fills each contract from its last delta.
+    The snapshot record is written last, so a torn append is ignored on read.
+    Decoded days are kept in memory until their files grow.
+    """
+
+    def __init__(self, root=None, tz='Asia/Kolkata'):
+        self.root = root or os.getenv("OPTION_CHAIN_DIR", DEFAULT_OPTION_CHAIN_DIR)
+        self.tz = tz
+        self._decoded = {}
+        self._lock = threading.Lock()
+
+    def _day_dir(self, symbol, day):
+        return os.path.join(self.root, re.sub(r'[^A-Za-z0-9._-]', '_', symbol), str(day))
+
+    def _session_date(self, date):
+        if date is None:
+            return pd.Timestamp.now(tz=self.tz).date()
+        return pd.Timestamp(date).date()
+
+    def dates(self, symbol):
+        """Session dates with stored snapshots, oldest first."""
+        try:
+            names = os.listdir(self._day_dir(symbol, ''))
+        except FileNotFoundError:
+            return []
+        return sorted(pd.Timestamp(name).date() for name in names if re.fullmatch(r'\d{4}-\d{2}-\d{2}', name))
+
+    def _read(self, symbol, day):
+        directory = self._day_dir(symbol, day)
+        arrays = {}
+        for name, dtype in (('snapshots', SNAPSHOT_DTYPE), ('keys', KEY_DTYPE), ('deltas', DELTA_DTYPE)):
+            path = os.path.join(directory, f'{name}.bin')
+            count = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+            arrays[name] = np.fromfile(path, dtype=dtype, count=count) if count else np.zeros(0, dtype=dtype)
+        snapshots = arrays['snapshots']
+        # Deltas and keys past the last complete snapshot belong to an interrupted append
+        deltas = arrays['deltas'][:int(snapshots['rows'].sum())]
+        keys = arrays['keys'][:int(_key_rows(deltas).max()) + 1 if len(deltas) else 0]
+        return snapshots, keys, deltas
+
+    def history(self, symbol, date=None):
+        """Returns the ChainHistory of a session (today by default), or None if nothing is stored."""
+        day = self._session_date(date)
+        path = os.path.join(self._day_dir(symbol, day), 'snapshots.bin')
+        size = os.path.getsize(path) // SNAPSHOT_DTYPE.itemsize if os.path.exists(path) else 0
+        with self._lock:
+            cached = self._decoded.get((symbol, day))
+            if cached is not None and cached[0] == size:
+                return cached[1]
+        if not size:
+            return None
+        snapshots, keys, deltas = self._read(symbol, day)
+        if not len(snapshots):
+            return None
+        snapshot_of = np.repeat(np.arange(len(snapshots)), snapshots['rows'])
+        sources = np.full((len(snapshots), len(keys)), -1, dtype=np.int64)
+        sources[snapshot_of, _key_rows(deltas)] = np.arange(len(deltas))
+        np.maximum.accumulate(sources, axis=0, out=sources)
+        times = pd.to_datetime(snapshots['ts'], unit='ns', utc=True).tz_convert(self.tz)
+        history = ChainHistory(times, snapshots['underlying'], keys, deltas, sources)
+        with self._lock:
+            self._decoded[(symbol, day)] = (size, history)
+        return history
+
+    def append(self, symbol, chain, timestamp=None, underlying=None):
+        """Stores one polled chain; returns the number of changed or removed contracts written.
+
+        `chain` has a strike column, an expiry column and the FIELDS
+        (missing ones are stored as 0). The timestamp and underlying default
+        to chain.attrs['timestamp'/'underlying'] and then to now/NaN. A
+        snapshot no newer than the last stored one is skipped.
+        """
+        if chain is None or chain.empty:
+            return 0
+        timestamp = pd.Timestamp(timestamp if timestamp is not None else chain.attrs.get('timestamp') or pd.Timestamp.now(tz=self.tz))
+        timestamp = timestamp.tz_localize(self.tz) if timestamp.tz is None else timestamp.tz_convert(self.tz)
+        if underlying is None:
+            underlying = chain.attrs.get('underlying')
+        day = timestamp.date()
+
+        history = self.history(symbol, day)
+        if history is not None and timestamp <= history.times[-1]:
+            return 0
+        if 'expiry' in chain:
+            expiry = pd.to_datetime(chain['expiry']).to_numpy().astype('datetime64[D]').astype(np.int64)
+        else:
+            expiry = np.zeros(len(chain), dtype=np.int64)
+        strike = chain['strike'].to_numpy(float)
+
+        # Map contracts onto the day's key rows, adding the new ones at the end
+        known = {} if history is None else {
+            (int(e), float(s)): row for row, (e, s) in enumerate(zip(history.expiry.astype(np.int64), history.strike))
+        }
+        rows = np.empty(len(chain), dtype=np.int32)
+        new_keys = []
+        for i, key in enumerate(zip(expiry.tolist(), strike.tolist())):
+            row = known.get(key)
+            if row is None:
+                row = known[key] = len(known)
+                new_keys.append(key)
+            rows[i] = row
+
+        records = np.zeros(len(chain), dtype=DELTA_DTYPE)
+        records['row'] = rows
+        for field in FIELDS:
+            if field in chain:
+                records[field] = chain[field].fillna(0).to_numpy()
+        changed = np.ones(len(chain), dtype=bool)
+        if history is not None:
+            # Only contracts whose values differ from their last stored ones are kept
+            old = rows < len(history.strike)
+            changed[old] = False
+            for field in FIELDS:
+                previous = history.column(field)[-1, rows[old]]
+                changed[old] |= ~(records[field][old].astype(float) == previous)
+        records = records[changed]
+        if history is not None:
+            # Contracts quoted in the last snapshot but missing from this one
+            quoted = ~np.isnan(history.column('ce_oi')[-1])
+            quoted[rows[rows < len(quoted)]] = False
+            tombstones = np.zeros(int(quoted.sum()), dtype=DELTA_DTYPE)
+            tombstones['row'] = -np.flatnonzero(quoted) - 1
+            records = np.concatenate([records, tombstones])
+
+        directory = self._day_dir(symbol, day)
+        os.makedirs(directory, exist_ok=True)
+        self._truncate(directory, history)
+        with open(os.path.join(directory, 'keys.bin'), 'ab') as f:
+            np.array(new_keys, dtype=KEY_DTYPE).tofile(f)
+        with open(os.path.join(directory, 'deltas.bin'), 'ab') as f:
+            records.tofile(f)
+        snapshot = np.array([(timestamp.value, np.nan if underlying is None else underlying, len(records))], dtype=SNAPSHOT_DTYPE)
+        with open(os.path.join(directory, 'snapshots.bin'), 'ab') as f:
+            snapshot.tofile(f)
+        return len(records)
+
+    def _truncate(self, directory, history):
+        """Drops whatever an interrupted append left after the last complete snapshot."""
+        committed = {
+            'snapshots.bin': 0 if history is None else len(history) * SNAPSHOT_DTYPE.itemsize,
+            'keys.bin': 0 if history is None else len(history.strike) * KEY_DTYPE.itemsize,
+            'deltas.bin': 0 if history is None else history.delta_count * DELTA_DTYPE.itemsize,
+        }
+        for name, size in committed.items():
+            path = os.path.join(directory, name)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def latest(self, symbol, date=None):
+        """The last stored chain of a session, as get_oi_data returns it, or None."""
+        history = self.history(symbol, date)
+        return history.chain() if history is not None else None
+
+    def oi_buildup(self, symbol, strike, last=None, expiry=None, date=None):
+        """OI, change in OI and LTP at one strike over the session's snapshots.
+
+        Defaults to the nearest expiry; `last` keeps only the most recent N
+        snapshots. Returns a DataFrame indexed by snapshot time, or None.
+        """
+        history = self.history(symbol, date)
+        if history is None:
+            return None
+        expiry = expiry if expiry is not None else history.nearest_expiry()
+        mask = history.rows(strike, expiry)
+        if not mask.any():
+            return None
+        window = slice(-last, None) if last else slice(None)
+        row = np.flatnonzero(mask)[0]
+        fields = ('ce_oi', 'pe_oi', 'ce_change_oi', 'pe_change_oi', 'ce_ltp', 'pe_ltp')
+        return pd.DataFrame({field: history.column(field)[window, row] for field in fields}, index=history.times[window])
+
+    def pcr_series(self, symbol, date=None, expiry=None):
+        """Put-call OI ratio of every snapshot of a session, across all expiries unless one is given."""
+        history = self.history(symbol, date)
+        if history is None:
+            return pd.Series(dtype=float, name='pcr')
+        mask = history.rows(expiry=expiry) if expiry is not None else slice(None)
+        ce = np.nansum(history.column('ce_oi')[:, mask], axis=1)
+        pe = np.nansum(history.column('pe_oi')[:, mask], axis=1)
+        pcr = np.divide(pe, ce, out=np.zeros_like(pe), where=ce != 0)
+        return pd.Series(pcr, index=history.times, name='pcr')
@@ -0,0 +1,341 @@
+# market_analysis_app/data/providers.py
+
+import abc
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from kiteconnect import KiteConnect
+from requests.adapters import HTTPAdapter
+
+from market_analysis_app.data.cache import is_intraday, period_slice
+from market_analysis_app.rate_limit import TokenBucket
+
+# Kite historical API: (interval name, days per request) for each yfinance-style interval
+KITE_INTERVALS = {
+    '1m': ('minute', 60), '3m': ('3minute', 100), '5m': ('5minute', 100), '10m': ('10minute', 100),
+    '15m': ('15minute', 200), '30m': ('30minute', 200), '60m': ('60minute', 400), '1h': ('60minute', 400),
+    '1d': ('day', 2000),
+}
+
+# Kite allows 3 historical-data requests per second per API key
+KITE_HISTORICAL_RATE = 3
+
+# How far back a 'max' period reaches on Kite, which has no such request
+KITE_MAX_LOOKBACK = pd.DateOffset(years=10)
+
+# yfinance symbol suffix -> Kite exchange
+KITE_EXCHANGES = {'.NS': 'NSE', '.BO': 'BSE'}
+
+
+class DataProvider(abc.ABC):
+    """Source of OHLCV history behind get_data and get_bulk_data.
+
+    Subclasses implement `history`, which returns one symbol's bars as a DataFrame (empty if there are
+    none) and raises on failure, like yfinance's Ticker.history. `download`
+    fetches many symbols and returns {symbol: DataFrame} for those that came
+    back, or None if the request itself failed. Either a `period` ('5d',
+    '1mo', ...) or a `start` (and optional `end`) selects the range.
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    def history(self, symbol, interval, period=None, start=None, end=None):
+        """One symbol's bars for the range."""
+
+    def download(self, symbols, interval, period=None, start=None, end=None):
+        frames = {}
+        for symbol in symbols:
+            try:
+                data = self.history(symbol, interval, period=period, start=start, end=end)
+            except Exception as e:
+                print(f"Error fetching data for {symbol} from {self.name}: {e}")
+                continue
+            if data is not None and not data.empty:
+                frames[symbol] = data
+        return frames
+
+    def groups(self, symbols):
+        """Splits symbols into (provider, symbols) pairs that can share a download."""
+        return [(self, list(symbols))] if symbols else []
+
+
+class YFinanceProvider(DataProvider):
+    """Yahoo Finance, one Ticker request per symbol or one batched download."""
+
+    name = 'yfinance'
+
+    def history(self, symbol, interval, period=None, start=None, end=None):
+        kwargs = {key: value for key, value in (('period', period), ('start', start), ('end', end)) if value is not None}
+        return yf.Ticker(symbol).history(interval=interval, **kwargs)
+
+    def download(self, symbols, interval, period=None, start=None, end=None):
+        kwargs = {key: value for key, value in (('period', period), ('start', start), ('end', end)) if value is not None}
+        try:
+            raw = yf.download(
+                tickers=symbols, interval=interval, group_by='ticker', auto_adjust=True,
+                ignore_tz=False, progress=False, threads=True, **kwargs
+            )
+        except Exception as e:
+            print(f"Error downloading {len(symbols)} symbols ({interval}): {e}")
+            return None
+        if raw is None or raw.empty:
+            return {}
+
+        frames = {}
+        if isinstance(raw.columns, pd.MultiIndex):
+            available = set(raw.columns.get_level_values(0))
+            for symbol in symbols:
+                if symbol in available:
+                    frame = raw[symbol].dropna(how='all')
+                    frame.columns.name = None
+                    frames[symbol] = frame
+        elif len(symbols) == 1:
+            frames[symbols[0]] = raw.dropna(how='all')
+        return frames
+
+
+class KiteProvider(DataProvider):
+    """Zerodha Kite historical candles.
+
+    Ranges longer than Kite allows per request are split into windows, and
+    the windows of every requested symbol are downloaded concurrently by
+    `max_workers` threads, all drawing from one token bucket sized to Kite's
+    rate limit. A KiteConnect client is copied into one with its own
+    session, pooled to the worker count so connections stay alive between
+    windows, leaving the original's pool (shared with order placement) as
+    it is. `tokens` maps symbols to instrument tokens; symbols
+    ending in .NS or .BO are otherwise resolved from the exchange's
+    instrument list, loaded once.
+    """
+
+    name = 'kite'
+
+    def __init__(self, kite, tokens=None, rate=KITE_HISTORICAL_RATE, max_workers=4, tz='Asia/Kolkata'):
+        if isinstance(kite, KiteConnect):
+            kite = KiteConnect(kite.api_key, access_token=kite.access_token, root=kite.root, timeout=kite.timeout,
+                               proxies=kite.proxies, disable_ssl=kite.disable_ssl)
+            for prefix in ('http://', 'https://'):
+                kite.reqsession.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        self.kite = kite
+        self.tokens = dict(tokens or {})
+        self.limiter = TokenBucket(rate)
+        self.tz = tz
+        self._exchanges = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='kite-history')
+
+    @classmethod
+    def from_client(cls, client, **kwargs):
+        return cls(client.kite, **kwargs)
+
+    def token(self, symbol):
+        """Returns the instrument token of `symbol`, loading its exchange's instruments if needed."""
+        if symbol in self.tokens:
+            return self.tokens[symbol]
+        for suffix, exchange in KITE_EXCHANGES.items():
+            if symbol.endswith(suffix):
+                with self._lock:
+                    if exchange not in self._exchanges:
+                        for instrument in self.kite.instruments(exchange):
+                            self.tokens.setdefault(instrument['tradingsymbol'] + suffix, instrument['instrument_token'])
+                        self._exchanges.add(exchange)
+                break
+        if symbol not in self.tokens:
+            raise KeyError(f"No Kite instrument token for {symbol}")
+        return self.tokens[symbol]
+
+    def history(self, symbol, interval, period=None, start=None, end=None):
+        frames, errors = self._fetch([symbol], interval, period, start, end)
+        if symbol in errors:
+            raise errors[symbol]
+        return frames.get(symbol, pd.DataFrame())
+
+    def download(self, symbols, interval, period=None, start=None, end=None):
+        try:
+            frames, errors = self._fetch(symbols, interval, period, start, end)
+        except ValueError as e:
+            print(f"Error downloading {len(symbols)} symbols ({interval}) from kite: {e}")
+            return None
+        for symbol, error in errors.items():
+            print(f"Error fetching data for {symbol} from kite: {error}")
+        if symbols and len(errors) == len(set(symbols)):
+            return None
+        return frames
+
+    def _range(self, period, start, end):
+        end = self._timestamp(end) if end is not None else pd.Timestamp.now(tz=self.tz)
+        if start is not None:
+            return self._timestamp(start), end
+        if period is None or period == 'max':
+            return end - KITE_MAX_LOOKBACK, end
+        match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+        if match is None:
+            raise ValueError(f"Unsupported period for Kite: {period}")
+        count, unit = int(match.group(1)), match.group(2)
+        if unit == 'd':
+            # Periods count sessions; pad for weekends and holidays and let period_slice trim
+            return end.normalize() - pd.offsets.BDay(count + count // 4 + 2), end
+        offset = {'wk': pd.DateOffset(weeks=count), 'mo': pd.DateOffset(months=count), 'y': pd.DateOffset(years=count)}[unit]
+        return end - offset, end
+
+    def _timestamp(self, value):
+        value = pd.Timestamp(value)
+        return value.tz_localize(self.tz) if value.tz is None else value.tz_convert(self.tz)
+
+    def _fetch(self, symbols, interval, period, start, end):
+        if interval not in KITE_INTERVALS:
+            raise ValueError(f"Unsupported interval for Kite: {interval}")
+        kite_interval, window_days = KITE_INTERVALS[interval]
+        trim = period if start is None else None
+        start, end = self._range(period, start, end)
+
+        errors = {}
+        futures = {}
+        for symbol in dict.fromkeys(symbols):
+            try:
+                token = self.token(symbol)
+            except Exception as e:
+                errors[symbol] = e
+                continue
+            futures[symbol] = [
+                self._pool.submit(self._window, token, kite_interval, window_start, window_end)
+                for window_start, window_end in kite_windows(start, end, window_days)
+            ]
+
+        frames = {}
+        for symbol, windows in futures.items():
+            rows = []
+            for future in windows:
+                try:
+                    rows += future.result()
+                except Exception as e:
+                    errors.setdefault(symbol, e)
+            if symbol in errors or not rows:
+                continue
+            frame = self._frame(rows, interval)
+            frames[symbol] = period_slice(frame, trim) if trim else frame
+        return frames, errors
+
+    def _window(self, token, kite_interval, start, end):
+        self.limiter.acquire()
+        # KiteConnect only formats plain datetimes; both bounds are inclusive, in exchange time
+        return self.kite.historical_data(
+            token, start.tz_localize(None).to_pydatetime(), end.tz_localize(None).to_pydatetime(), kite_interval
+        )
+
+    def _frame(self, rows, interval):
+        frame = pd.DataFrame.from_records(rows)
+        index = pd.DatetimeIndex(pd.to_datetime(frame['date']), name='Datetime' if is_intraday(interval) else 'Date')
+        index = index.tz_localize(self.tz) if index.tz is None else index.tz_convert(self.tz)
+        frame = pd.DataFrame({
+            'Open': frame['open'].to_numpy(float), 'High': frame['high'].to_numpy(float),
+            'Low': frame['low'].to_numpy(float), 'Close': frame['close'].to_numpy(float),
+            'Volume': frame['volume'].to_numpy(),
+        }, index=index)
+        # Adjacent windows share their boundary bar
+        return frame[~frame.index.duplicated(keep='last')].sort_index()
+
+
+class FakeProvider(DataProvider):
+    """Serves fixed frames, for tests and offline runs.
+
+    `frames` maps a symbol, or a (symbol, interval) pair, to its full history;
+    requests are answered by slicing it. Every call is recorded in `calls`,
+    and symbols in `failing` raise as a failed request would.
+    """
+
+    name = 'fake'
+
+    def __init__(self, frames, failing=()):
+        self.frames = dict(frames)
+        self.failing = set(failing)
+        self.calls = []
+
+    def history(self, symbol, interval, period=None, start=None, end=None):
+        self.calls.append(('history', symbol, interval, period, start, end))
+        return self._slice(symbol, interval, period, start, end)
+
+    def download(self, symbols, interval, period=None, start=None, end=None):
+        self.calls.append(('download', tuple(symbols), interval, period, start, end))
+        frames = {}
+        for symbol in symbols:
+            try:
+                data = self._slice(symbol, interval, period, start, end)
+            except Exception:
+                continue
+            if not data.empty:
+                frames[symbol] = data
+        return frames
+
+    def _slice(self, symbol, interval, period, start, end):
+        if symbol in self.failing:
+            raise ConnectionError(f"{symbol} is unavailable")
+        data = self.frames.get((symbol, interval), self.frames.get(symbol))
+        if data is None or data.empty:
+            return pd.DataFrame()
+        if start is not None or end is not None:
+            index = data.index
+            mask = np.ones(len(index), dtype=bool)
+            if start is not None:
+                mask &= index >= _localize(start, index.tz)
+            if end is not None:
+                mask &= index < _localize(end, index.tz)
+            return data[mask]
+        return period_slice(data, period or 'max')
+
+
+class ProviderRouter(DataProvider):
+    """Sends each symbol to its own provider: `routes` maps symbols to providers, `default` serves the rest."""
+
+    name = 'router'
+
+    def __init__(self, default, routes=None):
+        self.default = default
+        self.routes = dict(routes or {})
+
+    def route(self, symbol):
+        return self.routes.get(symbol, self.default)
+
+    def history(self, symbol, interval, period=None, start=None, end=None):
+        return self.route(symbol).history(symbol, interval, period=period, start=start, end=end)
+
+    def download(self, symbols, interval, period=None, start=None, end=None):
+        frames, failed = {}, 0
+        groups = self.groups(symbols)
+        for provider, group in groups:
+            result = provider.download(group, interval, period=period, start=start, end=end)
+            if result is None:
+                failed += 1
+            else:
+                frames.update(result)
+        return None if groups and failed == len(groups) else frames
+
+    def groups(self, symbols):
+        grouped = {}
+        for symbol in symbols:
+            provider = self.route(symbol)
+            grouped.setdefault(id(provider), (provider, []))[1].append(symbol)
+        return list(grouped.values())
+
+
+def kite_windows(start, end, days):
+    """Splits [start, end] into consecutive windows of at most `days` days."""
+    windows = []
+    step = pd.Timedelta(days=days)
+    while start < end:
+        stop = min(start + step, end)
+        windows.append((start, stop))
+        start = stop
+    return windows
+
+
+def _localize(value, tz):
+    value = pd.Timestamp(value)
+    if tz is None:
+        return value.tz_localize(None) if value.tz is not None else value
+    return value.tz_localize(tz) if value.tz is None else value.tz_convert(tz)
@@ -0,0 +1,130 @@
+# market_analysis_app/data/resampler.py
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from market_analysis_app.data.bar_store import COLUMNS, DEFAULT_CAPACITY, TIMEFRAMES, BarSeries
+
+_SECOND = 1_000_000_000
+_IST_OFFSET = int(5.5 * 3600) * _SECOND
+_SESSION_CLOSE = (15 * 3600 + 30 * 60) * _SECOND
+_DAY = 86400 * _SECOND
+
+
+def _utc_ns(index):
+    index = index if index.tz is not None else index.tz_localize('Asia/Kolkata')
+    return index.tz_convert('UTC').as_unit('ns').asi8
+
+
+def resample(data, timeframe, tz='Asia/Kolkata'):
+    """Aggregates time-sorted OHLCV bars into a coarser timeframe of TIMEFRAMES.
+
+    Buckets follow the exchange grid: intraday bars start at 09:15 and every
+    step after it (so hourly bars are 09:15, 10:15, ..., 15:15), daily bars
+    at midnight IST.
+    """
+    if data is None or data.empty:
+        return data
+    step, origin = TIMEFRAMES[timeframe]
+    shift = _IST_OFFSET - origin
+    times = _utc_ns(data.index)
+    starts = (times + shift) // step * step - shift
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    last = np.r_[first[1:] - 1, len(starts) - 1]
+    columns = {
+        'Open': data['Open'].to_numpy(float)[first],
+        'High': np.maximum.reduceat(data['High'].to_numpy(float), first),
+        'Low': np.minimum.reduceat(data['Low'].to_numpy(float), first),
+        'Close': data['Close'].to_numpy(float)[last],
+    }
+    if 'Volume' in data:
+        columns['Volume'] = np.add.reduceat(data['Volume'].to_numpy(float), first)
+    index = pd.DatetimeIndex(starts[first].view('datetime64[ns]')).tz_localize('UTC').tz_convert(tz)
+    return pd.DataFrame(columns, index=index)
+
+
+class Resampler:
+    """Derives higher timeframes from one base series per symbol as its bars close.
+
+    Each update folds only the closed base bars newer than the last one seen
+    into per-timeframe BarSeries, so one download (or stream) per symbol keeps
+    every timeframe in sync. A derived bar counts as complete once the base
+    bar ending with it, or with the 15:30 session close, has been folded in.
+    """
+
+    def __init__(self, base='5m', timeframes=('15m', '1h', '1d'), capacity=None):
+        self.base = base
+        self.base_step = TIMEFRAMES[base][0]
+        self.timeframes = tuple(timeframes)
+        self.capacity = dict(DEFAULT_CAPACITY, **(capacity or {}))
+        self._series = {}
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol, data, now=None):
+        """Folds new closed bars of the base series in `data`; bars still forming at `now` are left out.
+
+        Returns the timeframes that gained a complete bar.
+        """
+        if data is None or data.empty:
+            return []
+        times = _utc_ns(data.index)
+        closed = len(times)
+        if now is not None:
+            closed = int(np.searchsorted(times + self.base_step, pd.Timestamp(now).value, side='right'))
+        with self._lock:
+            last = self._last.get(symbol)
+            if last is None:
+                if not closed:
+                    return []
+                for timeframe in self.timeframes:
+                    series = self._series[(symbol, timeframe)] = BarSeries(timeframe, self.capacity[timeframe])
+                    series.seed(resample(data.iloc[:closed], timeframe))
+                self._last[symbol] = int(times[closed - 1])
+                return [timeframe for timeframe in self.timeframes if self._last_complete(symbol, timeframe) is not None]
+
+            new = np.arange(np.searchsorted(times, last, side='right'), closed)
+            if not len(new):
+                return []
+            values = np.column_stack([
+                data[column].to_numpy(float)[new] if column in data else np.zeros(len(new)) for column in COLUMNS
+            ])
+            before = {timeframe: self._last_complete(symbol, timeframe) for timeframe in self.timeframes}
+            for timeframe in self.timeframes:
+                series = self._series[(symbol, timeframe)]
+                for time, row in zip(times[new], values):
+                    series.add_bar(int(time), *row)
+            self._last[symbol] = int(times[new[-1]])
+            return [timeframe for timeframe in self.timeframes if self._last_complete(symbol, timeframe) != before[timeframe]]
+
+    def _complete(self, symbol, timeframe):
+        series = self._series[(symbol, timeframe)]
+        if not series.count:
+            return False
+        start = int(series.times[series.head])
+        day = (start + _IST_OFFSET) // _DAY * _DAY - _IST_OFFSET
+        end = min(start + series.step, day + _SESSION_CLOSE)
+        return self._last[symbol] + self.base_step >= end
+
+    def _last_complete(self, symbol, timeframe):
+        """Start of the newest complete bar, or None."""
+        series = self._series[(symbol, timeframe)]
+        if self._complete(symbol, timeframe):
+            return int(series.times[series.head])
+        if series.count > 1:
+            return int(series.times[(series.head - 1) % series.capacity])
+        return None
+
+    def frame(self, symbol, timeframe, complete_only=True):
+        """Bars of a derived timeframe, oldest first, or None before the symbol's first update.
+
+        With complete_only the last bar is dropped while base bars for it are still to come.
+        """
+        with self._lock:
+            if (symbol, timeframe) not in self._series:
+                return None
+            forming = not complete_only or self._complete(symbol, timeframe)
+            # A copy: the next update() rewrites the series while strategies still read it
+            return self._series[(symbol, timeframe)].frame(include_forming=forming, copy=True)
@@ -0,0 +1,243 @@
+# market_analysis_app/data/warehouse.py
+
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from market_analysis_app.data.cache import is_intraday
+from market_analysis_app.data.providers import YFinanceProvider
+
+DEFAULT_WAREHOUSE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "market_analysis", "warehouse")
+
+COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# One fixed-width record per bar; the timestamp is UTC nanoseconds
+BAR_DTYPE = np.dtype([('ts', '<i8')] + [(column, '<f8') for column in COLUMNS])
+
+# yfinance limits per interval: (days per request, days of lookback it serves)
+YF_LIMITS = {
+    '1m': (7, 30), '2m': (60, 60), '5m': (60, 60), '15m': (60, 60), '30m': (60, 60),
+    '60m': (730, 730), '1h': (730, 730), '1d': (3650, None),
+}
+
+
+class Warehouse:
+    """Long-term bar history, partitioned by interval, symbol and month.
+
+    Layout: <root>/<interval>/<symbol>/<YYYY-MM>.npy (<YYYY>.npy for daily and
+    slower bars), each an uncompressed array of BAR_DTYPE records sorted by
+    time, plus <root>/<interval>/_index.json mapping every symbol to its
+    partitions' first and last timestamps and row counts. Partitions are
+    opened as read-only memory maps, so a query only pages in the partitions
+    and rows it touches. Unlike OHLCVCache nothing is evicted.
+    """
+
+    def __init__(self, root=None, tz='Asia/Kolkata'):
+        self.root = root or os.getenv("MARKET_WAREHOUSE_DIR", DEFAULT_WAREHOUSE_DIR)
+        self.tz = tz
+        self._indexes = {}
+
+    def _symbol_dir(self, symbol, interval):
+        return os.path.join(self.root, interval, re.sub(r'[^A-Za-z0-9._-]', '_', symbol))
+
+    def _partition_path(self, symbol, interval, key):
+        return os.path.join(self._symbol_dir(symbol, interval), f'{key}.npy')
+
+    def _index_path(self, interval):
+        return os.path.join(self.root, interval, '_index.json')
+
+    def _partition_keys(self, ts, interval):
+        index = pd.to_datetime(ts, unit='ns', utc=True).tz_convert(self.tz)
+        return np.asarray(index.strftime('%Y-%m' if is_intraday(interval) else '%Y'))
+
+    def read_index(self, interval):
+        """Returns {symbol: {partition: [first_ns, last_ns, rows]}} for an interval."""
+        if interval not in self._indexes:
+            try:
+                with open(self._index_path(interval)) as f:
+                    self._indexes[interval] = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._indexes[interval] = {}
+        return self._indexes[interval]
+
+    def _write_index(self, interval):
+        path = self._index_path(interval)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.read_index(interval), f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def symbols(self, interval):
+        return sorted(self.read_index(interval))
+
+    def coverage(self, symbol, interval):
+        """Returns (first, last) stored bar times of a symbol, or (None, None)."""
+        partitions = self.read_index(interval).get(symbol)
+        if not partitions:
+            return None, None
+        first = min(entry[0] for entry in partitions.values())
+        last = max(entry[1] for entry in partitions.values())
+        return (pd.Timestamp(first, unit='ns', tz='UTC').tz_convert(self.tz),
+                pd.Timestamp(last, unit='ns', tz='UTC').tz_convert(self.tz))
+
+    def _open(self, symbol, interval, key):
+        return np.load(self._partition_path(symbol, interval, key), mmap_mode='r')
+
+    def _write_partition(self, path, records):
+        tmp_path = path + '.tmp.npy'
+        np.save(tmp_path, records)
+        os.replace(tmp_path, path)
+
+    def append(self, symbol, interval, data):
+        """Adds bars to a symbol's history; bars at already stored times replace the stored ones.
+
+        Bars after the end of a partition are appended to it, so the usual
+        end-of-session update only rewrites the current month.
+        """
+        if data is None or data.empty:
+            return 0
+        index = data.index if data.index.tz is not None else data.index.tz_localize(self.tz)
+        records = np.zeros(len(data), dtype=BAR_DTYPE)
+        records['ts'] = index.tz_convert('UTC').as_unit('ns').asi8
+        for column in COLUMNS:
+            records[column] = data[column].to_numpy(dtype=float) if column in data else 0.0
+        records = records[np.argsort(records['ts'], kind='stable')]
+        # Within the new bars the last of any duplicate timestamp wins
+        last_of_each = np.append(records['ts'][1:] != records['ts'][:-1], True)
+        records = records[last_of_each]
+
+        os.makedirs(self._symbol_dir(symbol, interval), exist_ok=True)
+        partitions = self.read_index(interval).setdefault(symbol, {})
+        keys = self._partition_keys(records['ts'], interval)
+        for key in np.unique(keys):
+            part = records[keys == key]
+            path = self._partition_path(symbol, interval, key)
+            if key in partitions and os.path.exists(path):
+                existing = np.load(path)
+                if part['ts'][0] > existing['ts'][-1]:
+                    part = np.concatenate([existing, part])
+                else:
+                    kept = existing[~np.isin(existing['ts'], part['ts'])]
+                    part = np.concatenate([kept, part])
+                    part = part[np.argsort(part['ts'], kind='stable')]
+            self._write_partition(path, part)
+            partitions[str(key)] = [int(part['ts'][0]), int(part['ts'][-1]), len(part)]
+        self._write_index(interval)
+        return len(records)
+
+    def arrays(self, symbol, interval, start=None, end=None, lookback=0):
+        """Returns memory-mapped record views of a symbol's bars in [start, end), one per partition.
+
+        `lookback` also includes up to that many bars before start, e.g. to
+        warm up indicators.
+        """
+        partitions = self.read_index(interval).get(symbol, {})
+        start_ns = None if start is None else self._to_ns(start)
+        end_ns = None if end is None else self._to_ns(end)
+        views = []
+        needed = lookback if start_ns is not None else 0
+        for key in sorted(partitions, reverse=True):
+            first, last, _ = partitions[key]
+            if end_ns is not None and first >= end_ns:
+                continue
+            if start_ns is not None and last < start_ns and not needed:
+                break
+            records = self._open(symbol, interval, key)
+            ts = records['ts']
+            low = 0 if start_ns is None else int(np.searchsorted(ts, start_ns, side='left'))
+            high = len(records) if end_ns is None else int(np.searchsorted(ts, end_ns, side='left'))
+            extra = min(needed, low)
+            needed -= extra
+            if high > low - extra:
+                views.append(records[low - extra:high])
+        return views[::-1]
+
+    def _to_ns(self, moment):
+        moment = pd.Timestamp(moment)
+        if moment.tz is None:
+            moment = moment.tz_localize(self.tz)
+        return moment.tz_convert('UTC').as_unit('ns').value
+
+    def frame(self, symbol, interval, start=None, end=None, lookback=0):
+        """Returns a symbol's bars in [start, end) as a DataFrame, or None if none are stored."""
+        views = self.arrays(symbol, interval, start, end, lookback)
+        if not views:
+            return None
+        records = np.concatenate(views) if len(views) > 1 else np.array(views[0])
+        index = pd.to_datetime(records['ts'], unit='ns', utc=True).tz_convert(self.tz)
+        return pd.DataFrame({column: records[column] for column in COLUMNS}, index=index)
+
+    def load(self, symbols, start=None, end=None, interval='5m'):
+        """Returns {symbol: bars in [start, end) or None} for research and backtests.
+
+        Naive start/end are read in the warehouse timezone; only the rows in
+        range are copied out of the memory maps.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        return {symbol: self.frame(symbol, interval, start, end) for symbol in symbols}
+
+    def backfill(self, symbols, interval='5m', start=None, end=None, fetch=None):
+        """Downloads and stores bars for [start, end), resuming after each symbol's last stored bar.
+
+        `fetch(symbols, interval, start, end)` returns {symbol: DataFrame}; by
+        default one batched yfinance request per window, with windows sized
+        to yfinance's per-request limit and the start clipped to its lookback.
+        Returns {symbol: rows stored}.
+        """
+        fetch = fetch or _yfinance_fetch
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.now(tz=self.tz)
+        end = end.tz_localize(self.tz) if end.tz is None else end
+        window_days, lookback_days = YF_LIMITS.get(interval, (60, 60))
+        earliest = end - pd.Timedelta(days=lookback_days) if lookback_days and fetch is _yfinance_fetch else None
+
+        stored = {symbol: 0 for symbol in symbols}
+        groups = {}
+        for symbol in symbols:
+            _, last = self.coverage(symbol, interval)
+            begin = last if last is not None else start
+            if begin is None:
+                begin = earliest if earliest is not None else end - pd.Timedelta(days=window_days)
+            begin = pd.Timestamp(begin)
+            begin = begin.tz_localize(self.tz) if begin.tz is None else begin
+            if earliest is not None:
+                begin = max(begin, earliest)
+            groups.setdefault(begin, []).append(symbol)
+
+        for begin, group in groups.items():
+            window_start = begin
+            while window_start < end:
+                window_end = min(window_start + pd.Timedelta(days=window_days), end)
+                frames = fetch(group, interval, window_start, window_end) or {}
+                for symbol, data in frames.items():
+                    if symbol in stored and data is not None and not data.empty:
+                        stored[symbol] += self.append(symbol, interval, data)
+                window_start = window_end
+        return stored
+
+    def update(self, symbols, interval='5m'):
+        """End-of-session job: appends every bar since each symbol's last stored one."""
+        return self.backfill(symbols, interval)
+
+
+def _yfinance_fetch(symbols, interval, start, end):
+    return YFinanceProvider().download(list(symbols), interval, start=start, end=end)
+
+
+if __name__ == '__main__':
+    from market_analysis_app.config import SYMBOLS
+
+    parser = argparse.ArgumentParser(description="Backfill the bar warehouse from yfinance.")
+    parser.add_argument('symbols', nargs='*', default=list(SYMBOLS['INDICES'].values()) + SYMBOLS['NIFTY50'])
+    parser.add_argument('--interval', nargs='+', default=['1m', '5m'])
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    args = parser.parse_args()
+    warehouse = Warehouse()
+    for interval in args.interval:
+        stored = warehouse.backfill(args.symbols, interval, args.start, args.end)
+        print(f"{interval}: stored {sum(stored.values())} bars for {sum(1 for rows in stored.values() if rows)} symbols")
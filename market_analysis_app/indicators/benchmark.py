@@ -0,0 +1,85 @@
+# market_analysis_app/indicators/benchmark.py
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from market_analysis_app.indicators import panel
+
+# Each case is (name, pandas_ta version on (pandas_ta, one DataFrame of bars), panel kernel on {column: 2-D array})
+# pandas_ta is imported by run() only, so the panel kernels never depend on it
+CASES = [
+    ('ema_9', lambda ta, data: ta.ema(data['Close'], 9, talib=False), lambda bars: panel.ema(bars['Close'], 9)),
+    ('sma_21', lambda ta, data: ta.sma(data['Close'], 21, talib=False), lambda bars: panel.sma(bars['Close'], 21)),
+    ('vortex', lambda ta, data: ta.vortex(data['High'], data['Low'], data['Close']),
+     lambda bars: panel.vortex(bars['High'], bars['Low'], bars['Close'])),
+    ('macd', lambda ta, data: ta.macd(data['Close'], talib=False), lambda bars: panel.macd(bars['Close'])),
+    ('psar', lambda ta, data: ta.psar(data['High'], data['Low']), lambda bars: panel.psar(bars['High'], bars['Low'])),
+    ('ichimoku', lambda ta, data: ta.ichimoku(data['High'], data['Low'], data['Close']),
+     lambda bars: panel.ichimoku(bars['High'], bars['Low'], bars['Close'])),
+    # strategy3's patterns; pandas_ta needs TA-Lib for engulfing and hammer
+    ('candles', lambda ta, data: data.ta.cdl_pattern(name=['doji', 'engulfing', 'hammer']),
+     lambda bars: panel.candle_patterns(bars['Open'], bars['High'], bars['Low'], bars['Close'])),
+]
+
+
+def random_bars(bars, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1000 + np.cumsum(rng.normal(0, 1, bars))
+    open_ = close + rng.normal(0, 0.5, bars)
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + rng.uniform(0, 1, bars),
+        'Low': np.minimum(open_, close) - rng.uniform(0, 1, bars),
+        'Close': close,
+    })
+
+
+def best_time(func, repeat):
+    """Best wall time of `repeat` runs, in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def run(bars=100_000, symbols=50, panel_bars=5_000, repeat=3):
+    """Times pandas_ta against the panel kernels on one long series and on a wide panel.
+
+    The panel case runs pandas_ta once per symbol and each kernel once for
+    the whole (symbols x panel_bars) panel. Returns a DataFrame of timings.
+    """
+    import pandas_ta as ta
+
+    long_series = random_bars(bars)
+    long_panel = {column: long_series[column].to_numpy()[None, :] for column in long_series}
+    frames = [random_bars(panel_bars, seed=seed) for seed in range(symbols)]
+    wide_panel = {column: np.vstack([data[column].to_numpy() for data in frames]) for column in frames[0]}
+
+    rows = []
+    for name, reference, kernel in CASES:
+        rows.append({
+            'indicator': name,
+            'long_pandas_ta_ms': best_time(lambda: reference(ta, long_series), repeat),
+            'long_kernel_ms': best_time(lambda: kernel(long_panel), repeat),
+            'panel_pandas_ta_ms': best_time(lambda: [reference(ta, data) for data in frames], repeat),
+            'panel_kernel_ms': best_time(lambda: kernel(wide_panel), repeat),
+        })
+    table = pd.DataFrame(rows).set_index('indicator')
+    table['long_speedup'] = table['long_pandas_ta_ms'] / table['long_kernel_ms']
+    table['panel_speedup'] = table['panel_pandas_ta_ms'] / table['panel_kernel_ms']
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the panel indicator kernels against pandas_ta.")
+    parser.add_argument('--bars', type=int, default=100_000, help='length of the long series')
+    parser.add_argument('--symbols', type=int, default=50, help='rows of the wide panel')
+    parser.add_argument('--panel-bars', type=int, default=5_000, help='bars per row of the wide panel')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(run(args.bars, args.symbols, args.panel_bars, args.repeat).round(2).to_string())
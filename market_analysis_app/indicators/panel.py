@@ -0,0 +1,235 @@
+# market_analysis_app/indicators/panel.py
+
+import numpy as np
+import pandas as pd
+
+# Indicators over a symbols x time panel: 2-D float arrays with one row per
+# symbol and time on the last axis. Rows may start with NaN (shorter
+# histories are right-aligned) but have no gaps after their first bar.
+# Definitions and warm-up rules follow indicators.streaming, i.e. pandas_ta's
+# native implementations, and values agree with them to floating-point rounding.
+
+
+def _panel(values):
+    return np.atleast_2d(np.asarray(values, dtype=float))
+
+
+def first_valid(values):
+    """Index of each row's first non-NaN value (the row length if there is none)."""
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=-1), valid.argmax(axis=-1), values.shape[-1])
+
+
+def shift(values, periods=1):
+    """Shifts every row `periods` bars later (earlier if negative), filling with NaN."""
+    values = _panel(values)
+    result = np.full_like(values, np.nan)
+    if periods > 0:
+        result[:, periods:] = values[:, :-periods]
+    elif periods < 0:
+        result[:, :periods] = values[:, -periods:]
+    else:
+        result[:] = values
+    return result
+
+
+def rolling_sum(values, length):
+    """Sum of the last `length` values; NaN while the window holds a NaN.
+
+    Each window is summed directly rather than as a difference of prefix
+    sums, so the error stays bounded by the window length however long the
+    series is, like the compensated streaming.RollingSum.
+    """
+    values = _panel(values)
+    result = np.full_like(values, np.nan)
+    if values.shape[1] >= length:
+        np.sum(np.lib.stride_tricks.sliding_window_view(values, length, axis=1), axis=-1, out=result[:, length - 1:])
+    return result
+
+
+def sma(values, length):
+    return rolling_sum(values, length) / length
+
+
+def _rolling_extreme(values, length, combine, fill):
+    # van Herk/Gil-Werman: split time into blocks of `length`; a window's extreme is
+    # the extreme of the suffix of one block and the prefix of the next
+    values = _panel(values)
+    rows, bars = values.shape
+    result = np.full_like(values, np.nan)
+    if bars < length:
+        return result
+    blocks = -(-bars // length)
+    padded = np.full((rows, blocks * length), fill)
+    padded[:, :bars] = values
+    blocked = padded.reshape(rows, blocks, length)
+    prefix = combine.accumulate(blocked, axis=2).reshape(rows, -1)
+    suffix = combine.accumulate(blocked[:, :, ::-1], axis=2)[:, :, ::-1].reshape(rows, -1)
+    combine(suffix[:, :bars - length + 1], prefix[:, length - 1:bars], out=result[:, length - 1:])
+    return result
+
+
+def rolling_max(values, length):
+    return _rolling_extreme(values, length, np.maximum, -np.inf)
+
+
+def rolling_min(values, length):
+    return _rolling_extreme(values, length, np.minimum, np.inf)
+
+
+def ema(values, length):
+    """EMA seeded with the mean of each row's first `length` values, as pandas_ta's presma EMA."""
+    values = _panel(values)
+    rows, bars = values.shape
+    seeds = first_valid(values) + length - 1
+    seeded = np.flatnonzero(seeds < bars)
+    series = np.full((bars, rows), np.nan)
+    for row in seeded:
+        seed = seeds[row]
+        series[seed, row] = values[row, seed - length + 1:seed + 1].sum() / length
+        series[seed + 1:, row] = values[row, seed + 1:]
+    # The recursion runs in pandas' compiled ewm(adjust=False) loop, which is
+    # exactly what pandas_ta applies after its SMA seed; numpy has no recursive filter
+    smoothed = pd.DataFrame(series, copy=False).ewm(span=length, adjust=False).mean()
+    return np.ascontiguousarray(smoothed.to_numpy().T)
+
+
+def psar(high, low, af0=0.02, max_af=0.2):
+    """Parabolic SAR; returns (long, short, af, reversal) like pandas_ta.psar(high, low).
+
+    The recursion branches on every bar, so each row is a plain float loop.
+    """
+    high, low = _panel(high), _panel(low)
+    rows, bars = high.shape
+    long, short = np.full((rows, bars), np.nan), np.full((rows, bars), np.nan)
+    af_values, reversal = np.full((rows, bars), np.nan), np.zeros((rows, bars), dtype=np.int64)
+    starts = first_valid(high)
+    for row in range(rows):
+        first = int(starts[row])
+        if first >= bars:
+            continue
+        h, l = high[row, first:].tolist(), low[row, first:].tolist()
+        row_long, row_short = [np.nan] * len(h), [np.nan] * len(h)
+        row_af, row_reversal = [af0] * len(h), [0] * len(h)
+        falling = False
+        if len(h) > 1:
+            # Initial direction from the -DM of the first two bars
+            up, down = h[1] - h[0], l[0] - l[1]
+            minus_dm = down if (down > up and down > 0) else 0
+            falling = abs(minus_dm) >= np.finfo(float).eps and minus_dm > 0
+        ep = l[0] if falling else h[0]
+        sar = h[0] if falling else l[0]
+        af = af0
+        for i in range(1, len(h)):
+            sar = sar + af * (ep - sar)
+            if falling:
+                reverse = h[i] > sar
+                if l[i] < ep:
+                    ep = l[i]
+                    af = min(af + af0, max_af)
+                sar = max(h[i - 1], sar)
+            else:
+                reverse = l[i] < sar
+                if h[i] > ep:
+                    ep = h[i]
+                    af = min(af + af0, max_af)
+                sar = min(l[i - 1], sar)
+            if reverse:
+                sar = ep
+                af = af0
+                falling = not falling
+                ep = l[i] if falling else h[i]
+            if falling:
+                row_short[i] = sar
+            else:
+                row_long[i] = sar
+            row_af[i] = af
+            row_reversal[i] = int(reverse)
+        long[row, first:], short[row, first:] = row_long, row_short
+        af_values[row, first:], reversal[row, first:] = row_af, row_reversal
+    return long, short, af_values, reversal
+
+
+def true_range(high, low, close):
+    """True range; each row's first bar has no previous close and uses High - Low."""
+    high, low, close = _panel(high), _panel(low), _panel(close)
+    previous = shift(close)
+    # fmax ignores the NaN previous close on a row's first bar
+    return np.fmax(np.abs(high - low), np.fmax(np.abs(high - previous), np.abs(previous - low)))
+
+
+def vortex(high, low, close, length=14):
+    """Returns (VI+, VI-)."""
+    high, low = _panel(high), _panel(low)
+    tr_sum = rolling_sum(true_range(high, low, close), length)
+    plus = rolling_sum(np.abs(high - shift(low)), length)
+    minus = rolling_sum(np.abs(low - shift(high)), length)
+    return plus / tr_sum, minus / tr_sum
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """Returns (macd, histogram, signal)."""
+    if slow < fast:
+        fast, slow = slow, fast
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, line - signal_line, signal_line
+
+
+def midprice(high, low, length):
+    return 0.5 * (rolling_min(low, length) + rolling_max(high, length))
+
+
+def ichimoku(high, low, close, tenkan=9, kijun=26, senkou=52):
+    """Returns {column: panel} with pandas_ta.ichimoku()'s per-bar columns (spans as plotted, chikou leading)."""
+    tenkan_line = midprice(high, low, tenkan)
+    kijun_line = midprice(high, low, kijun)
+    return {
+        f'ISA_{tenkan}': shift(0.5 * (tenkan_line + kijun_line), kijun - 1),
+        f'ISB_{kijun}': shift(midprice(high, low, senkou), kijun - 1),
+        f'ITS_{tenkan}': tenkan_line,
+        f'IKS_{kijun}': kijun_line,
+        f'ICS_{kijun}': shift(close, -(kijun - 1)),
+    }
+
+
+def candle_patterns(open_, high, low, close, doji_length=10, doji_factor=10):
+    """Doji, engulfing and hammer panels with the values of streaming.CandlePatterns."""
+    open_, high, low, close = _panel(open_), _panel(high), _panel(low), _panel(close)
+    body = np.abs(close - open_)
+    hl_range = high - low
+    color = np.where(close >= open_, 1, -1)
+    bars = np.arange(open_.shape[1]) - first_valid(close)[:, None]
+
+    doji = np.where(body < 0.01 * doji_factor * sma(np.abs(hl_range), doji_length), 100.0, 0.0)
+
+    p_open, p_close, p_low = shift(open_), shift(close), shift(low)
+    p_color = shift(color.astype(float))
+    engulfing_up = (color == 1) & (p_color == -1) & (
+        ((close >= p_open) & (open_ < p_close)) | ((close > p_open) & (open_ <= p_close))
+    )
+    engulfing_down = (color == -1) & (p_color == 1) & (
+        ((open_ >= p_close) & (close < p_open)) | ((open_ > p_close) & (close <= p_open))
+    )
+    strength = np.where((open_ != p_close) & (close != p_open), 100.0, 80.0)
+    engulfing = np.where((bars >= 2) & (engulfing_up | engulfing_down), color * strength, 0.0)
+
+    # TA-Lib's averages: body and range over the 10 prior bars, range over the 5 bars before the prior one
+    body_average = shift(rolling_sum(body, 10)) / 10
+    shadow_average = 0.1 * (shift(rolling_sum(hl_range, 10)) / 10)
+    near_average = 0.2 * (shift(rolling_sum(hl_range, 5), 2) / 5)
+    upper_shadow = high - np.maximum(close, open_)
+    lower_shadow = np.minimum(close, open_) - low
+    hammer = np.where(
+        (bars >= 11) &
+        (body < body_average) &
+        (lower_shadow > body) &
+        (upper_shadow < shadow_average) &
+        (np.minimum(close, open_) <= p_low + near_average),
+        100.0, 0.0
+    )
+    return {
+        f'CDL_DOJI_{doji_length}_{0.01 * doji_factor}': doji,
+        'CDL_ENGULFING': engulfing,
+        'CDL_HAMMER': hammer,
+    }
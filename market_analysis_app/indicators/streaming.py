@@ -0,0 +1,405 @@
+# market_analysis_app/indicators/streaming.py
+
+from collections import deque
+
+import numpy as np
+
+# Incremental versions of the pandas_ta indicators used by the strategies.
+# Every class keeps only the state it needs for the next bar, so update()
+# costs the same whether it is the 10th or the 10,000th bar of the session.
+# Values follow pandas_ta's native (non TA-Lib) definitions and warm-up rules:
+# an indicator returns NaN until pandas_ta would produce a value.
+
+NAN = float('nan')
+
+
+def _isnan(value):
+    return value != value
+
+
+class EMA:
+    """Exponential moving average seeded with the SMA of the first `length` values."""
+
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self._warmup = []
+        self.value = NAN
+
+    def update(self, value):
+        if _isnan(self.value):
+            if _isnan(value) and not self._warmup:
+                return NAN
+            self._warmup.append(value)
+            if len(self._warmup) == self.length:
+                self.value = np.array(self._warmup).sum() / self.length
+                self._warmup = []
+            return self.value
+        if not _isnan(value) and self.value != value:
+            # Same arithmetic as pandas' ewm(adjust=False).mean()
+            old_weight = 1.0 - self.alpha
+            self.value = (old_weight * self.value + self.alpha * value) / (old_weight + self.alpha)
+        return self.value
+
+
+class RollingSum:
+    """Fixed-window sum with Kahan compensation, skipping NaN like pandas' rolling().sum()."""
+
+    def __init__(self, length):
+        self.length = length
+        self._window = deque()
+        self._count = 0
+        self._sum = 0.0
+        self._add_compensation = 0.0
+        self._remove_compensation = 0.0
+
+    def _add(self, value):
+        y = value - self._add_compensation
+        t = self._sum + y
+        self._add_compensation = t - self._sum - y
+        self._sum = t
+
+    def _remove(self, value):
+        y = -value - self._remove_compensation
+        t = self._sum + y
+        self._remove_compensation = t - self._sum - y
+        self._sum = t
+
+    def update(self, value):
+        if len(self._window) == self.length:
+            old = self._window.popleft()
+            if not _isnan(old):
+                self._count -= 1
+                self._remove(old)
+        self._window.append(value)
+        if not _isnan(value):
+            self._count += 1
+            self._add(value)
+        return self.value
+
+    @property
+    def value(self):
+        if self._count < self.length:
+            return NAN
+        return self._sum
+
+
+class SMA:
+    """Simple moving average over `length` values."""
+
+    def __init__(self, length):
+        self.length = length
+        self._sum = RollingSum(length)
+        self.value = NAN
+
+    def update(self, value):
+        total = self._sum.update(value)
+        self.value = total / self.length
+        return self.value
+
+
+class TrueRange:
+    """True range; the first bar has no previous close and uses High - Low."""
+
+    def __init__(self):
+        self._prev_close = NAN
+        self.value = NAN
+
+    def update(self, high, low, close):
+        ranges = [abs(high - low)]
+        if not _isnan(self._prev_close):
+            ranges += [abs(high - self._prev_close), abs(self._prev_close - low)]
+        self.value = max(ranges)
+        self._prev_close = close
+        return self.value
+
+
+class Vortex:
+    """Vortex indicator; update() returns (VI+, VI-)."""
+
+    def __init__(self, length=14):
+        self._tr = TrueRange()
+        self._tr_sum = RollingSum(length)
+        self._plus_sum = RollingSum(length)
+        self._minus_sum = RollingSum(length)
+        self._prev_high = NAN
+        self._prev_low = NAN
+        self.value = (NAN, NAN)
+
+    def update(self, high, low, close):
+        tr_sum = self._tr_sum.update(self._tr.update(high, low, close))
+        plus = self._plus_sum.update(abs(high - self._prev_low))
+        minus = self._minus_sum.update(abs(low - self._prev_high))
+        self._prev_high, self._prev_low = high, low
+        self.value = (plus / tr_sum, minus / tr_sum)
+        return self.value
+
+
+class MACD:
+    """MACD line, histogram and signal line; update() returns (macd, histogram, signal)."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        if slow < fast:
+            fast, slow = slow, fast
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, close):
+        macd = self._fast.update(close) - self._slow.update(close)
+        signal = self._signal.update(macd)
+        self.value = (macd, macd - signal, signal)
+        return self.value
+
+
+class PSAR:
+    """Parabolic SAR; update() returns (long, short, af, reversal).
+
+    The first bar only records the range: the initial trend direction needs two
+    bars, exactly as in pandas_ta, so the long/short values start on bar two.
+    """
+
+    def __init__(self, af0=0.02, max_af=0.2):
+        self.af0 = af0
+        self.max_af = max_af
+        self._bars = 0
+        self._prev_high = NAN
+        self._prev_low = NAN
+        self._falling = False
+        self._ep = NAN
+        self._sar = NAN
+        self._af = af0
+        self.value = (NAN, NAN, af0, 0)
+
+    def update(self, high, low):
+        self._bars += 1
+        if self._bars == 1:
+            self._prev_high, self._prev_low = high, low
+            self.value = (NAN, NAN, self.af0, 0)
+            return self.value
+        if self._bars == 2:
+            # Direction comes from the -DM of the first two bars
+            up = high - self._prev_high
+            down = self._prev_low - low
+            minus_dm = down if (down > up and down > 0) else 0
+            self._falling = abs(minus_dm) >= np.finfo(float).eps and minus_dm > 0
+            self._ep = self._prev_low if self._falling else self._prev_high
+            self._sar = self._prev_high if self._falling else self._prev_low
+
+        sar = self._sar + self._af * (self._ep - self._sar)
+        if self._falling:
+            reverse = high > sar
+            if low < self._ep:
+                self._ep = low
+                self._af = min(self._af + self.af0, self.max_af)
+            sar = max(self._prev_high, sar)
+        else:
+            reverse = low < sar
+            if high > self._ep:
+                self._ep = high
+                self._af = min(self._af + self.af0, self.max_af)
+            sar = min(self._prev_low, sar)
+
+        if reverse:
+            sar = self._ep
+            self._af = self.af0
+            self._falling = not self._falling
+            self._ep = low if self._falling else high
+
+        self._sar = sar
+        self._prev_high, self._prev_low = high, low
+        if self._falling:
+            self.value = (NAN, sar, self._af, int(reverse))
+        else:
+            self.value = (sar, NAN, self._af, int(reverse))
+        return self.value
+
+
+class RollingMax:
+    """Rolling maximum over `length` values using a monotonic deque (amortized O(1))."""
+
+    def __init__(self, length):
+        self.length = length
+        self._count = 0
+        self._deque = deque()  # (index, value) with decreasing values
+        self.value = NAN
+
+    def _better(self, new, old):
+        return new >= old
+
+    def update(self, value):
+        index = self._count
+        self._count += 1
+        if not _isnan(value):
+            while self._deque and self._better(value, self._deque[-1][1]):
+                self._deque.pop()
+            self._deque.append((index, value))
+        while self._deque and self._deque[0][0] <= index - self.length:
+            self._deque.popleft()
+        if self._count < self.length or not self._deque:
+            self.value = NAN
+        else:
+            self.value = self._deque[0][1]
+        return self.value
+
+
+class RollingMin(RollingMax):
+    """Rolling minimum over `length` values using a monotonic deque (amortized O(1))."""
+
+    def _better(self, new, old):
+        return new <= old
+
+
+class Midprice:
+    """Midpoint of the highest high and lowest low over `length` bars."""
+
+    def __init__(self, length):
+        self._high = RollingMax(length)
+        self._low = RollingMin(length)
+        self.value = NAN
+
+    def update(self, high, low):
+        self.value = 0.5 * (self._low.update(low) + self._high.update(high))
+        return self.value
+
+
+class Ichimoku:
+    """Ichimoku cloud with the same column semantics as pandas_ta.ichimoku().
+
+    span_a / span_b are the values plotted on the current bar, i.e. the spans
+    computed kijun - 1 bars ago. The spans computed from the latest bars, which
+    pandas_ta returns as the separate lookahead frame, are available through
+    span_a_ahead / span_b_ahead without rebuilding anything.
+    """
+
+    def __init__(self, tenkan=9, kijun=26, senkou=52):
+        self.tenkan, self.kijun, self.senkou = tenkan, kijun, senkou
+        self._tenkan = Midprice(tenkan)
+        self._kijun = Midprice(kijun)
+        self._senkou = Midprice(senkou)
+        self._span_a = deque([NAN] * kijun, maxlen=kijun)
+        self._span_b = deque([NAN] * kijun, maxlen=kijun)
+        self.value = {}
+
+    def update(self, high, low):
+        tenkan = self._tenkan.update(high, low)
+        kijun = self._kijun.update(high, low)
+        self._span_a.append(0.5 * (tenkan + kijun))
+        self._span_b.append(self._senkou.update(high, low))
+        self.value = {
+            f'ISA_{self.tenkan}': self._span_a[0],
+            f'ISB_{self.kijun}': self._span_b[0],
+            f'ITS_{self.tenkan}': tenkan,
+            f'IKS_{self.kijun}': kijun,
+        }
+        return self.value
+
+    @property
+    def span_a_ahead(self):
+        """Leading span A for the next kijun - 1 bars, nearest bar first."""
+        return list(self._span_a)[1:]
+
+    @property
+    def span_b_ahead(self):
+        """Leading span B for the next kijun - 1 bars, nearest bar first."""
+        return list(self._span_b)[1:]
+
+
+class _PeriodTotal:
+    """Running sum of a candle range over the `length` bars before the current one."""
+
+    def __init__(self, length):
+        self.length = length
+        self._values = deque()
+        self.total = 0.0
+
+    @property
+    def ready(self):
+        return len(self._values) == self.length
+
+    def average(self, factor):
+        return factor * (self.total / self.length)
+
+    def push(self, value):
+        # TA-Lib adds the new range and drops the trailing one in a single step
+        if self.ready:
+            self.total += value - self._values.popleft()
+        else:
+            self.total += value
+        self._values.append(value)
+
+
+class CandlePatterns:
+    """Doji, engulfing and hammer detection, one bar at a time.
+
+    Columns and values match pandas_ta.cdl_pattern(name=['doji', 'engulfing',
+    'hammer']): doji is pandas_ta's own pattern, engulfing and hammer follow
+    TA-Lib's CDLENGULFING and CDLHAMMER with default candle settings, so TA-Lib
+    is not needed to evaluate them.
+    """
+
+    def __init__(self, doji_length=10, doji_factor=10):
+        self.doji_column = f'CDL_DOJI_{doji_length}_{0.01 * doji_factor}'
+        self._doji_factor = doji_factor
+        self._doji_range = SMA(doji_length)
+        self._body = _PeriodTotal(10)          # BodyShort: real body, 10 bars
+        self._shadow = _PeriodTotal(10)        # ShadowVeryShort: high-low, 10 bars
+        self._near = _PeriodTotal(5)           # Near: high-low, 5 bars
+        self._prev = None
+        self._bars = 0
+        self.value = {}
+
+    def update(self, open_, high, low, close):
+        body = abs(close - open_)
+        hl_range = high - low
+        color = 1 if close >= open_ else -1
+
+        doji_average = self._doji_range.update(abs(hl_range))
+        doji = 100.0 if body < 0.01 * self._doji_factor * doji_average else 0.0
+
+        engulfing = 0.0
+        if self._bars >= 2:
+            p_open, p_high, p_low, p_close = self._prev
+            p_color = 1 if p_close >= p_open else -1
+            if (
+                (color == 1 and p_color == -1 and (
+                    (close >= p_open and open_ < p_close) or (close > p_open and open_ <= p_close)
+                )) or
+                (color == -1 and p_color == 1 and (
+                    (open_ >= p_close and close < p_open) or (open_ > p_close and close <= p_open)
+                ))
+            ):
+                if open_ != p_close and close != p_open:
+                    engulfing = color * 100.0
+                else:
+                    engulfing = color * 80.0
+
+        hammer = 0.0
+        # TA-Lib's lookback is 11 bars: 10 for the averages plus the prior candle
+        if self._bars >= 11:
+            upper_shadow = high - max(close, open_)
+            lower_shadow = min(close, open_) - low
+            if (
+                body < self._body.average(1.0) and
+                lower_shadow > body and
+                upper_shadow < self._shadow.average(0.1) and
+                min(close, open_) <= self._prev[2] + self._near.average(0.2)
+            ):
+                hammer = 100.0
+
+        # Windows start where TA-Lib starts summing for its first output bar
+        if self._bars >= 6:
+            self._near.push(self._prev[1] - self._prev[2])
+        if self._bars >= 1:
+            self._body.push(body)
+            self._shadow.push(hl_range)
+        self._prev = (open_, high, low, close)
+        self._bars += 1
+
+        self.value = {
+            self.doji_column: doji,
+            'CDL_ENGULFING': engulfing,
+            'CDL_HAMMER': hammer,
+        }
+        return self.value
@@ -1,17 +1,40 @@
 # main.py
 
-import time
 import datetime
 from dotenv import load_dotenv
 import os
 import json
 import logging
 import asyncio
+import collections
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
-from market_analysis_app.config import SYMBOLS
-from market_analysis_app.data.data_fetcher import get_data
-from market_analysis_app.strategies import strategy1, strategy2, strategy3, strategy4, oi_strategy
+import pandas as pd
+
+from market_analysis_app.config import SYMBOLS, INDEX_TOKENS
+from market_analysis_app.data.data_fetcher import get_universe_data, set_provider
+from market_analysis_app.data.providers import KiteProvider, ProviderRouter, YFinanceProvider
+from market_analysis_app.data.cache import OHLCVCache
+from market_analysis_app.data.bar_store import BarStore, TIMEFRAMES
+from market_analysis_app.data.resampler import Resampler
+from market_analysis_app.data.warehouse import Warehouse
+from market_analysis_app.data.option_chains import OptionChainStore
+from market_analysis_app.options.greeks import chain_greeks, iv_skew
+from market_analysis_app.options.oi_analytics import analyze_chain
+from market_analysis_app.strategies import strategy1, strategy3, strategy4, oi_strategy
+from market_analysis_app.strategies.levels import LevelStore
+from market_analysis_app.strategies.scanner import scan_universe
 from market_analysis_app.notifiers.telegram_notifier import TelegramNotifier
+from market_analysis_app.ticks import bus as topics
+from market_analysis_app.ticks.bus import EventBus
+from market_analysis_app.ticks.ingest import TickIngestor
+from market_analysis_app.ticks.options import AtmOptionFeed
+from market_analysis_app.scheduler import Scheduler, CandleClose, DailyAt, CRITICAL, NORMAL, LOW, IST
+from market_analysis_app.zerodha.instruments import InstrumentMaster
+from market_analysis_app.zerodha.order_book import OrderBook
+from market_analysis_app.zerodha.order_gateway import OrderGateway, order_tag
+from market_analysis_app.zerodha.postbacks import PostbackServer
 from market_analysis_app.zerodha.zerodha_client import ZerodhaClient
 
 # Configure logging
@@ -27,6 +50,57 @@ ZERODHA_API_KEY = os.getenv("ZERODHA_API_KEY")
 ZERODHA_API_SECRET = os.getenv("ZERODHA_API_SECRET")
 ZERODHA_ACCESS_TOKEN = os.getenv("ZERODHA_ACCESS_TOKEN")
 
+# Comma-separated symbols whose bars come from Kite historical data instead of yfinance ("*" for all)
+KITE_DATA_SYMBOLS = [symbol.strip() for symbol in os.getenv("KITE_DATA_SYMBOLS", "").split(",") if symbol.strip()]
+
+# On-disk OHLCV cache shared by every data fetch in the loop
+ohlcv_cache = OHLCVCache()
+
+# Strategy2/strategy4 levels, computed once per session
+level_store = LevelStore()
+
+# Long-term bar history for research and backtests, appended after every session
+warehouse = Warehouse()
+WAREHOUSE_INTERVALS = ('1m', '5m')
+
+# Every polled option chain, delta-encoded per session for intraday OI trends
+option_chains = OptionChainStore()
+
+# Bounded pool for blocking work (downloads, option-chain scrapes, orders, strategy
+# runs) so the event loop stays free and independent calls overlap
+executor = ThreadPoolExecutor(max_workers=int(os.getenv("ANALYSIS_WORKERS", "8")))
+
+# A single fetch slower than this is abandoned for the cycle instead of holding up the others
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "60"))
+
+# Indices with NSE option-chain data
+OI_INDICES = ("NIFTY", "BANKNIFTY")
+
+# Seconds after a candle close before its bars are requested, so the provider has published them
+BAR_DELAY = float(os.getenv("BAR_DELAY", "2"))
+
+# Recent signals kept for the dashboard
+MAX_SIGNALS = 50
+
+# Ranked universe-scanner rows kept for the dashboard
+SCANNER_ROWS = 20
+
+# Live ticks and feed status events, fanned out in-process
+event_bus = EventBus()
+
+# Strikes either side of each index's ATM strike whose CE and PE ticks are streamed
+ATM_OPTION_STRIKES = int(os.getenv("ATM_OPTION_STRIKES", "2"))
+
+# Index bars aggregated from live ticks, keyed by the same symbols as the downloads
+bar_store = BarStore({INDEX_TOKENS[name]: symbol for name, symbol in SYMBOLS['INDICES'].items()})
+
+# Without the tick feed each index is downloaded once per candle close at the base interval;
+# 15m, 1h and daily bars are resampled from it. A few sessions give the slower timeframes warm-up.
+BASE_INTERVAL = '5m'
+BASE_PERIOD = '5d'
+resampler = Resampler(BASE_INTERVAL, ('15m', '1h', '1d'))
+_base_loads = {}
+
 # Initialize notifier
 notifier = None
 if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
@@ -58,23 +132,91 @@ if ZERODHA_API_KEY and ZERODHA_API_SECRET:
 else:
     logging.warning("Zerodha client not initialized. Please set ZERODHA_API_KEY and ZERODHA_API_SECRET in your .env file.")
 
-async def send_notification(message):
-    """Sends a notification."""
+# Orders go out concurrently over one pooled Kite session
+order_gateway = OrderGateway.from_client(zerodha_client) if zerodha_client else None
+
+# Kite's instrument dump, cached on disk for the day, resolving option contracts for orders
+instrument_master = InstrumentMaster(zerodha_client.kite) if zerodha_client else None
+
+# Order tag prefixes attributing every order to the strategy that placed it
+STRATEGY_TAGS = {'strategy1': 'MAS1', 'strategy3': 'MAS3'}
+
+def underlying_of(tradingsymbol):
+    """The index (or other underlying) a contract belongs to, from the instrument master."""
+    return instrument_master.underlying(tradingsymbol) if instrument_master else None
+
+# The day's orders and positions, seeded from Kite once and then kept current by order updates,
+# so a signal that persists across candles does not open another position in the same index
+order_book = OrderBook({prefix: strategy for strategy, prefix in STRATEGY_TAGS.items()}, underlying_of)
+
+# Port for Kite order postbacks (the app's registered postback URL must reach it); unset to rely on the ticker's order updates
+KITE_POSTBACK_PORT = os.getenv("KITE_POSTBACK_PORT")
+
+# Route the chosen symbols' downloads to Kite; everything else stays on yfinance
+if zerodha_client and KITE_DATA_SYMBOLS:
+    kite_provider = KiteProvider.from_client(
+        zerodha_client, tokens={SYMBOLS['INDICES'][name]: token for name, token in INDEX_TOKENS.items()}
+    )
+    if KITE_DATA_SYMBOLS == ['*']:
+        set_provider(kite_provider)
+    else:
+        set_provider(ProviderRouter(YFinanceProvider(), {symbol: kite_provider for symbol in KITE_DATA_SYMBOLS}))
+    logging.info(f"Fetching bars for {', '.join(KITE_DATA_SYMBOLS)} from Kite.")
+
+async def send_notification(message, topic=None):
+    """Queues a notification for the notifier's background worker and returns at once.
+
+    Messages with the same `topic` coalesce, and a topic's message is not
+    resent while it is unchanged (see NotificationQueue).
+    """
     logging.info(f"NOTIFICATION: {message}")
     if notifier:
-        await notifier.send_message(message)
+        notifier.notify(message, topic)
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking call (network I/O, pandas work) in the shared thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+async def fetch(func, *args, **kwargs):
+    """Runs a blocking fetch in the thread pool, giving up after FETCH_TIMEOUT seconds."""
+    return await asyncio.wait_for(run_blocking(func, *args, **kwargs), FETCH_TIMEOUT)
 
 def update_dashboard(data):
     """Updates the dashboard data by writing to a JSON file."""
     logging.info("Updating dashboard...")
     try:
         with open("dashboard_data.json", "w") as f:
-            json.dump(data, f, indent=4)
+            json.dump(data, f, indent=4, default=list)
     except Exception as e:
         logging.error(f"Error updating dashboard data: {e}")
 
-def place_order(client, symbol, transaction_type, quantity, price, order_type, product_type, validity, trigger_price=None, squareoff=None):
-    """Places an order on Zerodha."""
+def option_order(index_name, spot, option_type, transaction_type, price, on=None, strategy=None):
+    """Order for one lot of the index's option nearest `spot` in the nearest expiry, or None.
+
+    None also while `strategy` already has an open order or position in any
+    of the index's contracts: that is checked before the contract is
+    resolved, as spot moving a strike would otherwise resolve a new one.
+    """
+    if strategy is not None and order_book.has_open_underlying(index_name, strategy):
+        logging.info(f"Not placing another {index_name} order: {strategy} already has an open order or position in it.")
+        return None
+    contract = instrument_master.atm_option(index_name, spot, option_type, on=on) if instrument_master else None
+    if contract is None:
+        logging.warning(f"No {index_name} {option_type} contract near {spot:.2f} in the instrument master; not placing an order.")
+        return None
+    return dict(symbol=contract.tradingsymbol, exchange=contract.exchange, underlying=index_name, transaction_type=transaction_type,
+                quantity=contract.lot_size, price=price, order_type="LIMIT", product_type="MIS", validity="DAY")
+
+async def place_order(gateway, symbol, transaction_type, quantity, price, order_type, product_type, validity, trigger_price=None, squareoff=None, signal_time=None, strategy=None, exchange="NFO", candle=None, underlying=None):
+    """Places an order on Zerodha through the order gateway, alongside other orders in flight.
+
+    A strategy's order is tagged from the strategy, underlying (or symbol),
+    side and the `candle` that produced the signal, so re-running a candle (a restart, an
+    overrun, a retry) finds the order already placed instead of sending it
+    again. It is recorded in the order book as soon as Kite acknowledges it.
+    `signal_time` is only used for the gateway's latency histograms.
+    """
     order_details = {
         "symbol": symbol,
         "transaction_type": transaction_type,
@@ -87,11 +229,17 @@ def place_order(client, symbol, transaction_type, quantity, price, order_type, p
         "squareoff": squareoff
     }
     logging.info(f"Attempting to place order: {order_details}")
-    if client:
+    if gateway:
+        tag = order_tag(strategy, underlying or symbol, transaction_type, candle, prefix=STRATEGY_TAGS[strategy]) if strategy in STRATEGY_TAGS and candle is not None else None
+        if tag and order_book.order_id_for(tag):
+            logging.info(f"The {underlying or symbol} {transaction_type} order for this candle is already placed as {order_book.order_id_for(tag)}; not placing it again.")
+            return
         try:
-            order_id = client.kite.place_order(
+            order_id = await gateway.place(
+                signal_time=signal_time,
+                tag=tag,
                 variety="regular",
-                exchange="NFO", # For options
+                exchange=exchange,
                 tradingsymbol=symbol,
                 transaction_type=transaction_type,
                 quantity=quantity,
@@ -103,148 +251,382 @@ def place_order(client, symbol, transaction_type, quantity, price, order_type, p
                 squareoff=squareoff
             )
             logging.info(f"Order placed successfully. Order ID: {order_id}")
-            send_notification(f"Order placed: {symbol} {transaction_type} {quantity}. Order ID: {order_id}")
+            order_book.placed(order_id, tag=tag, exchange=exchange, tradingsymbol=symbol, name=underlying,
+                              transaction_type=transaction_type, quantity=quantity, product=product_type)
+            await send_notification(f"Order placed: {symbol} {transaction_type} {quantity}. Order ID: {order_id}")
         except Exception as e:
             logging.error(f"Error placing order: {e}")
-            send_notification(f"Error placing order for {symbol}: {e}")
+            await send_notification(f"Error placing order for {symbol}: {e}")
     else:
         logging.warning("Zerodha client not initialized. Cannot place order.")
-        send_notification("Zerodha client not initialized. Cannot place order.")
+        await send_notification("Zerodha client not initialized. Cannot place order.")
 
 def is_expiry_day(date):
     """Checks if the given date is an expiry day (Thursday for Nifty/BankNifty)."""
     # This is a simplified check. Real expiry dates can vary due to holidays.
     return date.weekday() == 3 # Thursday
 
-async def main():
-    """Main function to run the market analysis app."""
-    await send_notification("Market Analysis App started.")
-    analysis_data = {}
+async def signal_alert(notification, analysis_data, order=None, strategy=None, candle=None):
+    """Sends a signal notification and, if given, places its order at the same time."""
+    analysis_data['signals'].append(notification)
+    if order is None:
+        await send_notification(notification)
+    else:
+        # The gateway measures signal-to-ack latency from here
+        signal_time = order_gateway.clock() if order_gateway else None
+        await asyncio.gather(send_notification(notification), place_order(order_gateway, **order, signal_time=signal_time, strategy=strategy, candle=candle))
+
+async def gather_analyses(analyses, fetches):
+    """Awaits analyses that share fetch tasks, retrieving a failed fetch's error even if nothing awaited it."""
+    try:
+        await asyncio.gather(*analyses)
+    finally:
+        for task in fetches:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()
 
-    while True:
+async def precompute_levels(now):
+    """Pre-open job: computes the session's Strategy 2/4 levels before the first candle.
+
+    Covers the indices and the scanner's NIFTY 50 universe, so neither the
+    signal path nor the scan has to compute levels during the session.
+    """
+    symbols = list(SYMBOLS['INDICES'].values()) + SYMBOLS['NIFTY50']
+    await fetch(level_store.precompute, symbols, now.date(), cache=ohlcv_cache)
+
+async def morning_notifications(now, analysis_data):
+    """Sends each index's Strategy 2 levels for the day."""
+    session_levels = await fetch(level_store.get, list(SYMBOLS['INDICES'].values()), now.date(), cache=ohlcv_cache)
+    for index_name, index_symbol in SYMBOLS['INDICES'].items():
         try:
-            # Check if within market hours (9:00 AM to 3:30 PM IST)
-            now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=5, minutes=30))) # IST
-            market_open = now.replace(hour=9, minute=0, second=0, microsecond=0)
-            market_close = now.replace(hour=15, minute=30, second=0, microsecond=0)
-
-            if market_open <= now <= market_close:
-                logging.info(f"----- Running analysis at {now.strftime('%Y-%m-%d %H:%M:%S')} -----")
-                analysis_data['last_run'] = now.strftime('%Y-%m-%d %H:%M:%S')
-                analysis_data['signals'] = []
-                analysis_data['oi_analysis'] = {}
-
-                # --- Morning Notifications (9:10 AM) ---
-                if now.hour == 9 and now.minute == 10:
-                    for index_name, index_symbol in SYMBOLS['INDICES'].items():
-                        try:
-                            # Strategy 2: Previous day H/L breakout
-                            prev_day_data = get_data(index_symbol, period='2d', interval='1d')
-                            if prev_day_data is not None and len(prev_day_data) >= 2:
-                                levels = strategy2.calculate_strategy2_levels(prev_day_data.iloc[-2])
-                                notification = f"{index_name} Support/Resistance for the day: {levels}"
-                                await send_notification(notification)
-                                analysis_data['signals'].append(notification)
-                        except Exception as e:
-                            logging.error(f"Error in morning analysis for {index_name}: {e}")
-
-                # --- Intraday Analysis ---
-                for index_name, index_symbol in SYMBOLS['INDICES'].items():
-                    try:
-                        # Fetch 5m and 15m data
-                        data_5m = get_data(index_symbol, interval='5m', period='1d')
-                        data_15m = get_data(index_symbol, interval='15m', period='1d')
-
-                        if data_5m is not None and not data_5m.empty:
-                            # Strategy 1
-                            s1_data = strategy1.strategy1(data_5m.copy())
-                            last_signal_s1 = s1_data['signal'].iloc[-1]
-                            if last_signal_s1 == 1:
-                                notification = f"{index_name} (5m) - Strategy 1 Signal: BUY"
-                                await send_notification(notification)
-                                analysis_data['signals'].append(notification)
-                                # Example order placement
-                                place_order(zerodha_client, symbol="NIFTY25JULC22500", transaction_type="BUY", quantity=50, price=s1_data['entry_price'].iloc[-1], order_type="LIMIT", product_type="MIS", validity="DAY")
-                            elif last_signal_s1 == -1:
-                                notification = f"{index_name} (5m) - Strategy 1 Signal: SELL"
-                                await send_notification(notification)
-                                analysis_data['signals'].append(notification)
-                                # Example order placement
-                                place_order(zerodha_client, symbol="NIFTY25JULP22500", transaction_type="SELL", quantity=50, price=s1_data['entry_price'].iloc[-1], order_type="LIMIT", product_type="MIS", validity="DAY")
-
-                        if data_15m is not None and not data_15m.empty:
-                            # Strategy 3
-                            s3_data = strategy3.strategy3(data_15m.copy())
-                            last_signal_s3 = s3_data['signal'].iloc[-1]
-                            if last_signal_s3 == 1:
-                                notification = f"{index_name} (15m) - Strategy 3 Signal: BUY"
-                                await send_notification(notification)
-                                analysis_data['signals'].append(notification)
-                                # Example order placement
-                                place_order(zerodha_client, symbol="NIFTY25JULC22500", transaction_type="BUY", quantity=50, price=s3_data['entry_price'].iloc[-1], order_type="LIMIT", product_type="MIS", validity="DAY")
-                            elif last_signal_s3 == -1:
-                                notification = f"{index_name} (15m) - Strategy 3 Signal: SELL"
-                                await send_notification(notification)
-                                analysis_data['signals'].append(notification)
-                                # Example order placement
-                                place_order(zerodha_client, symbol="NIFTY25JULP22500", transaction_type="SELL", quantity=50, price=s3_data['entry_price'].iloc[-1], order_type="LIMIT", product_type="MIS", validity="DAY")
-
-                        # --- OI Analysis ---
-                        if index_name in ["NIFTY", "BANKNIFTY"]:
-                            oi_data = oi_strategy.get_oi_data(index_name)
-                            if oi_data is not None:
-                                pcr = oi_strategy.calculate_pcr(oi_data)
-                                trend = oi_strategy.oi_trend_analysis(pcr)
-                                analysis_data['oi_analysis'][index_name] = {
-                                    'pcr': pcr,
-                                    'trend': trend
-                                }
-                                await send_notification(f"{index_name} OI Analysis: PCR={pcr:.2f}, Trend={trend}")
-
-                                # Hero-Zero call on expiry day
-                                if is_expiry_day(now.date()):
-                                    # Get current price for Hero-Zero call
-                                    current_price = data_5m['Close'].iloc[-1] if not data_5m.empty else None
-                                    if current_price:
-                                        hero_zero_msg = oi_strategy.hero_zero_call(oi_data, current_price)
-                                        await send_notification(f"{index_name} Hero-Zero Call: {hero_zero_msg}")
-                                        analysis_data['signals'].append(f"{index_name} Hero-Zero Call: {hero_zero_msg}")
-
-                        # --- Strategy 4 (Pivot Points & Fibonacci) ---
-                        # Fetch 1-day data for previous day's H/L/C to calculate levels
-                        prev_day_data_s4 = get_data(index_symbol, period='2d', interval='1d')
-                        if prev_day_data_s4 is not None and len(prev_day_data_s4) >= 2:
-                            s4_levels = strategy4.calculate_strategy4_levels(prev_day_data_s4.iloc[-2])
-                            current_price_s4 = data_5m['Close'].iloc[-1] if not data_5m.empty else None
-                            if current_price_s4:
-                                s4_signal = strategy4.strategy4_signal(current_price_s4, s4_levels)
-                                if s4_signal != 0:
-                                    notification = f"{index_name} (Current Price: {current_price_s4:.2f}) - Strategy 4 Signal: {'BUY (Near Support)' if s4_signal == 1 else 'SELL (Near Resistance)'}"
-                                    await send_notification(notification)
-                                    analysis_data['signals'].append(notification)
-                                analysis_data['strategy4_levels'] = s4_levels
-
-                    except Exception as e:
-                        logging.error(f"Error in intraday analysis for {index_name}: {e}")
-
-                # --- Afternoon Notifications (3:10 PM & 3:15 PM) ---
-                if (now.hour == 15 and now.minute == 10) or (now.hour == 15 and now.minute == 15):
-                    notification = "Please close all open positions."
-                    await send_notification(notification)
-                    analysis_data['signals'].append(notification)
-
-                # --- Update Dashboard ---
-                update_dashboard(analysis_data)
-
-                # Sleep for 5 minutes before the next run
-                time.sleep(300)
-            else:
-                logging.info(f"Outside market hours. Last check at {now.strftime('%Y-%m-%d %H:%M:%S')}. Sleeping for 15 minutes.")
-                time.sleep(900)
+            # Strategy 2: Previous day H/L breakout
+            daily_levels = session_levels.get(index_symbol)
+            if daily_levels is not None:
+                levels = daily_levels.strategy2
+                notification = f"{index_name} Support/Resistance for the day: {levels}"
+                await signal_alert(notification, analysis_data)
         except Exception as e:
-            logging.critical(f"Critical error in main loop: {e}")
-            await send_notification(f"Critical error in Market Analysis App: {e}")
-            time.sleep(60) # Sleep for a minute before retrying
+            logging.error(f"Error in morning analysis for {index_name}: {e}")
+
+async def analyze_5m(index_name, index_symbol, market_data, session_levels, analysis_data):
+    """Runs strategies 1 and 4 for one index once its 5m data has arrived."""
+    try:
+        data_5m = (await market_data)['5m'][index_symbol]
+        if data_5m is None or data_5m.empty:
+            return
+        alerts = []
+
+        # Strategy 1
+        s1_data = await run_blocking(strategy1.strategy1, data_5m.copy(deep=False))
+        last_signal_s1 = s1_data['signal'].iloc[-1]
+        # Orders go to the index's ATM option of the nearest expiry as of the signal's session
+        spot, session = data_5m['Close'].iloc[-1], data_5m.index[-1].date()
+        if last_signal_s1 == 1:
+            order = option_order(index_name, spot, "CE", "BUY", s1_data['entry_price'].iloc[-1], on=session, strategy='strategy1')
+            alerts.append(signal_alert(f"{index_name} (5m) - Strategy 1 Signal: BUY", analysis_data, order=order, strategy='strategy1', candle=data_5m.index[-1]))
+        elif last_signal_s1 == -1:
+            order = option_order(index_name, spot, "PE", "SELL", s1_data['entry_price'].iloc[-1], on=session, strategy='strategy1')
+            alerts.append(signal_alert(f"{index_name} (5m) - Strategy 1 Signal: SELL", analysis_data, order=order, strategy='strategy1', candle=data_5m.index[-1]))
+
+        # --- Strategy 4 (Pivot Points & Fibonacci) ---
+        # Levels from the previous day's H/L/C, precomputed for the session
+        daily_levels = (await session_levels).get(index_symbol)
+        if daily_levels is not None:
+            s4_levels = daily_levels.strategy4
+            current_price_s4 = data_5m['Close'].iloc[-1]
+            s4_signal = strategy4.strategy4_signal(current_price_s4, daily_levels.ladder)
+            if s4_signal != 0:
+                notification = f"{index_name} (Current Price: {current_price_s4:.2f}) - Strategy 4 Signal: {'BUY (Near Support)' if s4_signal == 1 else 'SELL (Near Resistance)'}"
+                alerts.append(signal_alert(notification, analysis_data))
+            analysis_data['strategy4_levels'] = s4_levels
+
+        await asyncio.gather(*alerts)
+    except Exception as e:
+        logging.error(f"Error in 5m analysis for {index_name}: {e}")
+
+async def analyze_15m(index_name, index_symbol, market_data, analysis_data):
+    """Runs strategy 3 for one index once its 15m data has arrived."""
+    try:
+        data_15m = (await market_data)['15m'][index_symbol]
+        if data_15m is None or data_15m.empty:
+            return
+
+        # Strategy 3
+        s3_data = await run_blocking(strategy3.strategy3, data_15m.copy(deep=False))
+        last_signal_s3 = s3_data['signal'].iloc[-1]
+        spot, session = data_15m['Close'].iloc[-1], data_15m.index[-1].date()
+        if last_signal_s3 == 1:
+            order = option_order(index_name, spot, "CE", "BUY", s3_data['entry_price'].iloc[-1], on=session, strategy='strategy3')
+            await signal_alert(f"{index_name} (15m) - Strategy 3 Signal: BUY", analysis_data, order=order, strategy='strategy3', candle=data_15m.index[-1])
+        elif last_signal_s3 == -1:
+            order = option_order(index_name, spot, "PE", "SELL", s3_data['entry_price'].iloc[-1], on=session, strategy='strategy3')
+            await signal_alert(f"{index_name} (15m) - Strategy 3 Signal: SELL", analysis_data, order=order, strategy='strategy3', candle=data_15m.index[-1])
+    except Exception as e:
+        logging.error(f"Error in 15m analysis for {index_name}: {e}")
+
+async def analyze_oi(index_name, index_symbol, now, analysis_data):
+    """Fetches and analyzes one index's option chain independently of the price analysis."""
+    try:
+        oi_data = await fetch(oi_strategy.get_oi_data, index_name)
+        if oi_data is not None:
+            pcr = oi_strategy.calculate_pcr(oi_data)
+            # Walls and max pain of the nearest expiry, around the spot NSE published with the chain;
+            # the chain analytics and the IV solve over every contract run in the pool, off the loop
+            nearest = smile = None
+            if 'underlying' in oi_data.attrs:
+                nearest = (await run_blocking(analyze_chain, oi_data, symbol=index_name)).iloc[0]
+            if {'underlying', 'timestamp'} <= oi_data.attrs.keys():
+                smile = (await run_blocking(lambda: iv_skew(chain_greeks(oi_data)))).iloc[0]
+            trend = oi_strategy.oi_trend_analysis(pcr)
+            try:
+                await run_blocking(option_chains.append, index_name, oi_data)
+                pcr_today = await run_blocking(option_chains.pcr_series, index_name)
+            except Exception as e:
+                logging.error(f"Error storing the {index_name} option chain: {e}")
+                pcr_today = None
+            analysis_data['oi_analysis'][index_name] = {
+                'pcr': pcr,
+                'trend': trend,
+                # PCR drift since the session's first stored chain
+                'pcr_change': pcr - pcr_today.iloc[0] if pcr_today is not None and len(pcr_today) else 0.0,
+                'max_pain': nearest['max_pain'] if nearest is not None else None,
+                'support': nearest['support'] if nearest is not None else None,
+                'resistance': nearest['resistance'] if nearest is not None else None,
+                # Nearest expiry's ATM implied volatility and 25-delta put-call skew, in percent
+                'atm_iv': smile['atm_iv'] if smile is not None and pd.notna(smile['atm_iv']) else None,
+                'iv_skew': smile['skew'] if smile is not None else None,
+            }
+            await send_notification(f"{index_name} OI Analysis: PCR={pcr:.2f}, Trend={trend}", topic=f'oi:{index_name}')
+
+            # Hero-Zero call on expiry day
+            if is_expiry_day(now.date()):
+                # Get current price for Hero-Zero call from the bars the signal jobs loaded at this close
+                data_5m = (await load_bars(list(SYMBOLS['INDICES'].values()), BASE_INTERVAL, now))[BASE_INTERVAL][index_symbol]
+                current_price = data_5m['Close'].iloc[-1] if data_5m is not None and not data_5m.empty else None
+                if current_price:
+                    hero_zero_msg = oi_strategy.hero_zero_call(oi_data, current_price, index_name)
+                    await signal_alert(f"{index_name} Hero-Zero Call: {hero_zero_msg}", analysis_data)
+    except asyncio.TimeoutError:
+        logging.error(f"OI fetch for {index_name} timed out after {FETCH_TIMEOUT}s; skipping OI analysis this cycle.")
+    except Exception as e:
+        logging.error(f"Error in OI analysis for {index_name}: {e}")
+
+async def load_base_bars(symbols, now):
+    """Returns {symbol: closed base-interval bars} for the candle close at `now`.
+
+    Jobs firing at the same close share one batched download, which is also
+    folded into the resampler for the derived timeframes.
+    """
+    key = (tuple(symbols), now.replace(second=0, microsecond=0))
+    task = _base_loads.get(key)
+    if task is None:
+        _base_loads.clear()
+        task = _base_loads[key] = asyncio.ensure_future(_download_base_bars(symbols, now))
+    # Shielded so a job cancelling its own fetch does not cancel it for the others
+    return await asyncio.shield(task)
+
+async def _download_base_bars(symbols, now):
+    market_data = await fetch(get_universe_data, symbols, {BASE_INTERVAL: BASE_PERIOD}, cache=ohlcv_cache)
+    bars = {}
+    for symbol, data in market_data[BASE_INTERVAL].items():
+        resampler.update(symbol, data, now=now)
+        if data is not None and not data.empty:
+            # The bar that started at the close is still forming
+            data = data[data.index + pd.Timedelta(TIMEFRAMES[BASE_INTERVAL][0]) <= now]
+        bars[symbol] = data
+    return bars
+
+async def load_bars(symbols, interval, now=None):
+    """Returns {interval: {symbol: bars}} for a candle close.
+
+    While the tick feed is live these are the BarStore's closed bars, copied
+    under its lock without downloading, so ticks written meanwhile cannot
+    change them under a strategy running on a worker. Otherwise the
+    base-interval download shared by every job at this close is used,
+    resampled to slower timeframes, and also re-seeds the store, so ticks
+    continue from complete history once the feed is back.
+    """
+    if all(bar_store.is_live(symbol) for symbol in symbols):
+        return {interval: {symbol: bar_store.frame(symbol, interval, include_forming=False) for symbol in symbols}}
+    now = now or datetime.datetime.now(IST)
+    base = await load_base_bars(symbols, now)
+    if interval == BASE_INTERVAL:
+        frames = base
+    else:
+        frames = {symbol: resampler.frame(symbol, interval) for symbol in symbols}
+    for symbol, data in frames.items():
+        bar_store.seed(symbol, interval, data)
+    return {interval: frames}
+
+async def run_5m_signals(now, analysis_data):
+    """Signal path at every 5-minute close: strategies 1 and 4 for all indices concurrently."""
+    analysis_data['last_run'] = now.strftime('%Y-%m-%d %H:%M:%S')
+    symbols = list(SYMBOLS['INDICES'].values())
+    market_data = asyncio.ensure_future(load_bars(symbols, '5m', now))
+    # Previous-day levels are constant for the session; computed here if the pre-open job did not run
+    session_levels = asyncio.ensure_future(fetch(level_store.get, symbols, now.date(), cache=ohlcv_cache))
+    await gather_analyses(
+        [analyze_5m(name, symbol, market_data, session_levels, analysis_data) for name, symbol in SYMBOLS['INDICES'].items()],
+        [market_data, session_levels]
+    )
+
+async def run_15m_signals(now, analysis_data):
+    """Signal path at every 15-minute close: strategy 3 for all indices concurrently."""
+    symbols = list(SYMBOLS['INDICES'].values())
+    market_data = asyncio.ensure_future(load_bars(symbols, '15m', now))
+    await gather_analyses(
+        [analyze_15m(name, symbol, market_data, analysis_data) for name, symbol in SYMBOLS['INDICES'].items()],
+        [market_data]
+    )
+
+async def run_oi_analysis(now, analysis_data):
+    """OI analysis for the indices with NSE option chains, each scraped concurrently."""
+    await asyncio.gather(*(
+        analyze_oi(name, symbol, now, analysis_data)
+        for name, symbol in SYMBOLS['INDICES'].items() if name in OI_INDICES
+    ))
+
+async def run_universe_scan(now, analysis_data):
+    """Scans the NIFTY 50 universe for live signals of every strategy in one vectorized pass."""
+    symbols = SYMBOLS['NIFTY50']
+    try:
+        signals = await fetch(scan_universe, symbols, cache=ohlcv_cache, level_store=level_store, session_date=now.date())
+    except Exception as e:
+        logging.error(f"Error in universe scan: {e}")
+        return
+    analysis_data['scanner'] = signals.head(SCANNER_ROWS).reset_index().to_dict('records')
+
+async def update_warehouse(now):
+    """Post-close job: appends the session's bars for the indices and the NIFTY 50 to the warehouse."""
+    symbols = list(SYMBOLS['INDICES'].values()) + SYMBOLS['NIFTY50']
+    for interval in WAREHOUSE_INTERVALS:
+        try:
+            stored = await run_blocking(warehouse.update, symbols, interval)
+            logging.info(f"Warehouse: stored {sum(stored.values())} {interval} bars.")
+        except Exception as e:
+            logging.error(f"Error updating the {interval} warehouse: {e}")
+
+async def refresh_instruments(now):
+    """Pre-open job: loads the day's instrument dump, downloading it only if today's copy is not cached."""
+    if instrument_master:
+        try:
+            await fetch(instrument_master.ensure_loaded, now.date())
+            logging.info(f"Instrument master: {len(instrument_master)} instruments for {now.date()}.")
+        except Exception as e:
+            logging.error(f"Error loading the instrument master: {e}")
+
+async def square_off_reminder(now, analysis_data):
+    await signal_alert("Please close all open positions.", analysis_data)
+
+async def refresh_dashboard(now, analysis_data):
+    if notifier:
+        # Delivery latency, drops and retries of the Telegram queue
+        analysis_data['notifications'] = notifier.metrics()
+    if order_gateway:
+        # Signal-to-ack latency percentiles and retry counts of the order path
+        analysis_data['orders'] = order_gateway.metrics()
+        analysis_data['order_book'] = order_book.metrics()
+    await run_blocking(update_dashboard, analysis_data)
+
+def report_overrun(job, scheduled):
+    return send_notification(f"Job {job.name} was still running at its {scheduled:%H:%M:%S} slot; that run was skipped.")
+
+def build_scheduler(analysis_data):
+    """Registers every job of the app on a candle-close-aligned scheduler."""
+    scheduler = Scheduler(on_overrun=report_overrun)
+
+    def with_data(job):
+        return functools.partial(job, analysis_data=analysis_data)
+
+    # Signal path: runs at each candle close and is never shed under load
+    scheduler.add_job('signals_5m', with_data(run_5m_signals), CandleClose(5, delay=BAR_DELAY), priority=CRITICAL)
+    scheduler.add_job('signals_15m', with_data(run_15m_signals), CandleClose(15, delay=BAR_DELAY), priority=CRITICAL)
+    # --- Afternoon Notifications (3:10 PM & 3:15 PM) ---
+    for at in (datetime.time(15, 10), datetime.time(15, 15)):
+        scheduler.add_job(f'square_off_{at:%H%M}', with_data(square_off_reminder), DailyAt(at), priority=CRITICAL)
+
+    # Kite publishes the day's instrument dump by about 08:30
+    scheduler.add_job('instruments', refresh_instruments, DailyAt(datetime.time(8, 45)), priority=NORMAL)
+    scheduler.add_job('pre_open_levels', precompute_levels, DailyAt(datetime.time(9, 0)), priority=NORMAL)
+    # --- Morning Notifications (9:10 AM) ---
+    scheduler.add_job('morning_levels', with_data(morning_notifications), DailyAt(datetime.time(9, 10)), priority=NORMAL)
+    scheduler.add_job('oi_analysis', with_data(run_oi_analysis), CandleClose(5, delay=BAR_DELAY), priority=NORMAL)
+    # Universe scan is informational and the first job to shed under load
+    scheduler.add_job('universe_scan', with_data(run_universe_scan), CandleClose(5, delay=BAR_DELAY), priority=LOW)
+
+    scheduler.add_job('warehouse_update', update_warehouse, DailyAt(datetime.time(15, 45)), priority=LOW)
+
+    # Dashboard refresh after the signal path has had its head start
+    scheduler.add_job('dashboard', with_data(refresh_dashboard), CandleClose(5, delay=BAR_DELAY + 30), priority=LOW)
+    return scheduler
+
+def start_tick_ingestion():
+    """Streams index ticks from KiteTicker into the event bus and BarStore when Zerodha credentials are set.
+
+    The near-ATM calls and puts of each index, resolved from the instrument
+    master, are streamed onto the bus too and re-centred as the index moves.
+    """
+    if not (ZERODHA_API_KEY and ZERODHA_ACCESS_TOKEN):
+        logging.warning("Tick ingestion not started. Please set ZERODHA_API_KEY and ZERODHA_ACCESS_TOKEN in your .env file.")
+        return None
+    loop = asyncio.get_running_loop()
+    # KITE_TICKER_ROOT can point the feed at a local ReplayServer
+    ingestor = TickIngestor(ZERODHA_API_KEY, ZERODHA_ACCESS_TOKEN, event_bus, root=os.getenv("KITE_TICKER_ROOT"))
+    ingestor.subscribe(INDEX_TOKENS.values())
+    event_bus.subscribe(topics.TICKS, bar_store.on_ticks)
+    if instrument_master:
+        AtmOptionFeed(ingestor, instrument_master, {token: name for name, token in INDEX_TOKENS.items()},
+                      width=ATM_OPTION_STRIKES).attach(event_bus)
+    event_bus.subscribe(topics.GAVE_UP, lambda event: loop.call_soon_threadsafe(
+        asyncio.ensure_future, send_notification("Tick feed disconnected and gave up reconnecting.")
+    ))
+    ingestor.start()
+    return ingestor
+
+async def start_order_sync():
+    """Seeds the order book from Kite and keeps it current from order updates.
+
+    Updates arrive on the ticker socket and, with KITE_POSTBACK_PORT set,
+    as HTTP postbacks; both go through the event bus. Returns the postback
+    server, if one was started.
+    """
+    if not zerodha_client:
+        return None
+    event_bus.subscribe(topics.ORDER_UPDATES, order_book.apply)
+    postbacks = None
+    if KITE_POSTBACK_PORT:
+        postbacks = PostbackServer(ZERODHA_API_SECRET, functools.partial(event_bus.publish, topics.ORDER_UPDATES),
+                                   host=os.getenv("KITE_POSTBACK_HOST", "0.0.0.0"), port=int(KITE_POSTBACK_PORT)).start()
+        logging.info(f"Receiving Kite order postbacks on {postbacks.url}")
+    try:
+        await fetch(order_book.sync, zerodha_client.kite)
+        logging.info(f"Order book seeded with {len(order_book.orders)} orders.")
+    except Exception as e:
+        logging.error(f"Error seeding the order book: {e}")
+    return postbacks
+
+async def main():
+    """Main function to run the market analysis app."""
+    await send_notification("Market Analysis App started.")
+    # The instrument master maps the seeded orders to their indices
+    await refresh_instruments(datetime.datetime.now(IST))
+    postbacks = await start_order_sync()
+    start_tick_ingestion()
+    analysis_data = {'signals': collections.deque(maxlen=MAX_SIGNALS), 'oi_analysis': {}}
+    scheduler = build_scheduler(analysis_data)
+    try:
+        await scheduler.run()
+    except Exception as e:
+        logging.critical(f"Critical error in scheduler: {e}")
+        await send_notification(f"Critical error in Market Analysis App: {e}")
+        raise
+    finally:
+        if postbacks:
+            postbacks.stop()
+        if notifier:
+            await notifier.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
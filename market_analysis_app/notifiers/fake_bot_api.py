@@ -0,0 +1,162 @@
+# market_analysis_app/notifiers/fake_bot_api.py
+
+import argparse
+import collections
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeBotAPI:
+    """Local stand-in for the Telegram Bot API, recording every sendMessage.
+
+    Point telegram.Bot (or TelegramNotifier) at `base_url`. Like Telegram it
+    answers 429 with a retry_after when a chat gets more than `chat_limit`
+    messages within `window` seconds; `throttle_every` also answers every
+    Nth sendMessage with 429, and `latency` delays every response. Runs on a
+    background thread.
+    """
+
+    def __init__(self, token='123456:fake', host='127.0.0.1', port=0, chat_limit=None, window=1.0,
+                 throttle_every=None, retry_after=1, latency=0.0):
+        self.token = token
+        self.host = host
+        self.port = port
+        self.chat_limit = chat_limit
+        self.window = window
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.latency = latency
+        self.messages = []
+        self.stats = collections.Counter()
+        self._recent = collections.defaultdict(collections.deque)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f'http://{self.host}:{self.port}/bot'
+
+    def texts(self, chat_id=None):
+        with self._lock:
+            return [m['text'] for m in self.messages if chat_id is None or m['chat_id'] == str(chat_id)]
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                server._handle(self)
+
+            do_GET = do_POST
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-bot-api', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, handler, status, payload):
+        if self.latency:
+            time.sleep(self.latency)
+        body = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    @staticmethod
+    def _parameters(handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+        if 'json' in (handler.headers.get('Content-Type') or ''):
+            return json.loads(body or b'{}')
+        return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+    def _throttled(self):
+        return {
+            'ok': False, 'error_code': 429,
+            'description': f'Too Many Requests: retry after {self.retry_after}',
+            'parameters': {'retry_after': self.retry_after},
+        }
+
+    def _handle(self, handler):
+        path = urlparse(handler.path).path
+        prefix = f'/bot{self.token}/'
+        params = self._parameters(handler)
+        if not path.startswith(prefix):
+            self._respond(handler, 401, {'ok': False, 'error_code': 401, 'description': 'Unauthorized'})
+            return
+        method = path[len(prefix):]
+        if method == 'getMe':
+            self._respond(handler, 200, {'ok': True, 'result': {'id': 123456, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot'}})
+            return
+        if method != 'sendMessage':
+            self._respond(handler, 404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+            return
+
+        chat_id = str(params.get('chat_id'))
+        now = time.monotonic()
+        with self._lock:
+            self.stats['requests'] += 1
+            recent = self._recent[chat_id]
+            while recent and recent[0] <= now - self.window:
+                recent.popleft()
+            if (self.throttle_every and self.stats['requests'] % self.throttle_every == 0) or \
+                    (self.chat_limit and len(recent) >= self.chat_limit):
+                self.stats['throttled'] += 1
+                message = None
+            else:
+                recent.append(now)
+                message = {'message_id': len(self.messages) + 1, 'chat_id': chat_id, 'text': params.get('text', ''), 'received': now}
+                self.messages.append(message)
+        if message is None:
+            self._respond(handler, 429, self._throttled())
+            return
+        self._respond(handler, 200, {'ok': True, 'result': {
+            'message_id': message['message_id'], 'date': int(time.time()),
+            'chat': {'id': int(chat_id) if chat_id.lstrip('-').isdigit() else 0, 'type': 'private'},
+            'text': message['text'],
+        }})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve a fake Telegram Bot API that prints every message it receives.")
+    parser.add_argument('--token', default='123456:fake')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--chat-limit', type=int, default=1, help="messages per chat per second before answering 429")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = FakeBotAPI(args.token, args.host, args.port, chat_limit=args.chat_limit).start()
+    logging.info(f"Fake Bot API on {server.base_url} (set TELEGRAM_API_URL to use it)")
+    seen = 0
+    try:
+        while True:
+            time.sleep(0.5)
+            for text in server.texts()[seen:]:
+                seen += 1
+                logging.info(f"Message {seen}:\n{text}")
+    except KeyboardInterrupt:
+        server.stop()
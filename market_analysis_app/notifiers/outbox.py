@@ -0,0 +1,200 @@
+# market_analysis_app/notifiers/outbox.py
+
+import asyncio
+import collections
+import datetime
+import time
+
+import numpy as np
+
+from market_analysis_app.rate_limit import TokenBucket
+
+# Telegram rejects longer messages
+MAX_MESSAGE_LENGTH = 4096
+
+# Telegram allows about one message a second to a chat, with short bursts
+CHAT_RATE = 1.0
+CHAT_BURST = 3
+
+# Separates the messages joined into one batch
+BATCH_SEPARATOR = '\n\n'
+
+
+def retry_after(error):
+    """Seconds a flood-control error asks to wait (telegram.error.RetryAfter), or None."""
+    wait = getattr(error, 'retry_after', None)
+    if isinstance(wait, datetime.timedelta):
+        return wait.total_seconds()
+    return float(wait) if wait is not None else None
+
+
+class NotificationQueue:
+    """Outbound message queue drained by a background asyncio worker.
+
+    notify() only records the message and returns, so the signal path never
+    waits on the network. The worker waits `batch_window` seconds after the
+    first queued message so a burst leaves as one message (split at
+    `max_length`), and keeps to `rate` sends a second through a token
+    bucket. Messages given a `topic` coalesce: a newer one replaces a queued
+    one of the same topic, and one identical to the topic's last delivered
+    text is dropped as a duplicate. Repeats of an untopiced message still
+    queued are folded into it with a count. `send` is an async callable
+    that raises on failure; flood-control errors are retried after the wait
+    they ask for, others with exponential backoff, up to `retries` times.
+    When more than `max_pending` messages are waiting the oldest is dropped.
+    """
+
+    def __init__(self, send, rate=CHAT_RATE, burst=CHAT_BURST, batch_window=1.0, max_pending=500,
+                 max_length=MAX_MESSAGE_LENGTH, retries=3, backoff=1.0, clock=time.monotonic):
+        self.send = send
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.max_length = max_length
+        self.retries = retries
+        self.backoff = backoff
+        self.clock = clock
+        self.limiter = TokenBucket(rate, burst, clock=clock)
+        self.stats = collections.Counter()
+        # Delivery latency of recent messages, in seconds from notify() to a successful send
+        self.latencies = collections.deque(maxlen=1000)
+        # key -> [text, first queued at, repeats]; the key is the topic, or the text itself
+        self._pending = collections.OrderedDict()
+        self._last_sent = {}
+        self._wakeup = None
+        self._task = None
+        self._closing = False
+
+    def __len__(self):
+        return len(self._pending)
+
+    def notify(self, message, topic=None):
+        """Queues a message without waiting; starts the worker on the running loop if needed."""
+        self.stats['queued'] += 1
+        if topic is not None and self._last_sent.get(topic) == message:
+            # The topic is back to what was last delivered, so nothing of it needs sending
+            self._pending.pop(topic, None)
+            self.stats['deduplicated'] += 1
+            return
+        key = topic if topic is not None else ('text', message)
+        entry = self._pending.get(key)
+        if entry is not None:
+            self.stats['coalesced'] += 1
+            if topic is not None:
+                entry[0] = message
+            else:
+                entry[2] += 1
+        else:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self.stats['dropped'] += 1
+            self._pending[key] = [message, self.clock(), 1]
+        self._start()
+
+    def notify_threadsafe(self, loop, message, topic=None):
+        """notify() from a thread other than the one running `loop`."""
+        loop.call_soon_threadsafe(self.notify, message, topic)
+
+    def _start(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet: the messages wait for the first notify() or start() on one
+            return
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._closing = False
+            self._task = loop.create_task(self.run())
+        self._wakeup.set()
+
+    def start(self):
+        self._start()
+        return self._task
+
+    def _take_batch(self):
+        """Pops queued messages, oldest first, until the next would not fit in one message."""
+        parts, entries, length = [], [], 0
+        while self._pending:
+            key, (text, queued_at, repeats) = next(iter(self._pending.items()))
+            if repeats > 1:
+                text = f"{text} (x{repeats})"
+            text = text[:self.max_length]
+            added = len(text) + (len(BATCH_SEPARATOR) if parts else 0)
+            if parts and length + added > self.max_length:
+                break
+            self._pending.popitem(last=False)
+            parts.append(text)
+            entries.append((key, text, queued_at, repeats))
+            length += added
+        return BATCH_SEPARATOR.join(parts), entries
+
+    async def _deliver(self, text, entries):
+        for attempt in range(self.retries + 1):
+            wait = self.limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                await self.send(text)
+            except Exception as e:
+                if attempt == self.retries:
+                    self.stats['failed'] += sum(repeats for *_, repeats in entries)
+                    print(f"Error sending notification after {attempt + 1} attempts: {e}")
+                    return
+                delay = retry_after(e)
+                if delay is not None:
+                    self.stats['throttled'] += 1
+                else:
+                    self.stats['errors'] += 1
+                    delay = self.backoff * 2 ** attempt
+                await asyncio.sleep(delay)
+                continue
+            now = self.clock()
+            self.stats['sent'] += 1
+            self.stats['delivered'] += sum(repeats for *_, repeats in entries)
+            for key, message, queued_at, repeats in entries:
+                self.latencies.append(now - queued_at)
+                if not isinstance(key, tuple):
+                    self._last_sent[key] = message
+            return
+
+    async def run(self):
+        """Worker loop: batches and sends queued messages until close()."""
+        idle = True
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return
+                idle = True
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if idle and self.batch_window and not self._closing:
+                # Let the rest of a burst arrive
+                await asyncio.sleep(self.batch_window)
+            idle = False
+            text, entries = self._take_batch()
+            await self._deliver(text, entries)
+
+    async def close(self, timeout=10.0):
+        """Sends what is still queued (for at most `timeout` seconds) and stops the worker."""
+        if self._pending:
+            self._start()
+        if self._task is None or self._task.done():
+            return
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            self.stats['dropped'] += len(self._pending)
+            self._pending.clear()
+
+    def metrics(self):
+        """Counters plus the queue depth and delivery-latency percentiles (seconds)."""
+        metrics = dict(self.stats)
+        metrics['pending'] = len(self._pending)
+        if self.latencies:
+            latencies = np.fromiter(self.latencies, dtype=float)
+            metrics['latency_p50'], metrics['latency_p95'] = np.percentile(latencies, [50, 95]).tolist()
+            metrics['latency_max'] = float(latencies.max())
+        return metrics
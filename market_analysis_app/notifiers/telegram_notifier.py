@@ -1,22 +1,52 @@
 # market_analysis_app/notifiers/telegram_notifier.py
 
+import os
+
 import telegram
 
+from market_analysis_app.notifiers.outbox import NotificationQueue
+
 class TelegramNotifier:
-    def __init__(self, token, chat_id):
-        self.bot = telegram.Bot(token=token)
+    """Sends messages to one Telegram chat.
+
+    notify() hands a message to a NotificationQueue and returns at once; the
+    queue's worker batches, rate-limits and retries delivery. send_message()
+    sends straight away. `base_url` (or TELEGRAM_API_URL in the environment)
+    can point at a local FakeBotAPI; other keyword arguments configure the
+    queue.
+    """
+
+    def __init__(self, token, chat_id, base_url=None, **queue_options):
+        base_url = base_url or os.getenv("TELEGRAM_API_URL")
+        self.bot = telegram.Bot(token=token, base_url=base_url) if base_url else telegram.Bot(token=token)
         self.chat_id = chat_id
+        self.queue = NotificationQueue(self.deliver, **queue_options)
 
-    def send_message(self, message):
+    async def deliver(self, message):
+        """Sends one message, raising on failure (telegram.error.RetryAfter when flood-limited)."""
+        await self.bot.send_message(chat_id=self.chat_id, text=message)
+
+    async def send_message(self, message):
         try:
-            self.bot.send_message(chat_id=self.chat_id, text=message)
+            await self.deliver(message)
             print(f"Telegram message sent: {message}")
         except Exception as e:
             print(f"Error sending Telegram message: {e}")
 
+    def notify(self, message, topic=None):
+        """Queues a message for the background worker; see NotificationQueue.notify."""
+        self.queue.notify(message, topic)
+
+    def metrics(self):
+        return self.queue.metrics()
+
+    async def close(self):
+        """Delivers what is still queued, then releases the bot's HTTP client."""
+        await self.queue.close()
+        await self.bot.shutdown()
+
 if __name__ == '__main__':
     # Example usage (requires .env file with credentials)
-    import os
     from dotenv import load_dotenv
 
     load_dotenv()
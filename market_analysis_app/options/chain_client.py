@@ -0,0 +1,217 @@
+# market_analysis_app/options/chain_client.py
+
+import argparse
+import collections
+import datetime
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from market_analysis_app.rate_limit import TokenBucket
+
+NSE_BASE_URL = "https://www.nseindia.com"
+
+# Symbols served by the index option-chain endpoint; everything else is an equity
+INDEX_SYMBOLS = frozenset({'NIFTY', 'BANKNIFTY', 'FINNIFTY', 'MIDCPNIFTY', 'NIFTYNXT50'})
+
+# NSE rejects requests that do not look like they come from a browser
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.nseindia.com/option-chain',
+}
+
+# Status codes NSE answers with when throttling, and when the session cookies have expired
+THROTTLED = frozenset({429, 503})
+FORBIDDEN = frozenset({401, 403})
+
+# The payload's own timestamp, read before decoding the JSON so unchanged chains cost no parse
+_TIMESTAMP = re.compile(rb'"timestamp"\s*:\s*"([^"]+)"')
+
+# get_oi_data column -> NSE option-chain field, per side
+_SIDE_FIELDS = {
+    'oi': 'openInterest', 'change_oi': 'changeinOpenInterest', 'ltp': 'lastPrice',
+    'iv': 'impliedVolatility', 'volume': 'totalTradedVolume',
+}
+
+
+def parse_option_chain(data):
+    """Converts an NSE option-chain payload into a DataFrame, one row per strike and expiry.
+
+    Columns are built directly from the records; a missing CE or PE side
+    reads as 0. The payload's timestamp and underlying value are kept in
+    DataFrame.attrs for OptionChainStore.
+    """
+    records = data['records']
+    items = records['data']
+    columns = {'strike': [item['strikePrice'] for item in items]}
+    for name, key in _SIDE_FIELDS.items():
+        for side in ('CE', 'PE'):
+            columns[f'{side.lower()}_{name}'] = [(item.get(side) or {}).get(key, 0) for item in items]
+    columns['expiry'] = pd.to_datetime([item.get('expiryDate') for item in items], format='%d-%b-%Y')
+    df = pd.DataFrame(columns)
+    if 'timestamp' in records:
+        df.attrs['timestamp'] = pd.Timestamp(datetime.datetime.strptime(records['timestamp'], '%d-%b-%Y %H:%M:%S')).tz_localize('Asia/Kolkata')
+    if 'underlyingValue' in records:
+        df.attrs['underlying'] = float(records['underlyingValue'])
+    return df
+
+
+class OptionChainClient:
+    """NSE option-chain client that keeps one warm HTTP session for every poll.
+
+    The cookie handshake (a visit to the option-chain page) is done once and
+    repeated only when NSE answers 401/403. Requests from any thread share
+    the session's keep-alive connections and a token bucket; throttling
+    responses (429/503) are retried with exponential backoff and jitter,
+    honouring Retry-After. NSE republishes a chain only every few minutes,
+    so a payload whose timestamp matches the previous one is not decoded and
+    the previous chain is returned. `base_url` (or NSE_BASE_URL in the
+    environment) can point at a local OptionChainServer, and `record_dir`
+    appends every new payload to <dir>/<SYMBOL>.jsonl for it to replay.
+    """
+
+    def __init__(self, base_url=None, max_workers=4, rate=3, retries=4, backoff=1.0, max_backoff=30.0,
+                 timeout=10, record_dir=None, sleep=time.sleep):
+        self.base_url = (base_url or os.getenv("NSE_BASE_URL", NSE_BASE_URL)).rstrip('/')
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.record_dir = record_dir
+        self.sleep = sleep
+        self.limiter = TokenBucket(rate)
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        self.stats = collections.Counter()
+        self._warm = False
+        self._warm_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._timestamps = {}
+        self._chains = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='option-chain')
+
+    def url(self, symbol):
+        kind = 'indices' if symbol in INDEX_SYMBOLS else 'equities'
+        return f'{self.base_url}/api/option-chain-{kind}'
+
+    def warm_up(self, force=False):
+        """Visits the option-chain page so the session holds NSE's cookies."""
+        with self._warm_lock:
+            if self._warm and not force:
+                return
+            self.session.cookies.clear()
+            self.session.get(f'{self.base_url}/option-chain', timeout=self.timeout)
+            self.stats['warmups'] += 1
+            self._warm = True
+
+    def _retry_delay(self, response, attempt):
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        return min(self.backoff * 2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.0)
+
+    def fetch_raw(self, symbol):
+        """Returns the raw JSON bytes of a symbol's chain, retrying throttled and cookie-expired requests."""
+        status = None
+        for attempt in range(self.retries + 1):
+            self.warm_up()
+            self.limiter.acquire()
+            response = self.session.get(self.url(symbol), params={'symbol': symbol}, timeout=self.timeout)
+            self.stats['requests'] += 1
+            status = response.status_code
+            if status == 200:
+                return response.content
+            if status in FORBIDDEN:
+                self.stats['rewarms'] += 1
+                with self._warm_lock:
+                    self._warm = False
+            elif status in THROTTLED:
+                self.stats['throttled'] += 1
+                self.sleep(self._retry_delay(response, attempt))
+            else:
+                response.raise_for_status()
+        raise ConnectionError(f"NSE refused the {symbol} option chain {self.retries + 1} times (last status {status})")
+
+    def fetch(self, symbol):
+        """Returns a symbol's chain as a DataFrame, or None if it could not be fetched.
+
+        When NSE has not republished the chain since the last poll, the
+        previous DataFrame is returned as is.
+        """
+        try:
+            content = self.fetch_raw(symbol)
+        except Exception as e:
+            self.stats['failures'] += 1
+            print(f"Error fetching the {symbol} option chain: {e}")
+            return None
+
+        match = _TIMESTAMP.search(content)
+        stamp = match.group(1) if match else None
+        with self._state_lock:
+            if stamp is not None and self._timestamps.get(symbol) == stamp:
+                self.stats['unchanged'] += 1
+                return self._chains[symbol]
+
+        try:
+            payload = json.loads(content)
+            chain = parse_option_chain(payload)
+        except (ValueError, KeyError, TypeError) as e:
+            # NSE answers a blocked session with an empty object rather than an error status
+            self.stats['failures'] += 1
+            print(f"Unexpected {symbol} option-chain payload: {e}")
+            return None
+        if self.record_dir:
+            os.makedirs(self.record_dir, exist_ok=True)
+            with open(os.path.join(self.record_dir, f'{symbol}.jsonl'), 'ab') as f:
+                f.write(content.replace(b'\n', b'') + b'\n')
+        with self._state_lock:
+            self._timestamps[symbol] = stamp
+            self._chains[symbol] = chain
+        return chain
+
+    def fetch_many(self, symbols):
+        """Fetches several chains concurrently; returns {symbol: DataFrame or None}."""
+        futures = {symbol: self._pool.submit(self.fetch, symbol) for symbol in dict.fromkeys(symbols)}
+        return {symbol: future.result() for symbol, future in futures.items()}
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.session.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Poll NSE option chains and report fetch latency.")
+    parser.add_argument('symbols', nargs='*', default=['NIFTY', 'BANKNIFTY'])
+    parser.add_argument('--base-url', help="e.g. a local OptionChainServer")
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--interval', type=float, default=0.0, help="seconds between rounds")
+    parser.add_argument('--record-dir')
+    args = parser.parse_args()
+
+    client = OptionChainClient(base_url=args.base_url, record_dir=args.record_dir)
+    timings = []
+    for round_ in range(args.rounds):
+        started = time.perf_counter()
+        chains = client.fetch_many(args.symbols)
+        timings.append(time.perf_counter() - started)
+        print(f"Round {round_ + 1}: {timings[-1] * 1000:.1f} ms, "
+              + ", ".join(f"{symbol}: {'-' if chain is None else len(chain)} rows" for symbol, chain in chains.items()))
+        if args.interval and round_ + 1 < args.rounds:
+            time.sleep(args.interval)
+    print(f"Mean {sum(timings) / len(timings) * 1000:.1f} ms per round; {dict(client.stats)}")
+    client.close()
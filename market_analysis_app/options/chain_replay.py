@@ -0,0 +1,161 @@
+# market_analysis_app/options/chain_replay.py
+
+import argparse
+import collections
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def load_recordings(directory):
+    """Reads <SYMBOL>.json (one payload) and <SYMBOL>.jsonl (one payload per line) files.
+
+    Returns {symbol: [payload bytes, ...]} in recorded order.
+    """
+    recordings = {}
+    for name in sorted(os.listdir(directory)):
+        symbol, ext = os.path.splitext(name)
+        path = os.path.join(directory, name)
+        if ext == '.json':
+            with open(path, 'rb') as f:
+                recordings[symbol] = [f.read()]
+        elif ext == '.jsonl':
+            with open(path, 'rb') as f:
+                recordings[symbol] = [line.rstrip(b'\n') for line in f if line.strip()]
+    return recordings
+
+
+class OptionChainServer:
+    """Local stand-in for NSE's option-chain API, serving recorded payloads over HTTP.
+
+    Like the live site it only answers API calls from a session that has
+    first visited /option-chain for its cookie (401 otherwise). Each API call
+    for a symbol serves that symbol's next recorded payload, repeating the
+    last one once the recording runs out. `throttle_every` answers every Nth
+    API call with 429, and `latency` delays every response, for testing
+    backoff and measuring load. Runs on a background thread.
+    """
+
+    def __init__(self, recordings, host='127.0.0.1', port=0, throttle_every=None, retry_after=None, latency=0.0):
+        self.recordings = {
+            symbol: [payload if isinstance(payload, bytes) else json.dumps(payload).encode() for payload in payloads]
+            for symbol, payloads in recordings.items()
+        }
+        self.host = host
+        self.port = port
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.latency = latency
+        self.cookie = 'nsit=replay-0'
+        self._generation = 0
+        self.stats = collections.Counter()
+        self._positions = collections.Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='option-chain-replay', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, handler, status, body=b'', headers=None):
+        if self.latency:
+            time.sleep(self.latency)
+        handler.send_response(status)
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _handle(self, handler):
+        url = urlparse(handler.path)
+        if url.path == '/option-chain':
+            with self._lock:
+                self.stats['handshakes'] += 1
+                cookie = self.cookie
+            self._respond(handler, 200, b'<html></html>', {'Set-Cookie': f'{cookie}; Path=/', 'Content-Type': 'text/html'})
+            return
+        if not url.path.startswith('/api/option-chain-'):
+            self._respond(handler, 404)
+            return
+
+        symbol = parse_qs(url.query).get('symbol', [''])[0]
+        with self._lock:
+            self.stats['requests'] += 1
+            if self.cookie not in (handler.headers.get('Cookie') or '').split('; '):
+                self.stats['unauthorized'] += 1
+                status = 401
+            elif self.throttle_every and self.stats['requests'] % self.throttle_every == 0:
+                self.stats['throttled'] += 1
+                status = 429
+            elif symbol not in self.recordings:
+                status = 404
+            else:
+                payloads = self.recordings[symbol]
+                body = payloads[min(self._positions[symbol], len(payloads) - 1)]
+                self._positions[symbol] += 1
+                self.stats['served'] += 1
+                status = 200
+        if status == 200:
+            self._respond(handler, 200, body, {'Content-Type': 'application/json'})
+        elif status == 429 and self.retry_after is not None:
+            self._respond(handler, 429, b'{}', {'Retry-After': str(self.retry_after)})
+        else:
+            self._respond(handler, status, b'{}')
+
+    def expire_cookies(self):
+        """Makes the next API call of every client fail with 401, as an expired NSE session would."""
+        with self._lock:
+            self._generation += 1
+            self.cookie = f'nsit=replay-{self._generation}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve recorded NSE option chains as a local stand-in for nseindia.com.")
+    parser.add_argument('directory', help="folder of <SYMBOL>.json / <SYMBOL>.jsonl recordings")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--throttle-every', type=int)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = OptionChainServer(load_recordings(args.directory), args.host, args.port, args.throttle_every, latency=args.latency).start()
+    logging.info(f"Serving {', '.join(server.recordings)} option chains on {server.url} (set NSE_BASE_URL to use it)")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,218 @@
+# market_analysis_app/options/greeks.py
+
+import numpy as np
+import pandas as pd
+
+# Annual risk-free rate used for NSE index options (roughly the 91-day T-bill yield)
+RISK_FREE_RATE = 0.065
+
+# NSE index options settle at the 15:30 IST close of their expiry date
+EXPIRY_TIME = pd.Timedelta(hours=15, minutes=30)
+YEAR = pd.Timedelta(days=365)
+# Time left is floored at one minute so expiry-day contracts still solve
+MIN_YEARS = 60 / YEAR.total_seconds()
+
+# Volatility bracket of the implied-volatility solver
+MIN_VOL, MAX_VOL = 1e-4, 5.0
+
+# Delta at which iv_skew reads the wings of the smile
+SKEW_DELTA = 0.25
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / _SQRT_2PI
+
+
+def norm_cdf(x):
+    """Standard normal CDF by Hart's algorithm as given by West (absolute error ~1e-15), element-wise."""
+    x = np.asarray(x, dtype=float)
+    z = np.abs(x)
+    e = np.exp(-0.5 * z * z)
+    numerator = ((((((3.52624965998911e-02 * z + 0.700383064443688) * z + 6.37396220353165) * z
+                    + 33.912866078383) * z + 112.079291497871) * z + 221.213596169931) * z + 220.206867912376)
+    denominator = (((((((8.83883476483184e-02 * z + 1.75566716318264) * z + 16.064177579207) * z
+                       + 86.7807322029461) * z + 296.564248779674) * z + 637.333633378831) * z
+                    + 793.826512519948) * z + 440.413735824752)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tail = z + 1 / (z + 2 / (z + 3 / (z + 4 / (z + 0.65))))
+        lower = np.where(z < 7.07106781186547, e * numerator / denominator, e / tail / _SQRT_2PI)
+    lower = np.where(z > 37, 0.0, lower)
+    return np.where(x > 0, 1 - lower, lower)
+
+
+def _d1_d2(spot, strike, years, vol, rate):
+    root = vol * np.sqrt(years)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * vol * vol) * years) / root
+    return d1, d1 - root
+
+
+def black_scholes_price(spot, strike, years, vol, rate=RISK_FREE_RATE, is_call=True):
+    """European option premium; every argument may be an array and they broadcast."""
+    d1, d2 = _d1_d2(spot, strike, years, vol, rate)
+    discounted = strike * np.exp(-rate * years)
+    call = spot * norm_cdf(d1) - discounted * norm_cdf(d2)
+    # Put-call parity
+    return np.where(is_call, call, call - spot + discounted)
+
+
+def greeks(spot, strike, years, vol, rate=RISK_FREE_RATE, is_call=True):
+    """Delta, gamma, theta (per calendar day) and vega (per volatility point) as a dict of arrays."""
+    d1, d2 = _d1_d2(spot, strike, years, vol, rate)
+    density = norm_pdf(d1)
+    discounted = strike * np.exp(-rate * years)
+    root = np.sqrt(years)
+    call_delta = norm_cdf(d1)
+    call_theta = -spot * density * vol / (2 * root) - rate * discounted * norm_cdf(d2)
+    return {
+        'delta': np.where(is_call, call_delta, call_delta - 1),
+        'gamma': density / (spot * vol * root),
+        'theta': np.where(is_call, call_theta, call_theta + rate * discounted) / 365,
+        'vega': spot * density * root / 100,
+    }
+
+
+def implied_volatility(price, spot, strike, years, rate=RISK_FREE_RATE, is_call=True, tol=1e-6, max_iter=60):
+    """Volatilities (annual, as a fraction) reproducing `price`, solved for a whole batch at once.
+
+    Each contract runs a safeguarded Newton iteration: Newton steps on vega
+    while they stay inside the contract's [low, high] bracket, bisection
+    otherwise, so deep out-of-the-money strikes with vanishing vega still
+    converge. Only unconverged contracts are evaluated on later iterations.
+    Prices outside the no-arbitrage bounds, and non-positive prices or
+    times, give NaN.
+    """
+    shape = np.broadcast_shapes(*(np.shape(a) for a in (price, spot, strike, years, rate, is_call)))
+    price, spot, strike, years, rate = (
+        np.broadcast_to(np.asarray(a, dtype=float), shape).ravel() for a in (price, spot, strike, years, rate))
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), shape).ravel()
+    discounted = strike * np.exp(-rate * years)
+    floor = np.where(is_call, np.maximum(spot - discounted, 0), np.maximum(discounted - spot, 0))
+    cap = np.where(is_call, spot, discounted)
+    with np.errstate(invalid='ignore'):
+        valid = (price > floor) & (price < cap) & (years > 0) & (spot > 0) & (strike > 0)
+
+    vol = np.full(len(price), np.nan)
+    active = np.flatnonzero(valid)
+    p, s, k, t, r, c = (a[active] for a in (price, spot, strike, years, rate, is_call))
+    low, high = np.full(len(active), MIN_VOL), np.full(len(active), MAX_VOL)
+    # Start from the larger of the ATM approximation and the moneyness-implied volatility
+    guess = np.maximum(p / s * np.sqrt(2 * np.pi / t), np.sqrt(2 * np.abs(np.log(s / k) + r * t) / t))
+    sigma = np.clip(guess, 0.05, 2.0)
+    for _ in range(max_iter):
+        if not len(active):
+            break
+        d1, _d2 = _d1_d2(s, k, t, sigma, r)
+        error = black_scholes_price(s, k, t, sigma, r, c) - p
+        done = np.abs(error) < tol
+        vol[active[done]] = sigma[done]
+        high = np.where(error > 0, sigma, high)
+        low = np.where(error < 0, sigma, low)
+        vega = s * norm_pdf(d1) * np.sqrt(t)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = sigma - error / vega
+        sigma = np.where((step > low) & (step < high), step, 0.5 * (low + high))
+        keep = ~done
+        active, p, s, k, t, r, c, low, high, sigma = (
+            a[keep] for a in (active, p, s, k, t, r, c, low, high, sigma))
+    if len(active):
+        # Out of iterations: the bracket is already narrower than any quoted precision
+        vol[active] = sigma
+    return vol.reshape(shape)
+
+
+def years_to_expiry(expiry, now):
+    """Years from `now` until the 15:30 IST settlement of each expiry date, floored at MIN_YEARS."""
+    now = pd.Timestamp(now)
+    if now.tzinfo is not None:
+        now = now.tz_convert('Asia/Kolkata').tz_localize(None)
+    settle = pd.DatetimeIndex(np.atleast_1d(np.asarray(expiry, dtype='datetime64[ns]'))).normalize() + EXPIRY_TIME
+    return np.maximum(np.asarray((settle - now) / YEAR, dtype=float), MIN_YEARS)
+
+
+def chain_greeks(chain, spot=None, now=None, rate=RISK_FREE_RATE):
+    """Implied volatility and Greeks of every call and put of a chain snapshot.
+
+    `chain` is shaped like oi_strategy.get_oi_data's (strike, expiry, ce_ltp,
+    pe_ltp, ...); `spot` and `now` default to the underlying value and
+    timestamp NSE published with it. Both sides of all expiries are solved
+    in one batch. Returns strike and expiry with ce_/pe_ iv (in percent, like
+    NSE's own), delta, gamma, theta and vega; contracts without a usable
+    premium get NaN.
+    """
+    spot = spot if spot is not None else chain.attrs.get('underlying')
+    now = now if now is not None else chain.attrs.get('timestamp')
+    if spot is None or now is None:
+        raise ValueError("chain_greeks needs a spot price and a valuation time")
+    strike = chain['strike'].to_numpy(dtype=float)
+    years = years_to_expiry(chain['expiry'].to_numpy(), now)
+    n = len(chain)
+
+    # Calls in the first half, puts in the second
+    strikes, times = np.tile(strike, 2), np.tile(years, 2)
+    is_call = np.arange(2 * n) < n
+    prices = np.concatenate([chain['ce_ltp'].to_numpy(dtype=float), chain['pe_ltp'].to_numpy(dtype=float)])
+    vol = implied_volatility(prices, float(spot), strikes, times, rate, is_call)
+    sensitivities = greeks(float(spot), strikes, times, vol, rate, is_call)
+
+    frame = pd.DataFrame({'strike': strike, 'expiry': chain['expiry'].to_numpy()})
+    for side, half in (('ce', slice(None, n)), ('pe', slice(n, None))):
+        frame[f'{side}_iv'] = vol[half] * 100
+        for name, values in sensitivities.items():
+            frame[f'{side}_{name}'] = values[half]
+    frame.attrs['underlying'] = float(spot)
+    frame.attrs['timestamp'] = now
+    return frame
+
+
+def iv_skew(greeks_frame, spot=None, skew_delta=SKEW_DELTA):
+    """Volatility smile summary of every expiry in a chain_greeks frame.
+
+    atm_iv averages the call and put IV at the strike nearest spot;
+    call_wing_iv/put_wing_iv are the IVs interpolated at +/-`skew_delta`
+    delta and skew is put_wing_iv - call_wing_iv (positive when downside
+    protection is bid). Indexed by expiry, IVs in percent.
+    """
+    spot = spot if spot is not None else greeks_frame.attrs['underlying']
+    rows = []
+    for expiry, group in greeks_frame.sort_values(['expiry', 'strike']).groupby('expiry', sort=True):
+        nearest = group.iloc[np.argmin(np.abs(group['strike'].to_numpy() - spot))]
+        atm_iv = np.nanmean([nearest['ce_iv'], nearest['pe_iv']]) if nearest[['ce_iv', 'pe_iv']].notna().any() else np.nan
+        calls = group.dropna(subset=['ce_iv', 'ce_delta'])
+        puts = group.dropna(subset=['pe_iv', 'pe_delta'])
+        # Delta falls as strike rises, so interpolate over the strikes in reverse
+        call_wing = np.interp(skew_delta, calls['ce_delta'].to_numpy()[::-1], calls['ce_iv'].to_numpy()[::-1]) if len(calls) else np.nan
+        put_wing = np.interp(-skew_delta, puts['pe_delta'].to_numpy()[::-1], puts['pe_iv'].to_numpy()[::-1]) if len(puts) else np.nan
+        rows.append((expiry, atm_iv, call_wing, put_wing, put_wing - call_wing))
+    return pd.DataFrame(rows, columns=['expiry', 'atm_iv', 'call_wing_iv', 'put_wing_iv', 'skew']).set_index('expiry')
+
+
+def atm_iv_series(history, expiry=None, rate=RISK_FREE_RATE):
+    """ATM implied volatility (percent) at every snapshot of an OptionChainStore ChainHistory.
+
+    Each snapshot's ATM strike is the quoted strike of `expiry` (the
+    nearest expiry by default) closest to that snapshot's underlying; its
+    call and put premiums are solved together and averaged.
+    """
+    expiry = expiry if expiry is not None else history.nearest_expiry()
+    if expiry is None or not len(history):
+        return pd.Series(dtype=float, name='atm_iv')
+    columns = np.flatnonzero(history.rows(expiry=expiry))
+    strikes = history.strike[columns]
+    ce = history.column('ce_ltp')[:, columns]
+    pe = history.column('pe_ltp')[:, columns]
+    distance = np.where(np.isnan(ce) & np.isnan(pe), np.inf, np.abs(strikes[None, :] - history.underlying[:, None]))
+    atm = np.argmin(distance, axis=1)
+    snapshots = np.arange(len(history))
+    settle = (pd.Timestamp(expiry).normalize() + EXPIRY_TIME).tz_localize('Asia/Kolkata')
+    years = np.maximum((settle - history.times) / YEAR, MIN_YEARS)
+
+    n = len(history)
+    vol = implied_volatility(
+        np.concatenate([ce[snapshots, atm], pe[snapshots, atm]]), np.tile(history.underlying, 2),
+        np.tile(strikes[atm], 2), np.tile(years, 2), rate, np.arange(2 * n) < n,
+    ).reshape(2, n)
+    solved = (~np.isnan(vol)).sum(axis=0)
+    iv = np.where(solved > 0, np.nansum(vol, axis=0) / np.maximum(solved, 1), np.nan)
+    return pd.Series(iv * 100, index=history.times, name='atm_iv')
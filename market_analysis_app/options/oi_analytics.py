@@ -0,0 +1,138 @@
+# market_analysis_app/options/oi_analytics.py
+
+import numpy as np
+import pandas as pd
+
+# Listed strike interval of each index's options
+STRIKE_STEPS = {'NIFTY': 50, 'BANKNIFTY': 100, 'FINNIFTY': 50, 'MIDCPNIFTY': 25, 'NIFTYNXT50': 100}
+DEFAULT_STRIKE_STEP = 50
+
+# Strikes either side of ATM searched for OI walls and hotspots, so the window
+# spans NIFTY +/-500 and BANKNIFTY +/-1000 points
+WINDOW_STRIKES = 10
+
+# Absolute change in OI that marks a strike as a hotspot
+HOTSPOT_CHANGE = 10000
+
+COLUMNS = (
+    'atm', 'pcr', 'max_pain', 'ce_oi', 'pe_oi',
+    'resistance', 'resistance_oi', 'support', 'support_oi', 'ce_hotspots', 'pe_hotspots',
+)
+
+
+def window_width(symbol, strikes=WINDOW_STRIKES):
+    """Points either side of ATM covered by the wall/hotspot window of an index."""
+    return STRIKE_STEPS.get(symbol, DEFAULT_STRIKE_STEP) * strikes
+
+
+def _segment_first(mask, segments):
+    """Index of the first True in each segment of a sorted array."""
+    positions = np.where(mask, np.arange(len(mask)), len(mask))
+    return np.minimum.reduceat(positions, segments)
+
+
+def _segment_lists(values, mask, segments):
+    """Per segment, the list of values where mask is True."""
+    counts = np.add.reduceat(mask.astype(np.int64), segments)
+    return [part.tolist() for part in np.split(values[mask], np.cumsum(counts)[:-1])]
+
+
+def analyze_arrays(strike, expiry, ce_oi, pe_oi, ce_change_oi, pe_change_oi, spot, width, hotspot_change=HOTSPOT_CHANGE):
+    """OI analytics for every expiry of one chain snapshot, without per-expiry loops.
+
+    Rows are sorted once by (expiry, strike); every statistic is then a
+    segmented reduction over that order:
+    - pcr: put OI / call OI (0 when there is no call OI);
+    - max_pain: the strike minimising the option writers' payout at expiry,
+      from prefix sums of OI and OI x strike;
+    - atm: the strike nearest `spot`, by binary search on the sorted strikes;
+    - resistance/support: the strikes with the most call/put OI within
+      `width` points of ATM, with that OI;
+    - ce_hotspots/pe_hotspots: strikes within the window whose change in OI
+      exceeds `hotspot_change` in absolute terms.
+    Returns a DataFrame indexed by expiry with COLUMNS; attrs['pcr'] holds
+    the PCR across all expiries.
+    """
+    strike = np.asarray(strike, dtype=float)
+    expiry = np.asarray(expiry)
+    ce_oi, pe_oi = np.asarray(ce_oi, dtype=float), np.asarray(pe_oi, dtype=float)
+    ce_change_oi, pe_change_oi = np.asarray(ce_change_oi, dtype=float), np.asarray(pe_change_oi, dtype=float)
+    n = len(strike)
+    if not n:
+        frame = pd.DataFrame(columns=list(COLUMNS))
+        frame.attrs['pcr'] = 0.0
+        return frame
+
+    order = np.lexsort((strike, expiry))
+    strike, expiry = strike[order], expiry[order]
+    ce_oi, pe_oi, ce_change_oi, pe_change_oi = ce_oi[order], pe_oi[order], ce_change_oi[order], pe_change_oi[order]
+    segments = np.flatnonzero(np.r_[True, expiry[1:] != expiry[:-1]])
+    segment = np.repeat(np.arange(len(segments)), np.diff(np.r_[segments, n]))
+    first = segments[segment]
+    last = np.r_[segments[1:], n][segment] - 1
+
+    total_ce = np.add.reduceat(ce_oi, segments)
+    total_pe = np.add.reduceat(pe_oi, segments)
+    pcr = np.divide(total_pe, total_ce, out=np.zeros_like(total_pe), where=total_ce != 0)
+
+    # Payout if expiry settles at each row's strike, from per-expiry prefix sums:
+    # calls below the strike pay (K - s) * OI, puts above it pay (s - K) * OI
+    def within(values):
+        running = np.cumsum(values)
+        return running - (running[first] - values[first])
+    ce_below = within(ce_oi) - ce_oi
+    ce_value_below = within(ce_oi * strike) - ce_oi * strike
+    pe_upto = within(pe_oi)
+    pe_value_upto = within(pe_oi * strike)
+    pe_total, pe_value_total = pe_upto[last], pe_value_upto[last]
+    payout = (strike * ce_below - ce_value_below) + ((pe_value_total - pe_value_upto) - strike * (pe_total - pe_upto))
+    least = np.minimum.reduceat(payout, segments)
+    max_pain = strike[_segment_first(payout == least[segment], segments)]
+
+    # Binary search within each expiry: offset every expiry's strikes into its own range
+    span = strike.max() - strike.min() + 1.0
+    keyed = segment * span + (strike - strike.min())
+    targets = np.arange(len(segments)) * span + np.clip(spot - strike.min(), 0.0, span - 1.0)
+    position = np.searchsorted(keyed, targets)
+    segment_end = np.r_[segments[1:], n]
+    above = np.minimum(position, segment_end - 1)
+    below = np.maximum(position - 1, segments)
+    nearest = np.where(np.abs(strike[below] - spot) <= np.abs(strike[above] - spot), below, above)
+    atm = strike[nearest]
+
+    in_window = np.abs(strike - atm[segment]) <= width
+    ce_masked = np.where(in_window, ce_oi, -np.inf)
+    pe_masked = np.where(in_window, pe_oi, -np.inf)
+    ce_wall = np.maximum.reduceat(ce_masked, segments)
+    pe_wall = np.maximum.reduceat(pe_masked, segments)
+    resistance = strike[_segment_first(ce_masked == ce_wall[segment], segments)]
+    support = strike[_segment_first(pe_masked == pe_wall[segment], segments)]
+
+    ce_hot = in_window & (np.abs(ce_change_oi) > hotspot_change)
+    pe_hot = in_window & (np.abs(pe_change_oi) > hotspot_change)
+    frame = pd.DataFrame({
+        'atm': atm, 'pcr': pcr, 'max_pain': max_pain, 'ce_oi': total_ce, 'pe_oi': total_pe,
+        'resistance': resistance, 'resistance_oi': ce_wall, 'support': support, 'support_oi': pe_wall,
+        'ce_hotspots': _segment_lists(strike, ce_hot, segments),
+        'pe_hotspots': _segment_lists(strike, pe_hot, segments),
+    }, index=pd.Index(expiry[segments], name='expiry'))
+    ce_sum = total_ce.sum()
+    frame.attrs['pcr'] = float(total_pe.sum() / ce_sum) if ce_sum else 0.0
+    return frame
+
+
+def analyze_chain(chain, spot=None, symbol='NIFTY', width=None, hotspot_change=HOTSPOT_CHANGE):
+    """analyze_arrays over a chain DataFrame from get_oi_data or OptionChainStore.
+
+    `spot` defaults to the underlying value NSE published with the chain and
+    `width` to the index's window_width.
+    """
+    spot = spot if spot is not None else chain.attrs.get('underlying')
+    if spot is None:
+        raise ValueError("analyze_chain needs a spot price")
+    expiry = chain['expiry'].to_numpy() if 'expiry' in chain else np.zeros(len(chain), dtype='datetime64[D]')
+    return analyze_arrays(
+        chain['strike'].to_numpy(), expiry, chain['ce_oi'].to_numpy(), chain['pe_oi'].to_numpy(),
+        chain['ce_change_oi'].to_numpy(), chain['pe_change_oi'].to_numpy(),
+        float(spot), window_width(symbol) if width is None else width, hotspot_change,
+    )
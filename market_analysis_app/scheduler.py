@@ -0,0 +1,204 @@
+# market_analysis_app/scheduler.py
+
+import asyncio
+import datetime
+import inspect
+import logging
+
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+SESSION_OPEN = datetime.time(9, 15)
+SESSION_CLOSE = datetime.time(15, 30)
+
+# Job priorities; lower values start first and are never shed under load
+CRITICAL, NORMAL, LOW = 0, 1, 2
+
+# Longest single sleep, so clock jumps (NTP, suspend) are noticed within this many seconds
+_MAX_SLEEP = 60.0
+
+
+def _next_weekday(day, weekdays):
+    day += datetime.timedelta(days=1)
+    while day.weekday() not in weekdays:
+        day += datetime.timedelta(days=1)
+    return day
+
+
+class CandleClose:
+    """Fires at every close of `minutes`-long candles within the session.
+
+    Candles are aligned to the 09:15 open, so 5-minute candles close at 09:20,
+    09:25, ..., 15:30. `delay` seconds are added to each close to give the data
+    provider time to publish the bar.
+    """
+
+    def __init__(self, minutes, delay=0.0, session_open=SESSION_OPEN, session_close=SESSION_CLOSE, weekdays=range(5)):
+        self.step = datetime.timedelta(minutes=minutes)
+        self.delay = datetime.timedelta(seconds=delay)
+        self.session_open = session_open
+        self.session_close = session_close
+        self.weekdays = set(weekdays)
+
+    def next_after(self, moment):
+        """Returns the first fire time strictly after `moment`."""
+        day = moment.date()
+        if day.weekday() not in self.weekdays:
+            day = _next_weekday(day, self.weekdays)
+        while True:
+            session_open = datetime.datetime.combine(day, self.session_open, moment.tzinfo)
+            session_close = datetime.datetime.combine(day, self.session_close, moment.tzinfo)
+            candles = max((moment - self.delay - session_open) // self.step + 1, 1)
+            close = session_open + candles * self.step
+            if close <= session_close:
+                return close + self.delay
+            day = _next_weekday(day, self.weekdays)
+
+
+class DailyAt:
+    """Fires once a day at a wall-clock time, e.g. the pre-open or a square-off reminder."""
+
+    def __init__(self, at, weekdays=range(5)):
+        self.at = at
+        self.weekdays = set(weekdays)
+
+    def next_after(self, moment):
+        day = moment.date()
+        while True:
+            if day.weekday() in self.weekdays:
+                fire = datetime.datetime.combine(day, self.at, moment.tzinfo)
+                if fire > moment:
+                    return fire
+            day += datetime.timedelta(days=1)
+
+
+class Job:
+    """A coroutine function scheduled by a trigger; `func(fire_time)` is awaited on every fire."""
+
+    def __init__(self, name, func, trigger, priority=NORMAL, max_lateness=None):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.priority = priority
+        # Seconds a fire may be late and still run; None runs it however late
+        self.max_lateness = max_lateness
+        self.next_fire = None
+        self.task = None
+        self.overrunning = False
+        self.stats = {
+            'runs': 0, 'errors': 0, 'overruns': 0, 'shed': 0, 'missed': 0,
+            'last_duration': None, 'max_duration': 0.0, 'max_lateness': 0.0,
+        }
+
+    @property
+    def running(self):
+        return self.task is not None and not self.task.done()
+
+
+class Scheduler:
+    """Runs async jobs at exact wall-clock trigger times.
+
+    Every wake-up is computed from the wall clock rather than by sleeping a
+    fixed period after the previous run, so job run time and sleep overshoot
+    never accumulate into drift. A job that is still running when it fires
+    again is reported as an overrun and that fire is skipped rather than
+    stacked. While the scheduler is under load (it woke more than
+    `load_threshold` seconds late, or some job is overrunning) jobs with
+    priority `shed_priority` or lower are skipped so the signal path keeps
+    its slot.
+    """
+
+    def __init__(self, clock=None, sleep=asyncio.sleep, tz=IST, load_threshold=5.0, shed_priority=LOW, on_overrun=None):
+        self.tz = tz
+        self.clock = clock or (lambda: datetime.datetime.now(self.tz))
+        self.sleep = sleep
+        self.load_threshold = load_threshold
+        self.shed_priority = shed_priority
+        self.on_overrun = on_overrun
+        self.jobs = []
+
+    def add_job(self, name, func, trigger, priority=NORMAL, max_lateness=None):
+        job = Job(name, func, trigger, priority, max_lateness)
+        self.jobs.append(job)
+        return job
+
+    def under_load(self, lateness):
+        return lateness > self.load_threshold or any(job.overrunning for job in self.jobs)
+
+    def fire_due(self, now):
+        """Starts every job due at `now`, in priority order. Returns the jobs started."""
+        started = []
+        due = sorted((job for job in self.jobs if job.next_fire <= now), key=lambda job: job.priority)
+        for job in due:
+            scheduled = job.next_fire
+            lateness = (now - scheduled).total_seconds()
+            job.stats['max_lateness'] = max(job.stats['max_lateness'], lateness)
+
+            # Fires missed while the process was blocked or suspended collapse into this one
+            job.next_fire = job.trigger.next_after(scheduled)
+            missed = 0
+            while job.next_fire <= now:
+                missed += 1
+                job.next_fire = job.trigger.next_after(job.next_fire)
+            if missed:
+                job.stats['missed'] += missed
+                logging.warning(f"Job {job.name}: {missed} fire(s) missed before {now:%H:%M:%S}.")
+
+            if job.running:
+                job.overrunning = True
+                job.stats['overruns'] += 1
+                logging.warning(f"Job {job.name} overran: still running at its {scheduled:%H:%M:%S} fire, skipping it.")
+                if self.on_overrun is not None:
+                    result = self.on_overrun(job, scheduled)
+                    if inspect.isawaitable(result):
+                        asyncio.ensure_future(result)
+                continue
+            if job.max_lateness is not None and lateness > job.max_lateness:
+                job.stats['shed'] += 1
+                logging.warning(f"Job {job.name} skipped: {lateness:.1f}s late for its {scheduled:%H:%M:%S} fire.")
+                continue
+            if job.priority >= self.shed_priority and self.under_load(lateness):
+                job.stats['shed'] += 1
+                logging.warning(f"Job {job.name} skipped: scheduler under load at {now:%H:%M:%S}.")
+                continue
+
+            job.task = asyncio.ensure_future(self._run_job(job, scheduled))
+            started.append(job)
+        return started
+
+    async def _run_job(self, job, scheduled):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            await job.func(scheduled)
+        except Exception as e:
+            job.stats['errors'] += 1
+            logging.error(f"Job {job.name} failed: {e}")
+        finally:
+            duration = loop.time() - started
+            job.overrunning = False
+            job.stats['runs'] += 1
+            job.stats['last_duration'] = duration
+            job.stats['max_duration'] = max(job.stats['max_duration'], duration)
+
+    async def sleep_until(self, moment):
+        """Sleeps until the wall clock reaches `moment`, re-reading the clock after every nap."""
+        while True:
+            remaining = (moment - self.clock()).total_seconds()
+            if remaining <= 0:
+                return
+            await self.sleep(min(remaining, _MAX_SLEEP))
+
+    async def run(self, until=None):
+        """Fires jobs forever, or until the next fire would be after `until`."""
+        now = self.clock()
+        for job in self.jobs:
+            job.next_fire = job.trigger.next_after(now)
+        while self.jobs:
+            fire_at = min(job.next_fire for job in self.jobs)
+            if until is not None and fire_at > until:
+                break
+            await self.sleep_until(fire_at)
+            self.fire_due(self.clock())
+        running = [job.task for job in self.jobs if job.running]
+        if running:
+            await asyncio.gather(*running)
@@ -0,0 +1,144 @@
+# market_analysis_app/strategies/exit_simulator.py
+
+import numpy as np
+
+# Bars scanned per step when looking for the exit of an open trade. The window
+# doubles until an exit is found, so long trades cost O(log n) numpy calls.
+_INITIAL_WINDOW = 64
+
+
+def _first_exit(direction, stop, target, high, low, start, trail, trailing):
+    """Returns (exit_index, stop_levels) for a trade entered at start - 1.
+
+    stop_levels holds the (trailed) stop recorded on every bar from start up to
+    and including the exit bar, or up to the end of the data when no exit occurs.
+    """
+    n = len(high)
+    window = _INITIAL_WINDOW
+    levels = []
+    begin = start
+    while begin < n:
+        end = min(n, begin + window)
+        if trailing and not np.isnan(stop):
+            if direction == 1:
+                trailed = np.fmax.accumulate(np.fmax(trail[begin:end], stop))
+            else:
+                trailed = np.fmin.accumulate(np.fmin(trail[begin:end], stop))
+        else:
+            trailed = np.full(end - begin, stop)
+
+        # The exit test on each bar uses the stop as it stood after the previous bar.
+        previous = np.empty(end - begin)
+        previous[0] = stop
+        previous[1:] = trailed[:-1]
+        if direction == 1:
+            hit = (low[begin:end] < previous) | (high[begin:end] > target)
+        else:
+            hit = (high[begin:end] > previous) | (low[begin:end] < target)
+
+        if hit.any():
+            offset = int(hit.argmax())
+            levels.append(trailed[:offset + 1])
+            return begin + offset, np.concatenate(levels)
+
+        levels.append(trailed)
+        stop = trailed[-1]
+        begin = end
+        window *= 2
+
+    return n, np.concatenate(levels) if levels else np.empty(0)
+
+
+def simulate_exits(signal, high, low, close, long_stop, short_stop, target_pct=0.01, trailing=True):
+    """Simulates entries, stop losses and targets over arrays of bars.
+
+    A trade is opened at the close of a bar whose signal is 1 or -1 while flat.
+    Its stop starts at long_stop/short_stop for that bar and, when trailing is
+    enabled, ratchets towards price with later long_stop/short_stop values. The
+    trade is closed on the first bar whose range crosses the stop or the target.
+
+    Returns a dict of 'position', 'entry_price', 'stop_loss' and 'target_price'
+    arrays, one value per bar.
+    """
+    signal = np.asarray(signal)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    long_stop = np.asarray(long_stop, dtype=float)
+    short_stop = np.asarray(short_stop, dtype=float)
+
+    n = len(signal)
+    positions = np.zeros(n, dtype=np.int64)
+    entry_prices = np.full(n, np.nan)
+    stop_losses = np.full(n, np.nan)
+    target_prices = np.full(n, np.nan)
+
+    entries = np.flatnonzero((signal == 1) | (signal == -1))
+    next_entry = 0
+    while next_entry < len(entries):
+        i = entries[next_entry]
+        direction = 1 if signal[i] == 1 else -1
+        entry = close[i]
+        if direction == 1:
+            stop, trail, target = long_stop[i], long_stop, entry * (1 + target_pct)
+        else:
+            stop, trail, target = short_stop[i], short_stop, entry * (1 - target_pct)
+
+        exit_index, levels = _first_exit(direction, stop, target, high, low, i + 1, trail, trailing)
+
+        # Bars from the entry up to (but excluding) the exit bar hold the position.
+        held = slice(i, exit_index)
+        positions[held] = direction
+        entry_prices[held] = entry
+        target_prices[held] = target
+        stop_losses[i] = stop
+        stop_losses[i + 1:exit_index] = levels[:exit_index - i - 1]
+
+        # A new trade can only be opened on the bar after the exit.
+        next_entry = np.searchsorted(entries, exit_index + 1)
+
+    return {
+        'position': positions,
+        'entry_price': entry_prices,
+        'stop_loss': stop_losses,
+        'target_price': target_prices,
+    }
+
+
+class ExitTracker:
+    """Bar-by-bar counterpart of simulate_exits for streaming strategies.
+
+    Feeding the same bars one at a time through update() produces exactly the
+    values simulate_exits returns for the whole array.
+    """
+
+    def __init__(self, target_pct=0.01, trailing=True):
+        self.target_pct = target_pct
+        self.trailing = trailing
+        self.position = 0
+        self.entry_price = np.nan
+        self.stop_loss = np.nan
+        self.target_price = np.nan
+
+    def _flatten(self):
+        self.position = 0
+        self.entry_price = self.stop_loss = self.target_price = np.nan
+
+    def update(self, signal, high, low, close, long_stop, short_stop):
+        """Processes one bar and returns (position, entry_price, stop_loss, target_price)."""
+        if self.position == 0 and signal in (1, -1):
+            self.position = 1 if signal == 1 else -1
+            self.entry_price = close
+            self.stop_loss = long_stop if self.position == 1 else short_stop
+            self.target_price = close * (1 + self.position * self.target_pct)
+        elif self.position == 1:
+            if low < self.stop_loss or high > self.target_price:
+                self._flatten()
+            elif self.trailing:
+                self.stop_loss = max(self.stop_loss, long_stop)
+        elif self.position == -1:
+            if high > self.stop_loss or low < self.target_price:
+                self._flatten()
+            elif self.trailing:
+                self.stop_loss = min(self.stop_loss, short_stop)
+        return self.position, self.entry_price, self.stop_loss, self.target_price
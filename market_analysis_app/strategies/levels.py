@@ -0,0 +1,173 @@
+# market_analysis_app/strategies/levels.py
+
+import bisect
+import datetime
+import json
+import os
+import threading
+
+import pandas as pd
+
+from market_analysis_app.data.data_fetcher import get_bulk_data
+from market_analysis_app.strategies.strategy2 import calculate_strategy2_levels
+from market_analysis_app.strategies.strategy4 import calculate_strategy4_levels
+
+DEFAULT_LEVELS_DIR = os.path.join(os.path.expanduser("~"), ".cache", "market_analysis", "levels")
+
+
+class LevelLadder:
+    """Price levels for one symbol, sorted for O(log n) proximity queries.
+
+    Each entry is (price, name, source) where source is 'strategy2', 'pivot'
+    or 'fibonacci'.
+    """
+
+    def __init__(self, levels):
+        self.levels = sorted(levels)
+        self.prices = [level[0] for level in self.levels]
+
+    @classmethod
+    def from_daily_levels(cls, strategy2_levels, strategy4_levels):
+        levels = [(value, name, 'strategy2') for name, value in strategy2_levels.items()]
+        levels += [(value, name, 'pivot') for name, value in strategy4_levels['pivot_points'].items()]
+        levels += [(value, name, 'fibonacci') for name, value in strategy4_levels['fibonacci'].items()]
+        return cls(levels)
+
+    def nearest(self, price):
+        """Returns the level closest to price, or None for an empty ladder."""
+        if not self.levels:
+            return None
+        i = bisect.bisect_left(self.prices, price)
+        candidates = self.levels[max(i - 1, 0):i + 1]
+        return min(candidates, key=lambda level: abs(level[0] - price))
+
+    def within(self, price, tolerance):
+        """Returns the levels whose relative distance to price is below tolerance."""
+        # abs(price - v) / v < tolerance bounds v to (price / (1 + tol), price / (1 - tol))
+        low = bisect.bisect_left(self.prices, price / (1 + tolerance))
+        high = bisect.bisect_right(self.prices, price / (1 - tolerance))
+        return [
+            level for level in self.levels[max(low - 1, 0):high + 1]
+            if abs(price - level[0]) / level[0] < tolerance
+        ]
+
+    def below(self, price):
+        """Returns the nearest level strictly below price (support), or None."""
+        i = bisect.bisect_left(self.prices, price)
+        return self.levels[i - 1] if i > 0 else None
+
+    def above(self, price):
+        """Returns the nearest level strictly above price (resistance), or None."""
+        i = bisect.bisect_right(self.prices, price)
+        return self.levels[i] if i < len(self.levels) else None
+
+
+class DailyLevels:
+    """Strategy2 and strategy4 levels for one symbol and session."""
+
+    def __init__(self, previous_day, strategy2, strategy4):
+        self.previous_day = previous_day
+        self.strategy2 = strategy2
+        self.strategy4 = strategy4
+        self.ladder = LevelLadder.from_daily_levels(strategy2, strategy4)
+
+    @classmethod
+    def from_bar(cls, bar, date):
+        previous_day = {'date': str(date), 'High': float(bar['High']), 'Low': float(bar['Low']), 'Close': float(bar['Close'])}
+        strategy2 = {name: float(value) for name, value in calculate_strategy2_levels(previous_day).items()}
+        return cls(previous_day, strategy2, calculate_strategy4_levels(previous_day))
+
+    def to_dict(self):
+        return {'previous_day': self.previous_day, 'strategy2': self.strategy2, 'strategy4': self.strategy4}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['previous_day'], data['strategy2'], data['strategy4'])
+
+
+def previous_session_bar(daily_data, session_date):
+    """Returns (date, row) of the last completed daily bar before session_date."""
+    if daily_data is None or daily_data.empty:
+        return None, None
+    dates = pd.Index(daily_data.index.date)
+    completed = daily_data[dates < session_date]
+    if completed.empty:
+        return None, None
+    return completed.index[-1].date(), completed.iloc[-1]
+
+
+class LevelStore:
+    """Per-session level cache: computed once before the open, then read per tick.
+
+    Levels are persisted as <root>/<YYYY-MM-DD>.json so a restart during the
+    session reloads them instead of refetching daily bars. Jobs asking for
+    different symbol sets (indices, the scanner universe) share one session
+    entry: each computes only what is missing and merges it in.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.getenv("MARKET_LEVELS_DIR", DEFAULT_LEVELS_DIR)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _path(self, session_date):
+        return os.path.join(self.root, f'{session_date.isoformat()}.json')
+
+    def load(self, session_date):
+        """Returns {symbol: DailyLevels or None} for a session, or None if not computed yet."""
+        if session_date in self._sessions:
+            return self._sessions[session_date]
+        try:
+            with open(self._path(session_date)) as f:
+                stored = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        levels = {symbol: DailyLevels.from_dict(data) for symbol, data in stored['symbols'].items()}
+        self._sessions[session_date] = levels
+        return levels
+
+    def save(self, session_date, levels):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(session_date)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'session': session_date.isoformat(),
+                # Symbols without levels are left out so a restart retries them
+                'symbols': {symbol: daily.to_dict() for symbol, daily in levels.items() if daily is not None},
+            }, f, indent=2)
+        os.replace(tmp_path, path)
+        self._sessions[session_date] = levels
+
+    def precompute(self, symbols, session_date=None, cache=None):
+        """Pre-open job: computes and persists levels for the symbols the session does not have yet.
+
+        Daily bars for the missing symbols are fetched in one batched request
+        and merged into the session's levels, which are returned whole.
+        Symbols without a completed previous session map to None. Runs under
+        a lock, so concurrent jobs neither fetch twice nor race on the file.
+        """
+        session_date = session_date or datetime.date.today()
+        with self._lock:
+            levels = dict(self.load(session_date) or {})
+            missing = [symbol for symbol in symbols if symbol not in levels]
+            if not missing:
+                return levels
+            daily = get_bulk_data(missing, interval='1d', period='5d', cache=cache)
+            for symbol in missing:
+                date, bar = previous_session_bar(daily.get(symbol), session_date)
+                if bar is None:
+                    print(f"No previous session bar for {symbol} before {session_date}.")
+                    levels[symbol] = None
+                    continue
+                levels[symbol] = DailyLevels.from_bar(bar, date)
+            self.save(session_date, levels)
+        return levels
+
+    def get(self, symbols, session_date=None, cache=None):
+        """Returns the session's levels, computing them if the pre-open job has not run."""
+        session_date = session_date or datetime.date.today()
+        levels = self.load(session_date)
+        if levels is None or any(symbol not in levels for symbol in symbols):
+            levels = self.precompute(symbols, session_date, cache=cache)
+        return levels
@@ -1,38 +1,32 @@
 # market_analysis_app/strategies/oi_strategy.py
 
-import pandas as pd
-from nsepython import nse_optionchain_scrapper
-import datetime
-
-def get_oi_data(symbol):
-    """Fetches OI data for a given symbol using nsepython."""
-    try:
-        # nse_optionchain_scrapper expects symbol like 'NIFTY' or 'BANKNIFTY'
-        # It fetches data for the current expiry by default.
-        # For Sensex, nsepython might not work as it's NSE specific.
-        if symbol == "SENSEX":
-            print("NSEPython does not support Sensex OI data directly. Skipping.")
-            return None
-
-        data = nse_optionchain_scrapper(symbol)
-        
-        # Extract relevant data and convert to DataFrame
-        records = []
-        for item in data['records']['data']:
-            record = {
-                'strike': item['strikePrice'],
-                'ce_oi': item['CE']['openInterest'] if 'CE' in item else 0,
-                'pe_oi': item['PE']['openInterest'] if 'PE' in item else 0,
-                'ce_change_oi': item['CE']['changeinOpenInterest'] if 'CE' in item else 0,
-                'pe_change_oi': item['PE']['changeinOpenInterest'] if 'PE' in item else 0,
-            }
-            records.append(record)
-        
-        df = pd.DataFrame(records)
-        return df
-    except Exception as e:
-        print(f"Error fetching OI data for {symbol}: {e}")
+import numpy as np
+
+from market_analysis_app.options.chain_client import OptionChainClient
+from market_analysis_app.options.greeks import chain_greeks
+from market_analysis_app.options.oi_analytics import analyze_chain
+
+# Shared by every poll so the NSE session, its cookies and rate limit carry over
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = OptionChainClient()
+    return _client
+
+def get_oi_data(symbol, client=None):
+    """Fetches OI data for a given symbol from NSE's option chain.
+
+    Returns one row per strike and expiry; see parse_option_chain. When NSE
+    has not updated the chain since the last poll the previous DataFrame is
+    returned.
+    """
+    # Sensex options trade on BSE, which NSE's option chain does not cover.
+    if symbol == "SENSEX":
+        print("NSE does not publish Sensex OI data. Skipping.")
         return None
+    return (client or get_client()).fetch(symbol)
 
 def calculate_pcr(oi_data):
     """Calculates the PCR (Put-Call Ratio)."""
@@ -58,53 +52,58 @@ def oi_trend_analysis(pcr):
     else:
         return "Neutral"
 
-def hero_zero_call(oi_data, current_price):
-    """Generates a hero-zero call based on OI data and current price."""
+def hero_zero_call(oi_data, current_price, symbol='NIFTY', analysis=None, now=None):
+    """Generates a hero-zero call from the nearest expiry's OI around the current price.
+
+    The window around ATM follows the index's strike step (see
+    oi_analytics.window_width); pass `analysis` to reuse an analyze_chain
+    result computed at the same price. The ATM call and put premiums are
+    reported with their implied volatility and delta as of `now` (default:
+    the chain's timestamp).
+    """
     if oi_data is None or oi_data.empty:
         return "No OI data for Hero-Zero call."
 
-    # Find the ATM strike price
-    atm_strike = oi_data.iloc[(oi_data['strike'] - current_price).abs().argsort()[:1]]['strike'].iloc[0]
-
-    # Filter data around ATM
-    filtered_oi = oi_data[(oi_data['strike'] >= atm_strike - 500) & (oi_data['strike'] <= atm_strike + 500)]
-
-    if filtered_oi.empty:
+    if analysis is None:
+        analysis = analyze_chain(oi_data, current_price, symbol)
+    nearest = analysis.iloc[0]
+    if not np.isfinite(nearest['resistance_oi']):
         return "No relevant OI data around ATM for Hero-Zero call."
 
-    # Identify strikes with significant OI build-up/unwinding
-    # Max CE OI (Resistance)
-    max_ce_oi_strike = filtered_oi.loc[filtered_oi['ce_oi'].idxmax()]
-    # Max PE OI (Support)
-    max_pe_oi_strike = filtered_oi.loc[filtered_oi['pe_oi'].idxmax()]
-
     call_message = f"Hero-Zero Call for current price {current_price:.2f}:\n"
-    call_message += f"  Max CE OI (Resistance): Strike {max_ce_oi_strike['strike']} (OI: {max_ce_oi_strike['ce_oi']})\n"
-    call_message += f"  Max PE OI (Support): Strike {max_pe_oi_strike['strike']} (OI: {max_pe_oi_strike['pe_oi']})\n"
+    call_message += f"  Max CE OI (Resistance): Strike {nearest['resistance']:g} (OI: {nearest['resistance_oi']:.0f})\n"
+    call_message += f"  Max PE OI (Support): Strike {nearest['support']:g} (OI: {nearest['support_oi']:.0f})\n"
+    call_message += f"  Max Pain: Strike {nearest['max_pain']:g}\n"
+
+    # Premiums of the ATM pair, to judge whether the options are cheap enough to buy
+    if now is None:
+        now = oi_data.attrs.get('timestamp')
+    if now is not None and 'ce_ltp' in oi_data:
+        atm = oi_data[(oi_data['expiry'] == analysis.index[0]) & (oi_data['strike'] == nearest['atm'])]
+        if len(atm):
+            pair = chain_greeks(atm, current_price, now).iloc[0]
+            call_message += (f"  ATM {nearest['atm']:g} premiums: CE {atm['ce_ltp'].iloc[0]:.2f} (IV {pair['ce_iv']:.1f}%, delta {pair['ce_delta']:.2f}), "
+                             f"PE {atm['pe_ltp'].iloc[0]:.2f} (IV {pair['pe_iv']:.1f}%, delta {pair['pe_delta']:.2f})\n")
 
     # Simple Hero-Zero logic: Look for strikes where OI is changing significantly
     # This is a very basic example and needs refinement for actual trading.
-    significant_change_ce = filtered_oi[filtered_oi['ce_change_oi'].abs() > 10000]
-    significant_change_pe = filtered_oi[filtered_oi['pe_change_oi'].abs() > 10000]
-
-    if not significant_change_ce.empty:
-        call_message += "  Significant CE OI change at strikes: " + ", ".join(significant_change_ce['strike'].astype(str).tolist()) + "\n"
-    if not significant_change_pe.empty:
-        call_message += "  Significant PE OI change at strikes: " + ", ".join(significant_change_pe['strike'].astype(str).tolist()) + "\n"
+    if nearest['ce_hotspots']:
+        call_message += "  Significant CE OI change at strikes: " + ", ".join(f"{strike:g}" for strike in nearest['ce_hotspots']) + "\n"
+    if nearest['pe_hotspots']:
+        call_message += "  Significant PE OI change at strikes: " + ", ".join(f"{strike:g}" for strike in nearest['pe_hotspots']) + "\n"
 
     return call_message
 
 if __name__ == '__main__':
     # Example usage
-    # Note: nsepython might have rate limits or require specific headers.
-    # This example assumes it works out of the box.
+    # Set NSE_BASE_URL to a local OptionChainServer to run this offline.
     nifty_oi_data = get_oi_data("NIFTY")
     if nifty_oi_data is not None:
         pcr = calculate_pcr(nifty_oi_data)
         trend = oi_trend_analysis(pcr)
         # For hero-zero call, we need a current price. Using a dummy for example.
         dummy_current_price = 22500
-        hero_zero = hero_zero_call(nifty_oi_data, dummy_current_price)
+        hero_zero = hero_zero_call(nifty_oi_data, dummy_current_price, 'NIFTY')
 
         print(f"PCR: {pcr:.2f}")
         print(f"Trend: {trend}")
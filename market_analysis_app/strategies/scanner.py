@@ -0,0 +1,162 @@
+# market_analysis_app/strategies/scanner.py
+
+import numpy as np
+import pandas as pd
+
+from market_analysis_app.data.data_fetcher import get_bulk_data
+from market_analysis_app.indicators import panel
+
+STRATEGIES = ('strategy1', 'strategy2', 'strategy3', 'strategy4')
+
+# strategy3 compares the chikou span with the close kijun - 1 bars later, so its
+# latest settled signal is this many bars before the latest bar
+STRATEGY3_LAG = 25
+
+# Pivot levels strategy4_signal treats as support and resistance
+SUPPORTS = ('S1', 'S2', 'S3')
+RESISTANCES = ('R1', 'R2', 'R3')
+
+
+def build_panel(frames, bars=None):
+    """Stacks per-symbol OHLC frames into a symbols x time panel.
+
+    Histories are right-aligned so the last column is every symbol's latest
+    bar; shorter ones are padded with NaN on the left. `bars` keeps only the
+    most recent bars. Returns (symbols, {'Open': ..., 'Close': ...}).
+    """
+    frames = {symbol: data for symbol, data in frames.items() if data is not None and not data.empty}
+    symbols = list(frames)
+    length = max((len(data) for data in frames.values()), default=0)
+    if bars is not None:
+        length = min(length, bars)
+    arrays = {}
+    for column in ('Open', 'High', 'Low', 'Close'):
+        values = np.full((len(symbols), length), np.nan)
+        for row, symbol in enumerate(symbols):
+            series = frames[symbol][column].to_numpy(dtype=float)[-length:] if length else []
+            values[row, length - len(series):] = series
+        arrays[column] = values
+    return symbols, arrays
+
+
+def strategy1_panel(bars):
+    """strategy1's signal for every symbol and bar, plus the EMA 9 / SMA 21 spread used for ranking."""
+    close = bars['Close']
+    ema_9 = panel.ema(close, 9)
+    sma_21 = panel.sma(close, 21)
+    vortex_p, vortex_n = panel.vortex(bars['High'], bars['Low'], close)
+    macd, _, macd_signal = panel.macd(close)
+    buy = (ema_9 > sma_21) & (vortex_p > vortex_n) & (macd > macd_signal)
+    sell = (ema_9 < sma_21) & (vortex_n > vortex_p) & (macd < macd_signal)
+    return np.where(sell, -1, np.where(buy, 1, 0)), (ema_9 - sma_21) / close
+
+
+def strategy3_panel(bars):
+    """strategy3's signal for every symbol and bar."""
+    high, low, close = bars['High'], bars['Low'], bars['Close']
+    cloud = panel.ichimoku(high, low, close)
+    candles = panel.candle_patterns(bars['Open'], high, low, close)
+    span_a, span_b, chikou = cloud['ISA_9'], cloud['ISB_26'], cloud['ICS_26']
+    lagged_close = panel.shift(close, 26)
+    ichimoku_buy = (close > span_a) & (close > span_b) & (span_a > span_b) & (chikou > lagged_close)
+    ichimoku_sell = (close < span_a) & (close < span_b) & (span_a < span_b) & (chikou < lagged_close)
+    bullish_candle = (candles['CDL_HAMMER'] > 0) | (candles['CDL_ENGULFING'] > 0)
+    bearish_candle = candles['CDL_ENGULFING'] < 0
+    return np.where(ichimoku_sell & bearish_candle, -1, np.where(ichimoku_buy & bullish_candle, 1, 0))
+
+
+def level_arrays(levels):
+    """Stacks a sequence of DailyLevels (or None) into breakout, support and resistance arrays.
+
+    Returns (breakout, supports, resistances) with one row per entry;
+    breakout holds (buy_breakout, sell_breakdown) and rows for None are NaN.
+    """
+    rows = len(levels)
+    breakout = np.full((rows, 2), np.nan)
+    supports = np.full((rows, len(SUPPORTS)), np.nan)
+    resistances = np.full((rows, len(RESISTANCES)), np.nan)
+    for row, daily in enumerate(levels):
+        if daily is None:
+            continue
+        breakout[row] = daily.strategy2['buy_breakout'], daily.strategy2['sell_breakdown']
+        pivots = daily.strategy4['pivot_points']
+        supports[row] = [pivots[name] for name in SUPPORTS]
+        resistances[row] = [pivots[name] for name in RESISTANCES]
+    return breakout, supports, resistances
+
+
+def breakout_signals(price, breakout):
+    """strategy2_signal for an array of prices against rows of level_arrays' breakout."""
+    return np.where(price > breakout[:, 0], 1, np.where(price < breakout[:, 1], -1, 0))
+
+
+def pivot_signals(price, supports, resistances, tolerance=0.001):
+    """strategy4_signal for an array of prices against rows of pivot supports and resistances."""
+    # Supports are checked first, as in strategy4_signal
+    column = price[:, None]
+    near_support = (np.abs(column - supports) / supports < tolerance).any(axis=1)
+    near_resistance = (np.abs(column - resistances) / resistances < tolerance).any(axis=1)
+    return np.where(near_support, 1, np.where(near_resistance, -1, 0))
+
+
+def level_signals(symbols, price, levels, tolerance=0.001):
+    """strategy2 breakout and strategy4 pivot-proximity signals for the latest prices.
+
+    `levels` maps symbols to DailyLevels (see strategies.levels); symbols
+    without levels get no signal.
+    """
+    breakout, supports, resistances = level_arrays([(levels or {}).get(symbol) for symbol in symbols])
+    return breakout_signals(price, breakout), pivot_signals(price, supports, resistances, tolerance)
+
+
+def scan_panel(symbols, bars, levels=None, tolerance=0.001):
+    """Evaluates every strategy on the latest bar of each symbol in one pass.
+
+    Returns a table of the symbols with at least one live signal, ranked by
+    how many strategies agree (|score|) and then by the EMA 9 / SMA 21 spread
+    in the signal's direction.
+
+    strategy3 compares the chikou span with the close 25 bars later, so it
+    cannot fire on the latest bar; its column holds the signal of the latest
+    settled bar, STRATEGY3_LAG bars back (Strategy3Stream.settled).
+    """
+    columns = ['price', *STRATEGIES, 'score', 'strength']
+    if not symbols or bars['Close'].shape[1] == 0:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='symbol'))
+    price = bars['Close'][:, -1]
+    strategy1, spread = strategy1_panel(bars)
+    strategy3 = strategy3_panel(bars)
+    settled = strategy3[:, -1 - STRATEGY3_LAG] if strategy3.shape[1] > STRATEGY3_LAG else np.zeros(len(symbols), dtype=int)
+    strategy2, strategy4 = level_signals(symbols, price, levels, tolerance)
+
+    table = pd.DataFrame({
+        'price': price,
+        'strategy1': strategy1[:, -1],
+        'strategy2': strategy2,
+        'strategy3': settled,
+        'strategy4': strategy4,
+    }, index=pd.Index(symbols, name='symbol'))
+    table['score'] = table[list(STRATEGIES)].sum(axis=1)
+    direction = np.sign(table['score']).replace(0, 1)
+    table['strength'] = np.nan_to_num(spread[:, -1] * 100) * direction
+    live = table[(table[list(STRATEGIES)] != 0).any(axis=1)]
+    order = np.lexsort((-live['strength'].to_numpy(), -live['score'].abs().to_numpy()))
+    return live.iloc[order]
+
+
+def scan_universe(symbols, interval='5m', period='5d', cache=None, level_store=None, session_date=None):
+    """Downloads the universe in one batched request and returns the ranked signal table."""
+    frames = get_bulk_data(symbols, interval=interval, period=period, cache=cache)
+    levels = level_store.get(symbols, session_date, cache=cache) if level_store is not None else None
+    names, bars = build_panel(frames)
+    return scan_panel(names, bars, levels)
+
+
+if __name__ == '__main__':
+    from market_analysis_app.config import SYMBOLS
+    from market_analysis_app.data.cache import OHLCVCache
+    from market_analysis_app.strategies.levels import LevelStore
+
+    cache = OHLCVCache()
+    signals = scan_universe(SYMBOLS['NIFTY50'], cache=cache, level_store=LevelStore())
+    print(signals.to_string() if not signals.empty else "No live signals.")
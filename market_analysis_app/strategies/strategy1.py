@@ -1,29 +1,38 @@
 # market_analysis_app/strategies/strategy1.py
 
-import pandas_ta as ta
-import numpy as np
+import copy
 
-def strategy1(data):
+from market_analysis_app.indicators import panel
+from market_analysis_app.indicators.streaming import EMA, SMA, Vortex, MACD, PSAR
+from market_analysis_app.strategies.exit_simulator import simulate_exits, ExitTracker
+
+def strategy1(data, ema_length=9, sma_length=21, target_pct=0.01):
     """Strategy using MA 21, EMA 9, Vortex, MACD, and PSAR."""
+    ema, sma = f'EMA_{ema_length}', f'SMA_{sma_length}'
     # Calculate indicators
-    data.ta.ema(length=9, append=True, col_names=('EMA_9',))
-    data.ta.sma(length=21, append=True, col_names=('SMA_21',))
-    data.ta.vortex(append=True, col_names=('VORTEX_P', 'VORTEX_N'))
-    data.ta.macd(append=True, col_names=('MACD', 'MACD_H', 'MACD_S'))
-    psar = data.ta.psar(append=True, col_names=('PSARl', 'PSARs', 'PSARaf', 'PSARr'))
-    data.rename(columns={'PSARl': 'PSAR_long', 'PSARs': 'PSAR_short'}, inplace=True)
-
+    # Array kernels with the definitions of pandas_ta's native implementations,
+    # which Strategy1Stream reproduces
+    high, low, close = (data[column].to_numpy(dtype=float) for column in ('High', 'Low', 'Close'))
+    data[ema] = panel.ema(close, ema_length)[0]
+    data[sma] = panel.sma(close, sma_length)[0]
+    vortex_p, vortex_n = panel.vortex(high, low, close)
+    data['VORTEX_P'], data['VORTEX_N'] = vortex_p[0], vortex_n[0]
+    macd, macd_h, macd_s = panel.macd(close)
+    data['MACD'], data['MACD_H'], data['MACD_S'] = macd[0], macd_h[0], macd_s[0]
+    psar_long, psar_short, psar_af, psar_reversal = panel.psar(high, low)
+    data['PSAR_long'], data['PSAR_short'] = psar_long[0], psar_short[0]
+    data['PSARaf'], data['PSARr'] = psar_af[0], psar_reversal[0]
 
     # Buy Signal
     buy_signal = (
-        (data['EMA_9'] > data['SMA_21']) &
+        (data[ema] > data[sma]) &
         (data['VORTEX_P'] > data['VORTEX_N']) &
         (data['MACD'] > data['MACD_S'])
     )
 
     # Sell Signal
     sell_signal = (
-        (data['EMA_9'] < data['SMA_21']) &
+        (data[ema] < data[sma]) &
         (data['VORTEX_N'] > data['VORTEX_P']) &
         (data['MACD'] < data['MACD_S'])
     )
@@ -33,72 +42,73 @@ def strategy1(data):
     data.loc[sell_signal, 'signal'] = -1
 
     # Trailing Stop Loss and Target
-    position = 0
-    entry_price = np.nan
-    stop_loss = np.nan
-    target_price = np.nan
-
-    positions = []
-    entry_prices = []
-    stop_losses = []
-    target_prices = []
-
-    for i, row in data.iterrows():
-        if position == 0 and row['signal'] == 1:
-            position = 1
-            entry_price = row['Close']
-            stop_loss = row['PSAR_long']
-            target_price = entry_price * 1.01 # 1% target
-        elif position == 0 and row['signal'] == -1:
-            position = -1
-            entry_price = row['Close']
-            stop_loss = row['PSAR_short']
-            target_price = entry_price * 0.99 # 1% target
-        elif position == 1:
-            # Check for stop loss hit
-            if row['Low'] < stop_loss:
-                position = 0
-                entry_price = np.nan
-                stop_loss = np.nan
-                target_price = np.nan
-            # Check for target hit
-            elif row['High'] > target_price:
-                position = 0
-                entry_price = np.nan
-                stop_loss = np.nan
-                target_price = np.nan
-            else:
-                # Update stop loss for trailing
-                stop_loss = max(stop_loss, row['PSAR_long'])
-        elif position == -1:
-            # Check for stop loss hit
-            if row['High'] > stop_loss:
-                position = 0
-                entry_price = np.nan
-                stop_loss = np.nan
-                target_price = np.nan
-            # Check for target hit
-            elif row['Low'] < target_price:
-                position = 0
-                entry_price = np.nan
-                stop_loss = np.nan
-                target_price = np.nan
-            else:
-                # Update stop loss for trailing
-                stop_loss = min(stop_loss, row['PSAR_short'])
-
-        positions.append(position)
-        entry_prices.append(entry_price)
-        stop_losses.append(stop_loss)
-        target_prices.append(target_price)
-
-    data['position'] = positions
-    data['entry_price'] = entry_prices
-    data['stop_loss'] = stop_losses
-    data['target_price'] = target_prices
+    exits = simulate_exits(
+        data['signal'].to_numpy(), data['High'].to_numpy(), data['Low'].to_numpy(), data['Close'].to_numpy(),
+        long_stop=data['PSAR_long'].to_numpy(), short_stop=data['PSAR_short'].to_numpy(),
+        target_pct=target_pct, trailing=True
+    )
+    for column, values in exits.items():
+        data[column] = values
 
     return data
 
+class Strategy1Stream:
+    """Streaming strategy1: seed once with history, then feed one bar at a time.
+
+    Every indicator and the position state are updated in constant time per bar,
+    and each row matches the corresponding row of strategy1() on the same bars.
+    """
+
+    def __init__(self, ema_length=9, sma_length=21, target_pct=0.01):
+        self.ema = EMA(ema_length)
+        self.sma = SMA(sma_length)
+        self.vortex = Vortex(14)
+        self.macd = MACD(12, 26, 9)
+        self.psar = PSAR()
+        self.exits = ExitTracker(target_pct=target_pct, trailing=True)
+        self._ema = f'EMA_{ema_length}'
+        self._sma = f'SMA_{sma_length}'
+        self.last = None
+
+    def seed(self, data):
+        """Feeds a DataFrame of historical bars and returns the last row."""
+        for open_, high, low, close in data[['Open', 'High', 'Low', 'Close']].itertuples(index=False):
+            self.update(open_, high, low, close)
+        return self.last
+
+    def update(self, open_, high, low, close):
+        """Processes one completed bar and returns its strategy1 row as a dict."""
+        ema = self.ema.update(close)
+        sma = self.sma.update(close)
+        vortex_p, vortex_n = self.vortex.update(high, low, close)
+        macd, macd_h, macd_s = self.macd.update(close)
+        psar_long, psar_short, _, _ = self.psar.update(high, low)
+
+        signal = 0
+        if ema > sma and vortex_p > vortex_n and macd > macd_s:
+            signal = 1
+        elif ema < sma and vortex_n > vortex_p and macd < macd_s:
+            signal = -1
+
+        position, entry_price, stop_loss, target_price = self.exits.update(
+            signal, high, low, close, psar_long, psar_short
+        )
+
+        self.last = {
+            'Open': open_, 'High': high, 'Low': low, 'Close': close,
+            self._ema: ema, self._sma: sma,
+            'VORTEX_P': vortex_p, 'VORTEX_N': vortex_n,
+            'MACD': macd, 'MACD_H': macd_h, 'MACD_S': macd_s,
+            'PSAR_long': psar_long, 'PSAR_short': psar_short,
+            'signal': signal, 'position': position, 'entry_price': entry_price,
+            'stop_loss': stop_loss, 'target_price': target_price,
+        }
+        return self.last
+
+    def preview(self, open_, high, low, close):
+        """Evaluates a still-forming bar (e.g. on every tick) without committing it."""
+        return copy.deepcopy(self).update(open_, high, low, close)
+
 if __name__ == '__main__':
     # Example usage (requires data_fetcher)
     # This is for testing purposes and will be moved to main.py
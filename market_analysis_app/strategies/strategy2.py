@@ -2,16 +2,19 @@
 
 import pandas as pd
 
-def calculate_strategy2_levels(previous_day_data):
-    """Calculates the breakout and breakdown levels for Strategy 2."""
+def calculate_strategy2_levels(previous_day_data, multiplier=1.1):
+    """Calculates the breakout and breakdown levels for Strategy 2.
+
+    Also works element-wise when High/Low/Close are arrays of sessions.
+    """
     H = previous_day_data['High']
     L = previous_day_data['Low']
     C = previous_day_data['Close']
 
-    buy_breakout = (H - L) * 1.1 / 2 + C
-    stoploss_buy = C - (H - L) * 1.1 / 4
-    sell_breakdown = C - (H - L) * 1.1 / 2
-    stoploss_sell = (H - L) * 1.1 / 4 + C
+    buy_breakout = (H - L) * multiplier / 2 + C
+    stoploss_buy = C - (H - L) * multiplier / 4
+    sell_breakdown = C - (H - L) * multiplier / 2
+    stoploss_sell = (H - L) * multiplier / 4 + C
 
     return {
         'buy_breakout': buy_breakout,
@@ -1,17 +1,25 @@
 # market_analysis_app/strategies/strategy3.py
 
-import pandas_ta as ta
+from collections import deque
+
 import numpy as np
-import pandas as pd
 
-def strategy3(data):
+from market_analysis_app.indicators import panel
+from market_analysis_app.indicators.streaming import Ichimoku, CandlePatterns, RollingMax, RollingMin
+from market_analysis_app.strategies.exit_simulator import simulate_exits, ExitTracker
+
+def strategy3(data, target_pct=0.01, stop_pct=0.005):
     """Strategy using Ichimoku Cloud and candlestick patterns."""
     # Calculate Ichimoku Cloud
-    ichimoku_df, span_df = data.ta.ichimoku()
-    data = pd.concat([data, ichimoku_df, span_df], axis=1)
+    # Array kernels with pandas_ta's per-bar ichimoku columns; the lookahead
+    # spans are exposed by Strategy3Stream.
+    open_, high, low, close = (data[column].to_numpy(dtype=float) for column in ('Open', 'High', 'Low', 'Close'))
+    for column, values in panel.ichimoku(high, low, close).items():
+        data[column] = values[0]
 
-    # Identify candlestick patterns
-    data.ta.cdl_pattern(name=['doji', 'engulfing', 'hammer'], append=True)
+    # Identify candlestick patterns (pandas_ta's doji, TA-Lib's engulfing and hammer)
+    for column, values in panel.candle_patterns(open_, high, low, close).items():
+        data[column] = values[0]
 
     # Ichimoku Buy Signal
     ichimoku_buy = (
@@ -42,66 +50,110 @@ def strategy3(data):
     data.loc[sell_signal, 'signal'] = -1
 
     # Target and Stop Loss
-    position = 0
-    entry_price = np.nan
-    stop_loss = np.nan
-    target_price = np.nan
-
-    positions = []
-    entry_prices = []
-    stop_losses = []
-    target_prices = []
-
-    for i, row in data.iterrows():
-        if position == 0 and row['signal'] == 1:
-            position = 1
-            entry_price = row['Close']
-            stop_loss = entry_price * 0.995 # 0.5% stop loss
-            target_price = entry_price * 1.01 # 1% target
-        elif position == 0 and row['signal'] == -1:
-            position = -1
-            entry_price = row['Close']
-            stop_loss = entry_price * 1.005 # 0.5% stop loss
-            target_price = entry_price * 0.99 # 1% target
-        elif position == 1:
-            # Check for stop loss hit
-            if row['Low'] < stop_loss:
-                position = 0
-                entry_price = np.nan
-                stop_loss = np.nan
-                target_price = np.nan
-            # Check for target hit
-            elif row['High'] > target_price:
-                position = 0
-                entry_price = np.nan
-                stop_loss = np.nan
-                target_price = np.nan
-        elif position == -1:
-            # Check for stop loss hit
-            if row['High'] > stop_loss:
-                position = 0
-                entry_price = np.nan
-                stop_loss = np.nan
-                target_price = np.nan
-            # Check for target hit
-            elif row['Low'] < target_price:
-                position = 0
-                entry_price = np.nan
-                stop_loss = np.nan
-                target_price = np.nan
-
-        positions.append(position)
-        entry_prices.append(entry_price)
-        stop_losses.append(stop_loss)
-        target_prices.append(target_price)
-
-    data['position'] = positions
-    data['entry_price'] = entry_prices
-    data['stop_loss'] = stop_losses
-    data['target_price'] = target_prices
+    close = data['Close'].to_numpy()
+    exits = simulate_exits(
+        data['signal'].to_numpy(), data['High'].to_numpy(), data['Low'].to_numpy(), close,
+        long_stop=close * (1 - stop_pct), short_stop=close * (1 + stop_pct), # 0.5% stop loss by default
+        target_pct=target_pct, trailing=False # 1% target by default
+    )
+    for column, values in exits.items():
+        data[column] = values
 
     return data
 
+class Strategy3Stream:
+    """Streaming strategy3 backed by monotonic-deque Ichimoku and candle state.
+
+    The chikou span compares each bar with the close kijun - 1 bars later, so a
+    row's final signal is only known 25 bars after the row itself. update()
+    returns the latest row as strategy3() would show it on the data seen so far,
+    and sets `settled` to the row that the new bar completed; settled rows never
+    change again and match strategy3() on the full history. Both take amortized
+    O(1) per bar.
+    """
+
+    def __init__(self, tenkan=9, kijun=26, senkou=52, target_pct=0.01, stop_pct=0.005):
+        self.ichimoku = Ichimoku(tenkan, kijun, senkou)
+        self.candles = CandlePatterns()
+        self.exits = ExitTracker(target_pct=target_pct, trailing=False)
+        self.stop_pct = stop_pct
+        self._span_a = f'ISA_{tenkan}'
+        self._span_b = f'ISB_{kijun}'
+        self._chikou = f'ICS_{kijun}'
+        self._closes = deque(maxlen=2 * kijun)
+        self._pending = deque()
+        self._lag = kijun - 1
+        # Extremes of the pending rows, which are always the last kijun - 1 bars
+        self._pending_high = RollingMax(self._lag)
+        self._pending_low = RollingMin(self._lag)
+        self.settled = None
+        self.last = None
+
+    @property
+    def span_a_ahead(self):
+        return self.ichimoku.span_a_ahead
+
+    @property
+    def span_b_ahead(self):
+        return self.ichimoku.span_b_ahead
+
+    def seed(self, data):
+        """Feeds a DataFrame of historical bars and returns the last row."""
+        for open_, high, low, close in data[['Open', 'High', 'Low', 'Close']].itertuples(index=False):
+            self.update(open_, high, low, close)
+        return self.last
+
+    def _signal(self, row, lagged_close):
+        close, span_a, span_b, chikou = row['Close'], row[self._span_a], row[self._span_b], row[self._chikou]
+        ichimoku_buy = close > span_a and close > span_b and span_a > span_b and chikou > lagged_close
+        ichimoku_sell = close < span_a and close < span_b and span_a < span_b and chikou < lagged_close
+        bullish_candle = row['CDL_HAMMER'] > 0 or row['CDL_ENGULFING'] > 0
+        bearish_candle = row['CDL_ENGULFING'] < 0
+        if ichimoku_buy and bullish_candle:
+            return 1
+        if ichimoku_sell and bearish_candle:
+            return -1
+        return 0
+
+    def _apply_exits(self, row, tracker):
+        close = row['Close']
+        position, entry_price, stop_loss, target_price = tracker.update(
+            row['signal'], row['High'], row['Low'], close, close * (1 - self.stop_pct), close * (1 + self.stop_pct)
+        )
+        row.update(position=position, entry_price=entry_price, stop_loss=stop_loss, target_price=target_price)
+        return row
+
+    def update(self, open_, high, low, close):
+        """Processes one completed bar and returns its strategy3 row as a dict."""
+        row = {'Open': open_, 'High': high, 'Low': low, 'Close': close}
+        row.update(self.ichimoku.update(high, low))
+        row[self._chikou] = np.nan
+        row.update(self.candles.update(open_, high, low, close))
+        self._closes.append(close)
+        self._pending.append(row)
+
+        self.settled = None
+        if len(self._pending) > self._lag:
+            settled = self._pending.popleft()
+            settled[self._chikou] = close
+            lagged_close = self._closes[0] if len(self._closes) == self._closes.maxlen else np.nan
+            settled['signal'] = self._signal(settled, lagged_close)
+            self.settled = self._apply_exits(settled, self.exits)
+
+        # Rows still waiting for their chikou value cannot signal yet, exactly as
+        # the trailing rows of the batch frame. With no entries among them and a
+        # fixed stop and target, they only close the settled trade if one of them
+        # crosses its stop or target, so their extremes give the latest row's state.
+        pending_high, pending_low = self._pending_high.update(high), self._pending_low.update(low)
+        position, entry_price, stop_loss, target_price = (
+            self.exits.position, self.exits.entry_price, self.exits.stop_loss, self.exits.target_price)
+        if (position == 1 and (pending_low < stop_loss or pending_high > target_price)) or \
+                (position == -1 and (pending_high > stop_loss or pending_low < target_price)):
+            position, entry_price, stop_loss, target_price = 0, np.nan, np.nan, np.nan
+        self.last = dict(row, signal=0, position=position, entry_price=entry_price,
+                         stop_loss=stop_loss, target_price=target_price)
+        return self.last
+
 if __name__ == '__main__':
     # Example usage (requires data_fetcher)
     try:
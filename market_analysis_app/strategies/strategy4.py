@@ -1,33 +1,51 @@
 # market_analysis_app/strategies/strategy4.py
 
-import pandas_ta as ta
 import pandas as pd
 
-def calculate_strategy4_levels(data):
-    """Calculates Pivot Points and Fibonacci Retracement levels."""
-    # Calculate Pivot Points
-    # pandas_ta.pivot returns a DataFrame with columns like 'PIVOT', 'S1', 'R1', etc.
-    pivots_df = data.ta.pivot(append=True)
+FIBONACCI_RATIOS = (0.0, 0.236, 0.382, 0.5, 0.618, 0.786, 1.0)
 
-    # Extract the last row of pivot points
-    last_pivots = pivots_df.iloc[-1].filter(regex='^(PIVOT|S|R)')
+def calculate_strategy4_levels(data):
+    """Calculates Pivot Points and Fibonacci Retracement levels.
+
+    `data` is the previous session's bar (a row with High/Low/Close) or a
+    DataFrame of daily bars, in which case its last row is used.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = data.iloc[-1]
+    high, low, close = float(data['High']), float(data['Low']), float(data['Close'])
+
+    # Traditional floor pivots
+    pivot = (high + low + close) / 3
+    hl_range = high - low
+    pivot_points = {
+        'PIVOT': pivot,
+        'S1': 2 * pivot - high,
+        'S2': pivot - hl_range,
+        'S3': pivot - 2 * hl_range,
+        'R1': 2 * pivot - low,
+        'R2': pivot + hl_range,
+        'R3': pivot + 2 * hl_range,
+    }
 
-    # Calculate Fibonacci Retracement
-    # The fibonacci function in pandas-ta needs a high and low price.
-    # We will use the high and low of the last period.
-    high_price = data['High'].iloc[-1]
-    low_price = data['Low'].iloc[-1]
-    fib_levels = ta.fibonacci(high=high_price, low=low_price)
+    # Retracements measured down from the high of the period
+    fibonacci = {f'{ratio:.3f}': high - ratio * hl_range for ratio in FIBONACCI_RATIOS}
 
     levels = {
-        'pivot_points': last_pivots.to_dict(),
-        'fibonacci': fib_levels.to_dict()
+        'pivot_points': pivot_points,
+        'fibonacci': fibonacci
     }
 
     return levels
 
 def strategy4_signal(current_price, levels, tolerance=0.001):
-    """Generates a signal based on the current price and Strategy 4 levels."""
+    """Generates a signal based on the current price and Strategy 4 levels.
+
+    `levels` is either the dict from calculate_strategy4_levels or a precomputed
+    LevelLadder (see strategies.levels), which answers in O(log n).
+    """
+    if hasattr(levels, 'within'):
+        return _ladder_signal(current_price, levels, tolerance)
+
     pivot_points = levels['pivot_points']
     fibonacci_levels = levels['fibonacci']
 
@@ -51,6 +69,14 @@ def strategy4_signal(current_price, levels, tolerance=0.001):
 
     return 0 # No signal
 
+def _ladder_signal(current_price, ladder, tolerance):
+    pivots = [(name, value) for value, name, source in ladder.within(current_price, tolerance) if source == 'pivot']
+    if any(name.startswith('S') for name, _ in pivots):
+        return 1 # Buy signal (near support)
+    if any(name.startswith('R') for name, _ in pivots):
+        return -1 # Sell signal (near resistance)
+    return 0 # No signal
+
 if __name__ == '__main__':
     # Example usage (requires data_fetcher)
     try:
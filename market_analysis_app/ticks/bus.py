@@ -0,0 +1,64 @@
+# market_analysis_app/ticks/bus.py
+
+import asyncio
+import collections
+import threading
+
+# Topics published by the tick ingestion
+TICKS = 'ticks'
+CONNECTED = 'ticker.connected'
+DISCONNECTED = 'ticker.disconnected'
+RECONNECTING = 'ticker.reconnecting'
+GAVE_UP = 'ticker.gave_up'
+# Kite order updates, from the ticker's order messages or HTTP postbacks
+ORDER_UPDATES = 'orders.update'
+
+
+class EventBus:
+    """In-process publish/subscribe shared by the feed threads and the asyncio app.
+
+    publish() may be called from any thread. Callback subscribers run on the
+    publishing thread and must be quick; queue subscribers receive events on
+    their own event loop through a bounded asyncio.Queue, and when a consumer
+    falls behind the oldest queued event is dropped rather than blocking the feed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks = collections.defaultdict(list)
+        self.stats = collections.Counter()
+
+    def subscribe(self, topic, callback):
+        """Calls callback(event) for every event on topic. Returns an unsubscribe function."""
+        with self._lock:
+            self._callbacks[topic] = self._callbacks[topic] + [callback]
+
+        def unsubscribe():
+            with self._lock:
+                self._callbacks[topic] = [cb for cb in self._callbacks[topic] if cb is not callback]
+        return unsubscribe
+
+    def subscribe_queue(self, topic, maxsize=10000, loop=None):
+        """Returns an asyncio.Queue on `loop` (default: the running loop) fed with topic's events."""
+        loop = loop or asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize)
+
+        def offer(event):
+            if queue.full():
+                queue.get_nowait()
+                self.stats[f'{topic}.dropped'] += 1
+            queue.put_nowait(event)
+
+        def deliver(event):
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(offer, event)
+
+        queue.unsubscribe = self.subscribe(topic, deliver)
+        return queue
+
+    def publish(self, topic, event):
+        # The callback list is replaced, never mutated, so it can be read without the lock
+        callbacks = self._callbacks.get(topic, ())
+        self.stats[topic] += 1
+        for callback in callbacks:
+            callback(event)
@@ -0,0 +1,107 @@
+# market_analysis_app/ticks/codec.py
+
+import datetime
+import struct
+
+# Kite ticker modes and exchange segments, as used by kiteconnect.KiteTicker
+MODE_LTP, MODE_QUOTE, MODE_FULL = 'ltp', 'quote', 'full'
+SEGMENT_CDS, SEGMENT_BCD, SEGMENT_INDICES, SEGMENT_NCO = 3, 6, 9, 7
+
+_LTP = struct.Struct('>II')
+_INDEX_QUOTE = struct.Struct('>7I')
+_INDEX_FULL = struct.Struct('>8I')
+_QUOTE = struct.Struct('>11I')
+_FULL_EXTRA = struct.Struct('>5I')
+_DEPTH = struct.Struct('>IIH2x')
+_HEADER = struct.Struct('>H')
+
+
+def price_divisor(instrument_token):
+    segment = instrument_token & 0xff
+    if segment == SEGMENT_CDS:
+        return 10000000.0
+    if segment in (SEGMENT_BCD, SEGMENT_NCO):
+        return 10000.0
+    return 100.0
+
+
+def _epoch(value):
+    if value is None:
+        return 0
+    if isinstance(value, datetime.datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+def encode_tick(tick):
+    """Encodes one tick dict (as KiteTicker parses it) into its binary packet."""
+    token = tick['instrument_token']
+    divisor = price_divisor(token)
+
+    def price(value):
+        return int(round(value * divisor))
+
+    mode = tick.get('mode', MODE_QUOTE)
+    last_price = price(tick['last_price'])
+    if mode == MODE_LTP:
+        return _LTP.pack(token, last_price)
+
+    ohlc = tick.get('ohlc', {})
+    open_, high, low, close = (price(ohlc.get(key, 0)) for key in ('open', 'high', 'low', 'close'))
+    if token & 0xff == SEGMENT_INDICES:
+        change = price(tick['last_price'] - ohlc.get('close', 0)) & 0xffffffff
+        if mode == MODE_FULL:
+            return _INDEX_FULL.pack(token, last_price, high, low, open_, close, change, _epoch(tick.get('exchange_timestamp')))
+        return _INDEX_QUOTE.pack(token, last_price, high, low, open_, close, change)
+
+    packet = _QUOTE.pack(
+        token, last_price, tick.get('last_traded_quantity', 0), price(tick.get('average_traded_price', 0)),
+        tick.get('volume_traded', 0), tick.get('total_buy_quantity', 0), tick.get('total_sell_quantity', 0),
+        open_, high, low, close
+    )
+    if mode != MODE_FULL:
+        return packet
+
+    packet += _FULL_EXTRA.pack(
+        _epoch(tick.get('last_trade_time')), tick.get('oi', 0), tick.get('oi_day_high', 0),
+        tick.get('oi_day_low', 0), _epoch(tick.get('exchange_timestamp'))
+    )
+    depth = tick.get('depth', {})
+    for side in ('buy', 'sell'):
+        entries = list(depth.get(side, []))[:5]
+        entries += [{'quantity': 0, 'price': 0, 'orders': 0}] * (5 - len(entries))
+        for entry in entries:
+            packet += _DEPTH.pack(entry['quantity'], price(entry['price']), entry['orders'])
+    return packet
+
+
+def join_packets(packets):
+    """Frames packets into one binary WebSocket message."""
+    parts = [_HEADER.pack(len(packets))]
+    for packet in packets:
+        parts.append(_HEADER.pack(len(packet)))
+        parts.append(packet)
+    return b''.join(parts)
+
+
+def encode_ticks(ticks):
+    """Encodes a list of ticks into one binary message in the Kite ticker format."""
+    return join_packets([encode_tick(tick) for tick in ticks])
+
+
+def split_packets(message):
+    """Splits a binary message into its packets; heartbeats (1 byte) hold none."""
+    if len(message) < 2:
+        return []
+    count = _HEADER.unpack_from(message, 0)[0]
+    packets = []
+    offset = 2
+    for _ in range(count):
+        length = _HEADER.unpack_from(message, offset)[0]
+        packets.append(message[offset + 2:offset + 2 + length])
+        offset += 2 + length
+    return packets
+
+
+def packet_token(packet):
+    return struct.unpack_from('>I', packet, 0)[0]
@@ -0,0 +1,101 @@
+# market_analysis_app/ticks/ingest.py
+
+import logging
+import threading
+
+from kiteconnect import KiteTicker
+
+from market_analysis_app.ticks import bus as topics
+
+
+class TickIngestor:
+    """Streams KiteTicker ticks for a set of instrument tokens onto an EventBus.
+
+    The ticker runs on Twisted's reactor in a background thread. Every
+    (re)connection subscribes the full token set again, including tokens
+    added while the socket was down, so no instrument goes silent after a
+    reconnect. Order updates Kite pushes on the same socket are published
+    as ORDER_UPDATES. `root` points the ticker at another endpoint, e.g. a local
+    ReplayServer.
+    """
+
+    def __init__(self, api_key, access_token, bus, root=None, mode=KiteTicker.MODE_FULL, **ticker_kwargs):
+        self.bus = bus
+        self.mode = mode
+        self.tokens = {}
+        self._lock = threading.Lock()
+        self.ticker = KiteTicker(api_key, access_token, root=root, **ticker_kwargs)
+        self.ticker.on_ticks = self._on_ticks
+        self.ticker.on_connect = self._on_connect
+        self.ticker.on_close = self._on_close
+        self.ticker.on_error = self._on_error
+        self.ticker.on_reconnect = self._on_reconnect
+        self.ticker.on_noreconnect = self._on_noreconnect
+        self.ticker.on_order_update = self._on_order_update
+
+    def start(self):
+        """Connects in a background thread and returns immediately."""
+        self.ticker.connect(threaded=True)
+
+    def stop(self):
+        self.ticker.close()
+
+    def subscribe(self, tokens, mode=None):
+        """Adds instrument tokens; they are streamed now if connected, else on the next connect."""
+        mode = mode or self.mode
+        tokens = [int(token) for token in tokens]
+        with self._lock:
+            self.tokens.update({token: mode for token in tokens})
+        if self.ticker.is_connected():
+            self._call_in_reactor(self._send_subscription, {mode: tokens})
+
+    def unsubscribe(self, tokens):
+        tokens = [int(token) for token in tokens]
+        with self._lock:
+            for token in tokens:
+                self.tokens.pop(token, None)
+        if self.ticker.is_connected():
+            self._call_in_reactor(self.ticker.unsubscribe, tokens)
+
+    def _call_in_reactor(self, func, *args):
+        # WebSocket writes have to happen on the reactor thread
+        from twisted.internet import reactor
+        reactor.callFromThread(func, *args)
+
+    def _by_mode(self):
+        with self._lock:
+            modes = {}
+            for token, mode in self.tokens.items():
+                modes.setdefault(mode, []).append(token)
+        return modes
+
+    def _send_subscription(self, modes):
+        for mode, tokens in modes.items():
+            if tokens:
+                self.ticker.subscribe(tokens)
+                self.ticker.set_mode(mode, tokens)
+
+    def _on_connect(self, ws, response):
+        self._send_subscription(self._by_mode())
+        logging.info(f"Ticker connected; subscribed {len(self.tokens)} instruments.")
+        self.bus.publish(topics.CONNECTED, {'tokens': list(self.tokens)})
+
+    def _on_ticks(self, ws, ticks):
+        self.bus.publish(topics.TICKS, ticks)
+
+    def _on_order_update(self, ws, order):
+        self.bus.publish(topics.ORDER_UPDATES, order)
+
+    def _on_close(self, ws, code, reason):
+        self.bus.publish(topics.DISCONNECTED, {'code': code, 'reason': reason})
+
+    def _on_error(self, ws, code, reason):
+        logging.error(f"Ticker error {code}: {reason}")
+
+    def _on_reconnect(self, ws, attempts):
+        logging.warning(f"Ticker reconnecting, attempt {attempts}.")
+        self.bus.publish(topics.RECONNECTING, {'attempts': attempts})
+
+    def _on_noreconnect(self, ws):
+        logging.error("Ticker gave up reconnecting.")
+        self.bus.publish(topics.GAVE_UP, {})
@@ -0,0 +1,71 @@
+# market_analysis_app/ticks/options.py
+
+import threading
+
+from market_analysis_app.ticks import bus as topics
+
+
+class AtmOptionFeed:
+    """Keeps a TickIngestor subscribed to the calls and puts around each index's ATM strike.
+
+    Listens to TICKS on the bus. On an index tick it resolves the index's
+    ATM call of the nearest expiry from the InstrumentMaster (two bisects)
+    and, only when that contract changed (the strike moved or the expiry
+    rolled), subscribes the CE and PE contracts `width` strikes either side
+    and unsubscribes the ones that fell out of range. Nothing is subscribed
+    for an index until the instrument master lists its options.
+    """
+
+    def __init__(self, ingestor, instruments, index_tokens, width=2):
+        self.ingestor = ingestor
+        self.instruments = instruments
+        # instrument token -> index name, e.g. {256265: 'NIFTY'}
+        self.index_tokens = {int(token): name for token, name in index_tokens.items()}
+        self.width = width
+        # index name -> token of its ATM call, and {token: tradingsymbol} of its subscribed contracts
+        self.atm = {}
+        self.contracts = {}
+        self._lock = threading.Lock()
+
+    def attach(self, bus):
+        """Follows the index ticks published on `bus`. Returns the unsubscribe function."""
+        return bus.subscribe(topics.TICKS, self.on_ticks)
+
+    def tokens(self):
+        with self._lock:
+            return {token for contracts in self.contracts.values() for token in contracts}
+
+    def on_ticks(self, ticks):
+        """EventBus callback: re-centres each index on the last of its ticks in the batch."""
+        latest = {}
+        for tick in ticks:
+            name = self.index_tokens.get(tick.get('instrument_token'))
+            if name is not None:
+                latest[name] = tick
+        for name, tick in latest.items():
+            stamp = tick.get('exchange_timestamp')
+            self.update(name, tick['last_price'], on=stamp.date() if stamp is not None else None)
+
+    def update(self, name, spot, on=None):
+        """Re-centres one index's option subscriptions on `spot`; returns True when they changed."""
+        atm = self.instruments.atm_option(name, spot, 'CE', on=on)
+        if atm is None:
+            return False
+        with self._lock:
+            if self.atm.get(name) == atm.instrument_token:
+                return False
+            self.atm[name] = atm.instrument_token
+            contracts = {}
+            for option_type in ('CE', 'PE'):
+                for offset in range(-self.width, self.width + 1):
+                    contract = self.instruments.atm_option(name, spot, option_type, expiry=atm.expiry, offset=offset)
+                    if contract is not None:
+                        contracts[contract.instrument_token] = contract.tradingsymbol
+            previous, self.contracts[name] = self.contracts.get(name, {}), contracts
+        removed = [token for token in previous if token not in contracts]
+        added = [token for token in contracts if token not in previous]
+        if removed:
+            self.ingestor.unsubscribe(removed)
+        if added:
+            self.ingestor.subscribe(added)
+        return True
@@ -0,0 +1,160 @@
+# market_analysis_app/ticks/replay.py
+
+import argparse
+import asyncio
+import json
+import logging
+import struct
+import time
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from market_analysis_app.ticks.codec import split_packets, join_packets, packet_token
+
+# Recording layout: repeated (receive time as float64 seconds, payload length as uint32, payload)
+_RECORD = struct.Struct('>dI')
+
+
+class TickRecorder:
+    """Appends raw binary ticker messages with their receive times to a recording file."""
+
+    def __init__(self, path):
+        self.file = open(path, 'ab')
+
+    def write(self, payload, received_at=None):
+        received_at = time.time() if received_at is None else received_at
+        self.file.write(_RECORD.pack(received_at, len(payload)))
+        self.file.write(payload)
+
+    def on_message(self, ws, payload, is_binary):
+        """KiteTicker on_message callback: records every binary message except heartbeats."""
+        if is_binary and len(payload) > 1:
+            self.write(payload)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_recording(path):
+    """Yields (received_at, payload) for every message in a recording file."""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            received_at, length = _RECORD.unpack(header)
+            yield received_at, f.read(length)
+
+
+class ReplayServer:
+    """Local stand-in for the Kite ticker WebSocket that replays recorded messages.
+
+    Speaks the same protocol as the live endpoint: clients send subscribe
+    messages as JSON and receive binary tick messages, filtered to their
+    subscribed tokens. The recording plays as one shared timeline paced at
+    `speed` times real time (None replays as fast as possible), so a client
+    that reconnects resumes at the current position like on a live feed.
+    """
+
+    def __init__(self, messages, host='127.0.0.1', port=0, speed=1.0):
+        self.messages = messages
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.clients = {}
+        self.sent = 0
+        self.finished = asyncio.Event()
+        self._subscribed = asyncio.Event()
+        self._server = None
+        self._player = None
+
+    @property
+    def url(self):
+        return f'ws://{self.host}:{self.port}'
+
+    async def start(self):
+        self._server = await serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._player = asyncio.ensure_future(self._play())
+        return self
+
+    async def stop(self):
+        if self._player is not None:
+            self._player.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def drop_connections(self):
+        """Closes every client connection abnormally, as a network failure would."""
+        for connection in list(self.clients):
+            connection.transport.abort()
+
+    async def _handle(self, connection):
+        subscriptions = self.clients.setdefault(connection, set())
+        try:
+            async for message in connection:
+                request = json.loads(message)
+                if request.get('a') == 'subscribe':
+                    subscriptions.update(request['v'])
+                    self._subscribed.set()
+                elif request.get('a') == 'unsubscribe':
+                    subscriptions.difference_update(request['v'])
+        except ConnectionClosed:
+            pass
+        finally:
+            self.clients.pop(connection, None)
+
+    async def _broadcast(self, payload):
+        packets = split_packets(payload)
+        for connection, subscriptions in list(self.clients.items()):
+            wanted = [packet for packet in packets if packet_token(packet) in subscriptions]
+            if not wanted:
+                continue
+            try:
+                await connection.send(payload if len(wanted) == len(packets) else join_packets(wanted))
+            except ConnectionClosed:
+                continue
+            self.sent += 1
+
+    async def _play(self):
+        # Playback starts with the first subscription
+        await self._subscribed.wait()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = None
+        for received_at, payload in self.messages:
+            first = received_at if first is None else first
+            if self.speed:
+                # Sleep towards the message's due time, not by gaps, so pacing does not drift
+                delay = started + (received_at - first) / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)
+            await self._broadcast(payload)
+        self.finished.set()
+
+
+async def _serve(path, host, port, speed):
+    server = await ReplayServer(read_recording(path), host, port, speed).start()
+    logging.info(f"Replaying {path} on {server.url} at {speed or 'max'}x")
+    await server.finished.wait()
+    await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a tick recording as a local Kite ticker endpoint.")
+    parser.add_argument('recording')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--speed', type=float, default=1.0, help="multiple of real time; 0 replays as fast as possible")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(_serve(args.recording, args.host, args.port, args.speed))
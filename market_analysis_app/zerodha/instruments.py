@@ -0,0 +1,183 @@
+# market_analysis_app/zerodha/instruments.py
+
+import argparse
+import bisect
+import collections
+import datetime
+import glob
+import os
+import threading
+
+import pandas as pd
+
+from market_analysis_app.scheduler import IST
+
+DEFAULT_INSTRUMENTS_DIR = os.path.join(os.path.expanduser("~"), ".cache", "market_analysis", "instruments")
+
+# Index options trade on NFO (NIFTY, BANKNIFTY, ...) and BFO (SENSEX, BANKEX)
+EXCHANGES = ('NFO', 'BFO')
+
+# Columns of Kite's instrument dump, in its order
+DUMP_COLUMNS = ['instrument_token', 'exchange_token', 'tradingsymbol', 'name', 'last_price', 'expiry', 'strike',
+                'tick_size', 'lot_size', 'instrument_type', 'segment', 'exchange']
+
+Instrument = collections.namedtuple(
+    'Instrument', 'instrument_token exchange tradingsymbol name expiry strike instrument_type lot_size tick_size')
+
+
+class InstrumentMaster:
+    """Kite's instrument dump, cached on disk for the day and indexed in memory.
+
+    Layout: <root>/<exchange>-<YYYY-MM-DD>.csv, one dump per exchange per
+    IST trading date; load() downloads an exchange only when today's file
+    is missing and removes older ones. Contracts are indexed by
+    instrument_token and by (underlying, expiry, strike, CE/PE), both plain
+    dicts, with each underlying's expiries and each expiry's strikes kept
+    sorted, so resolving "ATM call of the nearest expiry", the symbol of a
+    tick or the underlying of a tradingsymbol is a dict hit plus a bisect
+    over a few dozen values.
+    """
+
+    def __init__(self, kite=None, root=None, exchanges=EXCHANGES):
+        self.kite = kite
+        self.root = root or os.getenv("INSTRUMENTS_CACHE_DIR", DEFAULT_INSTRUMENTS_DIR)
+        self.exchanges = tuple(exchanges)
+        self.loaded_for = None
+        self.stats = collections.Counter()
+        self._by_token = {}
+        self._by_symbol = {}
+        self._contracts = {}
+        self._expiries = {}
+        self._strikes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._by_token)
+
+    def _path(self, exchange, date):
+        return os.path.join(self.root, f"{exchange}-{date:%Y-%m-%d}.csv")
+
+    def _download(self, exchange, date):
+        if self.kite is None:
+            raise RuntimeError(f"No cached {exchange} instrument dump for {date} and no Kite client to download it")
+        dump = pd.DataFrame(self.kite.instruments(exchange), columns=DUMP_COLUMNS)
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(exchange, date)
+        dump.to_csv(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+        self.stats['downloads'] += 1
+        for old in glob.glob(os.path.join(self.root, f"{exchange}-*.csv")):
+            if old != path:
+                os.remove(old)
+        return path
+
+    def load(self, date=None):
+        """Loads (downloading only if needed) and indexes the dumps for `date` (default: today in IST)."""
+        date = date or datetime.datetime.now(IST).date()
+        frames = []
+        for exchange in self.exchanges:
+            path = self._path(exchange, date)
+            if os.path.exists(path):
+                self.stats['cache_hits'] += 1
+            else:
+                path = self._download(exchange, date)
+            frames.append(pd.read_csv(path, dtype={'tradingsymbol': str, 'name': str, 'exchange_token': str},
+                                      keep_default_na=False, na_values={'expiry': ['']}))
+        self.index(pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=DUMP_COLUMNS))
+        self.loaded_for = date
+        return self
+
+    def ensure_loaded(self, date=None):
+        """load() unless the dumps for `date` are already indexed."""
+        if self.loaded_for != (date or datetime.datetime.now(IST).date()):
+            self.load(date)
+        return self
+
+    def index(self, dump):
+        """Builds the indexes from an instrument dump frame and swaps them in at once."""
+        expiry = pd.to_datetime(dump['expiry'], errors='coerce')
+        instruments = list(map(Instrument._make, zip(
+            dump['instrument_token'].astype(int), dump['exchange'], dump['tradingsymbol'], dump['name'],
+            [None if pd.isna(value) else value.date() for value in expiry],
+            dump['strike'].astype(float), dump['instrument_type'], dump['lot_size'].astype(int),
+            dump['tick_size'].astype(float),
+        )))
+        by_token = {instrument.instrument_token: instrument for instrument in instruments}
+        by_symbol = {instrument.tradingsymbol: instrument for instrument in instruments}
+        contracts, expiries, strikes = {}, collections.defaultdict(set), collections.defaultdict(set)
+        for instrument in instruments:
+            if instrument.instrument_type in ('CE', 'PE') and instrument.expiry is not None:
+                contracts[(instrument.name, instrument.expiry, instrument.strike, instrument.instrument_type)] = instrument
+                expiries[instrument.name].add(instrument.expiry)
+                strikes[(instrument.name, instrument.expiry)].add(instrument.strike)
+        with self._lock:
+            self._by_token = by_token
+            self._by_symbol = by_symbol
+            self._contracts = contracts
+            self._expiries = {name: sorted(dates) for name, dates in expiries.items()}
+            self._strikes = {key: sorted(values) for key, values in strikes.items()}
+
+    def instrument(self, instrument_token):
+        """The Instrument with this token, or None; e.g. to name the contract a tick belongs to."""
+        return self._by_token.get(int(instrument_token))
+
+    def symbol(self, instrument_token):
+        instrument = self.instrument(instrument_token)
+        return instrument.tradingsymbol if instrument else None
+
+    def underlying(self, tradingsymbol):
+        """The underlying name (e.g. NIFTY) of a contract's tradingsymbol, or None."""
+        instrument = self._by_symbol.get(tradingsymbol)
+        return instrument.name if instrument else None
+
+    def option(self, underlying, expiry, strike, option_type):
+        """The CE or PE contract of `underlying` at exactly this expiry and strike, or None."""
+        return self._contracts.get((underlying, expiry, float(strike), option_type))
+
+    def expiries(self, underlying):
+        return self._expiries.get(underlying, [])
+
+    def nearest_expiry(self, underlying, on=None):
+        """The first option expiry of `underlying` on or after `on` (default: today in IST), or None."""
+        on = on or datetime.datetime.now(IST).date()
+        expiries = self.expiries(underlying)
+        position = bisect.bisect_left(expiries, on)
+        return expiries[position] if position < len(expiries) else None
+
+    def atm_option(self, underlying, spot, option_type, expiry=None, on=None, offset=0):
+        """The contract whose strike is nearest `spot`, of `expiry` (default: the nearest one).
+
+        `offset` moves that many listed strikes up (positive) or down, e.g.
+        offset=1 with CE for one strike out of the money. None when nothing
+        is listed.
+        """
+        expiry = expiry or self.nearest_expiry(underlying, on)
+        strikes = self._strikes.get((underlying, expiry))
+        if not strikes:
+            return None
+        position = bisect.bisect_left(strikes, spot)
+        if position == len(strikes) or (position > 0 and spot - strikes[position - 1] <= strikes[position] - spot):
+            position -= 1
+        position = min(max(position + offset, 0), len(strikes) - 1)
+        return self.option(underlying, expiry, strikes[position], option_type)
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    from market_analysis_app.zerodha.zerodha_client import ZerodhaClient
+
+    parser = argparse.ArgumentParser(description="Refresh the cached Kite instrument dump and resolve ATM options.")
+    parser.add_argument('underlying', nargs='?', default='NIFTY')
+    parser.add_argument('spot', type=float, nargs='?')
+    parser.add_argument('--exchange', action='append', help="exchanges to load (default: NFO and BFO)")
+    args = parser.parse_args()
+    load_dotenv()
+    client = ZerodhaClient(os.getenv("ZERODHA_API_KEY"), os.getenv("ZERODHA_API_SECRET"), os.getenv("ZERODHA_ACCESS_TOKEN"))
+    master = InstrumentMaster(client.kite, exchanges=args.exchange or EXCHANGES).load()
+    print(f"{len(master)} instruments ({master.stats['downloads']} dumps downloaded) in {master.root}")
+    expiry = master.nearest_expiry(args.underlying)
+    print(f"{args.underlying} nearest expiry: {expiry}")
+    if args.spot:
+        for option_type in ('CE', 'PE'):
+            print(f"  ATM {option_type}: {master.atm_option(args.underlying, args.spot, option_type)}")
@@ -0,0 +1,322 @@
+# market_analysis_app/zerodha/mock_kite.py
+
+import argparse
+import collections
+import csv
+import datetime
+import io
+import itertools
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from market_analysis_app.zerodha.instruments import DUMP_COLUMNS
+from market_analysis_app.zerodha.order_book import postback_checksum
+
+# Order fields parsed as numbers from the form Kite Connect posts
+_INTEGER_FIELDS = {'quantity', 'disclosed_quantity', 'validity_ttl', 'iceberg_legs', 'iceberg_quantity'}
+_FLOAT_FIELDS = {'price', 'trigger_price'}
+
+
+class MockKiteServer:
+    """Local stand-in for the Kite Connect order REST API, for tests and offline benchmarks.
+
+    Serves POST /orders/<variety> (place), PUT and DELETE
+    /orders/<variety>/<order_id> (modify, cancel), GET /orders and GET
+    /portfolio/positions in Kite's JSON envelope, and GET /instruments/<exchange>
+    as CSV from `instruments` (exchange -> list of dump rows), so a KiteConnect created
+    with root=`url` works against it unchanged. MARKET orders fill at once
+    (at `fill_price`), others stay OPEN until fill() is called. With a
+    `postback_url`, every order change is POSTed there in order, signed
+    with `api_secret` like Kite's postbacks. Every response is delayed by `latency` plus up to `jitter`
+    seconds. `fail_every` answers every Nth place with 503 without placing
+    the order, `lose_ack_every` places the order but answers 504 as if the
+    acknowledgement was lost, and more than `max_rate` requests a second are
+    answered 429. Runs on a background thread.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, fail_every=None, lose_ack_every=None,
+                 max_rate=None, fill_price=100.0, postback_url=None, api_secret='secret',
+                 instruments=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_every = fail_every
+        self.lose_ack_every = lose_ack_every
+        self.max_rate = max_rate
+        self.fill_price = fill_price
+        self.postback_url = postback_url
+        self.api_secret = api_secret
+        self.instruments = instruments or {}
+        self.orders = collections.OrderedDict()
+        self.stats = collections.Counter()
+        self._ids = itertools.count(1)
+        self._recent = collections.deque()
+        self._lock = threading.Lock()
+        self._postbacks = queue.Queue()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._handle(self, 'GET')
+
+            def do_POST(self):
+                server._handle(self, 'POST')
+
+            def do_PUT(self):
+                server._handle(self, 'PUT')
+
+            def do_DELETE(self):
+                server._handle(self, 'DELETE')
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='mock-kite', daemon=True)
+        self._thread.start()
+        if self.postback_url:
+            threading.Thread(target=self._send_postbacks, name='mock-kite-postbacks', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._postbacks.put(None)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, handler, status, payload, content_type='application/json'):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    @staticmethod
+    def _error(error_type, message):
+        return {'status': 'error', 'message': message, 'data': None, 'error_type': error_type}
+
+    @staticmethod
+    def _form(handler, url):
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length).decode() if length else ''
+        params = {key: values[0] for key, values in parse_qs(body or url.query).items()}
+        for key in params.keys() & _INTEGER_FIELDS:
+            params[key] = int(params[key])
+        for key in params.keys() & _FLOAT_FIELDS:
+            params[key] = float(params[key])
+        return params
+
+    def _handle(self, handler, method):
+        url = urlparse(handler.path)
+        params = self._form(handler, url)
+        parts = [part for part in url.path.split('/') if part]
+        with self._lock:
+            self.stats['requests'] += 1
+            now = time.monotonic()
+            while self._recent and self._recent[0] <= now - 1.0:
+                self._recent.popleft()
+            throttled = self.max_rate is not None and len(self._recent) >= self.max_rate
+            if not throttled:
+                self._recent.append(now)
+        if throttled:
+            self.stats['throttled'] += 1
+            self._respond(handler, 429, self._error('NetworkException', 'Too many requests'))
+            return
+        if not handler.headers.get('Authorization', '').startswith('token '):
+            self._respond(handler, 403, self._error('TokenException', 'Incorrect `api_key` or `access_token`.'))
+            return
+
+        if parts == ['orders'] and method == 'GET':
+            with self._lock:
+                orders = [dict(order) for order in self.orders.values()]
+            self._respond(handler, 200, {'status': 'success', 'data': orders})
+        elif parts == ['portfolio', 'positions'] and method == 'GET':
+            self._respond(handler, 200, {'status': 'success', 'data': self.positions()})
+        elif len(parts) == 2 and parts[0] == 'instruments' and method == 'GET' and parts[1] in self.instruments:
+            self.stats['instrument_dumps'] += 1
+            self._respond(handler, 200, self._dump(self.instruments[parts[1]]), content_type='text/csv')
+        elif len(parts) == 2 and parts[0] == 'orders' and method == 'POST':
+            self._place(handler, parts[1], params)
+        elif len(parts) == 3 and parts[0] == 'orders' and method in ('PUT', 'DELETE'):
+            self._amend(handler, parts[2], params, cancel=method == 'DELETE')
+        else:
+            self._respond(handler, 404, self._error('GeneralException', 'Route not found'))
+
+    def _place(self, handler, variety, params):
+        missing = [field for field in ('exchange', 'tradingsymbol', 'transaction_type', 'quantity', 'product', 'order_type')
+                   if field not in params]
+        if missing or params['quantity'] <= 0:
+            self._respond(handler, 400, self._error('InputException', f"Invalid order: {', '.join(missing) or 'quantity'}"))
+            return
+        with self._lock:
+            self.stats['places'] += 1
+            if self.fail_every and self.stats['places'] % self.fail_every == 0:
+                self.stats['failed'] += 1
+                order = None
+            else:
+                order = self._new_order(variety, params)
+                self.orders[order['order_id']] = order
+                self._postback(order)
+                lost = self.lose_ack_every and self.stats['places'] % self.lose_ack_every == 0
+                if lost:
+                    self.stats['lost_acks'] += 1
+        if order is None:
+            self._respond(handler, 503, self._error('NetworkException', 'Order service unavailable'))
+        elif lost:
+            self._respond(handler, 504, self._error('NetworkException', 'Gateway timed out'))
+        else:
+            self._respond(handler, 200, {'status': 'success', 'data': {'order_id': order['order_id']}})
+
+    def _new_order(self, variety, params):
+        stamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        order_id = f"{datetime.date.today():%y%m%d}{next(self._ids):09d}"
+        filled = params['order_type'] == 'MARKET'
+        tag = params.get('tag')
+        return {
+            'order_id': order_id, 'exchange_order_id': f"1{order_id}", 'parent_order_id': None,
+            'status': 'COMPLETE' if filled else 'OPEN', 'status_message': None,
+            'order_timestamp': stamp, 'exchange_timestamp': stamp, 'variety': variety,
+            'exchange': params['exchange'], 'tradingsymbol': params['tradingsymbol'], 'instrument_token': 0,
+            'order_type': params['order_type'], 'transaction_type': params['transaction_type'],
+            'validity': params.get('validity', 'DAY'), 'product': params['product'],
+            'quantity': params['quantity'], 'disclosed_quantity': params.get('disclosed_quantity', 0),
+            'price': params.get('price', 0.0), 'trigger_price': params.get('trigger_price', 0.0),
+            'average_price': (params.get('price') or self.fill_price) if filled else 0.0,
+            'filled_quantity': params['quantity'] if filled else 0,
+            'pending_quantity': 0 if filled else params['quantity'], 'cancelled_quantity': 0,
+            'tag': tag, 'tags': [tag] if tag else [],
+        }
+
+    def _amend(self, handler, order_id, params, cancel):
+        with self._lock:
+            order = self.orders.get(order_id)
+            status = order['status'] if order is not None else None
+            if status == 'OPEN':
+                if cancel:
+                    order.update(status='CANCELLED', cancelled_quantity=order['pending_quantity'], pending_quantity=0)
+                    self.stats['cancels'] += 1
+                    self._postback(order)
+                else:
+                    order.update({key: value for key, value in params.items()
+                                  if key in ('quantity', 'price', 'trigger_price', 'order_type', 'validity')})
+                    order['pending_quantity'] = order['quantity'] - order['filled_quantity']
+                    self.stats['modifies'] += 1
+                    self._postback(order)
+        if status is None:
+            self._respond(handler, 400, self._error('InputException', f"Order {order_id} not found"))
+        elif status != 'OPEN':
+            self._respond(handler, 400, self._error('OrderException', f"Order {order_id} is {status}"))
+        else:
+            self._respond(handler, 200, {'status': 'success', 'data': {'order_id': order_id}})
+
+    def fill(self, order_id, quantity=None, price=None):
+        """Fills `quantity` (default: all that is pending) of an OPEN order, as the exchange would."""
+        with self._lock:
+            order = self.orders[order_id]
+            if order['status'] != 'OPEN':
+                raise ValueError(f"Order {order_id} is {order['status']}")
+            quantity = min(quantity or order['pending_quantity'], order['pending_quantity'])
+            price = price or order['price'] or self.fill_price
+            filled = order['filled_quantity'] + quantity
+            order.update(
+                average_price=(order['average_price'] * order['filled_quantity'] + price * quantity) / filled,
+                filled_quantity=filled, pending_quantity=order['quantity'] - filled,
+                status='COMPLETE' if filled == order['quantity'] else 'OPEN',
+                exchange_timestamp=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            )
+            self.stats['fills'] += 1
+            self._postback(order)
+            return dict(order)
+
+    def positions(self):
+        """Net positions built from the filled quantities of every order, shaped like kite.positions()."""
+        net = {}
+        with self._lock:
+            for order in self.orders.values():
+                if not order['filled_quantity']:
+                    continue
+                key = (order['exchange'], order['tradingsymbol'], order['product'])
+                position = net.setdefault(key, {'exchange': key[0], 'tradingsymbol': key[1], 'product': key[2],
+                                                'quantity': 0, 'buy_quantity': 0, 'sell_quantity': 0})
+                side = 'buy' if order['transaction_type'] == 'BUY' else 'sell'
+                position[f'{side}_quantity'] += order['filled_quantity']
+                position['quantity'] += order['filled_quantity'] * (1 if side == 'buy' else -1)
+        positions = list(net.values())
+        return {'net': positions, 'day': [dict(position) for position in positions]}
+
+    @staticmethod
+    def _dump(rows):
+        out = io.StringIO()
+        writer = csv.DictWriter(out, DUMP_COLUMNS, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+        return out.getvalue()
+
+    def _postback(self, order):
+        # Called under the lock, so updates queue in the order they happened
+        if self.postback_url:
+            update = dict(order, user_id='MOCK01', app_id='mock', checksum=postback_checksum(
+                order['order_id'], order['order_timestamp'], self.api_secret))
+            self._postbacks.put(update)
+
+    def _send_postbacks(self):
+        while True:
+            update = self._postbacks.get()
+            if update is None:
+                return
+            request = urllib.request.Request(self.postback_url, data=json.dumps(update).encode(),
+                                             headers={'Content-Type': 'application/json'}, method='POST')
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+                self.stats['postbacks'] += 1
+            except Exception as e:
+                self.stats['postback_errors'] += 1
+                logging.warning(f"Mock Kite postback for {update['order_id']} failed: {e}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve a mock Kite Connect order API on localhost.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8768)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--max-rate', type=int, default=10, help="requests a second before answering 429, as Kite does")
+    parser.add_argument('--postback-url', help="where to POST order updates, e.g. a PostbackServer's url")
+    parser.add_argument('--secret', default='secret', help="API secret the postbacks are signed with")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = MockKiteServer(args.host, args.port, args.latency, args.jitter, max_rate=args.max_rate,
+                            postback_url=args.postback_url, api_secret=args.secret).start()
+    logging.info(f"Mock Kite order API on {server.url} (set KITE_API_ROOT to use it)")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,205 @@
+# market_analysis_app/zerodha/order_book.py
+
+import collections
+import hashlib
+import threading
+
+# Kite order statuses after which an order never changes again
+TERMINAL_STATUSES = {'COMPLETE', 'CANCELLED', 'REJECTED'}
+
+_SIGN = {'BUY': 1, 'SELL': -1}
+
+
+def postback_checksum(order_id, order_timestamp, api_secret):
+    """The SHA-256 checksum Kite signs every order postback with."""
+    return hashlib.sha256(f"{order_id}{order_timestamp}{api_secret}".encode()).hexdigest()
+
+
+class OrderBook:
+    """Local copy of the day's orders and net positions, kept current by order updates.
+
+    seed() loads orders and positions from the Kite REST API once; after
+    that every order update (a KiteTicker on_order_update message or an
+    HTTP postback, both shaped like a kite.orders() entry) is applied with
+    apply(), moving positions by the newly filled quantity. Updates are
+    idempotent and stale ones are ignored: an order that has reached a
+    terminal status stays there and its filled quantity never goes back,
+    so duplicated or reordered deliveries change nothing. Orders are
+    attributed to a strategy by their tag prefix (`strategy_tags`, prefix
+    -> strategy), so has_open() answers "is there already an open order or
+    position for this instrument and strategy" from counters in O(1).
+    has_open_underlying() answers the same for any contract of an
+    underlying (e.g. every NIFTY option), taken from an order's `name` or
+    looked up with `underlying_of(tradingsymbol)`. Safe to use from the
+    feed and postback threads at once.
+    """
+
+    def __init__(self, strategy_tags=None, underlying_of=None):
+        self.strategy_tags = dict(strategy_tags or {})
+        self.underlying_of = underlying_of
+        self.orders = {}
+        self.stats = collections.Counter()
+        # (tradingsymbol, strategy) -> net quantity / open order count; strategy None covers every strategy
+        self._net = collections.Counter()
+        self._open = collections.Counter()
+        self._tags = {}
+        # tradingsymbol -> underlying, and (underlying, strategy) -> contracts with an open order or position
+        self._names = {}
+        self._live = collections.Counter()
+        self._lock = threading.Lock()
+        self._during_seed = None
+
+    def strategy_of(self, tag):
+        if tag:
+            for prefix, strategy in self.strategy_tags.items():
+                if tag.startswith(prefix):
+                    return strategy
+        return None
+
+    @staticmethod
+    def _tag(order):
+        return order.get('tag') or next(iter(order.get('tags') or ()), None)
+
+    def _keys(self, order):
+        strategy = self.strategy_of(self._tag(order))
+        symbol = order.get('tradingsymbol')
+        return ((symbol, None),) if strategy is None else ((symbol, None), (symbol, strategy))
+
+    def _name(self, symbol, order=None):
+        name = (order or {}).get('name') or self._names.get(symbol)
+        if name is None and self.underlying_of is not None:
+            name = self.underlying_of(symbol)
+        if name is not None:
+            self._names[symbol] = name
+        return name
+
+    def _is_live(self, key):
+        return self._open[key] > 0 or self._net[key] != 0
+
+    def sync(self, kite):
+        """Seeds the book from kite.orders() and kite.positions().
+
+        Updates that arrive while the REST calls are in flight are replayed
+        on top of the snapshot, so none is lost to the seed.
+        """
+        with self._lock:
+            self._during_seed = []
+        try:
+            orders, positions = kite.orders(), kite.positions()
+        except Exception:
+            with self._lock:
+                self._during_seed = None
+            raise
+        self.seed(orders, positions)
+
+    def seed(self, orders, positions=None):
+        """Replaces the book with a REST snapshot: a kite.orders() list and a kite.positions() dict."""
+        with self._lock:
+            replay, self._during_seed = self._during_seed or [], None
+            self.orders.clear()
+            self._net.clear()
+            self._open.clear()
+            self._tags.clear()
+            self._live.clear()
+            for order in orders:
+                order = dict(order)
+                self.orders[order['order_id']] = order
+                if self._tag(order):
+                    self._tags[self._tag(order)] = order['order_id']
+                keys = self._keys(order)
+                self._name(order.get('tradingsymbol'), order)
+                if order.get('status') not in TERMINAL_STATUSES:
+                    for key in keys:
+                        self._open[key] += 1
+                # The account's net position comes from positions(); the orders attribute fills to strategies
+                for key in keys[1:]:
+                    self._net[key] += _SIGN.get(order.get('transaction_type'), 0) * (order.get('filled_quantity') or 0)
+            for position in (positions or {}).get('net', ()):
+                self._net[(position['tradingsymbol'], None)] += position.get('quantity') or 0
+            for symbol, strategy in set(self._open) | set(self._net):
+                name = self._name(symbol)
+                if name is not None and self._is_live((symbol, strategy)):
+                    self._live[(name, strategy)] += 1
+            for update in replay:
+                self._apply(update)
+            self.stats['seeds'] += 1
+
+    def apply(self, update):
+        """Applies one order update; returns False when it was stale or a duplicate."""
+        with self._lock:
+            if self._during_seed is not None:
+                self._during_seed.append(update)
+            return self._apply(update)
+
+    def _apply(self, update):
+        order_id = update.get('order_id')
+        if order_id is None:
+            self.stats['ignored'] += 1
+            return False
+        previous = self.orders.get(order_id)
+        if previous is not None:
+            if previous.get('status') in TERMINAL_STATUSES or \
+                    (update.get('filled_quantity') or 0) < (previous.get('filled_quantity') or 0):
+                self.stats['stale'] += 1
+                return False
+            order = {**previous, **update}
+        else:
+            order = dict(update)
+        self.orders[order_id] = order
+        if self._tag(order):
+            self._tags[self._tag(order)] = order_id
+        keys = self._keys(order)
+        live = [self._is_live(key) for key in keys]
+        filled = (order.get('filled_quantity') or 0) - ((previous or {}).get('filled_quantity') or 0)
+        if filled:
+            for key in keys:
+                self._net[key] += _SIGN.get(order.get('transaction_type'), 0) * filled
+        was_open = previous is not None and previous.get('status') not in TERMINAL_STATUSES
+        is_open = order.get('status') not in TERMINAL_STATUSES
+        if was_open != is_open:
+            for key in keys:
+                self._open[key] += 1 if is_open else -1
+        name = self._name(order.get('tradingsymbol'), order)
+        if name is not None:
+            for key, was_live in zip(keys, live):
+                if self._is_live(key) != was_live:
+                    self._live[(name, key[1])] += -1 if was_live else 1
+        self.stats['updates'] += 1
+        return True
+
+    def placed(self, order_id, tag=None, **order):
+        """Records an acknowledged order as open until its first update arrives."""
+        with self._lock:
+            if order_id in self.orders:
+                return
+            self._apply({'order_id': order_id, 'status': 'PUT ORDER REQ RECEIVED', 'tag': tag,
+                         'filled_quantity': 0, **order})
+
+    def order_id_for(self, tag):
+        """The order placed with `tag` today, or None."""
+        return self._tags.get(tag)
+
+    def has_open(self, tradingsymbol, strategy=None):
+        """True while `tradingsymbol` has an open order or a non-zero net position (for `strategy`, if given)."""
+        key = (tradingsymbol, strategy)
+        return self._open[key] > 0 or self._net[key] != 0
+
+    def has_open_underlying(self, underlying, strategy=None):
+        """True while any contract of `underlying` has an open order or a non-zero net position (for `strategy`, if given)."""
+        return self._live[(underlying, strategy)] > 0
+
+    def position(self, tradingsymbol, strategy=None):
+        """Net filled quantity, positive long and negative short."""
+        return self._net[(tradingsymbol, strategy)]
+
+    def open_orders(self, tradingsymbol=None):
+        with self._lock:
+            return [dict(order) for order in self.orders.values()
+                    if order.get('status') not in TERMINAL_STATUSES
+                    and (tradingsymbol is None or order.get('tradingsymbol') == tradingsymbol)]
+
+    def metrics(self):
+        metrics = dict(self.stats)
+        metrics['orders'] = len(self.orders)
+        metrics['open'] = sum(count for (symbol, strategy), count in self._open.items() if strategy is None)
+        return metrics
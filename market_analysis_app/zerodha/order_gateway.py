@@ -0,0 +1,261 @@
+# market_analysis_app/zerodha/order_gateway.py
+
+import argparse
+import asyncio
+import bisect
+import collections
+import functools
+import hashlib
+import math
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from kiteconnect import exceptions as kite_exceptions
+from requests.adapters import HTTPAdapter
+
+from market_analysis_app.rate_limit import TokenBucket
+
+# Kite accepts up to 10 order requests a second per API key
+ORDER_RATE = 10
+
+# Kite order tags are at most 20 alphanumeric characters
+TAG_PREFIX = 'MA'
+TAG_LENGTH = 20
+
+
+def order_tag(*parts, prefix=TAG_PREFIX):
+    """Deterministic Kite order tag for one trading intent (e.g. strategy, symbol, side, candle time).
+
+    The same intent always gets the same tag, so a resubmission can be
+    recognised among the day's orders. `prefix` starts the tag, e.g. to
+    mark the strategy that placed the order.
+    """
+    digest = hashlib.blake2b('|'.join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    return (prefix + digest)[:TAG_LENGTH]
+
+
+class LatencyHistogram:
+    """Durations counted into fixed log-spaced buckets, `per_decade` of them per power of ten.
+
+    Recording is one bisect; percentiles are read back as the upper bound of
+    the bucket they fall in, so they are accurate to the bucket width
+    (about 12% with the default 20 per decade).
+    """
+
+    def __init__(self, low=1e-4, high=60.0, per_decade=20):
+        decades = math.log10(high / low)
+        steps = int(math.ceil(decades * per_decade))
+        self.bounds = [low * 10 ** (i / per_decade) for i in range(steps + 1)]
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bounds[bucket], self.max) if bucket < len(self.bounds) else self.max
+
+    def summary(self):
+        """count, mean, p50, p90, p99 and max, in seconds."""
+        if not self.count:
+            return {'count': 0}
+        summary = {'count': self.count, 'mean': self.total / self.count}
+        summary.update((f'p{q}', self.percentile(q)) for q in (50, 90, 99))
+        summary['max'] = self.max
+        return summary
+
+
+def _ambiguous(error):
+    """True when a failed request may still have reached Kite (timeouts, dropped connections, 5xx)."""
+    if isinstance(error, (requests.RequestException, kite_exceptions.NetworkException, kite_exceptions.DataException)):
+        return True
+    return isinstance(error, kite_exceptions.GeneralException) and error.code >= 500
+
+
+class OrderGateway:
+    """Places, modifies and cancels Kite orders concurrently from asyncio code.
+
+    Calls run on a thread pool sharing the KiteConnect session's pooled
+    keep-alive connections, paced by a token bucket at Kite's order rate,
+    so orders for different indices are in flight together. Every order
+    carries a tag: when a place request fails in a way that may have
+    reached Kite, the day's orders are searched for that tag before
+    anything is resent, and a tag already acknowledged in this session is
+    never sent again, so retries cannot double-fill. Latencies are recorded
+    from the signal to the request being sent (signal_to_submit), from the
+    request to Kite's acknowledgement (submit_to_ack), and end to end
+    (signal_to_ack); modify and cancel round trips are recorded too.
+    """
+
+    def __init__(self, kite, max_workers=8, rate=ORDER_RATE, retries=2, backoff=0.2, clock=time.perf_counter):
+        self.kite = kite
+        self.retries = retries
+        self.backoff = backoff
+        self.clock = clock
+        session = getattr(kite, 'reqsession', None)
+        if session is not None:
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        self.limiter = TokenBucket(rate)
+        self.histograms = collections.defaultdict(LatencyHistogram)
+        self.stats = collections.Counter()
+        self._acked = {}
+        self._inflight = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='kite-orders')
+
+    @classmethod
+    def from_client(cls, client, **kwargs):
+        return cls(client.kite, **kwargs)
+
+    def _paced(self, func, *args, **kwargs):
+        """Runs a Kite call once the rate limit allows; returns (clock reading when it was sent, result)."""
+        self.limiter.acquire()
+        sent = self.clock()
+        return sent, func(*args, **kwargs)
+
+    async def _send(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(self._paced, func, *args, **kwargs))
+
+    async def _call(self, func, *args, **kwargs):
+        return (await self._send(func, *args, **kwargs))[1]
+
+    async def _find_by_tag(self, tag):
+        for order in await self._call(self.kite.orders):
+            if order.get('tag') == tag or tag in (order.get('tags') or ()):
+                return order['order_id']
+        return None
+
+    async def place(self, signal_time=None, tag=None, variety='regular', **order):
+        """Places one order and returns its Kite order_id; raises if it could not be placed.
+
+        `order` holds kite.place_order's arguments (exchange, tradingsymbol,
+        transaction_type, quantity, product, order_type, price, ...); None
+        values are left out. `signal_time` is a `clock` reading taken when
+        the signal fired (default: now). Pass a `tag` from order_tag to make
+        the order idempotent across calls; otherwise a random one covers
+        this call's retries.
+        """
+        signal_time = self.clock() if signal_time is None else signal_time
+        tag = tag or (TAG_PREFIX + uuid.uuid4().hex)[:TAG_LENGTH]
+        if tag in self._acked:
+            self.stats['duplicates'] += 1
+            return self._acked[tag]
+        if tag in self._inflight:
+            self.stats['duplicates'] += 1
+            return await asyncio.shield(self._inflight[tag])
+        task = asyncio.ensure_future(self._place(signal_time, tag, variety, {k: v for k, v in order.items() if v is not None}))
+        self._inflight[tag] = task
+        task.add_done_callback(lambda _: self._inflight.pop(tag, None))
+        return await asyncio.shield(task)
+
+    async def _place(self, signal_time, tag, variety, order):
+        submitted = None
+        for attempt in range(self.retries + 1):
+            try:
+                sent, order_id = await self._send(self.kite.place_order, variety=variety, tag=tag, **order)
+                submitted = sent
+                break
+            except Exception as e:
+                if not _ambiguous(e):
+                    self.stats['rejected'] += 1
+                    raise
+                # The order may have been placed before the failure: never resend without checking
+                try:
+                    order_id = await self._find_by_tag(tag)
+                except Exception:
+                    self.stats['failed'] += 1
+                    raise e
+                if order_id is not None:
+                    self.stats['recovered'] += 1
+                    break
+                if attempt == self.retries:
+                    self.stats['failed'] += 1
+                    raise
+                self.stats['retries'] += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        acked = self.clock()
+        if submitted is not None:
+            # Orders recovered by tag lookup have no clean round trip to record
+            self.histograms['signal_to_submit'].record(submitted - signal_time)
+            self.histograms['submit_to_ack'].record(acked - submitted)
+        self.histograms['signal_to_ack'].record(acked - signal_time)
+        self.stats['placed'] += 1
+        self._acked[tag] = order_id
+        return order_id
+
+    async def place_many(self, orders):
+        """Places several orders at once; returns order_ids or exceptions, in order."""
+        return await asyncio.gather(*(self.place(**order) for order in orders), return_exceptions=True)
+
+    async def _timed(self, name, func, *args, **kwargs):
+        sent, result = await self._send(func, *args, **kwargs)
+        self.histograms[name].record(self.clock() - sent)
+        self.stats[name] += 1
+        return result
+
+    async def modify(self, order_id, variety='regular', **changes):
+        return await self._timed('modify', self.kite.modify_order, variety=variety, order_id=order_id,
+                                 **{k: v for k, v in changes.items() if v is not None})
+
+    async def cancel(self, order_id, variety='regular'):
+        return await self._timed('cancel', self.kite.cancel_order, variety=variety, order_id=order_id)
+
+    def metrics(self):
+        """Counters plus a summary of every latency histogram."""
+        metrics = dict(self.stats)
+        metrics.update((name, histogram.summary()) for name, histogram in self.histograms.items())
+        return metrics
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+
+if __name__ == '__main__':
+    from kiteconnect import KiteConnect
+
+    from market_analysis_app.zerodha.mock_kite import MockKiteServer
+
+    parser = argparse.ArgumentParser(description="Benchmark order throughput and latency against a (mock) Kite order API.")
+    parser.add_argument('--root', help="Kite API root; by default a local MockKiteServer is started")
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=ORDER_RATE)
+    parser.add_argument('--latency', type=float, default=0.02, help="mock server response time")
+    parser.add_argument('--jitter', type=float, default=0.02)
+    args = parser.parse_args()
+
+    server = None if args.root else MockKiteServer(latency=args.latency, jitter=args.jitter).start()
+    kite = KiteConnect(api_key='benchmark', access_token='benchmark', root=args.root or server.url)
+    gateway = OrderGateway(kite, max_workers=args.workers, rate=args.rate)
+
+    async def benchmark():
+        orders = [dict(exchange='NFO', tradingsymbol=f'NIFTY{i % 5}', transaction_type='BUY', quantity=50,
+                       product='MIS', order_type='LIMIT', price=100.0, validity='DAY') for i in range(args.orders)]
+        started = time.perf_counter()
+        results = await gateway.place_many(orders)
+        return time.perf_counter() - started, results
+
+    elapsed, results = asyncio.run(benchmark())
+    failures = sum(isinstance(result, Exception) for result in results)
+    print(f"{args.orders} orders in {elapsed:.2f} s ({args.orders / elapsed:.1f}/s), {failures} failed")
+    for name, summary in gateway.metrics().items():
+        if isinstance(summary, dict) and summary.get('count'):
+            print(f"  {name}: " + ", ".join(f"{key} {value * 1000:.1f} ms" for key, value in summary.items() if key != 'count'))
+    gateway.close()
+    if server:
+        server.stop()
@@ -0,0 +1,112 @@
+# market_analysis_app/zerodha/postbacks.py
+
+import argparse
+import collections
+import hmac
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from market_analysis_app.zerodha.order_book import postback_checksum
+
+
+class PostbackServer:
+    """Receives Kite order postbacks (the app's registered postback URL) on a background thread.
+
+    Every POSTed JSON update whose checksum matches `api_secret` is passed to
+    `on_update` (e.g. OrderBook.apply, or publishing it on the EventBus);
+    anything else is answered 400/403 and counted in `stats`. Behind a
+    reverse proxy or tunnel this is the endpoint Kite calls.
+    """
+
+    def __init__(self, api_secret, on_update, host='127.0.0.1', port=0, path='/kite/postback'):
+        self.api_secret = api_secret
+        self.on_update = on_update
+        self.host = host
+        self.port = port
+        self.path = path
+        self.stats = collections.Counter()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}{self.path}'
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='kite-postbacks', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @staticmethod
+    def _respond(handler, status):
+        handler.send_response(status)
+        handler.send_header('Content-Length', '0')
+        handler.end_headers()
+
+    def _handle(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+        if handler.path.split('?')[0] != self.path:
+            self._respond(handler, 404)
+            return
+        try:
+            update = json.loads(body)
+            expected = postback_checksum(update['order_id'], update.get('order_timestamp', ''), self.api_secret)
+        except (ValueError, KeyError, TypeError):
+            self.stats['malformed'] += 1
+            self._respond(handler, 400)
+            return
+        if not hmac.compare_digest(str(update.get('checksum', '')), expected):
+            self.stats['rejected'] += 1
+            self._respond(handler, 403)
+            return
+        self.stats['received'] += 1
+        # Acknowledge before handing over, so Kite is never kept waiting on the app
+        self._respond(handler, 200)
+        try:
+            self.on_update(update)
+        except Exception as e:
+            print(f"Error handling order postback {update.get('order_id')}: {e}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Receive Kite order postbacks and log them.")
+    parser.add_argument('--secret', required=True, help="Kite API secret the postbacks are signed with")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8769)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = PostbackServer(args.secret, lambda update: logging.info(
+        f"{update['order_id']} {update.get('tradingsymbol')} {update.get('status')} "
+        f"filled {update.get('filled_quantity')}/{update.get('quantity')}"), args.host, args.port).start()
+    logging.info(f"Listening for Kite postbacks on {server.url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
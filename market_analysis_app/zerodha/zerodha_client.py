@@ -1,10 +1,13 @@
 # market_analysis_app/zerodha/zerodha_client.py
 
+import os
+
 from kiteconnect import KiteConnect
 
 class ZerodhaClient:
-    def __init__(self, api_key, api_secret, access_token):
-        self.kite = KiteConnect(api_key=api_key)
+    def __init__(self, api_key, api_secret, access_token, root=None):
+        # KITE_API_ROOT can point the REST client at a local MockKiteServer
+        self.kite = KiteConnect(api_key=api_key, root=root or os.getenv("KITE_API_ROOT"))
         self.api_secret = api_secret
         self.access_token = access_token
         self.kite.set_access_token(access_token)
@@ -38,7 +41,6 @@ class ZerodhaClient:
 
 if __name__ == '__main__':
     # Example usage (requires .env file with credentials)
-    import os
     from dotenv import load_dotenv
 
     load_dotenv()
@@ -0,0 +1,110 @@
+# tests/test_backtest.py
+
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from market_analysis_app.backtest.engine import run_backtest, run_shard, extract_trades, STRATEGIES
+from market_analysis_app.data.warehouse import Warehouse
+from market_analysis_app.strategies.strategy1 import strategy1
+
+def session_bars(days, seed=0):
+    """5-minute bars for `days` sessions of 09:15-15:25 IST."""
+    sessions = pd.bdate_range('2024-01-01', periods=days)
+    index = pd.DatetimeIndex([
+        session + pd.Timedelta(hours=9, minutes=15) + pd.Timedelta(minutes=5 * i)
+        for session in sessions for i in range(75)
+    ]).tz_localize('Asia/Kolkata')
+    rng = np.random.default_rng(seed)
+    close = 1000 + np.cumsum(rng.normal(0, 2, len(index)))
+    open_ = close + rng.normal(0, 1, len(index))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + rng.uniform(0, 2, len(index)),
+        'Low': np.minimum(open_, close) - rng.uniform(0, 2, len(index)),
+        'Close': close,
+        'Volume': rng.integers(100, 1000, len(index)).astype(float)
+    }, index=index)
+
+class TestExtractTrades(unittest.TestCase):
+
+    def bars(self, open_, high, low, close):
+        index = pd.date_range('2024-01-01 09:15', periods=len(close), freq='5min')
+        return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close}, index=index)
+
+    def test_fills_at_next_open_and_target(self):
+        bars = self.bars([100, 100.5, 100.7, 101.5], [100.2, 100.8, 100.9, 102.0], [99.8, 100.2, 100.5, 101.2], [100, 100.6, 100.8, 101.8])
+        trades = extract_trades(bars, np.array([1, 0, 0, 0]), np.full(4, 99.0), np.full(4, np.nan), target_pct=0.01, trailing=False, slippage=0, commission=0)
+        self.assertEqual(len(trades), 1)
+        trade = trades.iloc[0]
+        self.assertEqual(trade['entry_time'], bars.index[1])
+        self.assertEqual(trade['entry_price'], 100.5)
+        # Target is 1% above the signal bar's close; bar 3 opens through it
+        self.assertEqual(trade['exit_reason'], 'target')
+        self.assertEqual(trade['exit_price'], 101.5)
+        self.assertAlmostEqual(trade['return'], 1 / 100.5)
+
+    def test_gap_through_stop_and_costs(self):
+        bars = self.bars([100, 100, 98], [100.2, 100.3, 98.5], [99.8, 99.7, 97.5], [100, 100, 98])
+        trades = extract_trades(bars, np.array([1, 0, 0]), np.full(3, 99.0), np.full(3, np.nan), trailing=False, slippage=0.001, commission=0.0005)
+        trade = trades.iloc[0]
+        self.assertEqual(trade['exit_reason'], 'stop')
+        self.assertAlmostEqual(trade['entry_price'], 100 * 1.001)
+        self.assertAlmostEqual(trade['exit_price'], 98 * 0.999)
+        self.assertAlmostEqual(trade['return'], (98 * 0.999 - 100.1) / 100.1 - 0.001)
+
+    def test_open_trade_closes_at_end(self):
+        bars = self.bars([100, 99.9, 99.8], [100.1, 100.0, 99.9], [99.9, 99.8, 99.7], [100, 99.9, 99.8])
+        trades = extract_trades(bars, np.array([-1, 0, 0]), np.full(3, np.nan), np.full(3, 101.0), trailing=False, slippage=0, commission=0)
+        self.assertEqual(trades.iloc[0]['exit_reason'], 'end')
+        self.assertEqual(trades.iloc[0]['exit_price'], 99.8)
+        self.assertEqual(trades.iloc[0]['direction'], -1)
+
+class TestBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = {'AAA': session_bars(20, seed=1), 'BBB': session_bars(15, seed=2)}
+        times = self.frames['AAA'].index[::25]
+        self.pcr = {'AAA': pd.Series(np.random.default_rng(3).uniform(0.3, 1.5, len(times)), index=times)}
+
+    def test_results_cover_every_strategy(self):
+        result = run_backtest(list(self.frames), frames=self.frames, pcr=self.pcr, workers=1)
+        self.assertEqual(set(result.trades['strategy']), set(STRATEGIES))
+        self.assertEqual(set(result.stats.index), set(STRATEGIES))
+        for name in STRATEGIES:
+            trades = result.trades[result.trades['strategy'] == name]
+            self.assertAlmostEqual(result.equity[name].iloc[-1] - 1, trades['return'].sum() / 2)
+            self.assertTrue((trades['entry_time'] <= trades['exit_time']).all())
+        self.assertTrue(set(result.trades['exit_reason']) <= {'stop', 'target', 'end'})
+
+    def test_signals_match_strategy_functions(self):
+        data = self.frames['AAA']
+        _, shard = run_shard({'symbol': 'AAA', 'data': data, 'strategies': ['strategy1'], 'params': {'strategy1': {'ema_length': 5}}})
+        expected = strategy1(data.copy(), ema_length=5)
+        np.testing.assert_array_equal(shard['strategy1_signal'], expected['signal'])
+        np.testing.assert_array_equal(shard['strategy1_long_stop'], expected['PSAR_long'])
+
+    def test_strategy2_needs_a_previous_session(self):
+        result = run_backtest(['AAA'], ['strategy2'], frames=self.frames, workers=1)
+        first_session = self.frames['AAA'].index[74]
+        self.assertTrue((result.trades['entry_time'] > first_session).all())
+
+    def test_chunked_process_pool_matches_single_pass(self):
+        expected = run_backtest(list(self.frames), frames=self.frames, pcr=self.pcr, workers=1)
+        chunked = run_backtest(
+            list(self.frames), frames=self.frames, pcr=self.pcr, start='2024-01-01', end='2024-02-01',
+            chunk_days=7, workers=2
+        )
+        pd.testing.assert_frame_equal(chunked.trades, expected.trades)
+
+    def test_reads_bars_from_warehouse(self):
+        with tempfile.TemporaryDirectory() as root:
+            Warehouse(root).append('AAA', '5m', self.frames['AAA'])
+            task = {'symbol': 'AAA', 'interval': '5m', 'strategies': ['strategy1', 'strategy4'], 'start': '2024-01-10', 'warmup': 150}
+            _, from_warehouse = run_shard(dict(task, warehouse_root=root))
+            _, in_memory = run_shard(dict(task, data=self.frames['AAA']))
+            pd.testing.assert_frame_equal(from_warehouse, in_memory, check_freq=False, check_index_type=False)
+            self.assertEqual(from_warehouse.index[0], pd.Timestamp('2024-01-10 09:15', tz='Asia/Kolkata'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# tests/test_bar_store.py
+
+import unittest
+import numpy as np
+import pandas as pd
+from market_analysis_app.data.bar_store import BarSeries, BarStore
+
+def random_ticks(n, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-01-02 09:15', tz='Asia/Kolkata')
+    offsets = np.sort(rng.uniform(0, 375 * 60, n))
+    index = start + pd.to_timedelta(offsets, unit='s')
+    return pd.DataFrame({
+        'price': 22000 + np.cumsum(rng.normal(0, 1, n)),
+        'volume': rng.integers(1, 100, n).astype(float)
+    }, index=index)
+
+def resample(ticks, rule):
+    bars = ticks['price'].resample(rule, origin='start_day', offset='15min').ohlc()
+    bars['Volume'] = ticks['volume'].resample(rule, origin='start_day', offset='15min').sum()
+    bars.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+    return bars.dropna()
+
+class TestBarStore(unittest.TestCase):
+
+    def feed(self, store, ticks):
+        day_volume = ticks['volume'].cumsum()
+        for timestamp, price, volume in zip(ticks.index.as_unit('ns').asi8, ticks['price'], day_volume):
+            store.add_tick('^NSEI', int(timestamp), price, volume)
+
+    def test_aggregation_matches_resample(self):
+        ticks = random_ticks(5000)
+        store = BarStore()
+        # The first tick only establishes the cumulative volume baseline
+        self.feed(store, ticks)
+        ticks.loc[ticks.index[0], 'volume'] = 0.0
+        for timeframe, rule in [('1m', '1min'), ('5m', '5min'), ('15m', '15min')]:
+            expected = resample(ticks, rule)
+            frame = store.frame('^NSEI', timeframe)
+            pd.testing.assert_frame_equal(frame, expected, check_freq=False, check_names=False)
+        self.assertEqual(store.frame('^NSEI', '5m').index[0], pd.Timestamp('2024-01-02 09:15', tz='Asia/Kolkata'))
+        self.assertEqual(len(store.frame('^NSEI', '1d')), 1)
+
+    def test_forming_bar_excluded_on_request(self):
+        store = BarStore()
+        self.feed(store, random_ticks(500, seed=1))
+        full = store.frame('^NSEI', '15m')
+        closed = store.frame('^NSEI', '15m', include_forming=False)
+        pd.testing.assert_frame_equal(closed, full.iloc[:-1])
+
+    def test_ring_buffer_keeps_latest_bars_without_copying(self):
+        series = BarSeries('1m', capacity=50)
+        start = pd.Timestamp('2024-01-02 09:15', tz='Asia/Kolkata').value
+        for i in range(180):
+            closed = series.update(start + i * 60 * 10**9, float(i))
+            self.assertEqual(closed, None if i == 0 else start + (i - 1) * 60 * 10**9)
+        arrays = series.arrays()
+        self.assertEqual(len(series), 50)
+        np.testing.assert_array_equal(arrays['Close'], np.arange(130, 180, dtype=float))
+        self.assertTrue(np.shares_memory(arrays['Close'], series.values))
+        self.assertTrue(np.shares_memory(series.frame()['Close'].to_numpy(), series.values))
+
+    def test_store_hands_out_copies_of_the_ring(self):
+        store = BarStore(timeframes=('1m',), capacity={'1m': 5})
+        start = pd.Timestamp('2024-01-02 09:15', tz='Asia/Kolkata').value
+        for i in range(8):
+            store.add_tick('^NSEI', start + i * 60 * 10**9, float(i))
+        frame = store.frame('^NSEI', '1m', include_forming=False)
+        arrays = store.arrays('^NSEI', '1m')
+        expected = frame.copy()
+        # Ticks wrap the ring over every slot the frame was taken from, then a re-seed rewrites it
+        for i in range(8, 20):
+            store.add_tick('^NSEI', start + i * 60 * 10**9, float(i))
+        store.seed('^NSEI', '1m', expected.iloc[:2] * 0)
+        pd.testing.assert_frame_equal(frame, expected)
+        np.testing.assert_array_equal(arrays['Close'], [3.0, 4, 5, 6, 7])
+        self.assertFalse(np.shares_memory(frame['Close'].to_numpy(), store.series('^NSEI', '1m').values))
+
+    def test_seed_then_continue_with_ticks(self):
+        index = pd.date_range('2024-01-02 09:15', periods=4, freq='5min', tz='Asia/Kolkata')
+        history = pd.DataFrame({'Open': [1.0, 2, 3, 4], 'High': [2.0, 3, 4, 5], 'Low': [0.5, 1, 2, 3],
+                                'Close': [1.5, 2.5, 3.5, 4.5], 'Volume': [10.0, 20, 30, 40]}, index=index)
+        store = BarStore(symbols={256265: '^NSEI'})
+        store.seed('^NSEI', '5m', history)
+        # A tick inside the last seeded bar extends it; the next bucket opens a new bar
+        for offset, price in [(1, 6.0), (6, 5.0)]:
+            # KiteTicker timestamps are naive datetimes in the machine's local time
+            stamp = (index[-1] + pd.Timedelta(minutes=offset)).to_pydatetime().astimezone().replace(tzinfo=None)
+            store.on_ticks([{'instrument_token': 256265, 'last_price': price, 'exchange_timestamp': stamp}])
+        frame = store.frame('^NSEI', '5m')
+        self.assertEqual(len(frame), 5)
+        self.assertEqual(frame['High'].iloc[3], 6.0)
+        self.assertEqual(frame['Close'].iloc[-1], 5.0)
+        self.assertTrue(store.is_live('^NSEI'))
+        self.assertFalse(store.is_live('^NSEBANK'))
+
+    def test_late_tick_is_ignored(self):
+        series = BarSeries('5m', capacity=10)
+        start = pd.Timestamp('2024-01-02 09:15', tz='Asia/Kolkata').value
+        series.update(start + 10**9, 1.0)
+        series.update(start + 301 * 10**9, 2.0)
+        series.update(start + 2 * 10**9, 9.0)
+        np.testing.assert_array_equal(series.arrays()['High'], [1.0, 2.0])
+
+if __name__ == '__main__':
+    unittest.main()
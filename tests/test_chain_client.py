@@ -0,0 +1,106 @@
+# tests/test_chain_client.py
+
+import json
+import tempfile
+import time
+import unittest
+
+from market_analysis_app.options.chain_client import OptionChainClient
+from market_analysis_app.options.chain_replay import OptionChainServer, load_recordings
+from tests.test_option_chains import nse_payload
+
+
+class TestOptionChainClient(unittest.TestCase):
+
+    def serve(self, recordings, **kwargs):
+        server = OptionChainServer(recordings, **kwargs).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def client(self, server, **kwargs):
+        self.sleeps = []
+        kwargs.setdefault('sleep', self.sleeps.append)
+        client = OptionChainClient(base_url=server.url, rate=100, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_session_is_warmed_once(self):
+        server = self.serve({
+            'NIFTY': [nse_payload('25-Jul-2024 10:00:00'), nse_payload('25-Jul-2024 10:05:00')],
+            'BANKNIFTY': [nse_payload('25-Jul-2024 10:00:00')],
+        })
+        client = self.client(server)
+
+        first = client.fetch_many(['NIFTY', 'BANKNIFTY'])
+        second = client.fetch_many(['NIFTY', 'BANKNIFTY'])
+
+        self.assertEqual(server.stats['handshakes'], 1)
+        self.assertEqual(len(first['NIFTY']), 6)
+        self.assertEqual(second['NIFTY'].attrs['timestamp'].minute, 5)
+        # BANKNIFTY was republished with the same timestamp, so the first chain is reused
+        self.assertIs(second['BANKNIFTY'], first['BANKNIFTY'])
+        self.assertEqual(client.stats['unchanged'], 1)
+
+    def test_throttling_is_retried(self):
+        server = self.serve({'NIFTY': [nse_payload('25-Jul-2024 10:00:00')]}, throttle_every=2)
+        client = self.client(server, backoff=0.5)
+
+        self.assertIsNotNone(client.fetch('NIFTY'))
+        client._timestamps.clear()
+        self.assertIsNotNone(client.fetch('NIFTY'))
+
+        self.assertEqual(client.stats['throttled'], 1)
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertTrue(0.25 <= self.sleeps[0] <= 0.5)
+
+    def test_retry_after_is_honoured_and_retries_are_bounded(self):
+        server = self.serve({'NIFTY': [nse_payload('25-Jul-2024 10:00:00')]}, throttle_every=1, retry_after=2)
+        client = self.client(server, retries=3)
+
+        self.assertIsNone(client.fetch('NIFTY'))
+        self.assertEqual(server.stats['requests'], 4)
+        self.assertEqual(self.sleeps, [2.0] * 4)
+        self.assertEqual(client.stats['failures'], 1)
+
+    def test_expired_cookies_trigger_a_new_handshake(self):
+        server = self.serve({'NIFTY': [nse_payload('25-Jul-2024 10:00:00'), nse_payload('25-Jul-2024 10:05:00')]})
+        client = self.client(server)
+        client.fetch('NIFTY')
+
+        server.expire_cookies()
+        chain = client.fetch('NIFTY')
+
+        self.assertEqual(chain.attrs['timestamp'].minute, 5)
+        self.assertEqual(server.stats['handshakes'], 2)
+        self.assertEqual(client.stats['rewarms'], 1)
+
+    def test_symbols_are_fetched_concurrently(self):
+        symbols = ['NIFTY', 'BANKNIFTY', 'FINNIFTY', 'RELIANCE']
+        server = self.serve({symbol: [nse_payload('25-Jul-2024 10:00:00')] for symbol in symbols}, latency=0.2)
+        client = self.client(server, max_workers=4)
+        client.warm_up()
+
+        started = time.perf_counter()
+        chains = client.fetch_many(symbols)
+        elapsed = time.perf_counter() - started
+
+        self.assertTrue(all(chain is not None for chain in chains.values()))
+        # One at a time this would take 0.8 seconds
+        self.assertLess(elapsed, 0.6)
+
+    def test_recorded_payloads_replay(self):
+        server = self.serve({'NIFTY': [nse_payload('25-Jul-2024 10:00:00'), nse_payload('25-Jul-2024 10:05:00')]})
+        with tempfile.TemporaryDirectory() as directory:
+            client = self.client(server, record_dir=directory)
+            client.fetch('NIFTY')
+            client.fetch('NIFTY')
+            client.fetch('NIFTY')
+
+            recordings = load_recordings(directory)
+
+        self.assertEqual(len(recordings['NIFTY']), 2)
+        self.assertEqual(json.loads(recordings['NIFTY'][1])['records']['timestamp'], '25-Jul-2024 10:05:00')
+
+
+if __name__ == '__main__':
+    unittest.main()
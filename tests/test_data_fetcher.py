@@ -1,9 +1,15 @@
 # tests/test_data_fetcher.py
 
+import glob
+import os
+import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 import pandas as pd
-from market_analysis_app.data.data_fetcher import get_data
+from market_analysis_app.data.data_fetcher import get_data, get_bulk_data, get_universe_data
+from market_analysis_app.data.cache import OHLCVCache
 
 class TestDataFetcher(unittest.TestCase):
 
@@ -44,5 +50,145 @@ class TestDataFetcher(unittest.TestCase):
         data = get_data("TEST")
         self.assertIsNone(data)
 
+def intraday_bars(days_ago, periods):
+    session = pd.Timestamp.now(tz='Asia/Kolkata').normalize() - pd.Timedelta(days=days_ago)
+    index = pd.date_range(session + pd.Timedelta(hours=9, minutes=15), periods=periods, freq='5min')
+    return pd.DataFrame({
+        'Open': range(periods), 'High': range(periods), 'Low': range(periods),
+        'Close': [float(i) for i in range(periods)], 'Volume': [1000] * periods
+    }, index=index)
+
+class TestCachedDataFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = OHLCVCache(root=self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @patch('yfinance.Ticker')
+    def test_fresh_cache_skips_network(self, mock_ticker):
+        mock_ticker.return_value.history.return_value = intraday_bars(1, 10)
+
+        first = get_data("TEST", interval='5m', cache=self.cache)
+        second = get_data("TEST", interval='5m', cache=self.cache)
+
+        self.assertEqual(mock_ticker.return_value.history.call_count, 1)
+        pd.testing.assert_frame_equal(first, second)
+
+    @patch('yfinance.Ticker')
+    def test_stale_cache_fetches_only_new_bars(self, mock_ticker):
+        history = mock_ticker.return_value.history
+        bars = intraday_bars(1, 12)
+        history.return_value = bars.iloc[:10]
+        get_data("TEST", interval='5m', cache=self.cache)
+
+        # Expire the TTL, then the provider returns the last cached bar plus two new ones
+        self.cache.write("TEST", '5m', None, now=time.time() - 3600)
+        history.return_value = bars.iloc[9:]
+        data = get_data("TEST", interval='5m', cache=self.cache)
+
+        history.assert_called_with(start=bars.index[9], interval='5m')
+        self.assertEqual(len(data), 12)
+        self.assertEqual(data['Close'].iloc[-1], 11.0)
+
+    @patch('yfinance.Ticker')
+    def test_cache_survives_restart(self, mock_ticker):
+        mock_ticker.return_value.history.return_value = intraday_bars(1, 10)
+        expected = get_data("TEST", interval='5m', cache=self.cache)
+
+        restarted = OHLCVCache(root=self.tmpdir.name)
+        data = get_data("TEST", interval='5m', cache=restarted)
+
+        self.assertEqual(mock_ticker.return_value.history.call_count, 1)
+        pd.testing.assert_frame_equal(data, expected, check_freq=False)
+
+    def test_old_partitions_are_evicted(self):
+        self.cache.write("TEST", '5m', intraday_bars(200, 5), full_fetch=True, now=time.time() - 200 * 86400)
+        recent = intraday_bars(1, 5)
+        self.cache.write("TEST", '5m', recent)
+
+        pd.testing.assert_frame_equal(self.cache.read("TEST", '5m'), recent, check_freq=False, check_index_type=False)
+
+    def test_concurrent_writes_to_one_series_are_all_kept(self):
+        bars = intraday_bars(1, 72)
+        self.cache.read("TEST", '5m')
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda chunk: self.cache.write("TEST", '5m', bars.iloc[chunk::8]), range(8)))
+
+        pd.testing.assert_frame_equal(self.cache.read("TEST", '5m'), bars, check_freq=False, check_dtype=False, check_index_type=False)
+        restarted = OHLCVCache(root=self.tmpdir.name)
+        pd.testing.assert_frame_equal(restarted.read("TEST", '5m'), bars, check_freq=False, check_dtype=False, check_index_type=False)
+        self.assertFalse([name for name in os.listdir(os.path.join(self.tmpdir.name, 'TEST', '5m')) if name.endswith('.tmp')])
+
+def multi_symbol_frame(frames):
+    return pd.concat(frames, axis=1)
+
+class TestBulkDataFetcher(unittest.TestCase):
+
+    @patch('yfinance.download')
+    def test_bulk_data_uses_one_request(self, mock_download):
+        bars = intraday_bars(1, 10)
+        mock_download.return_value = multi_symbol_frame({'AAA': bars, 'BBB': bars * 2})
+
+        data = get_bulk_data(['AAA', 'BBB'], interval='5m')
+
+        mock_download.assert_called_once()
+        self.assertEqual(mock_download.call_args.kwargs['tickers'], ['AAA', 'BBB'])
+        self.assertEqual(data['BBB']['Close'].iloc[-1], 18.0)
+
+    @patch('yfinance.Ticker')
+    @patch('yfinance.download')
+    def test_missing_symbols_fall_back_to_single_requests(self, mock_download, mock_ticker):
+        mock_download.return_value = multi_symbol_frame({'AAA': intraday_bars(1, 10)})
+        mock_ticker.return_value.history.return_value = intraday_bars(1, 3)
+
+        data = get_bulk_data(['AAA', 'BBB'], interval='5m')
+
+        mock_ticker.assert_called_once_with('BBB')
+        self.assertEqual(len(data['AAA']), 10)
+        self.assertEqual(len(data['BBB']), 3)
+
+    @patch('yfinance.download')
+    def test_universe_data_fetches_each_interval(self, mock_download):
+        mock_download.return_value = multi_symbol_frame({'AAA': intraday_bars(1, 10)})
+
+        data = get_universe_data(['AAA'], {'5m': '1d', '15m': '1d'})
+
+        self.assertEqual(mock_download.call_count, 2)
+        self.assertEqual(set(data), {'5m', '15m'})
+        self.assertEqual(len(data['15m']['AAA']), 10)
+
+    @patch('yfinance.download')
+    def test_fresh_cached_symbols_are_not_downloaded(self, mock_download):
+        with tempfile.TemporaryDirectory() as root:
+            cache = OHLCVCache(root=root)
+            cache.write('AAA', '5m', intraday_bars(1, 10), full_fetch=True)
+            mock_download.return_value = multi_symbol_frame({'BBB': intraday_bars(1, 10)})
+
+            data = get_bulk_data(['AAA', 'BBB'], interval='5m', cache=cache)
+
+            self.assertEqual(mock_download.call_args.kwargs['tickers'], ['BBB'])
+            self.assertEqual(len(data['AAA']), 10)
+
+    @patch('yfinance.download')
+    def test_unreadable_cached_series_is_fetched_in_full(self, mock_download):
+        with tempfile.TemporaryDirectory() as root:
+            cache = OHLCVCache(root=root)
+            for symbol in ('AAA', 'BBB'):
+                cache.write(symbol, '5m', intraday_bars(1, 10), full_fetch=True)
+            for path in glob.glob(os.path.join(root, 'AAA', '5m', '*.npz')):
+                with open(path, 'wb') as f:
+                    f.write(b'partial')
+            mock_download.return_value = multi_symbol_frame({'AAA': intraday_bars(1, 10)})
+
+            # A cold start reads the partitions from disk
+            data = get_bulk_data(['AAA', 'BBB'], interval='5m', cache=OHLCVCache(root=root))
+
+            self.assertEqual(mock_download.call_args.kwargs['tickers'], ['AAA'])
+            self.assertEqual(len(data['AAA']), 10)
+            self.assertEqual(len(data['BBB']), 10)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,87 @@
+# tests/test_exit_simulator.py
+
+import unittest
+import numpy as np
+from market_analysis_app.strategies.exit_simulator import simulate_exits, ExitTracker
+
+def reference_exits(signal, high, low, close, long_stop, short_stop, target_pct, trailing):
+    """Bar-by-bar loop the strategies used before the simulator was introduced."""
+    position = 0
+    entry_price = stop_loss = target_price = np.nan
+    result = {'position': [], 'entry_price': [], 'stop_loss': [], 'target_price': []}
+    for i in range(len(signal)):
+        if position == 0 and signal[i] == 1:
+            position, entry_price, stop_loss = 1, close[i], long_stop[i]
+            target_price = entry_price * (1 + target_pct)
+        elif position == 0 and signal[i] == -1:
+            position, entry_price, stop_loss = -1, close[i], short_stop[i]
+            target_price = entry_price * (1 - target_pct)
+        elif position == 1:
+            if low[i] < stop_loss or high[i] > target_price:
+                position = 0
+                entry_price = stop_loss = target_price = np.nan
+            elif trailing:
+                stop_loss = max(stop_loss, long_stop[i])
+        elif position == -1:
+            if high[i] > stop_loss or low[i] < target_price:
+                position = 0
+                entry_price = stop_loss = target_price = np.nan
+            elif trailing:
+                stop_loss = min(stop_loss, short_stop[i])
+        result['position'].append(position)
+        result['entry_price'].append(entry_price)
+        result['stop_loss'].append(stop_loss)
+        result['target_price'].append(target_price)
+    return {key: np.array(values) for key, values in result.items()}
+
+class TestExitSimulator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 2000
+        self.close = 100 + np.cumsum(rng.normal(0, 0.3, n))
+        self.high = self.close + rng.uniform(0, 0.4, n)
+        self.low = self.close - rng.uniform(0, 0.4, n)
+        self.signal = rng.choice([-1, 0, 0, 0, 1], n)
+        self.long_stop = self.low - rng.uniform(0, 1, n)
+        self.short_stop = self.high + rng.uniform(0, 1, n)
+        # PSAR is undefined on the side it is not tracking
+        self.long_stop[rng.random(n) < 0.2] = np.nan
+        self.short_stop[rng.random(n) < 0.2] = np.nan
+
+    def assert_matches_reference(self, **kwargs):
+        args = (self.signal, self.high, self.low, self.close, self.long_stop, self.short_stop)
+        expected = reference_exits(*args, **kwargs)
+        result = simulate_exits(*args, **kwargs)
+        for key in expected:
+            np.testing.assert_array_equal(result[key], expected[key], err_msg=key)
+
+    def test_trailing_stop_matches_loop(self):
+        self.assert_matches_reference(target_pct=0.01, trailing=True)
+
+    def test_fixed_stop_matches_loop(self):
+        self.long_stop = self.close * 0.995
+        self.short_stop = self.close * 1.005
+        self.assert_matches_reference(target_pct=0.01, trailing=False)
+
+    def test_tracker_matches_simulator(self):
+        expected = simulate_exits(self.signal, self.high, self.low, self.close, self.long_stop, self.short_stop)
+        tracker = ExitTracker()
+        rows = [
+            tracker.update(*bar)
+            for bar in zip(self.signal, self.high, self.low, self.close, self.long_stop, self.short_stop)
+        ]
+        for column, key in enumerate(['position', 'entry_price', 'stop_loss', 'target_price']):
+            np.testing.assert_array_equal([row[column] for row in rows], expected[key], err_msg=key)
+
+    def test_long_trade_without_exit(self):
+        close = np.array([100.0, 100.5, 100.6, 100.7])
+        result = simulate_exits(
+            np.array([1, 0, 0, 0]), close + 0.1, close - 0.1, close,
+            long_stop=np.array([99.0, 99.5, 99.2, 100.0]), short_stop=np.full(4, np.nan)
+        )
+        np.testing.assert_array_equal(result['position'], [1, 1, 1, 1])
+        np.testing.assert_array_equal(result['stop_loss'], [99.0, 99.5, 99.5, 100.0])
+
+if __name__ == '__main__':
+    unittest.main()
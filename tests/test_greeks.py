@@ -0,0 +1,156 @@
+# tests/test_greeks.py
+
+import math
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from market_analysis_app.data.option_chains import OptionChainStore
+from market_analysis_app.options.greeks import (
+    atm_iv_series, black_scholes_price, chain_greeks, greeks, implied_volatility, iv_skew, norm_cdf, years_to_expiry,
+)
+from market_analysis_app.strategies.oi_strategy import hero_zero_call
+
+NOW = pd.Timestamp('2024-07-25 10:00', tz='Asia/Kolkata')
+SPOT = 22510.0
+
+
+def priced_chain(now=NOW, spot=SPOT, expiries=('2024-07-25', '2024-08-01', '2024-08-29'), step=50, strikes=40):
+    """A chain whose premiums come from a smile: IV rises away from the money, more on the put side."""
+    frames = []
+    for expiry in expiries:
+        strike = (np.arange(-strikes, strikes + 1) + round(spot / step)) * float(step)
+        moneyness = np.log(strike / spot)
+        vol = 0.13 + 2.0 * moneyness ** 2 - 0.3 * moneyness
+        years = years_to_expiry([np.datetime64(expiry)], now)[0]
+        frames.append(pd.DataFrame({
+            'strike': strike,
+            'ce_oi': 1000.0, 'pe_oi': 1000.0, 'ce_change_oi': 0.0, 'pe_change_oi': 0.0,
+            'ce_ltp': black_scholes_price(spot, strike, years, vol, is_call=True),
+            'pe_ltp': black_scholes_price(spot, strike, years, vol, is_call=False),
+            'expiry': pd.Timestamp(expiry),
+            'vol': vol,
+        }))
+    chain = pd.concat(frames, ignore_index=True)
+    chain.attrs.update(underlying=spot, timestamp=now)
+    return chain
+
+
+class TestBlackScholes(unittest.TestCase):
+
+    def test_norm_cdf_matches_erf(self):
+        x = np.linspace(-12, 12, 2001)
+        expected = [0.5 * math.erfc(-v / math.sqrt(2)) for v in x]
+        np.testing.assert_allclose(norm_cdf(x), expected, rtol=1e-8, atol=1e-15)
+
+    def test_greeks_match_finite_differences(self):
+        strike = np.array([21500.0, 22500.0, 23500.0])
+        args = dict(strike=strike, years=20 / 365, vol=0.15)
+        for is_call in (True, False):
+            g = greeks(SPOT, is_call=is_call, **args)
+            price = lambda spot=SPOT, vol=0.15, years=20 / 365: black_scholes_price(spot, strike, years, vol, is_call=is_call)
+            np.testing.assert_allclose(g['delta'], (price(SPOT + 0.01) - price(SPOT - 0.01)) / 0.02, rtol=1e-5)
+            np.testing.assert_allclose(g['gamma'], (price(SPOT + 1) - 2 * price() + price(SPOT - 1)), rtol=1e-3)
+            np.testing.assert_allclose(g['vega'], (price(vol=0.1501) - price(vol=0.1499)) / 0.02, rtol=1e-5)
+            dt = 1e-5
+            np.testing.assert_allclose(g['theta'], (price(years=20 / 365 - dt) - price(years=20 / 365 + dt)) / (2 * dt) / 365, rtol=1e-5)
+        np.testing.assert_allclose(greeks(SPOT, is_call=True, **args)['delta'] - greeks(SPOT, is_call=False, **args)['delta'], 1.0)
+
+
+class TestImpliedVolatility(unittest.TestCase):
+
+    def test_batch_recovers_volatility(self):
+        rng = np.random.default_rng(7)
+        n = 5000
+        strike = rng.uniform(18000, 27000, n)
+        years = rng.uniform(1 / 365, 1.0, n)
+        vol = rng.uniform(0.06, 0.6, n)
+        is_call = rng.random(n) < 0.5
+        price = black_scholes_price(SPOT, strike, years, vol, is_call=is_call)
+
+        solved = implied_volatility(price, SPOT, strike, years, is_call=is_call)
+
+        # Wherever the premium is sensitive to volatility, the solver recovers it exactly
+        sensitive = greeks(SPOT, strike, years, vol, is_call=is_call)['vega'] > 0.01
+        np.testing.assert_allclose(solved[sensitive], vol[sensitive], atol=1e-6)
+        # Elsewhere whatever it finds reproduces the premium
+        found = ~np.isnan(solved)
+        np.testing.assert_allclose(black_scholes_price(SPOT, strike, years, solved, is_call=is_call)[found], price[found], atol=1e-5)
+
+    def test_arbitrage_violating_premiums_are_nan(self):
+        solved = implied_volatility([0.0, 50.0, 30000.0, 200.0], SPOT, [22500, 22000, 22500, 22500], [0.05, 0.05, 0.05, 0.0])
+
+        self.assertTrue(np.isnan(solved).all())
+
+    def test_full_chain_solves_in_milliseconds(self):
+        chain = priced_chain(expiries=pd.date_range('2024-07-25', periods=18, freq='7D').strftime('%Y-%m-%d'), strikes=50)
+        chain_greeks(chain)
+
+        started = time.perf_counter()
+        solved = chain_greeks(chain)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(solved), 18 * 101)
+        self.assertLess(elapsed, 0.1)
+
+
+class TestChainGreeks(unittest.TestCase):
+
+    def test_every_side_and_expiry_is_solved(self):
+        chain = priced_chain()
+
+        solved = chain_greeks(chain)
+
+        sensitive = solved['ce_vega'] > 0.01
+        np.testing.assert_allclose(solved.loc[sensitive, 'ce_iv'], chain.loc[sensitive, 'vol'] * 100, atol=1e-4)
+        sensitive = solved['pe_vega'] > 0.01
+        np.testing.assert_allclose(solved.loc[sensitive, 'pe_iv'], chain.loc[sensitive, 'vol'] * 100, atol=1e-4)
+        self.assertTrue((solved['ce_delta'].dropna() > 0).all() and (solved['pe_delta'].dropna() < 0).all())
+        near = (solved['strike'] - SPOT).abs() < 500
+        self.assertTrue(solved.loc[near, ['ce_iv', 'pe_iv', 'ce_theta', 'pe_theta']].notna().all().all())
+
+    def test_expiry_day_contracts_still_solve(self):
+        chain = priced_chain(now=pd.Timestamp('2024-07-25 15:20', tz='Asia/Kolkata'), expiries=('2024-07-25',))
+
+        solved = chain_greeks(chain)
+
+        atm = solved['strike'] == 22500
+        self.assertAlmostEqual(solved.loc[atm, 'ce_iv'].iloc[0], chain.loc[atm, 'vol'].iloc[0] * 100, places=3)
+
+    def test_skew_reads_the_smile(self):
+        skew = iv_skew(chain_greeks(priced_chain()))
+
+        self.assertEqual(list(skew.index), [pd.Timestamp(e) for e in ('2024-07-25', '2024-08-01', '2024-08-29')])
+        self.assertTrue((skew['atm_iv'].between(12.9, 13.2)).all())
+        # The smile is steeper on the put side, so downside wings trade richer
+        self.assertTrue((skew['skew'] > 0).all())
+
+    def test_hero_zero_call_reports_atm_premiums(self):
+        message = hero_zero_call(priced_chain(), SPOT, 'NIFTY')
+
+        self.assertIn("ATM 22500 premiums: CE", message)
+        self.assertIn("IV 13.0%", message)
+
+
+class TestAtmIvSeries(unittest.TestCase):
+
+    def test_series_follows_each_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = OptionChainStore(root=directory)
+            spots = (22510.0, 22580.0, 22440.0)
+            for minute, spot in zip((0, 5, 10), spots):
+                store.append('NIFTY', priced_chain(now=NOW + pd.Timedelta(minutes=minute), spot=spot).drop(columns='vol'))
+
+            series = atm_iv_series(store.history('NIFTY', NOW.date()))
+
+        self.assertEqual(len(series), 3)
+        self.assertEqual(series.index[-1], NOW + pd.Timedelta(minutes=10))
+        # ATM strikes sit within half a step of spot, where the smile is ~13%
+        self.assertTrue(series.between(12.9, 13.2).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# tests/test_instruments.py
+
+import datetime
+import os
+import tempfile
+import unittest
+
+from kiteconnect import KiteConnect
+
+from market_analysis_app.zerodha.instruments import InstrumentMaster
+from market_analysis_app.zerodha.mock_kite import MockKiteServer
+
+EXPIRIES = (datetime.date(2024, 1, 4), datetime.date(2024, 1, 11), datetime.date(2024, 1, 25))
+
+
+def option_rows(name, exchange='NFO', expiries=EXPIRIES, strikes=range(90, 115, 5), lot_size=50, first_token=1000):
+    """Instrument dump rows for the calls and puts of `name`, shaped like kite.instruments()."""
+    rows, token = [], first_token
+    for expiry in expiries:
+        for strike in strikes:
+            for option_type in ('CE', 'PE'):
+                rows.append({
+                    'instrument_token': token, 'exchange_token': str(token // 256),
+                    'tradingsymbol': f"{name}{expiry:%y%b}{strike}{option_type}".upper(), 'name': name,
+                    'last_price': 0.0, 'expiry': expiry, 'strike': float(strike), 'tick_size': 0.05,
+                    'lot_size': lot_size, 'instrument_type': option_type, 'segment': f'{exchange}-OPT',
+                    'exchange': exchange,
+                })
+                token += 1
+    return rows
+
+
+def index_dumps():
+    """Option dumps for every index of the app: NIFTY and BANKNIFTY on NFO, SENSEX on BFO."""
+    return {
+        'NFO': option_rows('NIFTY') + option_rows('BANKNIFTY', lot_size=15, first_token=5000)
+               + [dict(option_rows('NIFTY')[0], instrument_token=9000, tradingsymbol='NIFTY24JANFUT',
+                       instrument_type='FUT', strike=0.0, segment='NFO-FUT')],
+        'BFO': option_rows('SENSEX', exchange='BFO', lot_size=10, first_token=7000),
+    }
+
+
+def index_master(root):
+    """An InstrumentMaster loaded with index_dumps() through a MockKiteServer."""
+    with MockKiteServer(instruments=index_dumps()) as server:
+        kite = KiteConnect(api_key='test', access_token='test', root=server.url)
+        return InstrumentMaster(kite, root=root).load(EXPIRIES[0] - datetime.timedelta(days=2))
+
+
+class TestInstrumentMaster(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+
+    def test_dump_is_downloaded_once_a_day(self):
+        with MockKiteServer(instruments=index_dumps()) as server:
+            kite = KiteConnect(api_key='test', access_token='test', root=server.url)
+            day = datetime.date(2024, 1, 2)
+            first = InstrumentMaster(kite, root=self.root).load(day)
+            # A restart the same day reads the cached copies
+            second = InstrumentMaster(kite, root=self.root).load(day)
+            self.assertEqual(server.stats['instrument_dumps'], 2)
+            self.assertEqual(second.stats['cache_hits'], 2)
+            self.assertEqual(len(first), len(second))
+
+            second.ensure_loaded(day)
+            self.assertEqual(second.stats['cache_hits'], 2)
+            second.ensure_loaded(day + datetime.timedelta(days=1))
+            self.assertEqual(server.stats['instrument_dumps'], 4)
+        self.assertEqual(sorted(os.listdir(self.root)), ['BFO-2024-01-03.csv', 'NFO-2024-01-03.csv'])
+
+    def test_missing_dump_without_a_client(self):
+        with self.assertRaises(RuntimeError):
+            InstrumentMaster(root=self.root).load(datetime.date(2024, 1, 2))
+
+    def test_atm_option_of_the_nearest_expiry(self):
+        master = index_master(self.root)
+        call = master.atm_option('NIFTY', 101.0, 'CE', on=datetime.date(2024, 1, 2))
+        self.assertEqual((call.tradingsymbol, call.expiry, call.strike, call.lot_size),
+                         ('NIFTY24JAN100CE', EXPIRIES[0], 100.0, 50))
+        # On expiry day that expiry is still the nearest; the day after it has rolled
+        self.assertEqual(master.nearest_expiry('NIFTY', EXPIRIES[0]), EXPIRIES[0])
+        self.assertEqual(master.atm_option('BANKNIFTY', 103.0, 'PE', on=EXPIRIES[0] + datetime.timedelta(days=1)).expiry, EXPIRIES[1])
+        self.assertEqual(master.atm_option('NIFTY', 101.0, 'CE', on=EXPIRIES[0], offset=1).strike, 105.0)
+        self.assertEqual(master.atm_option('NIFTY', 500.0, 'CE', on=EXPIRIES[0]).strike, 110.0)
+        self.assertEqual(master.atm_option('SENSEX', 92.4, 'PE', on=EXPIRIES[0]).exchange, 'BFO')
+        self.assertIsNone(master.atm_option('NIFTY', 101.0, 'CE', on=EXPIRIES[-1] + datetime.timedelta(days=1)))
+        self.assertIsNone(master.atm_option('FINNIFTY', 101.0, 'CE'))
+
+    def test_lookup_by_contract_and_token(self):
+        master = index_master(self.root)
+        put = master.option('NIFTY', EXPIRIES[1], 95, 'PE')
+        self.assertEqual(put.tradingsymbol, 'NIFTY24JAN95PE')
+        self.assertEqual(master.instrument(put.instrument_token), put)
+        self.assertEqual(master.symbol(9000), 'NIFTY24JANFUT')
+        self.assertIsNone(master.symbol(1))
+        self.assertEqual(master.expiries('SENSEX'), list(EXPIRIES))
+
+
+if __name__ == '__main__':
+    unittest.main()
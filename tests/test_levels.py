@@ -0,0 +1,87 @@
+# tests/test_levels.py
+
+import datetime
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from market_analysis_app.strategies.levels import LevelLadder, DailyLevels, LevelStore
+from market_analysis_app.strategies.strategy4 import calculate_strategy4_levels, strategy4_signal
+
+def daily_bars(session_date, days=3):
+    index = pd.date_range(end=pd.Timestamp(session_date), periods=days, freq='D', tz='Asia/Kolkata')
+    return pd.DataFrame({
+        'Open': np.linspace(100, 110, days),
+        'High': np.linspace(105, 115, days),
+        'Low': np.linspace(95, 105, days),
+        'Close': np.linspace(102, 112, days),
+        'Volume': np.full(days, 1000)
+    }, index=index)
+
+class TestLevelLadder(unittest.TestCase):
+
+    def setUp(self):
+        self.bar = {'High': 22150.0, 'Low': 21980.0, 'Close': 22100.0}
+        self.daily = DailyLevels.from_bar(self.bar, datetime.date(2024, 1, 1))
+
+    def test_pivot_levels(self):
+        pivots = calculate_strategy4_levels(self.bar)['pivot_points']
+        self.assertAlmostEqual(pivots['PIVOT'], (22150 + 21980 + 22100) / 3)
+        self.assertAlmostEqual(pivots['R1'], 2 * pivots['PIVOT'] - 21980)
+        self.assertAlmostEqual(pivots['S2'], pivots['PIVOT'] - 170)
+
+    def test_ladder_signal_matches_dict_signal(self):
+        levels = self.daily.strategy4
+        prices = np.linspace(21600, 22500, 5001)
+        for price in prices:
+            self.assertEqual(strategy4_signal(price, self.daily.ladder), strategy4_signal(price, levels), msg=price)
+
+    def test_nearest_below_above(self):
+        ladder = LevelLadder([(10.0, 'a', 'x'), (20.0, 'b', 'x'), (30.0, 'c', 'x')])
+        self.assertEqual(ladder.nearest(16)[1], 'b')
+        self.assertEqual(ladder.below(20)[1], 'a')
+        self.assertEqual(ladder.above(20)[1], 'c')
+        self.assertIsNone(ladder.below(10))
+        self.assertIsNone(ladder.above(30))
+        self.assertIsNone(LevelLadder([]).nearest(1))
+
+class TestLevelStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.session = datetime.date(2024, 1, 3)
+
+    @patch('market_analysis_app.strategies.levels.get_bulk_data')
+    def test_precompute_uses_previous_session(self, mock_bulk):
+        mock_bulk.return_value = {'^NSEI': daily_bars(self.session), '^NSEBANK': None}
+        levels = LevelStore(self.tmp.name).precompute(['^NSEI', '^NSEBANK'], self.session)
+        self.assertIsNone(levels['^NSEBANK'])
+        # The session's own (partial) bar is excluded
+        self.assertEqual(levels['^NSEI'].previous_day['date'], '2024-01-02')
+        self.assertEqual(levels['^NSEI'].previous_day['High'], 110.0)
+
+    @patch('market_analysis_app.strategies.levels.get_bulk_data')
+    def test_get_reloads_from_disk(self, mock_bulk):
+        mock_bulk.return_value = {'^NSEI': daily_bars(self.session)}
+        first = LevelStore(self.tmp.name).get(['^NSEI'], self.session)
+        second = LevelStore(self.tmp.name).get(['^NSEI'], self.session)
+        self.assertEqual(mock_bulk.call_count, 1)
+        self.assertEqual(second['^NSEI'].strategy4, first['^NSEI'].strategy4)
+        self.assertEqual(second['^NSEI'].ladder.levels, first['^NSEI'].ladder.levels)
+
+    @patch('market_analysis_app.strategies.levels.get_bulk_data')
+    def test_symbol_sets_are_merged_not_replaced(self, mock_bulk):
+        mock_bulk.side_effect = lambda symbols, **kwargs: {symbol: daily_bars(self.session) for symbol in symbols}
+        store = LevelStore(self.tmp.name)
+        for _ in range(3):
+            # The 5-minute job and the scanner alternate with different sets
+            store.get(['^NSEI', '^NSEBANK'], self.session)
+            store.get(['RELIANCE.NS', '^NSEI'], self.session)
+        self.assertEqual([call.args[0] for call in mock_bulk.call_args_list], [['^NSEI', '^NSEBANK'], ['RELIANCE.NS']])
+        restarted = LevelStore(self.tmp.name).load(self.session)
+        self.assertEqual(sorted(restarted), ['RELIANCE.NS', '^NSEBANK', '^NSEI'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+# tests/test_main.py
+
+import asyncio
+import collections
+import datetime
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+import pandas as pd
+from kiteconnect import KiteConnect
+from market_analysis_app import main
+from market_analysis_app.data.bar_store import BarStore
+from market_analysis_app.data.option_chains import OptionChainStore
+from market_analysis_app.data.resampler import Resampler
+from market_analysis_app.scheduler import CRITICAL, LOW
+from market_analysis_app.strategies.levels import LevelStore
+from market_analysis_app.zerodha.mock_kite import MockKiteServer
+from market_analysis_app.zerodha.order_book import OrderBook
+from market_analysis_app.options.chain_client import parse_option_chain
+from market_analysis_app.zerodha.order_gateway import OrderGateway
+from tests.test_backtest import session_bars
+from tests.test_instruments import index_master
+from tests.test_option_chains import nse_payload
+
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+def slow(delay, value):
+    def call(*args, **kwargs):
+        time.sleep(delay)
+        return value
+    return call
+
+def price_frame():
+    index = pd.DatetimeIndex([pd.Timestamp('2024-01-02 09:55', tz='Asia/Kolkata')])
+    return pd.DataFrame({'Open': [100.0], 'High': [101.0], 'Low': [99.0], 'Close': [100.5]}, index=index)
+
+class TestAnalysisJobs(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        frames = {symbol: price_frame() for symbol in main.SYMBOLS['INDICES'].values()}
+        self.market_data = {'5m': frames, '15m': frames}
+        self.signals = pd.DataFrame({'signal': [1], 'entry_price': [100.5]})
+        self.analysis_data = {'signals': collections.deque(maxlen=main.MAX_SIGNALS), 'oi_analysis': {}}
+        self.now = datetime.datetime(2024, 1, 2, 10, 0, tzinfo=IST)
+        for target, value in [('update_dashboard', lambda data: None), ('zerodha_client', None), ('notifier', None),
+                              ('bar_store', BarStore()), ('order_book', OrderBook(main.order_book.strategy_tags, main.underlying_of)),
+                              ('instrument_master', index_master(directory.name)), ('_base_loads', {}),
+                              ('resampler', Resampler(main.BASE_INTERVAL, ('15m', '1h', '1d')))]:
+            patcher = patch.object(main, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def timed(self, job):
+        started = time.perf_counter()
+        asyncio.run(job(self.now, self.analysis_data))
+        return time.perf_counter() - started
+
+    def test_indices_run_concurrently(self):
+        with patch.object(main, 'get_universe_data', slow(0.3, self.market_data)), \
+             patch.object(main.level_store, 'get', slow(0.3, {})), \
+             patch.object(main.strategy1, 'strategy1', slow(0.3, self.signals)):
+            elapsed = self.timed(main.run_5m_signals)
+        # Sequentially this would be 0.3 + 0.3 + 3 * 0.3 seconds
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(len(self.analysis_data['signals']), len(main.SYMBOLS['INDICES']))
+
+    def test_orders_for_indices_go_out_together(self):
+        server = MockKiteServer(latency=0.3).start()
+        self.addCleanup(server.stop)
+        gateway = OrderGateway(KiteConnect(api_key='test', access_token='test', root=server.url), rate=100)
+        self.addCleanup(gateway.close)
+        with patch.object(main, 'order_gateway', gateway), \
+             patch.object(main, 'get_universe_data', lambda *args, **kwargs: self.market_data), \
+             patch.object(main.level_store, 'get', lambda *args, **kwargs: {}), \
+             patch.object(main.strategy1, 'strategy1', lambda data: self.signals):
+            elapsed = self.timed(main.run_5m_signals)
+        # Each index trades its own ATM call of the nearest expiry, one lot
+        orders = {order['tradingsymbol']: order for order in server.orders.values()}
+        self.assertEqual(set(orders), {'NIFTY24JAN100CE', 'BANKNIFTY24JAN100CE', 'SENSEX24JAN100CE'})
+        self.assertEqual((orders['SENSEX24JAN100CE']['exchange'], orders['SENSEX24JAN100CE']['quantity']), ('BFO', 10))
+        # One after another the acks alone would take 0.3 seconds each
+        self.assertLess(elapsed, 0.3 * len(main.SYMBOLS['INDICES']))
+        self.assertEqual(gateway.metrics()['signal_to_ack']['count'], len(main.SYMBOLS['INDICES']))
+
+    def test_chain_analytics_run_off_the_event_loop(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        chain = parse_option_chain(nse_payload('02-Jan-2024 10:00:00'))
+        threads = []
+
+        def analytics(value):
+            def call(*args, **kwargs):
+                threads.append(threading.current_thread())
+                time.sleep(0.2)
+                return value
+            return call
+
+        with patch.object(main.oi_strategy, 'get_oi_data', lambda name: chain), \
+             patch.object(main, 'option_chains', OptionChainStore(root=directory.name)), \
+             patch.object(main, 'analyze_chain', analytics(pd.DataFrame({'max_pain': [22500.0], 'support': [22400.0], 'resistance': [22600.0]}))), \
+             patch.object(main, 'chain_greeks', analytics(chain)), \
+             patch.object(main, 'iv_skew', lambda greeks: pd.DataFrame({'atm_iv': [12.5], 'skew': [0.5]})):
+            elapsed = self.timed(main.run_oi_analysis)
+        self.assertEqual(len(threads), 2 * len(main.OI_INDICES))
+        self.assertNotIn(threading.main_thread(), threads)
+        # The indices' analytics overlap instead of running one after another on the loop
+        self.assertLess(elapsed, 0.2 * len(threads))
+        self.assertEqual(self.analysis_data['oi_analysis']['NIFTY']['max_pain'], 22500.0)
+        self.assertEqual(self.analysis_data['oi_analysis']['BANKNIFTY']['iv_skew'], 0.5)
+
+    def test_persisting_signal_does_not_place_again(self):
+        server = MockKiteServer().start()
+        self.addCleanup(server.stop)
+        gateway = OrderGateway(KiteConnect(api_key='test', access_token='test', root=server.url), rate=100)
+        self.addCleanup(gateway.close)
+        with patch.object(main, 'order_gateway', gateway), \
+             patch.object(main, 'get_universe_data', lambda *args, **kwargs: self.market_data), \
+             patch.object(main.strategy3, 'strategy3', lambda data: self.signals):
+            self.timed(main.run_15m_signals)
+            # Spot moves a strike, so the next candle's ATM call is another contract
+            self.market_data = {interval: {symbol: frame.set_axis(frame.index + pd.Timedelta(minutes=15)).assign(Close=105.5)
+                                           for symbol, frame in frames.items()}
+                                for interval, frames in self.market_data.items()}
+            self.now += datetime.timedelta(minutes=15)
+            self.timed(main.run_15m_signals)
+        # The second candle's signal finds the first one's order in the index still open
+        self.assertEqual(len(self.analysis_data['signals']), 2 * len(main.SYMBOLS['INDICES']))
+        self.assertEqual(len(server.orders), len(main.SYMBOLS['INDICES']))
+        self.assertEqual(gateway.stats['placed'], len(main.SYMBOLS['INDICES']))
+        self.assertTrue(main.order_book.has_open('NIFTY24JAN100CE', 'strategy3'))
+        self.assertTrue(main.order_book.has_open_underlying('NIFTY', 'strategy3'))
+        self.assertFalse(main.order_book.has_open_underlying('NIFTY', 'strategy1'))
+        self.assertTrue(all(order['tag'].startswith('MAS3') for order in server.orders.values()))
+
+    def test_rerun_candle_after_restart_does_not_place_again(self):
+        server = MockKiteServer().start()
+        self.addCleanup(server.stop)
+        kite = KiteConnect(api_key='test', access_token='test', root=server.url)
+
+        def run_candle():
+            # A fresh gateway and a book seeded from Kite, as after a restart
+            gateway = OrderGateway(kite, rate=100)
+            self.addCleanup(gateway.close)
+            main.order_book.sync(kite)
+            with patch.object(main, 'order_gateway', gateway), \
+                 patch.object(main, 'get_universe_data', lambda *args, **kwargs: self.market_data), \
+                 patch.object(main.strategy3, 'strategy3', lambda data: self.signals):
+                self.timed(main.run_15m_signals)
+
+        run_candle()
+        # Cancelled orders leave no open position, so only the tag stops a second order
+        for order in server.orders.values():
+            order.update(status='CANCELLED', pending_quantity=0)
+        run_candle()
+        self.assertEqual(len(server.orders), len(main.SYMBOLS['INDICES']))
+
+        self.market_data = {interval: {symbol: frame.set_axis(frame.index + pd.Timedelta(minutes=15))
+                                       for symbol, frame in frames.items()}
+                            for interval, frames in self.market_data.items()}
+        self.now += datetime.timedelta(minutes=15)
+        run_candle()
+        self.assertEqual(len(server.orders), 2 * len(main.SYMBOLS['INDICES']))
+
+    def test_slow_option_chain_is_abandoned(self):
+        with patch.object(main, 'FETCH_TIMEOUT', 0.5), \
+             patch.object(main.oi_strategy, 'get_oi_data', slow(3, None)):
+            elapsed = self.timed(main.run_oi_analysis)
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(self.analysis_data['oi_analysis'], {})
+
+    def test_live_feed_skips_download(self):
+        index = pd.Timestamp('2024-01-02 09:55', tz='Asia/Kolkata').value
+        for symbol in main.SYMBOLS['INDICES'].values():
+            for minute, price in [(0, 100.0), (1, 101.0), (5, 102.0)]:
+                main.bar_store.add_tick(symbol, index + minute * 60 * 10**9, price)
+        with patch.object(main, 'get_universe_data') as download:
+            market_data = asyncio.run(main.load_bars(list(main.SYMBOLS['INDICES'].values()), '5m'))
+        download.assert_not_called()
+        self.assertEqual(market_data['5m']['^NSEI']['Close'].tolist(), [101.0])
+
+    def test_timeframes_share_one_download(self):
+        symbols = list(main.SYMBOLS['INDICES'].values())
+        bars = session_bars(1)
+        now = datetime.datetime(2024, 1, 1, 10, 0, 2, tzinfo=IST)
+        download = Mock(return_value={'5m': {symbol: bars for symbol in symbols}})
+
+        async def close():
+            return await asyncio.gather(main.load_bars(symbols, '5m', now), main.load_bars(symbols, '15m', now))
+
+        with patch.object(main, 'get_universe_data', download), \
+             patch.object(main, 'resampler', Resampler('5m', ('15m', '1h', '1d'))), \
+             patch.object(main, '_base_loads', {}):
+            data_5m, data_15m = asyncio.run(close())
+        download.assert_called_once()
+        self.assertEqual(data_5m['5m']['^NSEI'].index[-1].strftime('%H:%M'), '09:55')
+        self.assertEqual(data_15m['15m']['^NSEI'].index[-1].strftime('%H:%M'), '09:45')
+
+    def test_pre_open_levels_cover_indices_and_scanner(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        fetched = []
+
+        def bulk(symbols, **kwargs):
+            fetched.append(list(symbols))
+            return {}
+
+        with patch.object(main, 'level_store', LevelStore(directory.name)), \
+             patch('market_analysis_app.strategies.levels.get_bulk_data', bulk):
+            asyncio.run(main.precompute_levels(self.now))
+            main.level_store.get(list(main.SYMBOLS['INDICES'].values()), self.now.date())
+            main.level_store.get(main.SYMBOLS['NIFTY50'], self.now.date())
+        self.assertEqual(fetched, [list(main.SYMBOLS['INDICES'].values()) + main.SYMBOLS['NIFTY50']])
+
+    def test_scheduler_priorities(self):
+        jobs = {job.name: job for job in main.build_scheduler(self.analysis_data).jobs}
+        self.assertEqual(jobs['signals_5m'].priority, CRITICAL)
+        self.assertEqual(jobs['square_off_1510'].priority, CRITICAL)
+        self.assertEqual(jobs['dashboard'].priority, LOW)
+
+if __name__ == '__main__':
+    unittest.main()
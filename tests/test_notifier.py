@@ -0,0 +1,145 @@
+# tests/test_notifier.py
+
+import asyncio
+import time
+import unittest
+
+from market_analysis_app.notifiers.fake_bot_api import FakeBotAPI
+from market_analysis_app.notifiers.outbox import NotificationQueue
+from market_analysis_app.notifiers.telegram_notifier import TelegramNotifier
+
+
+class TestTelegramQueue(unittest.TestCase):
+
+    def serve(self, **kwargs):
+        api = FakeBotAPI(**kwargs).start()
+        self.addCleanup(api.stop)
+        return api
+
+    def run_notifier(self, api, scenario, **options):
+        async def run():
+            notifier = TelegramNotifier(api.token, 42, base_url=api.base_url, **options)
+            try:
+                await scenario(notifier)
+            finally:
+                await notifier.close()
+            return notifier
+        return asyncio.run(run())
+
+    def test_burst_leaves_as_one_message(self):
+        api = self.serve()
+
+        async def burst(notifier):
+            for index in ('NIFTY', 'BANKNIFTY', 'FINNIFTY'):
+                notifier.notify(f"{index} (5m) - Strategy 1 Signal: BUY")
+            await asyncio.sleep(0.3)
+
+        notifier = self.run_notifier(api, burst, batch_window=0.1)
+
+        self.assertEqual(len(api.texts(42)), 1)
+        self.assertEqual(api.texts(42)[0].split('\n\n')[2], "FINNIFTY (5m) - Strategy 1 Signal: BUY")
+        metrics = notifier.metrics()
+        self.assertEqual((metrics['sent'], metrics['delivered'], metrics['pending']), (1, 3, 0))
+        self.assertGreaterEqual(metrics['latency_p50'], 0.1)
+
+    def test_unchanged_topic_is_not_resent(self):
+        api = self.serve()
+
+        async def polls(notifier):
+            notifier.notify("NIFTY OI Analysis: PCR=0.90, Trend=Bullish", topic='oi:NIFTY')
+            notifier.notify("NIFTY OI Analysis: PCR=0.95, Trend=Bullish", topic='oi:NIFTY')
+            await asyncio.sleep(0.2)
+            notifier.notify("NIFTY OI Analysis: PCR=0.95, Trend=Bullish", topic='oi:NIFTY')
+            notifier.notify("Market Analysis App started.")
+            notifier.notify("Market Analysis App started.")
+            await asyncio.sleep(0.2)
+
+        notifier = self.run_notifier(api, polls, batch_window=0.05)
+
+        self.assertEqual(api.texts(42), ["NIFTY OI Analysis: PCR=0.95, Trend=Bullish", "Market Analysis App started. (x2)"])
+        self.assertEqual(notifier.metrics()['deduplicated'], 1)
+        self.assertEqual(notifier.metrics()['coalesced'], 2)
+
+    def test_notify_does_not_wait_for_delivery(self):
+        api = self.serve(latency=0.3)
+
+        async def signals(notifier):
+            started = time.perf_counter()
+            for i in range(200):
+                notifier.notify(f"signal {i}")
+            self.elapsed = time.perf_counter() - started
+
+        notifier = self.run_notifier(api, signals, batch_window=0)
+
+        self.assertLess(self.elapsed, 0.05)
+        # Everything still went out, in as few messages as the length limit allows
+        self.assertEqual(notifier.metrics()['delivered'], 200)
+        self.assertEqual('\n\n'.join(api.texts(42)).count('signal '), 200)
+
+    def test_chat_rate_limit_is_respected(self):
+        api = self.serve(chat_limit=10)
+
+        async def long_burst(notifier):
+            for i in range(8):
+                notifier.notify(f"{i}" * 60)
+            await asyncio.sleep(0)
+
+        notifier = self.run_notifier(api, long_burst, batch_window=0, max_length=100, rate=5, burst=1)
+
+        self.assertEqual(len(api.texts(42)), 8)
+        self.assertEqual(api.stats['throttled'], 0)
+        received = [message['received'] for message in api.messages]
+        self.assertGreater(received[-1] - received[0], 7 * 0.2 * 0.9)
+        self.assertEqual(notifier.metrics()['sent'], 8)
+
+    def test_flood_control_is_retried_after_its_wait(self):
+        api = self.serve(throttle_every=1, retry_after=1)
+
+        async def send(notifier):
+            notifier.notify("Please close all open positions.")
+            await asyncio.sleep(0.2)
+            api.throttle_every = None
+
+        notifier = self.run_notifier(api, send, batch_window=0)
+
+        self.assertEqual(api.texts(42), ["Please close all open positions."])
+        metrics = notifier.metrics()
+        self.assertEqual(metrics['throttled'], 1)
+        self.assertGreaterEqual(metrics['latency_max'], 1.0)
+
+
+class TestNotificationQueue(unittest.TestCase):
+
+    def test_oldest_messages_are_dropped_when_full(self):
+        sent = []
+
+        async def send(text):
+            sent.append(text)
+
+        queue = NotificationQueue(send, batch_window=0, max_pending=3)
+        for i in range(5):
+            queue.notify(f"message {i}")
+        asyncio.run(queue.close())
+
+        self.assertEqual(sent, ["message 2\n\nmessage 3\n\nmessage 4"])
+        self.assertEqual(queue.metrics()['dropped'], 2)
+
+    def test_failed_delivery_is_counted(self):
+        async def send(text):
+            raise ConnectionError("network down")
+
+        queue = NotificationQueue(send, batch_window=0, retries=2, backoff=0.01)
+
+        async def run():
+            queue.notify("a")
+            queue.notify("b")
+            await queue.close()
+        asyncio.run(run())
+
+        self.assertEqual(queue.stats['errors'], 2)
+        self.assertEqual(queue.stats['failed'], 2)
+        self.assertNotIn('latency_p50', queue.metrics())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# tests/test_oi_analytics.py
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from market_analysis_app.options.chain_client import parse_option_chain
+from market_analysis_app.options.oi_analytics import analyze_arrays, analyze_chain, window_width
+from market_analysis_app.strategies.oi_strategy import calculate_pcr, hero_zero_call
+from tests.test_option_chains import nse_payload
+
+
+def random_chain(seed, step=50, spot=22510.0, expiries=('2024-07-25', '2024-08-01', '2024-08-29')):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for expiry in expiries:
+        strikes = (np.arange(-40, 41) + round(spot / step)) * float(step)
+        frames.append(pd.DataFrame({
+            'strike': strikes,
+            'ce_oi': rng.integers(0, 200000, len(strikes)).astype(float),
+            'pe_oi': rng.integers(0, 200000, len(strikes)).astype(float),
+            'ce_change_oi': rng.integers(-30000, 30000, len(strikes)).astype(float),
+            'pe_change_oi': rng.integers(-30000, 30000, len(strikes)).astype(float),
+            'expiry': pd.Timestamp(expiry),
+        }))
+    # NSE lists strikes first, so expiries arrive interleaved
+    chain = pd.concat(frames).sample(frac=1, random_state=seed).reset_index(drop=True)
+    chain.attrs['underlying'] = spot
+    return chain
+
+
+def brute_force_max_pain(chain):
+    def payout(settle):
+        calls = (np.maximum(settle - chain['strike'], 0) * chain['ce_oi']).sum()
+        puts = (np.maximum(chain['strike'] - settle, 0) * chain['pe_oi']).sum()
+        return calls + puts
+    strikes = np.sort(chain['strike'].unique())
+    return strikes[np.argmin([payout(strike) for strike in strikes])]
+
+
+class TestAnalyzeChain(unittest.TestCase):
+
+    def test_every_expiry_matches_a_per_expiry_scan(self):
+        chain = random_chain(1)
+        analysis = analyze_chain(chain, symbol='NIFTY')
+
+        self.assertEqual(len(analysis), 3)
+        self.assertTrue(analysis.index.is_monotonic_increasing)
+        for expiry, row in analysis.iterrows():
+            part = chain[chain['expiry'] == expiry]
+            window = part[(part['strike'] - row['atm']).abs() <= 500]
+            self.assertEqual(row['max_pain'], brute_force_max_pain(part))
+            self.assertAlmostEqual(row['pcr'], calculate_pcr(part))
+            self.assertEqual(row['atm'], 22500)
+            self.assertEqual(row['resistance'], window.loc[window['ce_oi'].idxmax(), 'strike'])
+            self.assertEqual(row['support_oi'], window['pe_oi'].max())
+            self.assertEqual(row['ce_hotspots'], sorted(window.loc[window['ce_change_oi'].abs() > 10000, 'strike'].tolist()))
+        self.assertAlmostEqual(analysis.attrs['pcr'], calculate_pcr(chain))
+
+    def test_strike_step_sets_the_window(self):
+        chain = random_chain(2, step=100, spot=48260.0)
+        self.assertEqual(window_width('NIFTY'), 500)
+        self.assertEqual(window_width('BANKNIFTY'), 1000)
+
+        analysis = analyze_chain(chain, symbol='BANKNIFTY')
+
+        row = analysis.iloc[0]
+        self.assertEqual(row['atm'], 48300)
+        part = chain[chain['expiry'] == analysis.index[0]]
+        window = part[(part['strike'] - 48300).abs() <= 1000]
+        self.assertEqual(len(window), 21)
+        self.assertEqual(row['resistance_oi'], window['ce_oi'].max())
+
+    def test_atm_of_a_spot_beyond_the_listed_strikes(self):
+        strike = [100, 200, 300, 150, 250]
+        expiry = np.array(['2024-07-25'] * 3 + ['2024-08-01'] * 2, dtype='datetime64[D]')
+        zeros = np.zeros(5)
+
+        self.assertEqual(analyze_arrays(strike, expiry, zeros, zeros, zeros, zeros, 1000, 50)['atm'].tolist(), [300, 250])
+        self.assertEqual(analyze_arrays(strike, expiry, zeros, zeros, zeros, zeros, 0, 50)['atm'].tolist(), [100, 150])
+        self.assertEqual(analyze_arrays(strike, expiry, zeros, zeros, zeros, zeros, 240, 50)['atm'].tolist(), [200, 250])
+
+    def test_spot_defaults_to_the_published_underlying(self):
+        chain = parse_option_chain(nse_payload('25-Jul-2024 10:00:00'))
+
+        analysis = analyze_chain(chain)
+
+        self.assertEqual(analysis['atm'].tolist(), [22500, 22500])
+        self.assertEqual(analysis.index[0], pd.Timestamp('2024-07-25'))
+        with self.assertRaises(ValueError):
+            analyze_chain(pd.DataFrame(chain.to_dict('list')))
+
+    def test_hero_zero_call_uses_the_nearest_expiry(self):
+        chain = random_chain(3)
+
+        message = hero_zero_call(chain, 22480.0, 'NIFTY')
+
+        nearest = analyze_chain(chain, 22480.0).iloc[0]
+        self.assertIn(f"Max CE OI (Resistance): Strike {nearest['resistance']:g}", message)
+        self.assertIn(f"Max Pain: Strike {nearest['max_pain']:g}", message)
+        self.assertEqual(hero_zero_call(None, 22480.0), "No OI data for Hero-Zero call.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# tests/test_optimizer.py
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from market_analysis_app.backtest import optimizer
+from market_analysis_app.backtest.engine import run_backtest
+from market_analysis_app.backtest.indicator_cache import IndicatorCache
+from market_analysis_app.indicators import panel
+from tests.test_backtest import session_bars
+
+class TestSearchSpaces(unittest.TestCase):
+
+    def test_grid(self):
+        combos = optimizer.grid({'ema_length': [5, 9], 'sma_length': [21, 30, 50]})
+        self.assertEqual(len(combos), 6)
+        self.assertEqual(combos[0], {'ema_length': 5, 'sma_length': 21})
+        self.assertEqual(combos[-1], {'ema_length': 9, 'sma_length': 50})
+
+    def test_random_sample_is_distinct_and_reproducible(self):
+        space = {'a': list(range(100)), 'b': list(range(100)), 'c': list(range(100))}
+        combos = optimizer.random_sample(space, 50, seed=4)
+        self.assertEqual(len({optimizer.params_key(combo) for combo in combos}), 50)
+        self.assertEqual(combos, optimizer.random_sample(space, 50, seed=4))
+        self.assertEqual(len(optimizer.random_sample({'a': [1, 2]}, 10)), 2)
+
+    def test_indicator_cache_evicts_least_recently_used(self):
+        calls = []
+        cache = IndicatorCache({'double': lambda data, n: calls.append(n) or data * n}, maxsize=2)
+        indicator = cache.bind('AAA', '5m', 3)
+        self.assertEqual([indicator('double', 1), indicator('double', 2), indicator('double', 1)], [3, 6, 3])
+        indicator('double', 3)
+        indicator('double', 1)
+        indicator('double', 2)
+        self.assertEqual(calls, [1, 2, 3, 2])
+        self.assertEqual(cache.stats, {'hits': 2, 'misses': 4})
+
+class TestOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = {'AAA': session_bars(12, seed=1), 'BBB': session_bars(12, seed=2)}
+        self.space = {'ema_length': [5, 9], 'sma_length': [21, 30], 'target_pct': [0.005, 0.01]}
+
+    def test_default_combination_matches_backtest(self):
+        results = optimizer.optimize('strategy2', {'multiplier': [0.8, 1.1]}, list(self.frames), frames=self.frames, workers=1)
+        self.assertEqual(len(results), 2)
+        default = results[results['multiplier'] == 1.1].iloc[0]
+        backtest = run_backtest(list(self.frames), ['strategy2'], frames=self.frames, workers=1)
+        self.assertEqual(default['trades'], len(backtest.trades))
+        self.assertAlmostEqual(default['total_return'], backtest.equity['strategy2'].iloc[-1] - 1)
+        self.assertTrue(results['total_return'].is_monotonic_decreasing)
+
+    def test_indicators_are_computed_once_per_series(self):
+        with mock.patch.object(panel, 'sma', wraps=panel.sma) as sma:
+            results = optimizer.optimize('strategy1', self.space, list(self.frames), frames=self.frames, workers=1, batch_size=3)
+        self.assertEqual(len(results), 8)
+        # One SMA per symbol and length, shared by the 4 combinations using it
+        self.assertEqual(sma.call_count, 4)
+
+    def test_process_pool_matches_inline(self):
+        inline = optimizer.optimize('strategy1', self.space, list(self.frames), frames=self.frames, workers=1)
+        pooled = optimizer.optimize('strategy1', self.space, list(self.frames), frames=self.frames, workers=2, batch_size=3)
+        self.assertEqual(list(inline['total_return']), list(pooled['total_return']))
+
+    def test_resumes_from_progress_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'sweep.jsonl')
+            partial = dict(self.space, ema_length=[9])
+            optimizer.optimize('strategy1', partial, list(self.frames), frames=self.frames, workers=1, progress_path=path)
+            with mock.patch.object(optimizer, 'evaluate', wraps=optimizer.evaluate) as evaluate:
+                resumed = optimizer.optimize('strategy1', self.space, list(self.frames), frames=self.frames, workers=1, progress_path=path, batch_size=100)
+            # Only the ema_length=5 half was left to run, one batch per symbol
+            self.assertEqual(evaluate.call_count, 2)
+            self.assertTrue(all(len(call.args[0]['combos']) == 4 for call in evaluate.call_args_list))
+            with open(path) as f:
+                self.assertEqual(len(f.readlines()), 1 + 2 * 8)
+            fresh = optimizer.optimize('strategy1', self.space, list(self.frames), frames=self.frames, workers=1)
+            self.assertEqual(list(resumed['total_return']), list(fresh['total_return']))
+
+            with self.assertRaises(ValueError):
+                optimizer.optimize('strategy1', self.space, list(self.frames), frames=self.frames, workers=1, progress_path=path, commission=0)
+
+    def test_unknown_parameter(self):
+        with self.assertRaises(ValueError):
+            optimizer.optimize('strategy4', {'multiplier': [1.0]}, list(self.frames), frames=self.frames, workers=1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+# tests/test_option_chains.py
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from market_analysis_app.data.option_chains import FIELDS, OptionChainStore
+from market_analysis_app.options.chain_client import parse_option_chain
+from market_analysis_app.strategies.oi_strategy import calculate_pcr
+
+
+def nse_payload(timestamp, strikes=(22400, 22500, 22600), expiries=('25-Jul-2024', '01-Aug-2024'), bump=0, pe_only=()):
+    data = []
+    for expiry in expiries:
+        for i, strike in enumerate(strikes):
+            item = {'strikePrice': strike, 'expiryDate': expiry}
+            side = {'openInterest': 1000 + 10 * i, 'changeinOpenInterest': 5 * i, 'lastPrice': 100.0 - i,
+                    'impliedVolatility': 12.5, 'totalTradedVolume': 300}
+            if strike not in pe_only:
+                item['CE'] = dict(side)
+            item['PE'] = dict(side, openInterest=2000 + 10 * i + (bump if strike == 22500 else 0))
+            data.append(item)
+    return {'records': {'timestamp': timestamp, 'underlyingValue': 22510.5, 'data': data}}
+
+
+class TestParseOptionChain(unittest.TestCase):
+
+    def test_columns_and_attrs(self):
+        chain = parse_option_chain(nse_payload('25-Jul-2024 10:00:00', pe_only=(22600,)))
+
+        self.assertEqual(list(chain.columns[:5]), ['strike', 'ce_oi', 'pe_oi', 'ce_change_oi', 'pe_change_oi'])
+        self.assertEqual(len(chain), 6)
+        self.assertEqual(chain['ce_oi'].iloc[2], 0)
+        self.assertEqual(chain['expiry'].iloc[0], pd.Timestamp('2024-07-25'))
+        self.assertEqual(chain.attrs['timestamp'], pd.Timestamp('2024-07-25 10:00', tz='Asia/Kolkata'))
+        self.assertEqual(chain.attrs['underlying'], 22510.5)
+
+
+class TestOptionChainStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = OptionChainStore(root=self.tmpdir.name)
+        self.day = pd.Timestamp('2024-07-25').date()
+        self.chains = [
+            parse_option_chain(nse_payload(f'25-Jul-2024 10:{minute:02d}:00', bump=100 * k))
+            for k, minute in enumerate((0, 5, 10, 15))
+        ]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_only_changed_contracts_are_written(self):
+        written = [self.store.append('NIFTY', chain) for chain in self.chains]
+
+        # The first snapshot is complete; later ones only carry the 22500 puts of both expiries
+        self.assertEqual(written, [6, 2, 2, 2])
+        self.assertEqual(self.store.append('NIFTY', self.chains[-1], timestamp='2024-07-25 10:20'), 0)
+        self.assertEqual(len(self.store.history('NIFTY', self.day)), 5)
+
+    def test_snapshots_decode_to_the_polled_chains(self):
+        for chain in self.chains:
+            self.store.append('NIFTY', chain)
+
+        history = OptionChainStore(root=self.tmpdir.name).history('NIFTY', self.day)
+        for i, chain in enumerate(self.chains):
+            decoded = history.chain(i)
+            pd.testing.assert_frame_equal(decoded[['strike'] + list(FIELDS)], chain[['strike'] + list(FIELDS)].astype(float))
+            self.assertEqual(decoded.attrs['underlying'], 22510.5)
+
+    def test_stale_snapshot_is_skipped(self):
+        self.store.append('NIFTY', self.chains[1])
+
+        self.assertEqual(self.store.append('NIFTY', self.chains[0]), 0)
+        self.assertEqual(len(self.store.history('NIFTY', self.day)), 1)
+
+    def test_oi_buildup_at_strike(self):
+        for chain in self.chains:
+            self.store.append('NIFTY', chain)
+
+        buildup = self.store.oi_buildup('NIFTY', 22500, last=3, date=self.day)
+
+        self.assertEqual(buildup['pe_oi'].tolist(), [2110.0, 2210.0, 2310.0])
+        self.assertEqual(buildup['ce_oi'].tolist(), [1010.0] * 3)
+        self.assertEqual(buildup.index[-1], pd.Timestamp('2024-07-25 10:15', tz='Asia/Kolkata'))
+        later = self.store.oi_buildup('NIFTY', 22500, expiry='2024-08-01', date=self.day)
+        self.assertEqual(len(later), 4)
+        self.assertIsNone(self.store.oi_buildup('NIFTY', 99999, date=self.day))
+
+    def test_pcr_series_matches_each_poll(self):
+        for chain in self.chains:
+            self.store.append('NIFTY', chain)
+
+        pcr = self.store.pcr_series('NIFTY', date=self.day)
+
+        np.testing.assert_allclose(pcr.to_numpy(), [calculate_pcr(chain) for chain in self.chains])
+        self.assertTrue(self.store.pcr_series('BANKNIFTY', date=self.day).empty)
+
+    def test_new_strikes_join_mid_session(self):
+        self.store.append('NIFTY', self.chains[0])
+        wider = parse_option_chain(nse_payload('25-Jul-2024 10:05:00', strikes=(22400, 22500, 22600, 22700)))
+        self.assertEqual(self.store.append('NIFTY', wider), 2)
+
+        history = self.store.history('NIFTY', self.day)
+        self.assertTrue(np.isnan(history.column('ce_oi')[0, history.rows(strike=22700)]).all())
+        self.assertEqual(len(self.store.latest('NIFTY', self.day)), 8)
+
+    def test_dropped_strikes_are_not_carried_forward(self):
+        chains = [
+            self.chains[0],
+            # The 22600 contracts of both expiries drop out, then come back
+            parse_option_chain(nse_payload('25-Jul-2024 10:05:00', strikes=(22400, 22500), bump=100)),
+            parse_option_chain(nse_payload('25-Jul-2024 10:10:00', bump=200)),
+        ]
+        # Two tombstones plus the changed 22500 puts, then the returning contracts
+        self.assertEqual([self.store.append('NIFTY', chain) for chain in chains], [6, 4, 4])
+
+        history = OptionChainStore(root=self.tmpdir.name).history('NIFTY', self.day)
+        for i, chain in enumerate(chains):
+            decoded = history.chain(i)
+            pd.testing.assert_frame_equal(decoded[['strike'] + list(FIELDS)], chain[['strike'] + list(FIELDS)].astype(float))
+        np.testing.assert_allclose(self.store.pcr_series('NIFTY', date=self.day).to_numpy(),
+                                   [calculate_pcr(chain) for chain in chains])
+        buildup = self.store.oi_buildup('NIFTY', 22600, date=self.day)
+        self.assertTrue(np.isnan(buildup['pe_oi'].iloc[1]))
+        self.assertEqual(buildup['pe_oi'].iloc[2], 2020.0)
+
+    def test_interrupted_append_is_ignored(self):
+        for chain in self.chains[:2]:
+            self.store.append('NIFTY', chain)
+        directory = os.path.join(self.tmpdir.name, 'NIFTY', '2024-07-25')
+        # A crash after the deltas were written but before their snapshot record
+        with open(os.path.join(directory, 'deltas.bin'), 'ab') as f:
+            f.write(b'\0' * 40)
+
+        history = OptionChainStore(root=self.tmpdir.name).history('NIFTY', self.day)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(self.store.dates('NIFTY'), [self.day])
+        # The next append starts from the last complete snapshot
+        self.store.append('NIFTY', self.chains[2])
+        self.assertEqual(self.store.history('NIFTY', self.day).chain()['pe_oi'].iloc[1], 2210.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+# tests/test_order_book.py
+
+import asyncio
+import json
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from kiteconnect import KiteConnect
+
+from market_analysis_app.ticks import bus as topics
+from market_analysis_app.ticks.bus import EventBus
+from market_analysis_app.zerodha.mock_kite import MockKiteServer
+from market_analysis_app.zerodha.order_book import OrderBook, postback_checksum
+from market_analysis_app.zerodha.order_gateway import OrderGateway, order_tag
+from market_analysis_app.zerodha.postbacks import PostbackServer
+
+SYMBOL = 'NIFTY24JUL22500CE'
+
+
+def update(order_id='1', status='OPEN', filled=0, quantity=50, side='BUY', tag=None, symbol=SYMBOL):
+    return {'order_id': order_id, 'status': status, 'tradingsymbol': symbol, 'exchange': 'NFO', 'product': 'MIS',
+            'transaction_type': side, 'quantity': quantity, 'filled_quantity': filled, 'tag': tag,
+            'order_timestamp': '2024-07-04 10:05:00'}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class TestOrderBook(unittest.TestCase):
+
+    def setUp(self):
+        self.book = OrderBook({'MAS1': 'strategy1'})
+
+    def test_fills_move_positions_and_close_orders(self):
+        tag = order_tag('strategy1', SYMBOL, prefix='MAS1')
+        self.book.apply(update(tag=tag))
+        self.assertTrue(self.book.has_open(SYMBOL, 'strategy1'))
+        self.assertFalse(self.book.has_open(SYMBOL, 'strategy3'))
+
+        self.book.apply(update(status='OPEN', filled=25, tag=tag))
+        self.book.apply(update(status='COMPLETE', filled=50, tag=tag))
+        self.assertEqual(self.book.position(SYMBOL), 50)
+        self.assertEqual(self.book.position(SYMBOL, 'strategy1'), 50)
+        self.assertEqual(self.book.open_orders(), [])
+
+        self.book.apply(update(order_id='2', status='COMPLETE', filled=50, side='SELL', tag=tag))
+        self.assertEqual(self.book.position(SYMBOL), 0)
+        self.assertFalse(self.book.has_open(SYMBOL, 'strategy1'))
+
+    def test_duplicate_and_stale_updates_are_ignored(self):
+        self.book.apply(update(filled=20))
+        self.book.apply(update(status='COMPLETE', filled=50))
+        self.assertFalse(self.book.apply(update(status='COMPLETE', filled=50)))
+        self.assertFalse(self.book.apply(update(filled=20)))
+        self.assertEqual(self.book.position(SYMBOL), 50)
+        self.assertFalse(self.book.open_orders())
+        self.assertEqual(self.book.stats['stale'], 2)
+
+    def test_seed_keeps_updates_that_arrive_during_the_rest_calls(self):
+        book = self.book
+
+        class Kite:
+            def orders(self):
+                # An update pushed while this call is in flight, already reflected in the snapshot
+                book.apply(update(status='COMPLETE', filled=50))
+                book.apply(update(order_id='2'))
+                return [update(status='COMPLETE', filled=50)]
+
+            def positions(self):
+                return {'net': [{'tradingsymbol': SYMBOL, 'quantity': 50}], 'day': []}
+
+        book.sync(Kite())
+        self.assertEqual(book.position(SYMBOL), 50)
+        self.assertEqual([order['order_id'] for order in book.open_orders()], ['2'])
+
+    def test_placed_order_counts_as_open_until_its_update(self):
+        self.book.placed('9', tag='MAS1abc', tradingsymbol=SYMBOL, transaction_type='BUY', quantity=50)
+        self.assertTrue(self.book.has_open(SYMBOL, 'strategy1'))
+        self.book.apply(update(order_id='9', status='CANCELLED', tag='MAS1abc'))
+        self.assertFalse(self.book.has_open(SYMBOL))
+
+    def test_open_exposure_is_tracked_per_underlying(self):
+        book = OrderBook({'MAS1': 'strategy1'}, underlying_of=lambda symbol: 'NIFTY' if symbol.startswith('NIFTY') else None)
+        book.seed([update(order_id='1', status='COMPLETE', filled=50, tag='MAS1a')],
+                  {'net': [{'tradingsymbol': SYMBOL, 'quantity': 50}]})
+        self.assertTrue(book.has_open_underlying('NIFTY', 'strategy1'))
+        # A second contract of the same index, then both positions closed
+        book.placed('2', tag='MAS1b', name='NIFTY', tradingsymbol='NIFTY24JUL22550CE', transaction_type='BUY', quantity=50)
+        book.apply(update(order_id='2', status='CANCELLED', tag='MAS1b', symbol='NIFTY24JUL22550CE'))
+        self.assertTrue(book.has_open_underlying('NIFTY', 'strategy1'))
+        book.apply(update(order_id='3', status='COMPLETE', filled=50, side='SELL', tag='MAS1c'))
+        self.assertFalse(book.has_open_underlying('NIFTY', 'strategy1'))
+        self.assertFalse(book.has_open_underlying('NIFTY'))
+        self.assertEqual(book.order_id_for('MAS1b'), '2')
+
+
+class TestPostbacks(unittest.TestCase):
+
+    def test_mock_kite_postbacks_keep_the_book_current(self):
+        bus, book = EventBus(), OrderBook({'MAS1': 'strategy1'})
+        bus.subscribe(topics.ORDER_UPDATES, book.apply)
+        receiver = PostbackServer('secret', lambda update: bus.publish(topics.ORDER_UPDATES, update)).start()
+        self.addCleanup(receiver.stop)
+        server = MockKiteServer(postback_url=receiver.url, api_secret='secret').start()
+        self.addCleanup(server.stop)
+        kite = KiteConnect(api_key='test', access_token='test', root=server.url)
+        gateway = OrderGateway(kite, rate=100)
+        self.addCleanup(gateway.close)
+
+        market = asyncio.run(gateway.place(exchange='NFO', tradingsymbol='NIFTY24JUL22400PE', transaction_type='BUY',
+                                           quantity=25, product='MIS', order_type='MARKET'))
+        book.sync(kite)
+        self.assertEqual(book.position('NIFTY24JUL22400PE'), 25)
+
+        limit = asyncio.run(gateway.place(exchange='NFO', tradingsymbol=SYMBOL, transaction_type='BUY', quantity=50,
+                                          product='MIS', order_type='LIMIT', price=100.0,
+                                          tag=order_tag('strategy1', SYMBOL, prefix='MAS1')))
+        wait_for(lambda: limit in book.orders)
+        self.assertTrue(book.has_open(SYMBOL, 'strategy1'))
+        server.fill(limit, 20)
+        server.fill(limit)
+        wait_for(lambda: book.orders[limit]['status'] == 'COMPLETE')
+        self.assertEqual(book.position(SYMBOL, 'strategy1'), 50)
+        self.assertEqual(book.position('NIFTY24JUL22400PE'), 25)
+        self.assertEqual(receiver.stats['received'], server.stats['postbacks'])
+        self.assertIn(market, book.orders)
+
+    def test_postback_with_a_bad_checksum_is_rejected(self):
+        received = []
+        receiver = PostbackServer('secret', received.append).start()
+        self.addCleanup(receiver.stop)
+        body = update()
+        body['checksum'] = postback_checksum(body['order_id'], body['order_timestamp'], 'wrong')
+        request = urllib.request.Request(receiver.url, data=json.dumps(body).encode(), method='POST')
+        with self.assertRaises(urllib.error.HTTPError) as raised:
+            urllib.request.urlopen(request, timeout=5)
+        self.assertEqual(raised.exception.code, 403)
+        self.assertEqual(received, [])
+        self.assertEqual(receiver.stats['rejected'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+# tests/test_order_gateway.py
+
+import asyncio
+import time
+import unittest
+
+from kiteconnect import KiteConnect
+from kiteconnect.exceptions import InputException
+
+from market_analysis_app.zerodha.mock_kite import MockKiteServer
+from market_analysis_app.zerodha.order_gateway import LatencyHistogram, OrderGateway, order_tag
+
+
+def option_order(symbol='NIFTY24JUL22500CE', order_type='LIMIT', quantity=50, **kwargs):
+    return dict(exchange='NFO', tradingsymbol=symbol, transaction_type='BUY', quantity=quantity,
+                product='MIS', order_type=order_type, price=100.5, validity='DAY', **kwargs)
+
+
+class TestOrderGateway(unittest.TestCase):
+
+    def gateway(self, **server_options):
+        self.server = MockKiteServer(**server_options).start()
+        self.addCleanup(self.server.stop)
+        kite = KiteConnect(api_key='test', access_token='test', root=self.server.url)
+        gateway = OrderGateway(kite, rate=100, backoff=0.01)
+        self.addCleanup(gateway.close)
+        return gateway
+
+    def test_orders_are_sent_concurrently(self):
+        gateway = self.gateway(latency=0.2)
+        orders = [option_order(symbol) for symbol in ('NIFTY24JUL22500CE', 'BANKNIFTY24JUL48000CE', 'FINNIFTY24JUL23000CE')]
+
+        started = time.perf_counter()
+        order_ids = asyncio.run(gateway.place_many(orders))
+        elapsed = time.perf_counter() - started
+
+        # One after another this would take 0.6 seconds
+        self.assertLess(elapsed, 0.45)
+        self.assertEqual(sorted(order_ids), sorted(self.server.orders))
+        metrics = gateway.metrics()
+        self.assertEqual(metrics['placed'], 3)
+        self.assertEqual(metrics['submit_to_ack']['count'], 3)
+        self.assertGreaterEqual(metrics['submit_to_ack']['p50'], 0.2)
+        self.assertGreaterEqual(metrics['signal_to_ack']['max'], metrics['submit_to_ack']['max'])
+
+    def test_lost_ack_is_recovered_without_a_second_order(self):
+        gateway = self.gateway(lose_ack_every=1)
+
+        order_id = asyncio.run(gateway.place(**option_order(), tag=order_tag('strategy1', 'NIFTY', 'BUY', '10:05')))
+
+        self.assertEqual(list(self.server.orders), [order_id])
+        self.assertEqual(gateway.stats['recovered'], 1)
+        self.assertEqual(self.server.stats['places'], 1)
+
+    def test_unplaced_order_is_retried(self):
+        gateway = self.gateway(fail_every=2)
+
+        async def place_two():
+            first = await gateway.place(**option_order())
+            second = await gateway.place(**option_order('BANKNIFTY24JUL48000CE'))
+            return first, second
+
+        order_ids = asyncio.run(place_two())
+
+        self.assertEqual(len(self.server.orders), 2)
+        self.assertEqual(set(order_ids), set(self.server.orders))
+        self.assertEqual(gateway.stats['retries'], 1)
+
+    def test_same_tag_is_placed_once(self):
+        gateway = self.gateway(latency=0.1)
+        tag = order_tag('strategy3', 'NIFTY', 'SELL', '2024-07-25 10:15')
+
+        async def twice():
+            concurrent = await asyncio.gather(gateway.place(**option_order(), tag=tag), gateway.place(**option_order(), tag=tag))
+            return concurrent + [await gateway.place(**option_order(), tag=tag)]
+
+        order_ids = asyncio.run(twice())
+
+        self.assertEqual(len(set(order_ids)), 1)
+        self.assertEqual(len(self.server.orders), 1)
+        self.assertEqual(gateway.stats['duplicates'], 2)
+
+    def test_rejected_order_is_not_retried(self):
+        gateway = self.gateway()
+
+        with self.assertRaises(InputException):
+            asyncio.run(gateway.place(**option_order(quantity=0)))
+
+        self.assertEqual(self.server.stats['requests'], 1)
+        self.assertEqual(gateway.stats['rejected'], 1)
+
+    def test_modify_and_cancel(self):
+        gateway = self.gateway()
+
+        async def amend():
+            order_id = await gateway.place(**option_order())
+            await gateway.modify(order_id, price=101.0)
+            await gateway.cancel(order_id)
+            return order_id
+
+        order_id = asyncio.run(amend())
+
+        order = self.server.orders[order_id]
+        self.assertEqual((order['price'], order['status']), (101.0, 'CANCELLED'))
+        self.assertEqual(gateway.metrics()['cancel']['count'], 1)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_percentiles_within_a_bucket(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.record(ms / 1000)
+
+        summary = histogram.summary()
+
+        self.assertEqual(summary['count'], 100)
+        self.assertAlmostEqual(summary['mean'], 0.0505)
+        self.assertTrue(0.050 <= summary['p50'] <= 0.050 * 1.13)
+        self.assertTrue(0.099 <= summary['p99'] <= 0.1)
+        self.assertEqual(summary['max'], 0.1)
+        self.assertEqual(LatencyHistogram().summary(), {'count': 0})
+
+    def test_order_tags_are_stable_and_fit_kite(self):
+        tag = order_tag('strategy1', 'NIFTY', 'BUY', '2024-07-25 10:05')
+
+        self.assertEqual(tag, order_tag('strategy1', 'NIFTY', 'BUY', '2024-07-25 10:05'))
+        self.assertNotEqual(tag, order_tag('strategy1', 'NIFTY', 'SELL', '2024-07-25 10:05'))
+        self.assertEqual(len(tag), 20)
+        self.assertTrue(tag.isalnum())
+
+
+if __name__ == '__main__':
+    unittest.main()
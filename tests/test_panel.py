@@ -0,0 +1,139 @@
+# tests/test_panel.py
+
+import importlib.util
+import unittest
+import numpy as np
+import pandas as pd
+from market_analysis_app.indicators import benchmark, panel
+from market_analysis_app.indicators.streaming import SMA, CandlePatterns
+from market_analysis_app.strategies.scanner import build_panel
+from market_analysis_app.strategies.strategy1 import strategy1
+from tests.test_scanner import random_bars
+
+LENGTHS = [300, 250, 120, 300, 2]
+
+class TestPanelKernels(unittest.TestCase):
+
+    def setUp(self):
+        # Ragged histories: shorter symbols are right-aligned behind leading NaN
+        self.frames = {f'SYM{i}': random_bars(n, seed=i) for i, n in enumerate(LENGTHS)}
+        self.symbols, self.bars = build_panel(self.frames)
+
+    def rows(self):
+        """(row, frame, slice of the frame's bars in the panel) for every symbol."""
+        for row, symbol in enumerate(self.symbols):
+            data = self.frames[symbol]
+            yield row, data, slice(max(LENGTHS) - len(data), None)
+
+    @unittest.skipUnless(importlib.util.find_spec('pandas_ta'), 'pandas_ta is not installed')
+    def test_indicators_match_pandas_ta(self):
+        import pandas_ta as ta
+        high, low, close = self.bars['High'], self.bars['Low'], self.bars['Close']
+        ema, sma = panel.ema(close, 9), panel.sma(close, 21)
+        plus, minus = panel.vortex(high, low, close)
+        line, histogram, signal = panel.macd(close)
+        for row, data, bars in self.rows():
+            if len(data) < 21:
+                # pandas_ta returns None for series shorter than the length
+                self.assertTrue(np.isnan(sma[row]).all())
+                continue
+            np.testing.assert_array_equal(ema[row, bars], ta.ema(data['Close'], 9, talib=False))
+            # pandas rolls its sums with add/remove updates, equal up to rounding
+            np.testing.assert_allclose(sma[row, bars], ta.sma(data['Close'], 21, talib=False), rtol=1e-12)
+            vortex = ta.vortex(data['High'], data['Low'], data['Close'])
+            np.testing.assert_allclose(plus[row, bars], vortex.iloc[:, 0], rtol=1e-12)
+            np.testing.assert_allclose(minus[row, bars], vortex.iloc[:, 1], rtol=1e-12)
+            macd = ta.macd(data['Close'], talib=False)
+            np.testing.assert_array_equal(line[row, bars], macd.iloc[:, 0])
+            np.testing.assert_array_equal(histogram[row, bars], macd.iloc[:, 1])
+            np.testing.assert_array_equal(signal[row, bars], macd.iloc[:, 2])
+
+    @unittest.skipUnless(importlib.util.find_spec('pandas_ta'), 'pandas_ta is not installed')
+    def test_psar_matches_pandas_ta(self):
+        import pandas_ta as ta
+        result = panel.psar(self.bars['High'], self.bars['Low'])
+        for row, data, bars in self.rows():
+            expected = ta.psar(data['High'], data['Low'])
+            for column, values in enumerate(result):
+                np.testing.assert_array_equal(values[row, bars], expected.iloc[:, column], err_msg=expected.columns[column])
+
+    @unittest.skipUnless(importlib.util.find_spec('pandas_ta'), 'pandas_ta is not installed')
+    def test_ichimoku_matches_pandas_ta(self):
+        import pandas_ta as ta
+        cloud = panel.ichimoku(self.bars['High'], self.bars['Low'], self.bars['Close'])
+        for row, data, bars in self.rows():
+            if len(data) < 52:
+                continue
+            expected, _ = ta.ichimoku(data['High'], data['Low'], data['Close'])
+            for column in expected.columns:
+                np.testing.assert_array_equal(cloud[column][row, bars], expected[column], err_msg=column)
+
+    @unittest.skipUnless(importlib.util.find_spec('pandas_ta'), 'pandas_ta is not installed')
+    def test_candles_match_pandas_ta_and_streaming(self):
+        import pandas_ta as ta
+        candles = panel.candle_patterns(self.bars['Open'], self.bars['High'], self.bars['Low'], self.bars['Close'])
+        for row, data, bars in self.rows():
+            args = (data['Open'], data['High'], data['Low'], data['Close'])
+            if len(data) >= 10:
+                np.testing.assert_array_equal(candles['CDL_DOJI_10_0.1'][row, bars], ta.cdl_doji(*args))
+            stream = CandlePatterns()
+            expected = pd.DataFrame([stream.update(*bar) for bar in zip(*args)])
+            for column in ('CDL_ENGULFING', 'CDL_HAMMER'):
+                np.testing.assert_array_equal(candles[column][row, bars], expected[column], err_msg=column)
+
+    @unittest.skipUnless(importlib.util.find_spec('talib'), 'TA-Lib is not installed')
+    def test_candles_match_talib(self):
+        import talib
+        data = random_bars(3000, seed=9)
+        args = [data[column].to_numpy() for column in ('Open', 'High', 'Low', 'Close')]
+        candles = panel.candle_patterns(*args)
+        np.testing.assert_array_equal(candles['CDL_ENGULFING'][0], talib.CDLENGULFING(*args))
+        np.testing.assert_array_equal(candles['CDL_HAMMER'][0], talib.CDLHAMMER(*args))
+
+    def test_rolling_sums_do_not_drift_from_streaming(self):
+        # A long series far from zero: differences of prefix sums lose digits as the
+        # running total grows, windowed sums stay as close as the compensated stream
+        rng = np.random.default_rng(1)
+        close = 1e5 + np.cumsum(rng.normal(0, 50, 200_000))
+        stream = SMA(21)
+        expected = np.array([stream.update(value) for value in close])
+        np.testing.assert_allclose(panel.sma(close, 21)[0], expected, rtol=1e-13)
+
+    @unittest.skipUnless(importlib.util.find_spec('pandas_ta'), 'pandas_ta is not installed')
+    def test_long_series(self):
+        import pandas_ta as ta
+        data = random_bars(20000, seed=5)
+        close = data['Close'].to_numpy()
+        np.testing.assert_array_equal(panel.ema(close, 21)[0], ta.ema(data['Close'], 21, talib=False))
+        long, short, _, _ = panel.psar(data['High'].to_numpy(), data['Low'].to_numpy())
+        expected = ta.psar(data['High'], data['Low'])
+        np.testing.assert_array_equal(long[0], expected.iloc[:, 0])
+        np.testing.assert_array_equal(short[0], expected.iloc[:, 1])
+
+    @unittest.skipUnless(importlib.util.find_spec('pandas_ta'), 'pandas_ta is not installed')
+    def test_strategy1_columns_match_pandas_ta_accessors(self):
+        import pandas_ta  # noqa: F401  (registers the DataFrame.ta accessor)
+        data = random_bars(1500, seed=6)
+        result = strategy1(data.copy())
+        reference = data.copy()
+        reference.ta.ema(length=9, talib=False, append=True, col_names=('EMA_9',))
+        reference.ta.sma(length=21, talib=False, append=True, col_names=('SMA_21',))
+        reference.ta.vortex(append=True, col_names=('VORTEX_P', 'VORTEX_N'))
+        reference.ta.macd(talib=False, append=True, col_names=('MACD', 'MACD_H', 'MACD_S'))
+        reference.ta.psar(append=True, col_names=('PSAR_long', 'PSAR_short', 'PSARaf', 'PSARr'))
+        for column in ['EMA_9', 'MACD', 'MACD_H', 'MACD_S', 'PSAR_long', 'PSAR_short', 'PSARaf', 'PSARr']:
+            np.testing.assert_array_equal(result[column], reference[column], err_msg=column)
+        for column in ['SMA_21', 'VORTEX_P', 'VORTEX_N']:
+            np.testing.assert_allclose(result[column], reference[column], rtol=1e-12, err_msg=column)
+
+class TestBenchmark(unittest.TestCase):
+
+    @unittest.skipUnless(importlib.util.find_spec('pandas_ta'), 'pandas_ta is not installed')
+    @unittest.skipUnless(importlib.util.find_spec('talib'), 'TA-Lib is not installed')
+    def test_reports_every_case(self):
+        table = benchmark.run(bars=500, symbols=3, panel_bars=200, repeat=1)
+        self.assertEqual(list(table.index), [name for name, _, _ in benchmark.CASES])
+        self.assertTrue((table > 0).all().all())
+
+if __name__ == '__main__':
+    unittest.main()
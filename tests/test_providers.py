@@ -0,0 +1,209 @@
+# tests/test_providers.py
+
+import datetime
+import tempfile
+import threading
+import unittest
+
+import pandas as pd
+
+from market_analysis_app.data.cache import OHLCVCache
+from market_analysis_app.data.data_fetcher import get_bulk_data, get_data
+from kiteconnect import KiteConnect
+
+from market_analysis_app.data.providers import DataProvider, FakeProvider, KiteProvider, ProviderRouter, kite_windows
+from market_analysis_app.rate_limit import TokenBucket
+from market_analysis_app.zerodha.order_gateway import OrderGateway
+from tests.test_data_fetcher import intraday_bars
+
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class FakeKite:
+    """Answers historical_data with one 09:15 candle per weekday in the requested range."""
+
+    def __init__(self, fail_from=None):
+        self.fail_from = fail_from
+        self.requests = []
+        self.instrument_calls = 0
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def instruments(self, exchange):
+        self.instrument_calls += 1
+        return [{'tradingsymbol': 'RELIANCE', 'instrument_token': 738561, 'exchange': exchange}]
+
+    def historical_data(self, token, from_date, to_date, interval):
+        with self.lock:
+            self.requests.append((token, from_date, to_date, interval))
+            self.threads.add(threading.current_thread().name)
+        if self.fail_from is not None and from_date >= self.fail_from:
+            raise ConnectionError("Too many requests")
+        rows = []
+        for day in pd.bdate_range(from_date.date(), to_date.date()):
+            stamp = datetime.datetime.combine(day.date(), datetime.time(9, 15), tzinfo=IST)
+            if from_date <= stamp.replace(tzinfo=None) <= to_date:
+                rows.append({'date': stamp, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': float(token % 100), 'volume': 10})
+        return rows
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(3, clock=clock, sleep=clock.sleep)
+
+        waits = [bucket.acquire() for _ in range(6)]
+
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertEqual([round(wait, 6) for wait in waits[3:]], [0.333333] * 3)
+        self.assertAlmostEqual(clock.now, 1.0)
+
+    def test_idle_time_refills_up_to_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, capacity=2, clock=clock, sleep=clock.sleep)
+        bucket.acquire(2)
+        clock.now += 10
+
+        self.assertEqual(bucket.reserve(2), 0.0)
+        self.assertEqual(bucket.reserve(), 0.5)
+
+
+class TestKiteProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.kite = FakeKite()
+        self.provider = KiteProvider(self.kite, tokens={'^NSEI': 256265}, max_workers=3)
+        self.clock = FakeClock()
+        self.provider.limiter = TokenBucket(3, clock=self.clock, sleep=self.clock.sleep)
+        self.start = pd.Timestamp('2024-01-01', tz='Asia/Kolkata')
+        self.end = pd.Timestamp('2024-09-07', tz='Asia/Kolkata')
+
+    def test_long_range_is_split_into_allowed_windows(self):
+        data = self.provider.history('^NSEI', '5m', start=self.start, end=self.end)
+
+        # 250 days of 5-minute bars need three requests of at most 100 days
+        self.assertEqual(len(self.kite.requests), 3)
+        self.assertTrue(all(request[3] == '5minute' for request in self.kite.requests))
+        self.assertTrue(all(to - frm <= datetime.timedelta(days=100) for _, frm, to, _ in self.kite.requests))
+        self.assertEqual(len(data), len(pd.bdate_range('2024-01-01', '2024-09-06')))
+        self.assertTrue(data.index.is_unique and data.index.is_monotonic_increasing)
+        self.assertEqual(str(data.index.tz), 'Asia/Kolkata')
+        self.assertEqual(list(data.columns), ['Open', 'High', 'Low', 'Close', 'Volume'])
+
+    def test_windows_of_all_symbols_share_the_rate_limit(self):
+        frames = self.provider.download(['^NSEI', 'RELIANCE.NS'], '5m', start=self.start, end=self.end)
+
+        self.assertEqual(set(frames), {'^NSEI', 'RELIANCE.NS'})
+        self.assertEqual(frames['RELIANCE.NS']['Close'].iloc[0], 61.0)
+        self.assertEqual(len(self.kite.requests), 6)
+        # Three requests go out in the first burst, the other three at 3 per second
+        self.assertAlmostEqual(self.clock.now, 1.0)
+        self.assertLessEqual(len(self.kite.threads), 3)
+
+    def test_instruments_are_loaded_once_per_exchange(self):
+        self.provider.history('RELIANCE.NS', '1d', start=self.start, end=self.end)
+        self.provider.history('RELIANCE.NS', '1d', start=self.start, end=self.end)
+
+        self.assertEqual(self.kite.instrument_calls, 1)
+        with self.assertRaises(KeyError):
+            self.provider.token('UNKNOWN.NS')
+
+    def test_period_is_trimmed_to_sessions(self):
+        data = self.provider.history('^NSEI', '1d', period='5d')
+
+        self.assertEqual(len(data.index.normalize().unique()), 5)
+        self.assertEqual(data.index.name, 'Date')
+
+    def test_failed_window_fails_the_symbol(self):
+        self.kite.fail_from = datetime.datetime(2024, 5, 1)
+
+        with self.assertRaises(ConnectionError):
+            self.provider.history('^NSEI', '5m', start=self.start, end=self.end)
+        self.assertIsNone(self.provider.download(['^NSEI'], '5m', start=self.start, end=self.end))
+        self.assertIsNone(self.provider.download(['^NSEI'], '7m', period='1d'))
+
+    def test_history_has_its_own_connection_pool(self):
+        kite = KiteConnect(api_key='test', access_token='test', root='https://kite.example')
+        gateway = OrderGateway(kite, max_workers=8)
+        self.addCleanup(gateway.close)
+        provider = KiteProvider(kite, max_workers=3)
+
+        # The order gateway's pool on the shared client is left alone
+        self.assertEqual(kite.reqsession.get_adapter('https://kite.example')._pool_maxsize, 8)
+        self.assertIsNot(provider.kite.reqsession, kite.reqsession)
+        self.assertEqual(provider.kite.reqsession.get_adapter('https://kite.example')._pool_maxsize, 3)
+        self.assertEqual((provider.kite.access_token, provider.kite.root), ('test', 'https://kite.example'))
+
+    def test_provider_must_implement_history(self):
+        class Incomplete(DataProvider):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_windows_cover_the_range(self):
+        windows = kite_windows(self.start, self.end, 100)
+
+        self.assertEqual(windows[0][0], self.start)
+        self.assertEqual(windows[-1][1], self.end)
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(windows, windows[1:])))
+
+
+class TestProviderSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.yahoo = FakeProvider({'AAA': intraday_bars(1, 10), 'BBB': intraday_bars(1, 10)})
+        self.kite = FakeProvider({'^NSEI': intraday_bars(1, 20)})
+        self.router = ProviderRouter(self.yahoo, {'^NSEI': self.kite})
+
+    def test_get_data_uses_the_routed_provider(self):
+        data = get_data('^NSEI', interval='5m', period='1d', provider=self.router)
+
+        self.assertEqual(len(data), 20)
+        self.assertEqual(self.kite.calls, [('history', '^NSEI', '5m', '1d', None, None)])
+        self.assertEqual(self.yahoo.calls, [])
+
+    def test_bulk_data_downloads_once_per_provider(self):
+        data = get_bulk_data(['AAA', '^NSEI', 'BBB'], interval='5m', provider=self.router)
+
+        self.assertEqual([call[:2] for call in self.yahoo.calls], [('download', ('AAA', 'BBB'))])
+        self.assertEqual([call[:2] for call in self.kite.calls], [('download', ('^NSEI',))])
+        self.assertEqual({symbol: len(frame) for symbol, frame in data.items()}, {'AAA': 10, '^NSEI': 20, 'BBB': 10})
+
+    def test_cached_delta_goes_to_the_same_provider(self):
+        with tempfile.TemporaryDirectory() as root:
+            cache = OHLCVCache(root=root)
+            bars = self.kite.frames['^NSEI']
+            cache.write('^NSEI', '5m', bars.iloc[:15], full_fetch=True, now=0)
+
+            data = get_data('^NSEI', interval='5m', period='1d', cache=cache, provider=self.router)
+
+            self.assertEqual(self.kite.calls, [('history', '^NSEI', '5m', None, bars.index[14], None)])
+            self.assertEqual(len(data), 20)
+
+    def test_failing_symbol_returns_none(self):
+        self.yahoo.failing.add('BBB')
+
+        data = get_bulk_data(['AAA', 'BBB'], interval='5m', provider=self.router)
+
+        self.assertEqual(len(data['AAA']), 10)
+        self.assertIsNone(data['BBB'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# tests/test_resampler.py
+
+import unittest
+
+import pandas as pd
+
+from market_analysis_app.data.resampler import Resampler, resample
+from tests.test_backtest import session_bars
+
+
+def pandas_resample(data, rule, offset=None):
+    aggregated = data.resample(rule, origin='start_day', offset=offset).agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    )
+    return aggregated.dropna(subset=['Open'])
+
+
+class TestResample(unittest.TestCase):
+
+    def setUp(self):
+        self.bars = session_bars(3)
+
+    def test_15m_bars_start_at_the_open(self):
+        bars = resample(self.bars, '15m')
+
+        expected = pandas_resample(self.bars, '15min', '9h15min')
+        pd.testing.assert_frame_equal(bars, expected, check_freq=False, check_index_type=False)
+        self.assertEqual(bars.index[0].strftime('%H:%M'), '09:15')
+        self.assertEqual(len(bars), 3 * 25)
+
+    def test_last_hour_is_cut_at_the_close(self):
+        bars = resample(self.bars, '1h')
+
+        session = bars[bars.index.normalize() == bars.index[0].normalize()]
+        self.assertEqual([stamp.strftime('%H:%M') for stamp in session.index][-2:], ['14:15', '15:15'])
+        last = self.bars.loc['2024-01-01 15:15':'2024-01-01 15:25']
+        self.assertEqual(session['Close'].iloc[-1], last['Close'].iloc[-1])
+        self.assertEqual(session['Volume'].iloc[-1], last['Volume'].sum())
+
+    def test_daily_bars_are_sessions(self):
+        bars = resample(self.bars, '1d')
+
+        expected = pandas_resample(self.bars, '1D')
+        pd.testing.assert_frame_equal(bars, expected, check_freq=False, check_index_type=False)
+
+
+class TestResampler(unittest.TestCase):
+
+    def setUp(self):
+        self.bars = session_bars(2)
+        self.resampler = Resampler('5m', ('15m', '1h', '1d'))
+
+    def test_incremental_updates_match_batch_resample(self):
+        self.resampler.update('^NSEI', self.bars.iloc[:40])
+        for end in range(41, len(self.bars) + 1):
+            # Each download repeats the recent history; only the new bar is folded in
+            self.resampler.update('^NSEI', self.bars.iloc[end - 30:end])
+
+        for timeframe in ('15m', '1h', '1d'):
+            pd.testing.assert_frame_equal(
+                self.resampler.frame('^NSEI', timeframe), resample(self.bars, timeframe),
+                check_freq=False, check_index_type=False
+            )
+
+    def test_bars_complete_as_their_last_base_bar_closes(self):
+        first = self.bars.index[0]
+        completed = {}
+        for minutes in (5, 10, 15, 60):
+            now = first + pd.Timedelta(minutes=minutes)
+            # The bar that started at `now` is in the download but still forming
+            completed[minutes] = self.resampler.update('^NSEI', self.bars[self.bars.index <= now], now=now)
+
+        self.assertEqual(completed[5], [])
+        self.assertEqual(completed[10], [])
+        self.assertEqual(completed[15], ['15m'])
+        self.assertEqual(completed[60], ['15m', '1h'])
+        self.assertEqual(len(self.resampler.frame('^NSEI', '15m')), 4)
+        self.assertEqual(len(self.resampler.frame('^NSEI', '1h')), 1)
+        self.assertEqual(self.resampler.frame('^NSEI', '1h')['Close'].iloc[0], self.bars['Close'].iloc[11])
+
+    def test_session_close_completes_hour_and_day(self):
+        session = self.bars.iloc[:75]
+        completed = self.resampler.update('^NSEI', session, now=session.index[-1] + pd.Timedelta(minutes=5))
+
+        self.assertEqual(completed, ['15m', '1h', '1d'])
+        self.assertEqual(self.resampler.frame('^NSEI', '1d')['High'].iloc[0], session['High'].max())
+        self.assertIsNone(self.resampler.frame('^BSESN', '15m'))
+
+
+if __name__ == '__main__':
+    unittest.main()
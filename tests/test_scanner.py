@@ -0,0 +1,107 @@
+# tests/test_scanner.py
+
+import datetime
+import unittest
+import numpy as np
+import pandas as pd
+from market_analysis_app.strategies.levels import DailyLevels
+from market_analysis_app.strategies.scanner import build_panel, strategy1_panel, strategy3_panel, scan_panel, STRATEGY3_LAG
+from market_analysis_app.strategies.strategy1 import strategy1
+
+def random_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 1, n)
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + rng.uniform(0, 1, n),
+        'Low': np.minimum(open_, close) - rng.uniform(0, 2, n),
+        'Close': close,
+        'Volume': rng.integers(100, 1000, n).astype(float)
+    }, index=pd.date_range('2024-01-01 09:15', periods=n, freq='5min'))
+
+class TestBuildPanel(unittest.TestCase):
+
+    def setUp(self):
+        # Ragged histories: shorter symbols are right-aligned behind leading NaN
+        self.frames = {f'SYM{i}': random_bars(n, seed=i) for i, n in enumerate([300, 250, 120, 300])}
+        self.symbols, self.bars = build_panel(self.frames)
+
+    def test_build_panel_right_aligns(self):
+        self.assertEqual(self.bars['Close'].shape, (4, 300))
+        self.assertTrue(np.isnan(self.bars['Close'][2, :180]).all())
+        np.testing.assert_array_equal(self.bars['Close'][2, 180:], self.frames['SYM2']['Close'])
+        symbols, bars = build_panel(dict(self.frames, EMPTY=None), bars=100)
+        self.assertEqual(symbols, list(self.frames))
+        self.assertEqual(bars['Close'].shape, (4, 100))
+
+class TestScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = {f'SYM{i}': random_bars(n, seed=10 + i) for i, n in enumerate([400, 260, 400, 330, 400])}
+        self.symbols, self.bars = build_panel(self.frames)
+
+    def test_strategy1_signals_match_per_symbol_runs(self):
+        signals, _ = strategy1_panel(self.bars)
+        for row, symbol in enumerate(self.symbols):
+            data = self.frames[symbol]
+            expected = strategy1(data.copy())['signal']
+            np.testing.assert_array_equal(signals[row, 400 - len(data):], expected, err_msg=symbol)
+
+    def test_strategy3_signals_match_per_symbol_runs(self):
+        from market_analysis_app.strategies.strategy3 import strategy3
+        signals = strategy3_panel(self.bars)
+        for row, symbol in enumerate(self.symbols):
+            data = self.frames[symbol]
+            expected = strategy3(data.copy())['signal']
+            np.testing.assert_array_equal(signals[row, 400 - len(data):], expected, err_msg=symbol)
+
+    def test_level_signals_and_ranking(self):
+        price = self.bars['Close'][:, -1]
+        day = datetime.date(2024, 1, 1)
+        levels = {
+            # Breakout: strategy2 buys above (H - L) * 0.55 + C
+            'SYM0': DailyLevels.from_bar({'High': price[0] - 1, 'Low': price[0] - 3, 'Close': price[0] - 2}, day),
+            # Close is the pivot's S1 exactly: 2P - H with H = L = C
+            'SYM1': DailyLevels.from_bar({'High': price[1], 'Low': price[1], 'Close': price[1]}, day),
+            # Breakdown
+            'SYM2': DailyLevels.from_bar({'High': price[2] + 3, 'Low': price[2] + 1, 'Close': price[2] + 2}, day),
+        }
+        table = scan_panel(self.symbols, self.bars, levels)
+        self.assertEqual(table.loc['SYM0', 'strategy2'], 1)
+        self.assertEqual(table.loc['SYM1', 'strategy4'], 1)
+        self.assertEqual(table.loc['SYM2', 'strategy2'], -1)
+
+        signals, _ = strategy1_panel(self.bars)
+        for row, symbol in enumerate(self.symbols):
+            if symbol in table.index:
+                self.assertEqual(table.loc[symbol, 'strategy1'], signals[row, -1])
+            else:
+                self.assertEqual(signals[row, -1], 0)
+        strategies = table[['strategy1', 'strategy2', 'strategy3', 'strategy4']]
+        self.assertTrue((strategies != 0).any(axis=1).all())
+        np.testing.assert_array_equal(table['score'], strategies.sum(axis=1))
+        self.assertTrue((np.diff(table['score'].abs()) <= 0).all())
+
+    def test_strategy3_is_ranked_on_its_latest_settled_bar(self):
+        from market_analysis_app.strategies.strategy3 import Strategy3Stream
+        # End the panel so that the first strategy3 hit is the latest bar it can fire on
+        row, hit = np.argwhere(strategy3_panel(self.bars) != 0)[0]
+        bars = {column: values[:, :hit + STRATEGY3_LAG + 1] for column, values in self.bars.items()}
+        table = scan_panel(self.symbols, bars)
+        symbol = self.symbols[row]
+        self.assertIn(symbol, table.index)
+        self.assertNotEqual(table.loc[symbol, 'strategy3'], 0)
+
+        stream = Strategy3Stream()
+        for bar in zip(*(bars[column][row] for column in ('Open', 'High', 'Low', 'Close'))):
+            if not np.isnan(bar[-1]):
+                stream.update(*bar)
+        self.assertEqual(table.loc[symbol, 'strategy3'], stream.settled['signal'])
+
+    def test_empty_universe(self):
+        symbols, bars = build_panel({'SYM0': None})
+        self.assertTrue(scan_panel(symbols, bars).empty)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+# tests/test_scheduler.py
+
+import asyncio
+import datetime
+import unittest
+from market_analysis_app.scheduler import Scheduler, CandleClose, DailyAt, IST, CRITICAL, NORMAL, LOW
+
+def at(day, hour, minute, second=0):
+    return datetime.datetime(2024, 1, day, hour, minute, second, tzinfo=IST)
+
+class FakeClock:
+    """Wall clock whose sleeps advance virtual time, overshooting by `overshoot` seconds."""
+
+    def __init__(self, now, overshoot=0.0):
+        self.now = now
+        self.overshoot = overshoot
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += datetime.timedelta(seconds=seconds + self.overshoot)
+        await asyncio.sleep(0)
+
+class TestTriggers(unittest.TestCase):
+
+    def test_candle_close_alignment(self):
+        # 2024-01-02 is a Tuesday, 2024-01-05 a Friday
+        trigger = CandleClose(5)
+        self.assertEqual(trigger.next_after(at(2, 8, 0)), at(2, 9, 20))
+        self.assertEqual(trigger.next_after(at(2, 9, 17, 30)), at(2, 9, 20))
+        self.assertEqual(trigger.next_after(at(2, 9, 20)), at(2, 9, 25))
+        self.assertEqual(trigger.next_after(at(2, 15, 29)), at(2, 15, 30))
+        self.assertEqual(trigger.next_after(at(2, 15, 30)), at(3, 9, 20))
+        self.assertEqual(trigger.next_after(at(5, 15, 30)), at(8, 9, 20))
+        self.assertEqual(CandleClose(15).next_after(at(2, 9, 31)), at(2, 9, 45))
+
+    def test_candle_close_delay(self):
+        trigger = CandleClose(5, delay=2)
+        self.assertEqual(trigger.next_after(at(2, 9, 20)), at(2, 9, 20, 2))
+        self.assertEqual(trigger.next_after(at(2, 9, 20, 2)), at(2, 9, 25, 2))
+
+    def test_daily_at_skips_weekends(self):
+        trigger = DailyAt(datetime.time(9, 0))
+        self.assertEqual(trigger.next_after(at(2, 8, 59)), at(2, 9, 0))
+        self.assertEqual(trigger.next_after(at(5, 9, 0)), at(8, 9, 0))
+
+class TestScheduler(unittest.TestCase):
+
+    def run_scheduler(self, scheduler, until):
+        asyncio.run(scheduler.run(until=until))
+
+    def test_fires_on_every_close_without_drift(self):
+        clock = FakeClock(at(2, 9, 0), overshoot=0.25)
+        scheduler = Scheduler(clock=clock, sleep=clock.sleep)
+        fired = []
+
+        async def job(scheduled):
+            fired.append(scheduled)
+
+        signals = scheduler.add_job('signals', job, CandleClose(5), priority=CRITICAL)
+        self.run_scheduler(scheduler, at(2, 15, 30))
+        self.assertEqual(len(fired), 75)
+        self.assertEqual(fired[:2], [at(2, 9, 20), at(2, 9, 25)])
+        # Lateness stays bounded by one sleep overshoot instead of accumulating
+        self.assertLessEqual(signals.stats['max_lateness'], 0.25)
+
+    def test_overrun_is_reported_and_skipped(self):
+        clock = FakeClock(at(2, 9, 16))
+        overruns = []
+        scheduler = Scheduler(clock=clock, sleep=clock.sleep, on_overrun=lambda job, scheduled: overruns.append(scheduled))
+        release = asyncio.Event()
+
+        async def stuck(scheduled):
+            await release.wait()
+
+        job = scheduler.add_job('stuck', stuck, CandleClose(5))
+
+        async def scenario():
+            runner = asyncio.ensure_future(scheduler.run(until=at(2, 9, 30)))
+            while clock() < at(2, 9, 30):
+                await asyncio.sleep(0)
+            release.set()
+            await runner
+
+        asyncio.run(scenario())
+        self.assertEqual(overruns, [at(2, 9, 25), at(2, 9, 30)])
+        self.assertEqual(job.stats['runs'], 1)
+        self.assertEqual(job.stats['overruns'], 2)
+
+    def test_low_priority_shed_under_load(self):
+        clock = FakeClock(at(2, 9, 16))
+        scheduler = Scheduler(clock=clock, sleep=clock.sleep, load_threshold=5)
+        ran = []
+
+        async def record(scheduled, name):
+            ran.append(name)
+
+        for name, priority in [('signals', CRITICAL), ('oi', NORMAL), ('dashboard', LOW)]:
+            job = scheduler.add_job(name, lambda scheduled, name=name: record(scheduled, name), CandleClose(5), priority=priority)
+            job.next_fire = at(2, 9, 20)
+
+        async def fire_late():
+            started = scheduler.fire_due(at(2, 9, 20, 10))
+            await asyncio.gather(*(job.task for job in started))
+
+        asyncio.run(fire_late())
+        self.assertEqual(ran, ['signals', 'oi'])
+        self.assertEqual(scheduler.jobs[2].stats['shed'], 1)
+
+    def test_missed_fires_collapse(self):
+        scheduler = Scheduler()
+        ran = []
+
+        async def job(scheduled):
+            ran.append(scheduled)
+
+        task = scheduler.add_job('signals', job, CandleClose(5))
+        task.next_fire = at(2, 9, 20)
+
+        async def wake_after_suspend():
+            for job in scheduler.fire_due(at(2, 9, 36)):
+                await job.task
+
+        asyncio.run(wake_after_suspend())
+        self.assertEqual(ran, [at(2, 9, 20)])
+        self.assertEqual(task.stats['missed'], 3)
+        self.assertEqual(task.next_fire, at(2, 9, 40))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,68 +3,84 @@
 import unittest
 import pandas as pd
 import numpy as np
-from market_analysis_app.strategies.strategy1 import strategy1
+from market_analysis_app.strategies.strategy1 import strategy1, Strategy1Stream
 
 class TestStrategy1(unittest.TestCase):
 
-    def setUp(self):
-        # Create a dummy DataFrame for testing
-        self.data = pd.DataFrame({
-            'Open': [100, 101, 102, 103, 104, 105, 106, 107, 108, 109],
-            'High': [102, 103, 104, 105, 106, 107, 108, 109, 110, 111],
-            'Low': [99, 100, 101, 102, 103, 104, 105, 106, 107, 108],
-            'Close': [101, 102, 103, 104, 105, 106, 107, 108, 109, 110]
-        })
+    @staticmethod
+    def bars(close):
+        return pd.DataFrame({'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close})
 
-    def test_strategy1_buy_signal(self):
-        # Manipulate data to create a buy signal scenario
-        # EMA_9 > SMA_21, VORTEX_P > VORTEX_N, MACD > MACD_S
-        self.data['EMA_9'] = [100, 101, 102, 103, 104, 105, 106, 107, 108, 109.5]
-        self.data['SMA_21'] = [99, 100, 101, 102, 103, 104, 105, 106, 107, 108.5]
-        self.data['VORTEX_P'] = [0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 1.4]
-        self.data['VORTEX_N'] = [0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3]
-        self.data['MACD'] = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
-        self.data['MACD_S'] = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
-        self.data['PSAR_long'] = [98, 99, 100, 101, 102, 103, 104, 105, 106, 107]
-        self.data['PSAR_short'] = [103, 104, 105, 106, 107, 108, 109, 110, 111, 112]
+    @classmethod
+    def trend(cls, step, base_bars=30, trend_bars=40):
+        # A flat base and then a steady trend: every indicator of strategy1 agrees on the
+        # direction once the trend is under way. The 1% target closes each trade on the
+        # next bar, so entries fall on every other bar and the last one is an entry.
+        return cls.bars(100 + step * np.r_[np.zeros(base_bars), np.arange(1, trend_bars + 1)])
 
-        result = strategy1(self.data.copy())
-        self.assertEqual(result['signal'].iloc[-1], 1)
-        self.assertAlmostEqual(result['entry_price'].iloc[-1], self.data['Close'].iloc[-1])
-        self.assertAlmostEqual(result['target_price'].iloc[-1], self.data['Close'].iloc[-1] * 1.01)
-        self.assertAlmostEqual(result['stop_loss'].iloc[-1], self.data['PSAR_long'].iloc[-1])
+    def test_strategy1_buy_signal(self):
+        data = self.trend(1.0)
+        result = strategy1(data.copy())
+        last = result.iloc[-1]
+        self.assertGreater(last['EMA_9'], last['SMA_21'])
+        self.assertGreater(last['VORTEX_P'], last['VORTEX_N'])
+        self.assertGreater(last['MACD'], last['MACD_S'])
+        self.assertEqual(last['signal'], 1)
+        self.assertEqual(last['position'], 1)
+        self.assertAlmostEqual(last['entry_price'], data['Close'].iloc[-1])
+        self.assertAlmostEqual(last['target_price'], data['Close'].iloc[-1] * 1.01)
+        self.assertAlmostEqual(last['stop_loss'], last['PSAR_long'])
+        self.assertLess(last['stop_loss'], data['Low'].iloc[-1])
 
     def test_strategy1_sell_signal(self):
-        # Manipulate data to create a sell signal scenario
-        # EMA_9 < SMA_21, VORTEX_N > VORTEX_P, MACD < MACD_S
-        self.data['EMA_9'] = [100, 101, 102, 103, 104, 105, 106, 107, 108, 107.5]
-        self.data['SMA_21'] = [101, 102, 103, 104, 105, 106, 107, 108, 109, 108.5]
-        self.data['VORTEX_P'] = [0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 1.3]
-        self.data['VORTEX_N'] = [0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 1.4, 1.4]
-        self.data['MACD'] = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.8]
-        self.data['MACD_S'] = [0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 0.9]
-        self.data['PSAR_long'] = [98, 99, 100, 101, 102, 103, 104, 105, 106, 107]
-        self.data['PSAR_short'] = [103, 104, 105, 106, 107, 108, 109, 110, 111, 112]
-
-        result = strategy1(self.data.copy())
-        self.assertEqual(result['signal'].iloc[-1], -1)
-        self.assertAlmostEqual(result['entry_price'].iloc[-1], self.data['Close'].iloc[-1])
-        self.assertAlmostEqual(result['target_price'].iloc[-1], self.data['Close'].iloc[-1] * 0.99)
-        self.assertAlmostEqual(result['stop_loss'].iloc[-1], self.data['PSAR_short'].iloc[-1])
+        data = self.trend(-1.0)
+        result = strategy1(data.copy())
+        last = result.iloc[-1]
+        self.assertLess(last['EMA_9'], last['SMA_21'])
+        self.assertGreater(last['VORTEX_N'], last['VORTEX_P'])
+        self.assertLess(last['MACD'], last['MACD_S'])
+        self.assertEqual(last['signal'], -1)
+        self.assertEqual(last['position'], -1)
+        self.assertAlmostEqual(last['entry_price'], data['Close'].iloc[-1])
+        self.assertAlmostEqual(last['target_price'], data['Close'].iloc[-1] * 0.99)
+        self.assertAlmostEqual(last['stop_loss'], last['PSAR_short'])
+        self.assertGreater(last['stop_loss'], data['High'].iloc[-1])
 
     def test_strategy1_no_signal(self):
-        # Data with no clear signal
-        self.data['EMA_9'] = [100, 101, 102, 103, 104, 105, 106, 107, 108, 108]
-        self.data['SMA_21'] = [100, 101, 102, 103, 104, 105, 106, 107, 108, 108]
-        self.data['VORTEX_P'] = [0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 1.3]
-        self.data['VORTEX_N'] = [0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 1.3]
-        self.data['MACD'] = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.9]
-        self.data['MACD_S'] = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.9]
-        self.data['PSAR_long'] = [98, 99, 100, 101, 102, 103, 104, 105, 106, 107]
-        self.data['PSAR_short'] = [103, 104, 105, 106, 107, 108, 109, 110, 111, 112]
+        # A rally followed by a four-bar pullback: the averages and the vortex still point
+        # up, but MACD has crossed below its signal line, so neither side has all three
+        rally = np.r_[np.zeros(30), np.arange(1, 31)]
+        data = self.bars(100 + np.r_[rally, rally[-1] - np.arange(1, 5)])
+        result = strategy1(data.copy())
+        last = result.iloc[-1]
+        self.assertFalse(result[['EMA_9', 'SMA_21', 'VORTEX_P', 'VORTEX_N', 'MACD', 'MACD_S']].iloc[-1].isna().any())
+        self.assertGreater(last['EMA_9'], last['SMA_21'])
+        self.assertGreater(last['VORTEX_P'], last['VORTEX_N'])
+        self.assertLess(last['MACD'], last['MACD_S'])
+        self.assertEqual(last['signal'], 0)
+        self.assertEqual(last['position'], 0)
+
+    def test_strategy1_stream_matches_batch(self):
+        rng = np.random.default_rng(0)
+        close = 20000 + np.cumsum(rng.normal(0, 10, 500))
+        data = pd.DataFrame({
+            'Open': close + rng.normal(0, 3, 500),
+            'High': close + rng.uniform(0, 15, 500),
+            'Low': close - rng.uniform(0, 15, 500),
+            'Close': close
+        })
+        batch = strategy1(data.copy())
+
+        stream = Strategy1Stream()
+        stream.seed(data.iloc[:300])
+        rows = [stream.update(*bar) for bar in data.iloc[300:][['Open', 'High', 'Low', 'Close']].itertuples(index=False)]
+        streamed = pd.DataFrame(rows, index=data.index[300:])
 
-        result = strategy1(self.data.copy())
-        self.assertEqual(result['signal'].iloc[-1], 0)
+        tail = batch.iloc[300:]
+        for column in ['signal', 'position']:
+            np.testing.assert_array_equal(streamed[column], tail[column])
+        for column in ['EMA_9', 'SMA_21', 'VORTEX_P', 'VORTEX_N', 'MACD', 'MACD_S', 'PSAR_long', 'PSAR_short', 'stop_loss', 'target_price']:
+            np.testing.assert_allclose(streamed[column], tail[column], rtol=1e-10, err_msg=column)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,94 @@
+# tests/test_streaming.py
+
+import importlib.util
+import unittest
+import pandas as pd
+import numpy as np
+from market_analysis_app.indicators.streaming import RollingMax, RollingMin, Ichimoku, CandlePatterns
+
+def random_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 1, n)
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + rng.uniform(0, 1, n),
+        'Low': np.minimum(open_, close) - rng.uniform(0, 2, n),
+        'Close': close
+    })
+
+class TestStreamingIndicators(unittest.TestCase):
+
+    def test_rolling_extremes_match_pandas(self):
+        values = pd.Series(np.random.default_rng(1).normal(0, 1, 500))
+        high, low = RollingMax(26), RollingMin(26)
+        np.testing.assert_array_equal([high.update(v) for v in values], values.rolling(26).max())
+        np.testing.assert_array_equal([low.update(v) for v in values], values.rolling(26).min())
+
+    def test_ichimoku_matches_midprice_definition(self):
+        data = random_bars(300)
+        ichimoku = Ichimoku()
+        rows = pd.DataFrame([ichimoku.update(h, l) for h, l in zip(data['High'], data['Low'])])
+
+        def midprice(length):
+            return 0.5 * (data['Low'].rolling(length).min() + data['High'].rolling(length).max())
+
+        span_a = 0.5 * (midprice(9) + midprice(26))
+        np.testing.assert_array_equal(rows['ITS_9'], midprice(9))
+        np.testing.assert_array_equal(rows['IKS_26'], midprice(26))
+        np.testing.assert_array_equal(rows['ISA_9'], span_a.shift(25))
+        np.testing.assert_array_equal(rows['ISB_26'], midprice(52).shift(25))
+        np.testing.assert_array_equal(ichimoku.span_a_ahead, span_a.iloc[-25:])
+
+    @unittest.skipUnless(importlib.util.find_spec('talib'), 'TA-Lib is not installed')
+    def test_candle_patterns_match_talib(self):
+        import talib
+        data = random_bars(1000, seed=2)
+        candles = CandlePatterns()
+        rows = pd.DataFrame([candles.update(*bar) for bar in data.itertuples(index=False)])
+        args = (data['Open'], data['High'], data['Low'], data['Close'])
+        np.testing.assert_array_equal(rows['CDL_ENGULFING'], talib.CDLENGULFING(*args))
+        np.testing.assert_array_equal(rows['CDL_HAMMER'], talib.CDLHAMMER(*args))
+
+    def test_strategy3_stream_matches_batch(self):
+        from market_analysis_app.strategies.strategy3 import strategy3, Strategy3Stream
+        data = random_bars(600, seed=3)
+        batch = strategy3(data.copy())
+
+        stream = Strategy3Stream()
+        settled = []
+        for bar in data.itertuples(index=False):
+            last = stream.update(*bar)
+            if stream.settled is not None:
+                settled.append(stream.settled)
+        settled = pd.DataFrame(settled)
+
+        for column in ['ISA_9', 'ISB_26', 'ICS_26', 'signal', 'position', 'entry_price', 'stop_loss', 'target_price']:
+            np.testing.assert_array_equal(settled[column], batch[column].iloc[:len(settled)], err_msg=column)
+            np.testing.assert_array_equal(last[column], batch[column].iloc[-1], err_msg=column)
+
+    def test_strategy3_latest_row_matches_batch_while_trades_are_open(self):
+        from market_analysis_app.strategies.strategy3 import strategy3, Strategy3Stream
+        # Calm bars, so trades survive the pending rows or are closed by one of them
+        rng = np.random.default_rng(0)
+        close = 1000 + np.cumsum(rng.normal(0, 1.5, 500))
+        open_ = close + rng.normal(0, 1, 500)
+        data = pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) + rng.uniform(0, 1, 500),
+                             'Low': np.minimum(open_, close) - rng.uniform(0, 1, 500), 'Close': close})
+
+        stream = Strategy3Stream()
+        carried = closed = 0
+        for end, bar in enumerate(data.itertuples(index=False), start=1):
+            last = stream.update(*bar)
+            if stream.exits.position == 0 and end % 25:
+                continue
+            expected = strategy3(data.iloc[:end].copy()).iloc[-1]
+            for column in ['signal', 'position', 'entry_price', 'stop_loss', 'target_price']:
+                np.testing.assert_array_equal(last[column], expected[column], err_msg=f'{column} at bar {end}')
+            carried += last['position'] != 0
+            closed += stream.exits.position != 0 and last['position'] == 0
+        self.assertGreater(carried, 0)
+        self.assertGreater(closed, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+# tests/test_ticks.py
+
+import asyncio
+import datetime
+import os
+import tempfile
+import threading
+import time
+import unittest
+from kiteconnect import KiteTicker
+from market_analysis_app.ticks import bus as topics
+from market_analysis_app.ticks.bus import EventBus
+from market_analysis_app.ticks.codec import encode_ticks, split_packets, join_packets
+from market_analysis_app.ticks.ingest import TickIngestor
+from market_analysis_app.ticks.options import AtmOptionFeed
+from market_analysis_app.ticks.replay import ReplayServer, TickRecorder, read_recording
+from tests.test_instruments import index_master
+
+# NFO tokens carry segment 2 in their low byte
+NIFTY, OPTION, OTHER = 256265, (48215 << 8) | 2, (48216 << 8) | 2
+
+def index_tick(token, price, mode='full'):
+    return {
+        'instrument_token': token, 'mode': mode, 'last_price': price,
+        'ohlc': {'open': 22000.0, 'high': 22100.5, 'low': 21950.25, 'close': 22010.0},
+        'exchange_timestamp': datetime.datetime(2024, 1, 2, 9, 30, 5),
+    }
+
+def option_tick(token, price):
+    return {
+        'instrument_token': token, 'mode': 'full', 'last_price': price, 'last_traded_quantity': 50,
+        'average_traded_price': 101.35, 'volume_traded': 123450, 'total_buy_quantity': 9000,
+        'total_sell_quantity': 8000, 'ohlc': {'open': 95.0, 'high': 110.0, 'low': 90.05, 'close': 98.0},
+        'last_trade_time': datetime.datetime(2024, 1, 2, 9, 30, 4), 'oi': 1500000,
+        'oi_day_high': 1600000, 'oi_day_low': 1400000, 'exchange_timestamp': datetime.datetime(2024, 1, 2, 9, 30, 5),
+        'depth': {
+            'buy': [{'quantity': 50 * i, 'price': price - 0.05 * i, 'orders': i} for i in range(1, 6)],
+            'sell': [{'quantity': 75 * i, 'price': price + 0.05 * i, 'orders': i} for i in range(1, 6)],
+        },
+    }
+
+class TestCodec(unittest.TestCase):
+
+    def test_round_trip_through_kiteticker_parser(self):
+        parser = KiteTicker('key', 'token')
+        ticks = [
+            index_tick(NIFTY, 22050.45), index_tick(NIFTY, 21990.1, mode='quote'),
+            {'instrument_token': OPTION, 'mode': 'ltp', 'last_price': 101.4}, option_tick(OPTION, 102.25),
+        ]
+        parsed = parser._parse_binary(encode_ticks(ticks))
+        self.assertEqual([tick['mode'] for tick in parsed], ['full', 'quote', 'ltp', 'full'])
+        self.assertEqual(parsed[0]['ohlc'], ticks[0]['ohlc'])
+        self.assertEqual(parsed[0]['exchange_timestamp'], ticks[0]['exchange_timestamp'])
+        self.assertAlmostEqual(parsed[2]['last_price'], 101.4)
+        for key in ['last_price', 'volume_traded', 'oi', 'last_trade_time', 'ohlc', 'depth']:
+            self.assertEqual(parsed[3][key], ticks[3][key], msg=key)
+
+    def test_split_and_join(self):
+        message = encode_ticks([index_tick(NIFTY, 1.0), option_tick(OPTION, 2.0)])
+        packets = split_packets(message)
+        self.assertEqual([len(packet) for packet in packets], [32, 184])
+        self.assertEqual(join_packets(packets), message)
+        self.assertEqual(split_packets(b'\x00'), [])
+
+class TestEventBus(unittest.TestCase):
+
+    def test_callbacks_and_unsubscribe(self):
+        bus = EventBus()
+        seen = []
+        unsubscribe = bus.subscribe('topic', seen.append)
+        bus.publish('topic', 1)
+        unsubscribe()
+        bus.publish('topic', 2)
+        self.assertEqual(seen, [1])
+
+    def test_queue_receives_from_other_threads_and_drops_oldest(self):
+        bus = EventBus()
+
+        async def consume():
+            queue = bus.subscribe_queue('topic', maxsize=3)
+            thread = threading.Thread(target=lambda: [bus.publish('topic', i) for i in range(5)])
+            thread.start()
+            thread.join()
+            await asyncio.sleep(0.05)
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        self.assertEqual(asyncio.run(consume()), [2, 3, 4])
+        self.assertEqual(bus.stats['topic.dropped'], 2)
+
+class TestAtmOptionFeed(unittest.TestCase):
+
+    class Ingestor:
+        def __init__(self):
+            self.tokens = set()
+            self.calls = []
+
+        def subscribe(self, tokens):
+            self.calls.append(('subscribe', sorted(tokens)))
+            self.tokens.update(tokens)
+
+        def unsubscribe(self, tokens):
+            self.calls.append(('unsubscribe', sorted(tokens)))
+            self.tokens.difference_update(tokens)
+
+    def test_subscriptions_follow_the_atm_strike(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        master = index_master(directory.name)
+        ingestor, bus = self.Ingestor(), EventBus()
+        feed = AtmOptionFeed(ingestor, master, {NIFTY: 'NIFTY'}, width=1)
+        feed.attach(bus)
+
+        def strikes():
+            return sorted((master.instrument(token).strike, master.instrument(token).instrument_type) for token in ingestor.tokens)
+
+        bus.publish(topics.TICKS, [option_tick(OPTION, 100.0), index_tick(NIFTY, 100.5), index_tick(NIFTY, 101.0)])
+        self.assertEqual(strikes(), [(95.0, 'CE'), (95.0, 'PE'), (100.0, 'CE'), (100.0, 'PE'), (105.0, 'CE'), (105.0, 'PE')])
+        self.assertEqual({master.instrument(token).expiry for token in ingestor.tokens}, {datetime.date(2024, 1, 4)})
+        # Within the same strike nothing is re-sent; a move of one strike swaps one pair
+        bus.publish(topics.TICKS, [index_tick(NIFTY, 102.0)])
+        self.assertEqual(len(ingestor.calls), 1)
+        bus.publish(topics.TICKS, [index_tick(NIFTY, 104.0)])
+        self.assertEqual(strikes()[-2:], [(110.0, 'CE'), (110.0, 'PE')])
+        self.assertEqual([call[0] for call in ingestor.calls], ['subscribe', 'unsubscribe', 'subscribe'])
+        self.assertEqual(len(ingestor.calls[1][1]), 2)
+        self.assertEqual(feed.tokens(), ingestor.tokens)
+        # Without listed options for the index nothing is subscribed
+        self.assertFalse(AtmOptionFeed(self.Ingestor(), master, {NIFTY: 'FINNIFTY'}).update('FINNIFTY', 100.0))
+
+
+class TestReplayIngestion(unittest.TestCase):
+
+    def test_recording_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ticks.bin')
+            with TickRecorder(path) as recorder:
+                recorder.write(b'\x00\x01ab', received_at=1.5)
+                recorder.on_message(None, b'\x00', True)  # heartbeat, not recorded
+                recorder.write(b'\x00\x02cd', received_at=2.5)
+            self.assertEqual(list(read_recording(path)), [(1.5, b'\x00\x01ab'), (2.5, b'\x00\x02cd')])
+
+    def test_ingestion_resubscribes_after_reconnect(self):
+        # Twisted's reactor cannot be restarted, so this is the only test that connects a KiteTicker
+        messages = [
+            (i * 0.01, encode_ticks([index_tick(NIFTY, 22000 + i), option_tick(OPTION, 100 + i), option_tick(OTHER, 1.0)]))
+            for i in range(400)
+        ]
+        bus = EventBus()
+        connects = []
+        bus.subscribe(topics.CONNECTED, connects.append)
+
+        async def scenario():
+            server = await ReplayServer(messages, speed=1.0).start()
+            ticks = bus.subscribe_queue(topics.TICKS)
+            ingestor = TickIngestor('key', 'token', bus, root=server.url, reconnect_max_delay=5)
+            ingestor.subscribe([NIFTY, OPTION])
+            ingestor.start()
+
+            received, after_reconnect = [], []
+            deadline = time.monotonic() + 20
+            while not server.finished.is_set() and time.monotonic() < deadline:
+                try:
+                    batch = await asyncio.wait_for(ticks.get(), 0.5)
+                except asyncio.TimeoutError:
+                    continue
+                (after_reconnect if len(connects) > 1 else received).extend(batch)
+                if len(received) >= 100 and len(connects) == 1 and server.clients:
+                    await server.drop_connections()
+            ingestor.stop()
+            await server.stop()
+            return received, after_reconnect
+
+        received, after_reconnect = asyncio.run(scenario())
+        self.assertEqual(len(connects), 2)
+        self.assertTrue(after_reconnect)
+        self.assertEqual({tick['instrument_token'] for tick in received + after_reconnect}, {NIFTY, OPTION})
+
+if __name__ == '__main__':
+    unittest.main()
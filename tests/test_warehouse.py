@@ -0,0 +1,86 @@
+# tests/test_warehouse.py
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from market_analysis_app.data.warehouse import Warehouse
+from tests.test_backtest import session_bars
+
+class TestWarehouse(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.warehouse = Warehouse(self.tmp.name)
+        # 45 sessions span three monthly partitions
+        self.bars = session_bars(45, seed=1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_partitions_and_round_trip(self):
+        self.warehouse.append('^NSEI', '5m', self.bars)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp.name, '5m', '_NSEI'))), ['2024-01.npy', '2024-02.npy', '2024-03.npy'])
+        index = self.warehouse.read_index('5m')['^NSEI']
+        self.assertEqual(sum(entry[2] for entry in index.values()), len(self.bars))
+        loaded = Warehouse(self.tmp.name).load(['^NSEI', 'MISSING'])
+        self.assertIsNone(loaded['MISSING'])
+        pd.testing.assert_frame_equal(loaded['^NSEI'], self.bars, check_freq=False, check_index_type=False)
+        self.assertEqual(self.warehouse.coverage('^NSEI', '5m'), (self.bars.index[0], self.bars.index[-1]))
+
+    def test_query_range_and_lookback(self):
+        self.warehouse.append('^NSEI', '5m', self.bars)
+        frame = self.warehouse.load('^NSEI', '2024-02-01', '2024-02-06 10:00')['^NSEI']
+        expected = self.bars[(self.bars.index >= '2024-02-01') & (self.bars.index < '2024-02-06 10:00')]
+        pd.testing.assert_frame_equal(frame, expected, check_freq=False, check_index_type=False)
+
+        # The lookback crosses back into January's partition
+        frame = self.warehouse.frame('^NSEI', '5m', '2024-02-01', '2024-02-02', lookback=100)
+        first = self.bars.index.searchsorted(pd.Timestamp('2024-02-01', tz='Asia/Kolkata'))
+        pd.testing.assert_frame_equal(frame, self.bars.iloc[first - 100:first + 75], check_freq=False, check_index_type=False)
+
+        views = self.warehouse.arrays('^NSEI', '5m', '2024-02-01', '2024-02-02')
+        self.assertEqual(len(views), 1)
+        self.assertIsInstance(views[0].base, np.memmap)
+
+    def test_incremental_append_and_overwrite(self):
+        first_half, second_half = self.bars.iloc[:1500], self.bars.iloc[1500:]
+        self.warehouse.append('^NSEI', '5m', first_half)
+        # The next session's update refetches the last stored bar, which may have been forming
+        revised = second_half.copy()
+        overlap = first_half.iloc[-1:].copy()
+        overlap['Close'] += 1
+        self.warehouse.append('^NSEI', '5m', pd.concat([overlap, revised]))
+        loaded = self.warehouse.load('^NSEI')['^NSEI']
+        self.assertEqual(len(loaded), len(self.bars))
+        self.assertEqual(loaded['Close'].iloc[1499], self.bars['Close'].iloc[1499] + 1)
+        pd.testing.assert_frame_equal(loaded.iloc[1500:], second_half, check_freq=False, check_index_type=False)
+
+        # Older bars inserted into the middle of a partition keep it sorted
+        self.warehouse.append('^NSEI', '5m', self.bars.iloc[100:110].assign(Volume=-1.0))
+        loaded = self.warehouse.load('^NSEI')['^NSEI']
+        self.assertTrue(loaded.index.is_monotonic_increasing)
+        self.assertEqual((loaded['Volume'] == -1).sum(), 10)
+
+    def test_backfill_resumes_in_windows(self):
+        calls = []
+
+        def fetch(symbols, interval, start, end):
+            calls.append((tuple(symbols), start, end))
+            return {symbol: self.bars[(self.bars.index >= start) & (self.bars.index < end)] for symbol in symbols}
+
+        end = pd.Timestamp('2024-03-01', tz='Asia/Kolkata')
+        stored = self.warehouse.backfill(['A', 'B'], '1m', start='2024-01-01', end=end, fetch=fetch)
+        # 1m requests are limited to 7 days each
+        self.assertTrue(all(window_end - window_start <= pd.Timedelta(days=7) for _, window_start, window_end in calls))
+        self.assertEqual(stored['A'], (self.bars.index < end).sum())
+
+        calls.clear()
+        self.warehouse.backfill(['A'], '1m', end='2024-03-08', fetch=fetch)
+        _, resumed_from, _ = calls[0]
+        self.assertEqual(resumed_from, self.bars.index[self.bars.index < end][-1])
+        self.assertEqual(self.warehouse.coverage('A', '1m')[1], self.bars.index[-1])
+
+if __name__ == '__main__':
+    unittest.main()